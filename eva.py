@@ -16,6 +16,7 @@
 import asyncio
 
 from src.server.server import start_server
+from src.server.supervisor import start_server_workers
 
 from src.configuration.configuration_manager import ConfigurationManager
 
@@ -33,11 +34,21 @@ def eva():
     hostname = config.get_value('server', 'hostname')
     port = config.get_value('server', 'port')
     socket_timeout = config.get_value('server', 'socket_timeout')    
+    workers = config.get_value('server', 'workers')
     loop = asyncio.new_event_loop()
     stop_server_future = loop.create_future()
 
     # Launch server
     try:
+        if workers is not None and workers > 1:
+            start_server_workers(host=hostname,
+                                 port=port,
+                                 loop=loop,
+                                 socket_timeout=socket_timeout,
+                                 stop_server_future=stop_server_future,
+                                 workers=workers)
+            return
+
         asyncio.run(start_server(host=hostname,
                                  port=port,
                                  loop=loop,
@@ -0,0 +1,93 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================
+# GOAL : Compare the memory and the filtering time of detections held as
+#        Prediction objects and as a columnar DetectionBatch
+# ==============================================
+#
+# Usage (from the eva directory):
+#   PYTHONPATH=./ python script/benchmark/detection_benchmark.py
+#   PYTHONPATH=./ python script/benchmark/detection_benchmark.py \
+#       --frames 64 --detections 50
+
+import argparse
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
+from src.models.inference.detection_batch import DetectionBatch
+from src.models.storage.batch import FrameBatch
+from src.udfs.fastrcnn_object_detector import FastRCNNObjectDetector
+
+
+def traced_size(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=32)
+    parser.add_argument('--detections', type=int, default=50,
+                        help='detections per frame')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    # the labels property does not need the model
+    labels = FastRCNNObjectDetector.labels.fget(None)
+    random = np.random.RandomState(0)
+    batch = FrameBatch.from_numpy(
+        np.arange(args.frames), np.zeros((args.frames, 1, 1, 3), np.uint8),
+        None)
+
+    def build_columnar():
+        return DetectionBatch.from_frames(
+            batch,
+            [random.randint(1, len(labels), args.detections)
+             for _ in range(args.frames)],
+            [random.rand(args.detections).astype(np.float32)
+             for _ in range(args.frames)],
+            labels,
+            boxes=[(random.rand(args.detections, 4) * 640).astype(np.float32)
+                   for _ in range(args.frames)])
+
+    detections, columnar_size = traced_size(build_columnar)
+    predictions, prediction_size = traced_size(detections.tolist)
+    total = args.frames * args.detections
+    print('%d frames, %d detections' % (args.frames, total))
+    print('%-12s %14s %16s' % ('', 'bytes/detection', 'filter ms/batch'))
+
+    for name, outcome, size in (('Prediction', predictions, prediction_size),
+                                ('columnar', detections, columnar_size)):
+        predicate = ComparisonExpression(
+            ExpressionType.COMPARE_EQUAL,
+            FunctionExpression(lambda frames, outcome=outcome: outcome),
+            ConstantValueExpression('car'))
+        seconds = min(timeit.repeat(lambda: predicate.evaluate(batch),
+                                    number=1, repeat=args.runs))
+        print('%-12s %14.1f %16.3f' % (name, size / total, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# ==============================================
+# GOAL : Measure the per row cost of predicate evaluation
+# ==============================================
+#
+# Usage (from the eva directory):
+#   PYTHONPATH=./ python script/benchmark/expression_benchmark.py
+
+import argparse
+import timeit
+
+import numpy as np
+
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
+from src.expression.logical_expression import LogicalExpression
+
+
+def row_wise_predicate(left_values, right_value, upper_value):
+    """Reference implementation of `x > right AND x < upper` evaluated one
+    row at a time, the way the expressions used to work."""
+    greater = []
+    for value in left_values:
+        greater.append(value > right_value)
+    lesser = []
+    for value in left_values:
+        lesser.append(value < upper_value)
+    outcome = []
+    for value_left, value_right in zip(greater, lesser):
+        outcome.append(value_left and value_right)
+    required_frame_ids = []
+    for i, value in enumerate(outcome):
+        if value:
+            required_frame_ids.append(i)
+    return required_frame_ids
+
+
+def vectorized_predicate(column_size):
+    column = FunctionExpression(lambda x: x)
+    greater = ComparisonExpression(ExpressionType.COMPARE_GREATER,
+                                   column,
+                                   ConstantValueExpression(column_size // 4))
+    lesser = ComparisonExpression(ExpressionType.COMPARE_LESSER,
+                                  column,
+                                  ConstantValueExpression(column_size // 2))
+    return LogicalExpression(ExpressionType.LOGICAL_AND, greater, lesser)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print('%10s %18s %18s' % ('rows', 'row-wise ns/row', 'vectorized ns/row'))
+    for rows in [100, 1000, 10000, 100000]:
+        values = np.arange(rows)
+        values_list = values.tolist()
+        predicate = vectorized_predicate(rows)
+
+        row_wise = min(timeit.repeat(
+            lambda: row_wise_predicate(values_list, rows // 4, rows // 2),
+            number=1, repeat=args.repeat))
+        vectorized = min(timeit.repeat(
+            lambda: np.flatnonzero(predicate.evaluate(values)),
+            number=1, repeat=args.repeat))
+
+        print('%10d %18.1f %18.1f' % (rows,
+                                      row_wise * 1e9 / rows,
+                                      vectorized * 1e9 / rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================
+# GOAL : Measure the frames per second FastRCNNObjectDetector classifies
+#        for every batch size, against the former per frame preprocessing
+#        with autograd enabled
+# ==============================================
+#
+# Usage (from the eva directory):
+#   PYTHONPATH=./ python script/benchmark/fastrcnn_benchmark.py
+#   PYTHONPATH=./ python script/benchmark/fastrcnn_benchmark.py \
+#       --batch-sizes 1,4,8 --threads 4 --video data/ua_detrac/ua_detrac.mp4
+#
+# Needs torch and torchvision, the model weights are downloaded on first use.
+# Without --video the frames are random noise of --height x --width.
+
+import argparse
+import time
+
+import numpy as np
+
+from src.models.storage.batch import FrameBatch
+from src.udfs.fastrcnn_object_detector import FastRCNNObjectDetector
+
+
+def load_frames(args) -> np.ndarray:
+    if args.video is None:
+        random = np.random.RandomState(0)
+        return random.randint(0, 256, (args.frames, args.height, args.width,
+                                       3), dtype=np.uint8)
+
+    import cv2
+    capture = cv2.VideoCapture(args.video)
+    frames = []
+    while len(frames) < args.frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    capture.release()
+    if not frames:
+        raise RuntimeError('No frames read from ' + args.video)
+    return np.stack(frames)
+
+
+def legacy_predictions(detector, frames):
+    """The former path: a Compose per call, one ToTensor per frame and
+    autograd enabled"""
+    from torchvision import transforms
+    transform = transforms.Compose([transforms.ToTensor()])
+    images = [transform(frame) for frame in frames]
+    return detector.model(images)
+
+
+def frames_per_second(classify, frames, batch_size, runs):
+    batches = [frames[start:start + batch_size]
+               for start in range(0, len(frames), batch_size)]
+    # first batch warms up the allocator and the thread pool
+    classify(batches[0])
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for batch in batches:
+            classify(batch)
+        timings.append(time.perf_counter() - start)
+    return len(frames) / min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch-sizes', default='1,2,4,8')
+    parser.add_argument('--frames', type=int, default=16)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--video', default=None)
+    parser.add_argument('--threads', type=int, default=0,
+                        help='intra op threads of torch, 0 keeps the default')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    detector = FastRCNNObjectDetector()
+    frames = load_frames(args)
+    print('%d frames of %s, %d torch threads'
+          % (len(frames), frames.shape[1:], torch.get_num_threads()))
+
+    def classify(batch):
+        detector.classify(FrameBatch.from_numpy(
+            np.arange(len(batch)), batch, None))
+
+    def legacy(batch):
+        predictions = legacy_predictions(detector, batch)
+        for prediction in predictions:
+            prediction['boxes'].detach().numpy()
+
+    print('%10s %12s %12s' % ('batch size', 'fps', 'legacy fps'))
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        fps = frames_per_second(classify, frames, batch_size, args.runs)
+        legacy_fps = float('nan') if args.skip_legacy else \
+            frames_per_second(legacy, frames, batch_size, args.runs)
+        print('%10d %12.2f %12.2f' % (batch_size, fps, legacy_fps))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================
+# GOAL : Measure the latency and the throughput of a running server under
+#        concurrent clients, to size hardware and catch regressions in the
+#        server and the executor
+# ==============================================
+#
+# Usage (from the eva directory, with the server running):
+#   PYTHONPATH=./ python script/benchmark/load_benchmark.py workload.jsonl \
+#       --clients 8 --concurrency 16 --repeat 10
+#   PYTHONPATH=./ python script/benchmark/load_benchmark.py workload.jsonl \
+#       --clients 8 --rate 50 --duration 60 --report report.json
+#
+# The workload has one JSON object per line, the statements in its `query`
+# field and optionally a `name` to group the latencies by, e.g.
+#   {"name": "scan", "query": "SELECT id FROM MyVideo WHERE id < 100;"}
+# Without --rate the clients keep --concurrency queries in flight, with it
+# they start --rate queries a second whether or not they were answered.
+
+import argparse
+import asyncio
+import json
+
+from src.configuration.configuration_manager import ConfigurationManager
+from src.server.client import start_clients
+from src.server.load_generator import LoadGenerator, load_workload, \
+    write_report
+
+
+def main():
+    config = ConfigurationManager()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('workload', help='JSON lines file of queries')
+    parser.add_argument('--host', default=config.get_value('server', 'host'))
+    parser.add_argument('--port', type=int,
+                        default=config.get_value('server', 'port'))
+    parser.add_argument('--clients', type=int, default=4,
+                        help='connections to the server')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='queries in flight, without --rate')
+    parser.add_argument('--rate', type=float,
+                        help='queries started a second')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='times the workload is replayed')
+    parser.add_argument('--duration', type=float,
+                        help='seconds to replay the workload for, '
+                             'instead of --repeat')
+    parser.add_argument('--frames', action='store_true',
+                        help='receive the pixel data of the results')
+    parser.add_argument('--timeout', type=float, default=600,
+                        help='seconds to wait for an answer')
+    parser.add_argument('--report', help='file to write the JSON report to')
+    args = parser.parse_args()
+
+    generator = LoadGenerator(load_workload(args.workload),
+                              clients=args.clients,
+                              concurrency=args.concurrency,
+                              rate=args.rate,
+                              repeat=args.repeat,
+                              duration=args.duration,
+                              include_frames=args.frames,
+                              timeout=args.timeout)
+    loop = asyncio.new_event_loop()
+    summary = start_clients(args.clients, args.host, args.port, loop, None,
+                            handler=generator.drive)
+    report = generator.report(summary)
+
+    if args.report:
+        write_report(report, args.report)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    latency = report['latency']
+    print('%d queries answered, %d failed in %.1f s: %.1f queries/s, '
+          '%.1f frames/s' % (latency['count'], latency['errors'],
+                             report['elapsed_seconds'],
+                             report['throughput_qps'],
+                             report['frames_per_second']))
+    print('%-24s %8s %8s %10s %10s %10s' % ('query', 'count', 'errors',
+                                            'p50 ms', 'p95 ms', 'p99 ms'))
+    for name, histogram in report['latency_by_query'].items():
+        print('%-24s %8d %8d %10.1f %10.1f %10.1f' % (
+            name, histogram['count'], histogram['errors'],
+            histogram.get('p50_ms', 0), histogram.get('p95_ms', 0),
+            histogram.get('p99_ms', 0)))
+
+
+if __name__ == '__main__':
+    main()
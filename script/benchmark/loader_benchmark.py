@@ -0,0 +1,91 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# ==============================================
+# GOAL : Measure VideoLoader throughput with and without decode prefetching
+# ==============================================
+#
+# Usage (from the eva directory):
+#   PYTHONPATH=./ python script/benchmark/loader_benchmark.py
+#   PYTHONPATH=./ python script/benchmark/loader_benchmark.py \
+#       --video data/ua_detrac/ua_detrac.mp4 --inference-ms 20
+#
+# Without --video a clip is synthesized from the UA-DETRAC sample images in
+# test/data. --inference-ms simulates the per batch work of a model, which
+# is what prefetching overlaps the decoding with.
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.loaders.video_loader import VideoLoader
+
+SAMPLE_IMAGES = 'test/data/uadetrac/small-data/MVI_20011/*.jpg'
+
+
+def synthesize_video(path, num_frames):
+    images = [cv2.imread(image) for image in sorted(glob.glob(SAMPLE_IMAGES))]
+    height, width = images[0].shape[:2]
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'),
+                          25, (width, height))
+    for i in range(num_frames):
+        out.write(images[i % len(images)])
+    out.release()
+
+
+def measure_fps(video_path, batch_size, prefetch_depth, inference_ms,
+                skip_frames=0):
+    video_info = DataFrameMetadata('benchmark', video_path)
+    loader = VideoLoader(video_info, batch_size=batch_size,
+                         skip_frames=skip_frames,
+                         prefetch_depth=prefetch_depth)
+    num_frames = 0
+    start = time.perf_counter()
+    for batch in loader.load():
+        num_frames += batch.batch_size * max(skip_frames, 1)
+        if inference_ms:
+            time.sleep(inference_ms / 1000.0)
+    return num_frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--video', default=None)
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--inference-ms', type=float, default=10.0)
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--skip-frames', type=int, default=0)
+    args = parser.parse_args()
+
+    video_path = args.video
+    if video_path is None:
+        video_path = os.path.join(tempfile.mkdtemp(), 'benchmark.avi')
+        synthesize_video(video_path, args.frames)
+
+    print('%15s %12s' % ('prefetch depth', 'frames/s'))
+    for depth in args.depths:
+        fps = measure_fps(video_path, args.batch_size, depth,
+                          args.inference_ms, args.skip_frames)
+        print('%15d %12.1f' % (depth, fps))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================
+# GOAL : Measure the throughput of encoding and decoding result batches for
+#        the wire, with pickle and with the binary encoding
+# ==============================================
+#
+# Usage (from the eva directory):
+#   PYTHONPATH=./ python script/benchmark/serialization_benchmark.py
+#   PYTHONPATH=./ python script/benchmark/serialization_benchmark.py \
+#       --frames 16 --height 1080 --width 1920
+
+import argparse
+import pickle
+import timeit
+
+import numpy as np
+
+from src.models.inference.classifier_prediction import Prediction
+from src.models.storage.batch import FrameBatch
+from src.server.serialization import FrameEncoding, serialize_batch, \
+    deserialize_batch
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=16)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--detections', type=int, default=20,
+                        help='detections per frame')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    random = np.random.RandomState(0)
+    batch = FrameBatch.from_numpy(
+        np.arange(args.frames),
+        random.randint(0, 255, (args.frames, args.height, args.width, 3),
+                       dtype=np.uint8),
+        None)
+    batch.set_outcomes('detector', [
+        Prediction(None, ['car'] * args.detections,
+                   random.rand(args.detections).tolist())
+        for _ in range(args.frames)])
+
+    encodings = [
+        ('pickle', lambda: pickle.dumps(batch, pickle.HIGHEST_PROTOCOL),
+         pickle.loads),
+        ('raw', lambda: serialize_batch(batch, FrameEncoding.RAW),
+         deserialize_batch),
+        ('jpeg', lambda: serialize_batch(batch, FrameEncoding.JPEG),
+         deserialize_batch),
+        ('no frames', lambda: serialize_batch(batch, FrameEncoding.NONE),
+         deserialize_batch),
+    ]
+    pixels = batch.frames_as_numpy_array().nbytes
+    print('%d frames of %dx%d, %.1f MB of pixels' % (
+        args.frames, args.width, args.height, pixels / 1e6))
+    print('%-10s %10s %14s %14s' % ('', 'MB sent', 'encode MB/s',
+                                    'decode MB/s'))
+    for name, encode, decode in encodings:
+        payload = encode()
+        encode_seconds = min(timeit.repeat(encode, number=1,
+                                           repeat=args.runs))
+        decode_seconds = min(timeit.repeat(lambda: decode(payload),
+                                           number=1, repeat=args.runs))
+        print('%-10s %10.1f %14.0f %14.0f' % (
+            name, len(payload) / 1e6, pixels / 1e6 / encode_seconds,
+            pixels / 1e6 / decode_seconds))
+
+
+if __name__ == '__main__':
+    main()
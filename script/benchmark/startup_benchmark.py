@@ -0,0 +1,108 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# ==============================================
+# GOAL : Track how long `python eva.py` takes until it accepts connections,
+#        and which heavy stacks the query path loads at import time
+# ==============================================
+#
+# Usage (from the eva directory):
+#   PYTHONPATH=./ python script/benchmark/startup_benchmark.py
+#   PYTHONPATH=./ python script/benchmark/startup_benchmark.py --runs 10
+#
+# The server is started on the host and port configured in eva.yml, which
+# has to be free. Every import is measured in a fresh interpreter.
+
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from src.configuration.configuration_manager import ConfigurationManager
+
+# modules a query passes through from the server to the storage
+QUERY_PATH_MODULES = [
+    'src.server.server',
+    'src.catalog.catalog_manager',
+    'src.optimizer.statement_to_opr_convertor',
+    'src.optimizer.plan_generator',
+    'src.executor.plan_executor',
+]
+
+# stacks which should only be loaded by the queries needing them
+HEAVY_MODULES = ['pyspark', 'petastorm', 'pyarrow', 'pandas', 'cv2',
+                 'torch', 'torchvision']
+
+
+def time_to_listening(host, port, timeout):
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-W', 'ignore', 'eva.py'],
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError('eva.py exited with %d' % server.returncode)
+            try:
+                socket.create_connection((host, port), timeout=0.1).close()
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError('eva.py did not listen within %ds' % timeout)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def import_time(module):
+    code = ('import sys, time; start = time.perf_counter(); import %s; '
+            'print(time.perf_counter() - start); print(" ".join(m for m in %r '
+            'if m in sys.modules))' % (module, HEAVY_MODULES))
+    output = subprocess.run([sys.executable, '-W', 'ignore', '-c', code],
+                            check=True, stdout=subprocess.PIPE,
+                            env=dict(os.environ, PYTHONPATH=os.getcwd()),
+                            universal_newlines=True).stdout.splitlines()
+    return float(output[0]), output[1] if len(output) > 1 else ''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=int, default=60)
+    args = parser.parse_args()
+
+    config = ConfigurationManager()
+    host = config.get_value('server', 'host')
+    if host in (None, '0.0.0.0'):
+        host = '127.0.0.1'
+    port = config.get_value('server', 'port')
+
+    timings = [time_to_listening(host, port, args.timeout)
+               for _ in range(args.runs)]
+    print('time to listening: median %.3fs min %.3fs max %.3fs'
+          % (statistics.median(timings), min(timings), max(timings)))
+
+    for module in QUERY_PATH_MODULES:
+        seconds, loaded = import_time(module)
+        print('import %-45s %.3fs  loads: %s'
+              % (module, seconds, loaded or '-'))
+
+
+if __name__ == '__main__':
+    main()
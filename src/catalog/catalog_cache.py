@@ -0,0 +1,104 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from typing import Any, Callable, Hashable
+
+from src.utils.metrics import CACHE_LOOKUPS
+
+
+class CatalogCache(object):
+    """
+    In-process cache of catalog entries, so that binding a statement does
+    not go to the catalog database for every table, column and udf.
+
+    Entries are grouped by kind (e.g. dataset by name, udf by name). Every
+    write to the catalog invalidates the affected entries and bumps the
+    version of the cache. An entry loaded while the version changed is not
+    stored, so a load racing with a write cannot bring back stale entries.
+    Misses are never cached, entries created by other processes are found.
+    Writes of other processes are seen through the shared version of the
+    catalog, see `check_shared_version`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._shared_version = None
+        self._entries = {}
+
+    @property
+    def version(self) -> int:
+        """Number of invalidations so far"""
+        return self._version
+
+    def get(self, kind: str, key: Hashable,
+            load: Callable[[], Any]) -> Any:
+        """
+        Returns the cached entry, or loads and caches it
+
+        Arguments:
+            kind (str): kind of the entry
+            key (Hashable): key of the entry within its kind
+            load (Callable[[], Any]): loads the entry from the catalog,
+                                      returns None if there is none
+
+        Returns:
+            Any: the entry, None if there is none
+        """
+        with self._lock:
+            version = self._version
+            if (kind, key) in self._entries:
+                CACHE_LOOKUPS.labels('catalog', 'hit').inc()
+                return self._entries[(kind, key)]
+        CACHE_LOOKUPS.labels('catalog', 'miss').inc()
+        entry = load()
+        if entry is not None:
+            with self._lock:
+                if version == self._version:
+                    self._entries[(kind, key)] = entry
+        return entry
+
+    def check_shared_version(self, shared_version: int):
+        """
+        Drops all entries if the catalog was written since the last check,
+        by this or another process
+
+        Arguments:
+            shared_version (int): version of the catalog database
+        """
+        with self._lock:
+            if shared_version != self._shared_version:
+                if self._shared_version is not None:
+                    self._version += 1
+                    self._entries.clear()
+                self._shared_version = shared_version
+
+    def invalidate(self, kind: str, key: Hashable):
+        """
+        Drops an entry and bumps the version
+
+        Arguments:
+            kind (str): kind of the entry
+            key (Hashable): key of the entry within its kind
+        """
+        with self._lock:
+            self._version += 1
+            self._entries.pop((kind, key), None)
+
+    def clear(self):
+        """Drops all entries and bumps the version"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
@@ -15,12 +15,15 @@
 
 from typing import List, Tuple
 
+from src.catalog.catalog_cache import CatalogCache
 from src.catalog.column_type import ColumnType
 from src.catalog.models.base_model import init_db
 from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.models.df_metadata import DataFrameMetadata
 from src.catalog.models.udf import UdfMetadata
 from src.catalog.models.udf_io import UdfIO
+from src.catalog.services.catalog_version_service import \
+    CatalogVersionService
 from src.catalog.services.df_column_service import DatasetColumnService
 from src.catalog.services.df_service import DatasetService
 from src.catalog.services.udf_service import UdfService
@@ -29,10 +32,21 @@ from src.utils.logging_manager import LoggingLevel
 from src.utils.logging_manager import LoggingManager
 
 
+# kinds of the entries in the catalog cache
+_DATASET_BY_NAME = 'dataset_by_name'
+_DATASET_BY_ID = 'dataset_by_id'
+_UDF_BY_NAME = 'udf_by_name'
+_UDF_IO_BY_UDF_ID = 'udf_io_by_udf_id'
+
+
 class CatalogManager(object):
     _instance = None
     _catalog = None
     _catalog_dictionary = {}
+    # datasets with their columns and udfs with their io, shared by all
+    # statements bound in this process, dropped when another process writes
+    # to the catalog
+    _cache = CatalogCache()
 
     def __new__(cls):
         if cls._instance is None:
@@ -47,6 +61,7 @@ class CatalogManager(object):
         self._column_service = DatasetColumnService()
         self._udf_service = UdfService()
         self._udf_io_service = UdfIOService()
+        self._version_service = CatalogVersionService()
 
     def bootstrap_catalog(self):
         """Bootstraps catalog.
@@ -81,6 +96,9 @@ class CatalogManager(object):
             column.metadata_id = metadata.id
         column_list = self._column_service.create_column(column_list)
         metadata.schema = column_list
+        self._version_service.bump()
+        self._cache.invalidate(_DATASET_BY_NAME, name)
+        self._cache.invalidate(_DATASET_BY_ID, metadata.id)
         return metadata
 
     def get_table_bindings(self, database_name: str, table_name: str,
@@ -92,23 +110,30 @@ class CatalogManager(object):
             database_name: currently not in use
             table_name: the table that is being referred to
             column_names: the column names of the table for which
-           bindings are required
+           bindings are required, all of them are bound at once
 
         Returns:
-            returns metadata_id of table and a list of column ids
+            returns metadata_id of table and a list of column ids in the
+            order of column_names, None for names the table does not have
         """
 
-        metadata_id = self._dataset_service.dataset_by_name(table_name)
+        metadata = self._dataset_by_name(table_name)
+        if metadata is None:
+            LoggingManager().log(
+                "CatalogManager::get_table_bindings() unknown table {}"
+                .format(table_name), LoggingLevel.ERROR)
+            return None, []
         column_ids = []
         if column_names is not None:
             if not isinstance(column_names, list):
                 LoggingManager().log(
                     "CatalogManager::get_table_binding() expected list",
                     LoggingLevel.WARNING)
-            column_ids = self._column_service.columns_by_dataset_id_and_names(
-                metadata_id,
-                column_names)
-        return metadata_id, column_ids
+            ids_by_name = {column.name.lower(): column.id
+                           for column in metadata.schema.column_list}
+            column_ids = [ids_by_name.get(name.lower())
+                          for name in column_names]
+        return metadata.id, column_ids
 
     def get_metadata(self, metadata_id: int,
                      col_id_list: List[int] = None) -> DataFrameMetadata:
@@ -123,11 +148,15 @@ class CatalogManager(object):
         Returns:
             metadata object with all the details of video/dataset
         """
-        metadata = self._dataset_service.dataset_by_id(metadata_id)
-        df_columns = self._column_service.columns_by_id_and_dataset_id(
-            metadata_id, col_id_list)
-        metadata.schema = df_columns
-        return metadata
+        metadata = self._dataset_by_id(metadata_id)
+        if metadata is None or col_id_list is None:
+            return metadata
+        # a copy, the cached metadata keeps all the columns
+        subset = DataFrameMetadata(metadata.name, metadata.file_url)
+        subset._id = metadata.id
+        subset.schema = [column for column in metadata.schema.column_list
+                         if column.id in col_id_list]
+        return subset
 
     def get_column_types(self, table_metadata_id: int,
                          col_id_list: List[int]) -> List[ColumnType]:
@@ -145,12 +174,9 @@ class CatalogManager(object):
             List[ColumnType] -- [list of required column type for each input
             column]
         """
-        metadata = self._dataset_service.dataset_by_id(table_metadata_id)
+        metadata = self.get_metadata(table_metadata_id, col_id_list)
         col_types = []
-        df_columns = self._column_service.columns_by_id_and_dataset_id(
-            metadata.id, col_id_list
-        )
-        for col in df_columns:
+        for col in metadata.schema.column_list:
             col_types.append(col.type)
 
         return col_types
@@ -169,10 +195,9 @@ class CatalogManager(object):
         """
 
         col_ids = []
-        df_columns = self._column_service.columns_by_id_and_dataset_id(
-            table_metadata_id)
-        for col in df_columns:
-            col_ids.append(col[0])
+        metadata = self.get_metadata(table_metadata_id)
+        for col in metadata.schema.column_list:
+            col_ids.append(col.id)
 
         return col_ids
 
@@ -201,11 +226,11 @@ class CatalogManager(object):
             dataset_name (str): name of the dataset
 
         Returns:
-            DataFrameMetadata
+            DataFrameMetadata with the schema set, None if there is no
+            dataset with the given name
         """
 
-        return self._dataset_service.dataset_object_by_name(
-            database_name, dataset_name)
+        return self._dataset_by_name(dataset_name)
 
     def udf_io(
             self, io_name: str, data_type: ColumnType,
@@ -245,4 +270,67 @@ class CatalogManager(object):
         for udf_io in udf_io_list:
             udf_io.udf_id = metadata.id
         self._udf_io_service.add_udf_io(udf_io_list)
+        self._version_service.bump()
+        self._cache.invalidate(_UDF_BY_NAME, name)
+        self._cache.invalidate(_UDF_IO_BY_UDF_ID, metadata.id)
+        return metadata
+
+    def get_udf_by_name(self, name: str) -> UdfMetadata:
+        """
+        Returns the udf metadata for the given udf name
+
+        Arguments:
+            name (str): name of the udf
+
+        Returns:
+            UdfMetadata, None if there is no udf with the given name
+        """
+        self._check_version()
+        return self._cache.get(
+            _UDF_BY_NAME, name,
+            lambda: self._udf_service.detach(
+                self._udf_service.udf_by_name(name)))
+
+    def get_udf_io(self, udf_id: int) -> List[UdfIO]:
+        """
+        Returns the inputs and outputs of an udf
+
+        Arguments:
+            udf_id (int): id of the udf
+
+        Returns:
+            List[UdfIO]: inputs and outputs of the udf
+        """
+        # an udf without io is not cached, it may be being created
+        self._check_version()
+        udf_io = self._cache.get(
+            _UDF_IO_BY_UDF_ID, udf_id,
+            lambda: self._udf_io_service.udf_io_by_udf_id(udf_id) or None)
+        return udf_io or []
+
+    def clear_cache(self):
+        """
+        Drops all the cached catalog entries of this process
+        """
+        self._cache.clear()
+
+    def _check_version(self):
+        self._cache.check_shared_version(self._version_service.version())
+
+    def _dataset_by_name(self, name: str) -> DataFrameMetadata:
+        self._check_version()
+        return self._cache.get(
+            _DATASET_BY_NAME, name,
+            lambda: self._load_dataset(name=name))
+
+    def _dataset_by_id(self, dataset_id: int) -> DataFrameMetadata:
+        self._check_version()
+        return self._cache.get(
+            _DATASET_BY_ID, dataset_id,
+            lambda: self._load_dataset(dataset_id=dataset_id))
+
+    def _load_dataset(self, **kwargs) -> DataFrameMetadata:
+        metadata = self._dataset_service.dataset_with_columns(**kwargs)
+        if metadata is not None:
+            metadata.schema = metadata.columns
         return metadata
@@ -94,7 +94,9 @@ BaseModel = declarative_base(cls=CustomModel, constructor=None)
 def init_db():
     """Create database if doesn't exist and create all tables."""
     engine = SQLConfig().engine
-    if not database_exists(engine.url):
+    # an embedded sqlite database is created by its first connection
+    if engine.url.get_backend_name() != 'sqlite' and \
+            not database_exists(engine.url):
         LoggingManager().log("Database does not exist, creating database.",
                              LoggingLevel.INFO)
         create_database(engine.url)
@@ -107,4 +109,5 @@ def drop_db():
     database as well."""
     engine = SQLConfig().engine
     BaseModel.metadata.drop_all(bind=engine)
-    drop_database(engine.url)
+    if engine.url.database not in (None, '', ':memory:'):
+        drop_database(engine.url)
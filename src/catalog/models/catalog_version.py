@@ -0,0 +1,39 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from sqlalchemy import Column, Integer
+
+from src.catalog.models.base_model import BaseModel
+
+
+class CatalogVersion(BaseModel):
+    """
+    Single row counting the writes to the catalog. Processes sharing the
+    catalog database compare it to the version their cached entries were
+    loaded at.
+    """
+    __tablename__ = 'catalog_version'
+
+    _version = Column('version', Integer, nullable=False)
+
+    def __init__(self, version: int = 0):
+        self._version = version
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def version(self):
+        return self._version
@@ -13,11 +13,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import numpy as np
-from petastorm.codecs import NdarrayCodec
-from petastorm.codecs import ScalarCodec
-from petastorm.unischema import Unischema
-from petastorm.unischema import UnischemaField
-from pyspark.sql.types import IntegerType, FloatType, StringType
 
 from src.catalog.column_type import ColumnType
 from src.utils.logging_manager import LoggingLevel
@@ -28,6 +23,12 @@ class SchemaUtils(object):
 
     @staticmethod
     def get_petastorm_column(df_column):
+        # petastorm and pyspark take a second to import, the catalog only
+        # needs them once a table is read or written
+        from petastorm.codecs import NdarrayCodec
+        from petastorm.codecs import ScalarCodec
+        from petastorm.unischema import UnischemaField
+        from pyspark.sql.types import IntegerType, FloatType, StringType
 
         column_type = df_column.type
         column_name = df_column.name
@@ -71,6 +72,8 @@ class SchemaUtils(object):
 
     @staticmethod
     def get_petastorm_schema(name, column_list):
+        from petastorm.unischema import Unischema
+
         petastorm_column_list = []
         for _column in column_list:
             petastorm_column = SchemaUtils.get_petastorm_column(_column)
@@ -12,7 +12,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from src.catalog.models.base_model import BaseModel
+from src.catalog.models.base_model import BaseModel, db_session
 
 
 class BaseService:
@@ -23,3 +23,19 @@ class BaseService:
 
     def __init__(self, model: BaseModel):
         self.model = model
+
+    def detach(self, instance: BaseModel) -> BaseModel:
+        """
+        Removes a loaded object from the database session. Its loaded
+        attributes stay readable after later commits, so it can be cached
+        and shared between threads.
+
+        Arguments:
+            instance (BaseModel): object to detach, may be None
+
+        Returns:
+            BaseModel: the detached object
+        """
+        if instance is not None:
+            db_session.expunge(instance)
+        return instance
@@ -0,0 +1,59 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from sqlalchemy.exc import IntegrityError
+
+from src.catalog.models.catalog_version import CatalogVersion
+from src.catalog.sql_config import SQLConfig
+
+# id of the single row of the catalog_version table
+_VERSION_ID = 1
+
+
+class CatalogVersionService:
+    """
+    Reads and bumps the version of the catalog. It runs on connections of
+    its own rather than on the session of the thread, so that it sees the
+    writes of other processes committed after the session began.
+    """
+
+    def __init__(self):
+        self._table = CatalogVersion.__table__
+
+    def version(self) -> int:
+        """
+        Returns:
+            int: number of writes to the catalog so far
+        """
+        with SQLConfig().engine.connect() as connection:
+            row = connection.execute(self._table.select().where(
+                self._table.c.id == _VERSION_ID)).first()
+        return row.version if row is not None else 0
+
+    def bump(self):
+        """Increments the version after a write to the catalog"""
+        while True:
+            try:
+                with SQLConfig().engine.begin() as connection:
+                    updated = connection.execute(
+                        self._table.update()
+                        .where(self._table.c.id == _VERSION_ID)
+                        .values(version=self._table.c.version + 1))
+                    if updated.rowcount == 0:
+                        connection.execute(self._table.insert().values(
+                            id=_VERSION_ID, version=1))
+                return
+            except IntegrityError:
+                # another process inserted the row first
+                continue
@@ -14,6 +14,7 @@
 # limitations under the License.
 from typing import List
 
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.exc import NoResultFound
 
 from src.catalog.models.df_metadata import DataFrameMetadata
@@ -87,3 +88,29 @@ class DatasetService(BaseService):
         """
         return self.model.query.filter(
             self.model._name == dataset_name).one()
+
+    def dataset_with_columns(self, name: str = None,
+                             dataset_id: int = None) -> DataFrameMetadata:
+        """
+        Returns the dataset with the given name or id together with its
+        columns, loaded in one query and detached from the session.
+
+        Arguments:
+            name (str): name of the dataset
+            dataset_id (int): id of the dataset, used if name is None
+
+        Returns:
+            DataFrameMetadata, None if there is no such dataset
+        """
+        if name is not None:
+            condition = self.model._name == name
+        else:
+            condition = self.model._id == dataset_id
+        metadata = self.model.query \
+            .options(joinedload(self.model._columns)) \
+            .filter(condition) \
+            .one_or_none()
+        if metadata is not None:
+            for column in metadata.columns:
+                self.detach(column)
+        return self.detach(metadata)
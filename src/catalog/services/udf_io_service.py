@@ -38,6 +38,16 @@ class UdfIOService(BaseService):
         
         return result
 
+    def udf_io_by_udf_id(self, udf_id: int) -> List[UdfIO]:
+        """return the inputs and outputs of the udf, detached from the
+        session
+
+        Arguments:
+            udf_id (int): id of the udf
+        """
+        return [self.detach(io) for io in
+                self.model.query.filter(self.model._udf_id == udf_id).all()]
+
     def add_udf_io(self, io_list: List[UdfIO]):
         """Commit an entry in the udf_io table
         
@@ -12,9 +12,116 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from sqlalchemy import create_engine
+import os
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
+
 from src.configuration.configuration_manager import ConfigurationManager
+from src.utils.metrics import CATALOG_QUERY_DURATION
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_STATEMENT_CACHE_SIZE = 500
+DEFAULT_SQLITE_BUSY_TIMEOUT = 30
+
+
+def create_catalog_engine(uri: str) -> Engine:
+    """
+    Creates the engine of the catalog database with the pool and statement
+    cache settings of the catalog section in eva.yml.
+
+    A file based SQLite database is embedded in the EVA process and runs in
+    WAL mode, so that reads are not blocked by a concurrent write. An
+    in-memory SQLite database is shared by all threads of the process.
+
+    Arguments:
+        uri (str): SQLAlchemy uri of the catalog database
+
+    Returns:
+        Engine: the engine
+    """
+    config = ConfigurationManager()
+
+    def get_value(key, default):
+        value = config.get_value("catalog", key)
+        return default if value is None else value
+
+    url = make_url(uri)
+    statement_cache_size = get_value("statement_cache_size",
+                                     DEFAULT_STATEMENT_CACHE_SIZE)
+    kwargs = {
+        'query_cache_size': statement_cache_size,
+        'pool_pre_ping': bool(get_value("pool_pre_ping", False)),
+    }
+    if url.get_backend_name() != 'sqlite':
+        kwargs['pool_size'] = get_value("pool_size", DEFAULT_POOL_SIZE)
+        kwargs['max_overflow'] = get_value("max_overflow",
+                                           DEFAULT_MAX_OVERFLOW)
+        return _time_statements(create_engine(url, **kwargs))
+
+    kwargs['connect_args'] = {
+        # connections are handed between the threads of the server
+        'check_same_thread': False,
+        'timeout': get_value("sqlite_busy_timeout",
+                             DEFAULT_SQLITE_BUSY_TIMEOUT),
+        'cached_statements': statement_cache_size,
+    }
+    in_memory = url.database in (None, '', ':memory:')
+    if in_memory:
+        kwargs['poolclass'] = StaticPool
+    else:
+        kwargs['pool_size'] = get_value("pool_size", DEFAULT_POOL_SIZE)
+        kwargs['max_overflow'] = get_value("max_overflow",
+                                           DEFAULT_MAX_OVERFLOW)
+        directory = os.path.dirname(os.path.abspath(url.database))
+        os.makedirs(directory, exist_ok=True)
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def configure_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent without syncing every commit
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    return _time_statements(engine)
+
+
+def _time_statements(engine: Engine) -> Engine:
+    """
+    Records the time of every statement run on the catalog database, by
+    its operation, e.g. select or insert
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context,
+                    executemany):
+        conn.info.setdefault('statement_started', []).append(
+            time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context,
+                   executemany):
+        elapsed = time.perf_counter() - conn.info['statement_started'].pop()
+        operation = statement.lstrip().split(None, 1)[0].lower() \
+            if statement.strip() else 'unknown'
+        CATALOG_QUERY_DURATION.labels(operation).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and \
+                connection.info.get('statement_started'):
+            connection.info['statement_started'].pop()
+
+    return engine
 
 
 class SQLConfig:
@@ -25,6 +132,8 @@ class SQLConfig:
     """
 
     _instance = None
+    engine = None
+    session = None
 
     def __new__(cls):
         """Overrides the default __new__ method.
@@ -43,10 +152,25 @@ class SQLConfig:
         """Initializes the engine and session for database operations
 
         Retrieves the database uri for connection from ConfigurationManager.
+        The engine and its connection pool are created once per process, a
+        forked child opens connections of its own.
         """
+        if self.engine is not None:
+            return
         uri = ConfigurationManager().get_value("core",
                                                "sqlalchemy_database_uri")
-        # set echo=True to log SQL
-        self.engine = create_engine(uri)
-        # statements
+        self.engine = create_catalog_engine(uri)
         self.session = scoped_session(sessionmaker(bind=self.engine))
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """
+        Drops the connections and sessions inherited from the parent without
+        closing them, the parent keeps using them and sqlite connections
+        must not be used across a fork. An in-memory database only exists
+        in the connection, the child keeps its copy.
+        """
+        if isinstance(self.engine.pool, StaticPool):
+            return
+        self.engine.dispose(close=False)
+        self.session.registry.clear()
@@ -16,7 +16,7 @@
 from src.catalog.catalog_manager import CatalogManager
 from src.planner.create_plan import CreatePlan
 from src.executor.abstract_executor import AbstractExecutor
-from src.storage.dataframe import create_dataframe
+from src.storage import StorageEngine
 import tempfile
 import os.path
 
@@ -33,7 +33,7 @@ class CreateExecutor(AbstractExecutor):
         """Create table executor
 
         Calls the catalog to create metadata corresponding to the table.
-        Calls the storage to create a spark dataframe from the metadata object.
+        Calls the storage engine to create the table from the metadata object.
         """
         if (self.node.if_not_exists):
             # check catalog if we already have this table
@@ -47,5 +47,5 @@ class CreateExecutor(AbstractExecutor):
                                                     file_url,
                                                     self.node.column_list)
 
-        create_dataframe(metadata)
+        StorageEngine.create(metadata)
         return file_url
@@ -32,13 +32,34 @@ class DiskStorageExecutor(AbstractStorageExecutor):
 
     def __init__(self, node: StoragePlan):
         super().__init__(node)
-        self.storage = Loader(node.video,
-                              batch_size=node.batch_size,
-                              skip_frames=node.skip_frames,
-                              limit=node.limit,
-                              offset=node.offset,
-                              curr_shard=node.curr_shard,
-                              total_shards=node.total_shards)
+        self.storage = self._create_loader(node.curr_shard,
+                                           node.total_shards)
+
+    def _create_loader(self, curr_shard: int, total_shards: int,
+                       ordered: bool = False):
+        node = self.node
+        return Loader(node.video,
+                      batch_size=node.batch_size,
+                      skip_frames=node.skip_frames,
+                      limit=node.limit,
+                      offset=node.offset,
+                      curr_shard=curr_shard,
+                      total_shards=total_shards,
+                      columns=node.columns,
+                      column_ranges=node.column_ranges,
+                      ordered=ordered)
+
+    def shard(self, curr_shard: int, total_shards: int,
+              ordered: bool = False):
+        """
+        Restricts the executor to read only one shard of the dataset
+
+        Arguments:
+            curr_shard (int): shard to read, from 0 to total_shards - 1
+            total_shards (int): number of shards the dataset is split into
+            ordered (bool): whether the shard has to be read in index order
+        """
+        self.storage = self._create_loader(curr_shard, total_shards, ordered)
 
     def validate(self):
         pass
@@ -13,13 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from numpy import ndarray
+import numpy as np
 
 from src.catalog.catalog_manager import CatalogManager
 from src.catalog.column_type import ColumnType
 from src.planner.insert_plan import InsertPlan
 from src.executor.abstract_executor import AbstractExecutor
-from src.storage.dataframe import append_rows
+from src.storage import StorageEngine
 from src.utils.logging_manager import LoggingLevel
 from src.utils.logging_manager import LoggingManager
 
@@ -34,39 +34,50 @@ class InsertExecutor(AbstractExecutor):
 
     def exec(self):
         """
-        Based on the table it constructs a valid tuple using the values
-        provided.
+        Based on the table it constructs a valid tuple for every row using
+        the values provided and appends all of them in one write.
         Right now we assume there are no missing values
         """
         table_id = self.node.video_id
-        col_id_to_val = {}
-        for col, val in zip(self.node.column_list, self.node.value_list):
-            col_id_to_val[col.col_metadata_id] = val.evaluate()
+        col_ids = [col.col_metadata_id for col in self.node.column_list]
 
         metadata = CatalogManager().get_metadata(table_id)
 
         column_list = metadata.schema.column_list
 
-        data_tuple = []
-        for column in column_list:
-            col_id, col_type = column.id, column.type
-            if col_id in col_id_to_val.keys():
-                val = col_id_to_val[col_id]
-                try:
-                    if col_type == ColumnType.INTEGER:
-                        data_tuple.append(int(val))
-                    elif col_type == ColumnType.FLOAT:
-                        data_tuple.append(float(val))
-                    elif col_type == ColumnType.BOOLEAN:
-                        data_tuple.append(bool(val))
-                    elif col_type == ColumnType.TEXT:
-                        data_tuple.append(str(val))
-                    elif col_type == ColumnType.NDARRAY:
-                        data_tuple.append(ndarray(val))
-                except Exception as e:
-                    LoggingManager().log(
-                        f'Insert Executor failed bcz of invalid value {e}',
-                        LoggingLevel.ERROR)
-                    return
+        rows = []
+        for values in self.node.value_list:
+            col_id_to_val = {}
+            for col_id, val in zip(col_ids, values):
+                col_id_to_val[col_id] = val.evaluate()
 
-        append_rows(metadata, [data_tuple])
+            data_tuple = []
+            for column in column_list:
+                col_id, col_type = column.id, column.type
+                if col_id in col_id_to_val.keys():
+                    val = col_id_to_val[col_id]
+                    try:
+                        if col_type == ColumnType.INTEGER:
+                            data_tuple.append(int(val))
+                        elif col_type == ColumnType.FLOAT:
+                            data_tuple.append(float(val))
+                        elif col_type == ColumnType.BOOLEAN:
+                            data_tuple.append(bool(val))
+                        elif col_type == ColumnType.TEXT:
+                            data_tuple.append(str(val))
+                        elif col_type == ColumnType.NDARRAY:
+                            data_tuple.append(np.asarray(val))
+                    except Exception as e:
+                        LoggingManager().log(
+                            f'Insert Executor failed bcz of invalid value {e}',
+                            LoggingLevel.ERROR)
+                        return
+            rows.append(data_tuple)
+
+        columns = {column.name: [row[index] for row in rows]
+                   for index, column in enumerate(column_list)}
+        try:
+            StorageEngine.append(metadata, columns)
+        except ValueError as e:
+            LoggingManager().log(f'Insert Executor failed: {e}',
+                                 LoggingLevel.ERROR)
@@ -0,0 +1,49 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from src.catalog.catalog_manager import CatalogManager
+from src.executor.abstract_executor import AbstractExecutor
+from src.planner.load_data_plan import LoadDataPlan
+from src.storage import StorageEngine
+from src.storage.column_reader import read_columns
+from src.utils.logging_manager import LoggingLevel
+from src.utils.logging_manager import LoggingManager
+
+
+class LoadDataExecutor(AbstractExecutor):
+
+    def __init__(self, node: LoadDataPlan):
+        super().__init__(node)
+
+    def validate(self):
+        pass
+
+    def exec(self):
+        """
+        Reads the file column-wise and appends all its rows to the table in
+        one write. The columns of the file are matched to the columns
+        of the table by name.
+        """
+        metadata = CatalogManager().get_metadata(self.node.table_metadata_id)
+        try:
+            columns = read_columns(str(self.node.path))
+            num_rows = StorageEngine.append(metadata, columns)
+        except (OSError, ValueError) as e:
+            LoggingManager().log(
+                f'Load Data Executor failed to load {self.node.path}: {e}',
+                LoggingLevel.ERROR)
+            return
+        LoggingManager().log(
+            f'Loaded {num_rows} rows from {self.node.path}',
+            LoggingLevel.INFO)
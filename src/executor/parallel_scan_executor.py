@@ -0,0 +1,181 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import heapq
+import multiprocessing
+import traceback
+from queue import Empty
+from typing import Iterator, List
+
+from src.executor.abstract_executor import AbstractExecutor
+from src.executor.disk_based_storage_executor import DiskStorageExecutor
+from src.models.storage.batch import FrameBatch
+from src.planner.parallel_scan_plan import ParallelScanPlan
+from src.utils.logging_manager import LoggingLevel
+from src.utils.logging_manager import LoggingManager
+
+# Number of batches a worker may have in flight before it blocks
+QUEUE_DEPTH = 4
+
+# Seconds between checks whether the workers are still alive
+POLL_INTERVAL = 1
+
+
+class ParallelScanExecutor(AbstractExecutor):
+    """
+    Fans the child scan out to one worker process per shard. Every worker
+    restricts the storage executors of its copy of the subtree to its shard
+    and runs the whole subtree, so predicates and UDFs are evaluated inside
+    the workers. The parent merges the output batches into one stream.
+
+    Workers are forked, the execution tree therefore does not need to be
+    picklable, only the output batches do. The catalog engine and the udf
+    result cache open connections of their own in the workers, sqlite
+    connections must not be used across a fork.
+
+    The ordered merge interleaves the shards frame by frame, every shard
+    has to yield its frames in index order. The workers therefore ask their
+    loaders for ordered shards. A batch of a shard may span frames far
+    apart, e.g. several row groups of a petastorm shard.
+
+    Arguments:
+        node (ParallelScanPlan): The ParallelScanPlan
+    """
+
+    def __init__(self, node: ParallelScanPlan):
+        super().__init__(node)
+        self.degree = node.degree
+        self.ordered = node.ordered
+
+    def validate(self):
+        pass
+
+    def exec(self) -> Iterator[FrameBatch]:
+        context = multiprocessing.get_context('fork')
+        if self.ordered:
+            queues = [context.Queue(QUEUE_DEPTH) for _ in range(self.degree)]
+        else:
+            queues = [context.Queue(QUEUE_DEPTH * self.degree)] * self.degree
+
+        workers = [context.Process(target=_scan_shard,
+                                   args=(self.children[0], shard,
+                                         self.degree, self.ordered,
+                                         queues[shard]),
+                                   daemon=True)
+                   for shard in range(self.degree)]
+        for worker in workers:
+            worker.start()
+
+        try:
+            if self.ordered:
+                yield from _merge_frames(
+                    [_drain(queue, workers, 1) for queue in queues])
+            else:
+                yield from _drain(queues[0], workers, self.degree)
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+
+class _ShardDone:
+    """Sent by a worker after its last batch"""
+
+
+class _ShardError:
+    """Sent by a worker instead of _ShardDone if its scan failed"""
+
+    def __init__(self, shard: int, error: str):
+        self.shard = shard
+        self.error = error
+
+
+def _shard_tree(executor: AbstractExecutor, shard: int, total_shards: int,
+                ordered: bool):
+    if isinstance(executor, DiskStorageExecutor):
+        executor.shard(shard, total_shards, ordered)
+    for child in executor.children:
+        _shard_tree(child, shard, total_shards, ordered)
+
+
+def _scan_shard(executor: AbstractExecutor, shard: int, total_shards: int,
+                ordered: bool, queue: multiprocessing.Queue):
+    try:
+        _shard_tree(executor, shard, total_shards, ordered)
+        for batch in executor.exec():
+            # filtered out batches are not worth the inter process copy
+            if batch.batch_size > 0:
+                queue.put(batch)
+        queue.put(_ShardDone())
+    except Exception:
+        queue.put(_ShardError(shard, traceback.format_exc()))
+
+
+def _merge_frames(streams: List[Iterator[FrameBatch]]) -> \
+        Iterator[FrameBatch]:
+    """
+    Merges batch streams, each in frame index order, into one stream in
+    frame index order. The output batches are the runs of frames taken from
+    the same input batch, a batch is passed on whole if none of its frames
+    fall between those of other streams.
+    """
+    def frames(stream):
+        for batch in stream:
+            for position, index in enumerate(batch.indices):
+                yield index, position, batch
+
+    current = None
+    positions = []
+    for _, position, batch in heapq.merge(
+            *[frames(stream) for stream in streams],
+            key=lambda frame: frame[0]):
+        if batch is not current:
+            if positions:
+                yield _take(current, positions)
+            current, positions = batch, []
+        positions.append(position)
+    if positions:
+        yield _take(current, positions)
+
+
+def _take(batch: FrameBatch, positions: List[int]) -> FrameBatch:
+    if len(positions) == batch.batch_size:
+        return batch
+    return batch[positions]
+
+
+def _drain(queue: multiprocessing.Queue,
+           workers: List[multiprocessing.Process],
+           num_workers: int) -> Iterator[FrameBatch]:
+    """
+    Yields the batches from the queue until num_workers workers are done.
+    A failure in a worker is raised as a RuntimeError in the parent.
+    """
+    while num_workers > 0:
+        try:
+            item = queue.get(timeout=POLL_INTERVAL)
+        except Empty:
+            if any(worker.exitcode not in (None, 0) for worker in workers):
+                raise RuntimeError('Parallel scan worker exited unexpectedly')
+            continue
+        if isinstance(item, _ShardDone):
+            num_workers -= 1
+        elif isinstance(item, _ShardError):
+            msg = 'Parallel scan of shard %d failed:\n%s' % (item.shard,
+                                                             item.error)
+            LoggingManager().log(msg, LoggingLevel.ERROR)
+            raise RuntimeError(msg)
+        else:
+            yield item
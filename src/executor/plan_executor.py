@@ -12,7 +12,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from typing import Iterator, List
+
 from src.executor.abstract_executor import AbstractExecutor
+from src.models.storage.batch import FrameBatch
 from src.executor.seq_scan_executor import SequentialScanExecutor
 from src.planner.abstract_plan import AbstractPlan
 from src.planner.types import PlanNodeType
@@ -21,6 +24,8 @@ from src.executor.pp_executor import PPExecutor
 from src.executor.create_executor import CreateExecutor
 from src.executor.insert_executor import InsertExecutor
 from src.executor.create_udf_executor import CreateUDFExecutor
+from src.executor.parallel_scan_executor import ParallelScanExecutor
+from src.executor.load_data_executor import LoadDataExecutor
 
 
 class PlanExecutor:
@@ -64,6 +69,10 @@ class PlanExecutor:
             executor_node = InsertExecutor(node=plan)
         elif plan_node_type == PlanNodeType.CREATE_UDF:
             executor_node = CreateUDFExecutor(node=plan)
+        elif plan_node_type == PlanNodeType.PARALLEL_SCAN:
+            executor_node = ParallelScanExecutor(node=plan)
+        elif plan_node_type == PlanNodeType.LOAD_DATA:
+            executor_node = LoadDataExecutor(node=plan)
 
         # Build Executor Tree for children
         for children in plan.children:
@@ -80,26 +89,40 @@ class PlanExecutor:
         # ToDo
         # clear all the nodes from the execution tree
 
-    def execute_plan(self):
-        """execute the plan tree
+    def execute_plan(self) -> List[FrameBatch]:
+        """execute the plan tree and collect all the output batches
+
+        Thin wrapper around `stream_plan`; it materializes the complete
+        result in memory, so prefer `stream_plan` for large scans.
 
+        Returns:
+            List[FrameBatch] -- all the batches produced by the plan
         """
-        # TODO: for now this returns list of batch frames. Update to return
-        # a stitched output
-        execution_tree = self._build_execution_tree(self._plan)
+        return list(self.stream_plan())
 
-        output_batches = []
+    def stream_plan(self) -> Iterator[FrameBatch]:
+        """execute the plan tree and yield the output batches as the
+        execution tree produces them
+
+        Nothing is executed until the returned generator is consumed and
+        only the batch currently being processed is held in memory.
+
+        Yields:
+            FrameBatch -- output batch of the root executor
+        """
+        execution_tree = self._build_execution_tree(self._plan)
 
         # ToDo generalize this logic
         _INSERT_CREATE_ = (
             PlanNodeType.CREATE,
             PlanNodeType.INSERT,
-            PlanNodeType.CREATE_UDF)
-        if execution_tree.node.node_type in _INSERT_CREATE_:
-            execution_tree.exec()
-        else:
-            for batch in execution_tree.exec():
-                output_batches.append(batch)
-
-        self._clean_execution_tree(execution_tree)
-        return output_batches
+            PlanNodeType.CREATE_UDF,
+            PlanNodeType.LOAD_DATA)
+        try:
+            if execution_tree.node.node_type in _INSERT_CREATE_:
+                execution_tree.exec()
+            else:
+                for batch in execution_tree.exec():
+                    yield batch
+        finally:
+            self._clean_execution_tree(execution_tree)
@@ -14,6 +14,9 @@
 # limitations under the License.
 from typing import Iterator
 
+import numpy as np
+
+from src.expression.expression_utils import to_boolean_mask
 from src.models.storage.batch import FrameBatch
 from src.executor.abstract_executor import AbstractExecutor
 from src.planner.seq_scan_plan import SeqScanPlan
@@ -39,13 +42,10 @@ class SequentialScanExecutor(AbstractExecutor):
         child_executor = self.children[0]
         for batch in child_executor.exec():
             if self.predicate is not None:
-                outcomes = self.predicate.evaluate(batch)
-                required_frame_ids = []
-                for i, outcome in enumerate(outcomes):
-                    if outcome:
-                        required_frame_ids.append(i)
-
-                yield batch[required_frame_ids]
+                mask = to_boolean_mask(self.predicate.evaluate(batch))
+                # a predicate independent of the rows returns a single value
+                mask = np.broadcast_to(mask, (batch.batch_size,))
+                yield batch[mask]
 
             else:
                 yield batch
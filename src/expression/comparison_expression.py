@@ -15,6 +15,7 @@
 from src.expression.abstract_expression import AbstractExpression, \
     ExpressionType, \
     ExpressionReturnType
+from src.expression.expression_utils import to_numpy_array, to_boolean_mask
 
 
 class ComparisonExpression(AbstractExpression):
@@ -29,29 +30,27 @@ class ComparisonExpression(AbstractExpression):
                          children=children)
 
     def evaluate(self, *args):
-        left_values = self.get_child(0).evaluate(*args)
-        right_values = self.get_child(1).evaluate(*args)
+        """
+        Compares the values of the two children. Scalars are broadcast
+        against the other side.
 
-        # Broadcasting scalars
-        if not isinstance(left_values, list):
-            left_values = [left_values]
-        if not isinstance(right_values, list):
-            right_values = [right_values] * len(left_values)
-        # TODO implement a better way to compare value_left and value_right
-        # Implement a generic return type
-        outcome = []
-        for value_left, value_right in zip(left_values, right_values):
-            if self.etype == ExpressionType.COMPARE_EQUAL:
-                outcome.append(value_left == value_right)
-            elif self.etype == ExpressionType.COMPARE_GREATER:
-                outcome.append(value_left > value_right)
-            elif self.etype == ExpressionType.COMPARE_LESSER:
-                outcome.append(value_left < value_right)
-            elif self.etype == ExpressionType.COMPARE_GEQ:
-                outcome.append(value_left >= value_right)
-            elif self.etype == ExpressionType.COMPARE_LEQ:
-                outcome.append(value_left <= value_right)
-            elif self.etype == ExpressionType.COMPARE_NEQ:
-                outcome.append(value_left != value_right)
+        Returns:
+            np.ndarray: boolean mask with one entry per row
+        """
+        left_values = to_numpy_array(self.get_child(0).evaluate(*args))
+        right_values = to_numpy_array(self.get_child(1).evaluate(*args))
 
-        return outcome
+        if self.etype == ExpressionType.COMPARE_EQUAL:
+            outcome = left_values == right_values
+        elif self.etype == ExpressionType.COMPARE_GREATER:
+            outcome = left_values > right_values
+        elif self.etype == ExpressionType.COMPARE_LESSER:
+            outcome = left_values < right_values
+        elif self.etype == ExpressionType.COMPARE_GEQ:
+            outcome = left_values >= right_values
+        elif self.etype == ExpressionType.COMPARE_LEQ:
+            outcome = left_values <= right_values
+        elif self.etype == ExpressionType.COMPARE_NEQ:
+            outcome = left_values != right_values
+
+        return to_boolean_mask(outcome)
@@ -12,3 +12,215 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.expression.abstract_expression import AbstractExpression, \
+    ExpressionType
+
+
+def to_numpy_array(values):
+    """
+    Converts the values returned by a child expression to a form which can
+    be used in vectorized numpy operations.
+
+    Lists of numbers are converted to numeric arrays, lists of any other
+    objects (e.g. predictions) to one dimensional object arrays. Scalars are
+    returned unchanged so that numpy broadcasts them.
+
+    Arguments:
+        values (Any): scalar, list or ndarray of values
+
+    Returns:
+        np.ndarray or the scalar value
+    """
+    if isinstance(values, np.ndarray) or \
+            not isinstance(values, (list, tuple)):
+        return values
+
+    try:
+        array = np.asarray(values)
+    except ValueError:
+        array = None
+    if array is not None and array.ndim == 1:
+        return array
+
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+def to_boolean_mask(values) -> np.ndarray:
+    """
+    Converts the outcome of a predicate to a one dimensional boolean array
+
+    Arguments:
+        values (Any): boolean outcomes as a list, ndarray or scalar
+
+    Returns:
+        np.ndarray: boolean mask
+    """
+    return np.atleast_1d(np.asarray(values, dtype=bool))
+
+
+def evaluation_cost(expression: AbstractExpression) -> int:
+    """
+    Rough estimate of the cost of evaluating an expression: the number of
+    function (UDF) calls in the expression tree. Everything else is
+    considered free in comparison.
+
+    Arguments:
+        expression (AbstractExpression): root of the expression tree
+
+    Returns:
+        int: estimated cost
+    """
+    cost = 0
+    if expression.etype == ExpressionType.FUNCTION_EXPRESSION:
+        cost += 1
+    for i in range(expression.get_children_count()):
+        cost += evaluation_cost(expression.get_child(i))
+    return cost
+
+
+def extract_referenced_columns(expressions: List[AbstractExpression]) \
+        -> Optional[List[str]]:
+    """
+    Collects the names of the columns read by the expressions, so that the
+    storage only has to load those.
+
+    Function expressions are passed the whole frame batch, therefore if
+    any is present (or an expression is not known) all columns are needed.
+
+    Arguments:
+        expressions (List[AbstractExpression]): target list and predicate,
+                                                None entries are ignored
+
+    Returns:
+        List[str]: sorted column names, None if all columns are needed
+    """
+    columns = set()
+    stack = [expression for expression in expressions
+             if expression is not None]
+    while stack:
+        expression = stack.pop()
+        if not isinstance(expression, AbstractExpression) or \
+                expression.etype == ExpressionType.FUNCTION_EXPRESSION:
+            return None
+        if expression.etype == ExpressionType.TUPLE_VALUE and \
+                expression.col_name is not None:
+            columns.add(expression.col_name)
+        for i in range(expression.get_children_count()):
+            stack.append(expression.get_child(i))
+    return sorted(columns)
+
+
+class ColumnRange(namedtuple('ColumnRange', ['lower', 'upper',
+                                             'lower_inclusive',
+                                             'upper_inclusive'])):
+    """
+    Interval of values a predicate restricts a column to. A bound of None
+    is unbounded.
+    """
+
+    def contains(self, value) -> bool:
+        if self.lower is not None:
+            if value < self.lower or \
+                    (value == self.lower and not self.lower_inclusive):
+                return False
+        if self.upper is not None:
+            if value > self.upper or \
+                    (value == self.upper and not self.upper_inclusive):
+                return False
+        return True
+
+    def overlaps(self, minimum, maximum) -> bool:
+        """Whether some value from minimum to maximum lies in the range"""
+        if self.lower is not None:
+            if maximum < self.lower or \
+                    (maximum == self.lower and not self.lower_inclusive):
+                return False
+        if self.upper is not None:
+            if minimum > self.upper or \
+                    (minimum == self.upper and not self.upper_inclusive):
+                return False
+        return True
+
+    def intersect(self, other: 'ColumnRange') -> 'ColumnRange':
+        lower, lower_inclusive = self.lower, self.lower_inclusive
+        if other.lower is not None and (
+                lower is None or other.lower > lower or
+                (other.lower == lower and not other.lower_inclusive)):
+            lower, lower_inclusive = other.lower, other.lower_inclusive
+        upper, upper_inclusive = self.upper, self.upper_inclusive
+        if other.upper is not None and (
+                upper is None or other.upper < upper or
+                (other.upper == upper and not other.upper_inclusive)):
+            upper, upper_inclusive = other.upper, other.upper_inclusive
+        return ColumnRange(lower, upper, lower_inclusive, upper_inclusive)
+
+
+# comparison with the column on the left: column range for the constant
+_RANGE_OF_COMPARISON = {
+    ExpressionType.COMPARE_EQUAL: lambda v: ColumnRange(v, v, True, True),
+    ExpressionType.COMPARE_GREATER: lambda v: ColumnRange(v, None, False,
+                                                          False),
+    ExpressionType.COMPARE_GEQ: lambda v: ColumnRange(v, None, True, False),
+    ExpressionType.COMPARE_LESSER: lambda v: ColumnRange(None, v, False,
+                                                         False),
+    ExpressionType.COMPARE_LEQ: lambda v: ColumnRange(None, v, False, True),
+}
+
+# operator to use when the column is on the right of the comparison
+_MIRRORED_COMPARISON = {
+    ExpressionType.COMPARE_EQUAL: ExpressionType.COMPARE_EQUAL,
+    ExpressionType.COMPARE_GREATER: ExpressionType.COMPARE_LESSER,
+    ExpressionType.COMPARE_GEQ: ExpressionType.COMPARE_LEQ,
+    ExpressionType.COMPARE_LESSER: ExpressionType.COMPARE_GREATER,
+    ExpressionType.COMPARE_LEQ: ExpressionType.COMPARE_GEQ,
+}
+
+
+def extract_column_ranges(predicate: AbstractExpression) \
+        -> Dict[str, ColumnRange]:
+    """
+    Extracts the ranges of column values that can be pushed down to the
+    storage from the conjuncts of a predicate of the form
+    `column <op> constant` (or `constant <op> column`).
+
+    Other conjuncts are ignored, the ranges are therefore only a necessary
+    condition and the full predicate still has to be evaluated.
+
+    Arguments:
+        predicate (AbstractExpression): scan predicate, may be None
+
+    Returns:
+        Dict[str, ColumnRange]: range per column name
+    """
+    ranges = {}
+    stack = [predicate] if isinstance(predicate, AbstractExpression) else []
+    while stack:
+        expression = stack.pop()
+        if expression.etype == ExpressionType.LOGICAL_AND:
+            stack.append(expression.get_child(0))
+            stack.append(expression.get_child(1))
+            continue
+        if expression.etype not in _RANGE_OF_COMPARISON:
+            continue
+        etype = expression.etype
+        column, constant = expression.get_child(0), expression.get_child(1)
+        if column.etype == ExpressionType.CONSTANT_VALUE:
+            column, constant = constant, column
+            etype = _MIRRORED_COMPARISON[etype]
+        if column.etype != ExpressionType.TUPLE_VALUE or \
+                constant.etype != ExpressionType.CONSTANT_VALUE or \
+                column.col_name is None:
+            continue
+        column_range = _RANGE_OF_COMPARISON[etype](constant.value)
+        if column.col_name in ranges:
+            column_range = ranges[column.col_name].intersect(column_range)
+        ranges[column.col_name] = column_range
+    return ranges
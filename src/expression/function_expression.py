@@ -12,12 +12,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
 from enum import Enum, unique
 from typing import Callable
 
 from src.expression.abstract_expression import AbstractExpression, \
     ExpressionType
+from src.expression.expression_utils import to_numpy_array
 from src.models.storage.batch import FrameBatch
+from src.udfs.udf_result_cache import UdfCacheKey, UdfResultCache
+from src.utils.metrics import CACHE_LOOKUPS, UDF_DURATION, UDF_FRAMES, \
+    UDF_INVOCATIONS
 
 
 @unique
@@ -43,11 +48,16 @@ class FunctionExpression(AbstractExpression):
         is_temp (bool, default:False): In case of EXEC type, decides if the
         outcome needs to be stored in BatchFrame temporarily.
 
+        cache_key (UdfCacheKey, default:None): When set, outcomes are looked
+        up in the UdfResultCache and the function is only called for the
+        frames which are not cached.
+
     """
 
     def __init__(self, func: Callable,
                  mode: ExecutionMode = ExecutionMode.EVAL, name=None,
                  is_temp: bool = False,
+                 cache_key: UdfCacheKey = None,
                  **kwargs):
         if mode == ExecutionMode.EXEC:
             assert name is not None
@@ -57,8 +67,20 @@ class FunctionExpression(AbstractExpression):
         self.name = name
         self.function = func
         self.is_temp = is_temp
+        self.cache_key = cache_key
 
     def evaluate(self, batch: FrameBatch):
+        if self.cache_key is not None and isinstance(batch, FrameBatch):
+            outcome = self._evaluate_with_cache(batch)
+        else:
+            outcome = self._evaluate(batch)
+
+        if self.mode == ExecutionMode.EXEC:
+            batch.set_outcomes(self.name, outcome, is_temp=self.is_temp)
+
+        return outcome
+
+    def _evaluate(self, batch: FrameBatch):
         args = []
         if self.get_children_count() > 0:
             child = self.get_child(0)
@@ -66,9 +88,33 @@ class FunctionExpression(AbstractExpression):
         else:
             args.append(batch)
 
+        udf = self.name if self.name is not None else 'anonymous'
+        started = time.perf_counter()
         outcome = self.function(*args)
+        UDF_DURATION.labels(udf).observe(time.perf_counter() - started)
+        UDF_INVOCATIONS.labels(udf).inc()
+        if isinstance(batch, FrameBatch):
+            UDF_FRAMES.labels(udf).inc(batch.batch_size)
+        return outcome
 
-        if self.mode == ExecutionMode.EXEC:
-            batch.set_outcomes(self.name, outcome, is_temp=self.is_temp)
+    def _evaluate_with_cache(self, batch: FrameBatch):
+        cache = UdfResultCache()
+        hits, outcome = cache.get(self.cache_key, batch)
+        hit_count = int(hits.sum())
+        CACHE_LOOKUPS.labels('udf_result', 'hit').inc(hit_count)
+        CACHE_LOOKUPS.labels('udf_result', 'miss').inc(len(hits) - hit_count)
+        if hits.all():
+            return outcome.tolist()
 
-        return outcome
+        missing = ~hits
+        sub_batch = batch[missing] if hits.any() else batch
+        computed = self._evaluate(sub_batch)
+        if sub_batch is not batch:
+            batch.scatter_outcomes(sub_batch, missing)
+        cache.put(self.cache_key, sub_batch, computed)
+        if sub_batch is batch:
+            # nothing was cached, keep the outcome as the udf returned it
+            return computed
+
+        outcome[missing] = to_numpy_array(computed)
+        return outcome.tolist()
@@ -12,9 +12,15 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import numpy as np
+
 from src.expression.abstract_expression import AbstractExpression, \
     ExpressionType, \
     ExpressionReturnType
+from src.expression.expression_utils import to_boolean_mask, \
+    evaluation_cost
+from src.expression.function_expression import ExecutionMode
+from src.models.storage.batch import FrameBatch
 
 
 class LogicalExpression(AbstractExpression):
@@ -29,19 +35,74 @@ class LogicalExpression(AbstractExpression):
                          children=children)
 
     def evaluate(self, *args):
+        """
+        Combines the boolean masks of the children
+
+        When evaluated over a FrameBatch, AND and OR evaluate the cheaper
+        child first and the other one only on the rows which are still
+        undecided. A child storing outcomes in the batch (EXEC mode
+        functions) is evaluated on every row, so it goes first, and if both
+        do neither is skipped.
+
+        Returns:
+            np.ndarray: boolean mask with one entry per row
+        """
         if self.get_children_count() == 2:
-            outcomes = []
-            left_values = self.get_child(0).evaluate(*args)
-            right_values = self.get_child(1).evaluate(*args)
-            for value_left, value_right in zip(left_values, right_values):
-                if self.etype == ExpressionType.LOGICAL_AND:
-                    outcomes.append(value_left and value_right)
-                elif self.etype == ExpressionType.LOGICAL_OR:
-                    outcomes.append(value_left or value_right)
-            return outcomes
+            if args and isinstance(args[0], FrameBatch):
+                return self._short_circuit_evaluate(*args)
+
+            left_values = to_boolean_mask(self.get_child(0).evaluate(*args))
+            right_values = to_boolean_mask(self.get_child(1).evaluate(*args))
+            if self.etype == ExpressionType.LOGICAL_AND:
+                return left_values & right_values
+            elif self.etype == ExpressionType.LOGICAL_OR:
+                return left_values | right_values
 
         else:
-            values = self.get_child(0).evaluate(*args)
+            values = to_boolean_mask(self.get_child(0).evaluate(*args))
 
             if self.etype == ExpressionType.LOGICAL_NOT:
-                return [not value for value in values]
+                return ~values
+
+    def _short_circuit_evaluate(self, batch: FrameBatch, *args):
+        first, second = self.get_child(0), self.get_child(1)
+        writes_first, writes_second = _writes_outcomes(first), \
+            _writes_outcomes(second)
+        if writes_second and not writes_first or \
+                writes_first == writes_second and \
+                evaluation_cost(second) < evaluation_cost(first):
+            first, second = second, first
+
+        outcome = to_boolean_mask(first.evaluate(batch, *args))
+        outcome = np.broadcast_to(outcome, (batch.batch_size,)).copy()
+
+        if writes_first and writes_second:
+            # the outcomes of both are needed for every row
+            second_outcome = to_boolean_mask(second.evaluate(batch, *args))
+            if self.etype == ExpressionType.LOGICAL_AND:
+                return outcome & second_outcome
+            elif self.etype == ExpressionType.LOGICAL_OR:
+                return outcome | second_outcome
+
+        if self.etype == ExpressionType.LOGICAL_AND:
+            undecided = outcome.copy()
+        elif self.etype == ExpressionType.LOGICAL_OR:
+            undecided = ~outcome
+        if not undecided.any():
+            return outcome
+
+        # second stores no outcomes in the batch, the sub batch is dropped
+        sub_outcome = to_boolean_mask(second.evaluate(batch[undecided],
+                                                      *args))
+        outcome[undecided] = sub_outcome
+        return outcome
+
+
+def _writes_outcomes(expression: AbstractExpression) -> bool:
+    """Whether the expression stores outcomes of EXEC mode functions in the
+    batch it is evaluated over"""
+    if expression.etype == ExpressionType.FUNCTION_EXPRESSION and \
+            expression.mode == ExecutionMode.EXEC:
+        return True
+    return any(_writes_outcomes(expression.get_child(i))
+               for i in range(expression.get_children_count()))
@@ -35,7 +35,7 @@ class TupleValueExpression(AbstractExpression):
 
     @property
     def col_metadata_id(self) -> int:
-        return self._column_metadata_id
+        return self._col_metadata_id
 
     @table_metadata_id.setter
     def table_metadata_id(self, id: int):
@@ -43,7 +43,7 @@ class TupleValueExpression(AbstractExpression):
 
     @col_metadata_id.setter
     def col_metadata_id(self, id: int):
-        self._column_metadata_id = id
+        self._col_metadata_id = id
 
     @property
     def table_name(self) -> str:
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from src.configuration.configuration_manager import ConfigurationManager
-from src.utils.generic_utils import str_to_class
+from src.utils.generic_utils import LazyObject, str_to_class
 
-Loader = str_to_class(ConfigurationManager().get_value("storage", "loader"))
+# resolved on the first scan, so that importing the executors does not load
+# the video decoding and petastorm stacks
+Loader = LazyObject(lambda: str_to_class(
+    ConfigurationManager().get_value("storage", "loader")))
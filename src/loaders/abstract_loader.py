@@ -12,12 +12,18 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import threading
+import time
 from abc import ABCMeta, abstractmethod
-from typing import Iterator
+from queue import Queue, Full
+from typing import Dict, Iterator, List
 
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.configuration.configuration_manager import ConfigurationManager
+from src.expression.expression_utils import ColumnRange
 from src.models.storage.batch import FrameBatch
 from src.models.storage.frame import Frame
+from src.utils.metrics import FRAMES_SCANNED, LOADER_DECODE
 
 
 class AbstractVideoLoader(metaclass=ABCMeta):
@@ -36,11 +42,23 @@ class AbstractVideoLoader(metaclass=ABCMeta):
         curr_shard (int, optional): Shard number to load from if sharded
         total_shards (int, optional): Specify total number of shards if
                                       applicable
+        columns (List[str], optional): Columns needed by the query, loaders
+                                       may skip reading the others
+        column_ranges (Dict[str, ColumnRange], optional): Value ranges of
+                                       columns, loaders may skip rows outside
+        ordered (bool, optional): Whether the frames have to be loaded in
+                                  index order
+        prefetch_depth (int, optional): Number of batches decoded ahead on
+                                        a background thread. Defaults to
+                                        storage.prefetch_depth in eva.yml,
+                                        0 disables prefetching
     """
 
     def __init__(self, video_metadata: DataFrameMetadata, batch_size=1,
                  skip_frames=0, offset=None, limit=None, curr_shard=0,
-                 total_shards=0):
+                 total_shards=0, columns: List[str] = None,
+                 column_ranges: Dict[str, ColumnRange] = None,
+                 prefetch_depth=None, ordered=False):
         self.video_metadata = video_metadata
         self.batch_size = batch_size
         self.skip_frames = skip_frames
@@ -48,6 +66,13 @@ class AbstractVideoLoader(metaclass=ABCMeta):
         self.limit = limit
         self.curr_shard = curr_shard
         self.total_shards = total_shards
+        self.columns = columns
+        self.column_ranges = column_ranges if column_ranges else {}
+        self.ordered = ordered
+        if prefetch_depth is None:
+            prefetch_depth = ConfigurationManager().get_value(
+                "storage", "prefetch_depth")
+        self.prefetch_depth = prefetch_depth if prefetch_depth else 0
 
     def load(self) -> Iterator[FrameBatch]:
         """
@@ -58,19 +83,77 @@ class AbstractVideoLoader(metaclass=ABCMeta):
         :obj: `eva.models.FrameBatch`: An object containing a batch of frames
                                        and frame specific metadata
         """
+        if self.prefetch_depth > 0:
+            return self._prefetch(self._load_batches())
+        return self._load_batches()
 
+    def _load_batches(self) -> Iterator[FrameBatch]:
+        loader = type(self).__name__
+        decode_time = LOADER_DECODE.labels(loader)
+        frames_scanned = FRAMES_SCANNED.labels(loader)
         frames = []
+        # the time the caller spends on a batch is not decoding
+        started = time.perf_counter()
         for frame in self._load_frames():
             if self.skip_frames > 0 and frame.index % self.skip_frames != 0:
                 continue
             if self.limit and frame.index >= self.limit:
-                return FrameBatch(frames, frame.info)
+                break
             frames.append(frame)
             if len(frames) % self.batch_size == 0:
+                decode_time.observe(time.perf_counter() - started)
+                frames_scanned.inc(len(frames))
                 yield FrameBatch(frames, frame.info)
                 frames = []
+                started = time.perf_counter()
         if frames:
-            return FrameBatch(frames, frames[0].info)
+            decode_time.observe(time.perf_counter() - started)
+            frames_scanned.inc(len(frames))
+            yield FrameBatch(frames, frames[0].info)
+
+    def _prefetch(self, batches: Iterator[FrameBatch]) -> \
+            Iterator[FrameBatch]:
+        """
+        Consumes `batches` on a background thread, which keeps up to
+        `prefetch_depth` decoded batches ready in a queue. Decoding thereby
+        overlaps with the processing of the batches by the caller.
+        """
+        queue = Queue(maxsize=self.prefetch_depth)
+        stopped = threading.Event()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def worker():
+            try:
+                for batch in batches:
+                    if not put(batch):
+                        return
+                put(_END_OF_BATCHES)
+            except Exception as e:
+                put(_PrefetchError(e))
+            finally:
+                batches.close()
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = queue.get()
+                if item is _END_OF_BATCHES:
+                    break
+                if isinstance(item, _PrefetchError):
+                    raise item.error
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
 
     @abstractmethod
     def _load_frames(self) -> Iterator[Frame]:
@@ -80,3 +163,13 @@ class AbstractVideoLoader(metaclass=ABCMeta):
         Yields:
             Frame:  A frame object of the video, used for processing.
         """
+
+
+class _PrefetchError:
+    """Wraps an exception raised while prefetching batches"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+_END_OF_BATCHES = object()
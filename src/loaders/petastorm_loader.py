@@ -12,38 +12,172 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Iterator
+import re
+from typing import Dict, Iterator, List, Tuple
 
+import pyarrow.parquet as pq
 from petastorm import make_reader
+from petastorm.cache import NullCache
+from petastorm.etl.dataset_metadata import get_schema_from_dataset_url
+from petastorm.fs_utils import get_filesystem_and_path_or_paths
+from petastorm.predicates import PredicateBase
+from petastorm.py_dict_reader_worker import PyDictReaderWorker
+from petastorm.reader import Reader, normalize_dataset_url_or_urls
+from petastorm.workers_pool.thread_pool import ThreadPool
 
+from src.expression.expression_utils import ColumnRange
 from src.loaders.abstract_loader import AbstractVideoLoader
 from src.models.catalog.frame_info import FrameInfo
 from src.models.catalog.properties import ColorSpace
 from src.models.storage.frame import Frame
 
 
+FRAME_ID = 'frame_id'
+FRAME_DATA = 'frame_data'
+
+
 class PetastormLoader(AbstractVideoLoader):
     def __init__(self, *args, **kwargs):
         """
         Loads parquet data frames using petastorm
         """
         super().__init__(*args, **kwargs)
-        if self.curr_shard is not None and self.curr_shard <= 0:
+        # petastorm expects both or neither of the shard arguments; shard
+        # 0 is a valid shard, so only the shard count decides
+        if self.total_shards is None or self.total_shards <= 0:
             self.curr_shard = None
-
-        if self.total_shards is not None and self.total_shards <= 0:
             self.total_shards = None
 
     def _load_frames(self) -> Iterator[Frame]:
         info = None
-        with make_reader(self.video_metadata.file_url,
+        reader_args = {}
+        if self.ordered:
+            # the row groups are sorted by path, which is the commit order
+            # of the frames; several workers would still interleave them
+            reader_args = dict(shuffle_row_groups=False, workers_count=1)
+        predicate = self._predicate()
+        open_reader = make_reader if predicate is None else \
+            _make_pruning_reader
+        with open_reader(self.video_metadata.file_url,
+                         schema_fields=self._schema_fields(),
+                         predicate=predicate,
                          shard_count=self.total_shards,
-                         cur_shard=self.curr_shard) \
+                         cur_shard=self.curr_shard,
+                         **reader_args) \
                 as reader:
-            for frame_ind, row in enumerate(reader):
-                if info is None:
-                    (height, width, num_channels) = row.frame_data.shape
+            for row in reader:
+                frame_data = getattr(row, FRAME_DATA, None)
+                if info is None and frame_data is not None:
+                    (height, width, num_channels) = frame_data.shape
                     info = FrameInfo(height, width, num_channels,
                                      ColorSpace.BGR)
 
-                yield Frame(row.frame_id, row.frame_data, info)
+                yield Frame(row.frame_id, frame_data, info)
+
+    def _schema_fields(self) -> List[str]:
+        """
+        Fields petastorm has to read, None for all of them. The frame id is
+        always read, the frame data only if the query references it.
+        """
+        if self.columns is None:
+            return None
+        return [re.escape(column)
+                for column in sorted(set(self.columns) | {FRAME_ID})]
+
+    def _predicate(self) -> '_InRanges':
+        """
+        Row groups whose parquet statistics lie outside the column ranges
+        are skipped. Of the others petastorm first reads only the predicate
+        fields and decodes the other fields just for the matching rows.
+        """
+        if not self.column_ranges:
+            return None
+        schema = get_schema_from_dataset_url(self.video_metadata.file_url)
+        ranges = {column: column_range
+                  for column, column_range in self.column_ranges.items()
+                  if column in schema.fields}
+        if not ranges:
+            return None
+        return _InRanges(ranges)
+
+
+class _InRanges(PredicateBase):
+    """Checks that the values of the predicate fields lie in their ranges"""
+
+    def __init__(self, ranges: Dict[str, ColumnRange]):
+        self.ranges = ranges
+
+    def get_fields(self):
+        return set(self.ranges)
+
+    def do_include(self, values) -> bool:
+        return all(column_range.contains(values[column])
+                   for column, column_range in self.ranges.items())
+
+    def may_include(self, statistics: Dict[str, Tuple]) -> bool:
+        """
+        Whether a row group may hold matching rows
+
+        Arguments:
+            statistics (Dict[str, Tuple]): (min, max) of the columns of the
+                                           row group which have statistics
+        """
+        try:
+            return all(column_range.overlaps(*statistics[column])
+                       for column, column_range in self.ranges.items()
+                       if column in statistics)
+        except TypeError:
+            # statistics of another type than the range, e.g. bytes
+            return True
+
+
+class _PruningReader(Reader):
+    """
+    Skips the row groups whose parquet statistics rule out an _InRanges
+    predicate. Petastorm only prunes by partition, and ignores the
+    `filters` of make_reader for other columns.
+    """
+
+    def _apply_predicate_to_row_groups(self, dataset, row_groups, predicate):
+        indexes, worker_predicate = super()._apply_predicate_to_row_groups(
+            dataset, row_groups, predicate)
+        if isinstance(predicate, _InRanges):
+            footers = {}
+            indexes = [index for index in indexes
+                       if predicate.may_include(_row_group_statistics(
+                           dataset, row_groups[index], footers))]
+        return indexes, worker_predicate
+
+
+def _row_group_statistics(dataset, piece, footers: Dict) -> Dict[str, Tuple]:
+    """
+    (min, max) per column of a row group, footers caches the parquet
+    footers of the files by path
+    """
+    if piece.row_group is None:
+        return {}
+    if piece.path not in footers:
+        with dataset.fs.open(piece.path) as parquet_file:
+            footers[piece.path] = pq.ParquetFile(parquet_file).metadata
+    row_group = footers[piece.path].row_group(piece.row_group)
+    statistics = {}
+    for i in range(row_group.num_columns):
+        column = row_group.column(i)
+        if column.statistics is not None and column.statistics.has_min_max:
+            statistics[column.path_in_schema] = (column.statistics.min,
+                                                 column.statistics.max)
+    return statistics
+
+
+def _make_pruning_reader(dataset_url, workers_count=10, **kwargs) -> Reader:
+    """
+    make_reader with a thread pool which returns a _PruningReader
+    """
+    filesystem, dataset_path = get_filesystem_and_path_or_paths(
+        normalize_dataset_url_or_urls(dataset_url))
+    return _PruningReader(filesystem, dataset_path,
+                          reader_pool=ThreadPool(workers_count),
+                          cache=NullCache(),
+                          worker_class=PyDictReaderWorker,
+                          is_batched_reader=False,
+                          **kwargs)
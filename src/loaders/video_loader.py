@@ -12,7 +12,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Iterator
+from typing import Iterator, Tuple
 
 import cv2
 
@@ -32,22 +32,74 @@ class VideoLoader(AbstractVideoLoader):
          """
         super().__init__(*args, **kwargs)
 
+    # Gaps between two frames to be returned that are at least this long are
+    # crossed with a seek, which only decodes from the preceding keyframe,
+    # instead of grabbing every frame in between
+    SEEK_THRESHOLD = 64
+
     def _load_frames(self) -> Iterator[Frame]:
         video = cv2.VideoCapture(self.video_metadata.file_url)
-        video_start = self.offset if self.offset else 0
-        video.set(cv2.CAP_PROP_POS_FRAMES, video_start)
+        frame_ind, stop_ind = self._frame_range(video)
+        if frame_ind > 0:
+            video.set(cv2.CAP_PROP_POS_FRAMES, frame_ind)
 
         LoggingManager().log("Loading frames", LoggingLevel.INFO)
 
-        _, frame = video.read()
-        frame_ind = video_start - 1
-
         info = None
-        if frame is not None:
-            (height, width, num_channels) = frame.shape
-            info = FrameInfo(height, width, num_channels, ColorSpace.BGR)
-
-        while frame is not None:
-            frame_ind += 1
-            yield Frame(frame_ind, frame, info)
-            _, frame = video.read()
+        try:
+            while True:
+                next_ind = self._next_frame_index(frame_ind)
+                if stop_ind is not None and next_ind >= stop_ind:
+                    break
+                if not self._advance(video, frame_ind, next_ind):
+                    break
+                _, frame = video.read()
+                if frame is None:
+                    break
+                if info is None:
+                    (height, width, num_channels) = frame.shape
+                    info = FrameInfo(height, width, num_channels,
+                                     ColorSpace.BGR)
+                yield Frame(next_ind, frame, info)
+                frame_ind = next_ind + 1
+        finally:
+            video.release()
+
+    def _frame_range(self, video: cv2.VideoCapture) -> Tuple[int, int]:
+        """
+        Returns the first frame index and the index to stop before, None to
+        read till the end. A sharded loader reads a contiguous part of the
+        frames between offset and limit.
+        """
+        start_ind = self.offset if self.offset else 0
+        stop_ind = self.limit if self.limit else None
+        if self.total_shards and self.total_shards > 1:
+            if stop_ind is None:
+                stop_ind = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+            shard_size = -(-(stop_ind - start_ind) // self.total_shards)
+            start_ind = min(start_ind + self.curr_shard * shard_size,
+                            stop_ind)
+            stop_ind = min(start_ind + shard_size, stop_ind)
+        return start_ind, stop_ind
+
+    def _next_frame_index(self, frame_ind: int) -> int:
+        """
+        Returns the first index from frame_ind onwards that is not skipped
+        """
+        if self.skip_frames > 0:
+            return -(-frame_ind // self.skip_frames) * self.skip_frames
+        return frame_ind
+
+    def _advance(self, video: cv2.VideoCapture, frame_ind: int,
+                 next_ind: int) -> bool:
+        """
+        Moves the video from frame_ind to next_ind without converting the
+        frames in between. Returns False if the video ends before next_ind.
+        """
+        gap = next_ind - frame_ind
+        if gap >= self.SEEK_THRESHOLD:
+            return video.set(cv2.CAP_PROP_POS_FRAMES, next_ind)
+        for _ in range(gap):
+            if not video.grab():
+                return False
+        return True
@@ -78,16 +78,17 @@ class Prediction(BasePrediction):
         Returns:
             List[Prediction]
         """
-        assert len(batch.frames) == len(predictions)
-        assert len(batch.frames) == len(scores)
+        frames = batch.frames
+        assert len(frames) == len(predictions)
+        assert len(frames) == len(scores)
         if boxes is not None:
-            assert len(batch.frames) == len(boxes)
+            assert len(frames) == len(boxes)
 
         predictions_ = []
-        for i in range(len(batch.frames)):
+        for i in range(len(frames)):
             prediction_boxes = boxes[i] if boxes is not None else None
             predictions_.append(
-                Prediction(batch.frames[i], predictions[i], scores[i],
+                Prediction(frames[i], predictions[i], scores[i],
                            boxes=prediction_boxes))
 
         return predictions_
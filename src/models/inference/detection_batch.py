@@ -0,0 +1,286 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Sequence
+
+import numpy as np
+
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.representation import BoundingBox, Point
+from src.models.storage.batch import FrameBatch
+
+
+class DetectionBatch:
+    """
+    Detections made on all the frames of a batch, stored column wise
+
+    The detections of every frame are laid out one after another: label ids,
+    scores and boxes are arrays over all the detections of the batch and
+    the detections of frame i are the rows offsets[i]:offsets[i + 1]. A
+    detection takes a few dozen bytes instead of the Python objects of a
+    Prediction.
+
+    The batch behaves as a sequence of Prediction objects, one per frame,
+    which are only built when accessed. Comparing it with a label gives a
+    boolean mask over the frames, the same outcome as comparing each
+    Prediction (frames containing the label), computed without building
+    them.
+
+    Arguments:
+        offsets (np.ndarray): start of the detections of every frame
+            followed by the total number of detections
+        label_ids (np.ndarray): index of the label of every detection
+        scores (np.ndarray): score of every detection
+        labels (Sequence[str]): names of the label ids
+        boxes (np.ndarray): (N, 4) top left x, y and bottom right x, y of
+            every detection, None if the model does not locate them
+        frames (FrameBatch): batch the detections were made on, used for
+            the frames of the Prediction objects
+    """
+
+    # numpy operators defer to the comparison methods of this class rather
+    # than iterating over it
+    __array_ufunc__ = None
+
+    def __init__(self, offsets: np.ndarray, label_ids: np.ndarray,
+                 scores: np.ndarray, labels: Sequence[str],
+                 boxes: np.ndarray = None, frames: FrameBatch = None):
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._label_ids = np.asarray(label_ids, dtype=np.int32)
+        self._scores = np.asarray(scores, dtype=np.float32)
+        self._labels = np.asarray(labels, dtype=str)
+        self._boxes = None if boxes is None else \
+            np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self._frames = frames
+        self._frame_of_detection = None
+
+    @staticmethod
+    def from_frames(frames: FrameBatch, label_ids: List[np.ndarray],
+                    scores: List[np.ndarray], labels: Sequence[str],
+                    boxes: List[np.ndarray] = None) -> 'DetectionBatch':
+        """
+        Factory method for building the batch out of the detections of
+        every frame
+
+        Arguments:
+            frames (FrameBatch): batch the detections were made on
+            label_ids (List[np.ndarray]): label ids per frame
+            scores (List[np.ndarray]): scores per frame
+            labels (Sequence[str]): names of the label ids
+            boxes (List[np.ndarray]): (N, 4) boxes per frame
+
+        Returns:
+            DetectionBatch
+        """
+        counts = [len(frame_scores) for frame_scores in scores]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return DetectionBatch(
+            offsets,
+            _concatenate(label_ids, np.int32),
+            _concatenate(scores, np.float32),
+            labels,
+            boxes=None if boxes is None else
+            _concatenate(boxes, np.float32).reshape(-1, 4),
+            frames=frames)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets
+
+    @property
+    def label_ids(self) -> np.ndarray:
+        return self._label_ids
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self._scores
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self._boxes
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._labels
+
+    @property
+    def frames(self) -> FrameBatch:
+        return self._frames
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: number of detections of every frame
+        """
+        return np.diff(self._offsets)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: memory taken by the detection arrays
+        """
+        size = self._offsets.nbytes + self._label_ids.nbytes + \
+            self._scores.nbytes
+        if self._boxes is not None:
+            size += self._boxes.nbytes
+        return size
+
+    def with_frames(self, frames: FrameBatch) -> 'DetectionBatch':
+        """
+        Returns:
+            DetectionBatch: the same detections bound to other frames, e.g.
+            None before sending them to another process
+        """
+        return DetectionBatch(self._offsets, self._label_ids, self._scores,
+                              self._labels, self._boxes, frames)
+
+    def contains(self, label) -> np.ndarray:
+        """
+        Checks which frames have a detection with a label
+
+        Arguments:
+            label (str or Sequence[str]): label to look for, or one label
+                per frame
+
+        Returns:
+            np.ndarray: boolean mask over the frames
+        """
+        if isinstance(label, (list, tuple, np.ndarray)):
+            label = np.asarray(label)
+            if len(label) != len(self):
+                raise ValueError('Expected one label per frame')
+            names = self._labels[self._label_ids]
+            hits = names == label.astype(str)[self._frame_ids()]
+        else:
+            ids = np.flatnonzero(self._labels == str(label))
+            hits = np.isin(self._label_ids, ids)
+        return np.bincount(self._frame_ids()[hits],
+                           minlength=len(self)) > 0
+
+    def tolist(self) -> List[Prediction]:
+        return list(self)
+
+    def __array__(self, dtype=None):
+        # np.asarray gives one Prediction per frame
+        column = np.empty(len(self), dtype=object)
+        for i, prediction in enumerate(self):
+            column[i] = prediction
+        return column
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._prediction(i)
+
+    def __getitem__(self, indices):
+        """
+        Arguments:
+            indices (int, slice, list, np.ndarray): a frame, or the frames
+                of a slice, index array or boolean mask
+
+        Returns:
+            Prediction for a single frame, DetectionBatch otherwise
+        """
+        if isinstance(indices, (int, np.integer)):
+            if indices < 0:
+                indices += len(self)
+            if not 0 <= indices < len(self):
+                raise IndexError('DetectionBatch index out of range')
+            return self._prediction(int(indices))
+
+        positions = np.arange(len(self))[indices]
+        counts = self.counts[positions]
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # row of every selected detection in the detection arrays
+        rows = np.repeat(self._offsets[positions] - offsets[:-1], counts) + \
+            np.arange(offsets[-1])
+        frames = None if self._frames is None else self._frames[positions]
+        return DetectionBatch(
+            offsets, self._label_ids[rows], self._scores[rows], self._labels,
+            None if self._boxes is None else self._boxes[rows], frames)
+
+    def __contains__(self, label) -> bool:
+        return bool(self.contains(label).any())
+
+    def __eq__(self, other):
+        """
+        Compared with another DetectionBatch, checks whether both hold the
+        same detections. Compared with a label (or one label per frame),
+        gives the frames containing it, like `Prediction.__eq__` does.
+        """
+        if isinstance(other, DetectionBatch):
+            return np.array_equal(self._offsets, other._offsets) and \
+                np.array_equal(self._labels[self._label_ids],
+                               other._labels[other._label_ids]) and \
+                np.array_equal(self._scores, other._scores) and \
+                _boxes_equal(self._boxes, other._boxes)
+        return self.contains(other)
+
+    def __ne__(self, other):
+        if isinstance(other, DetectionBatch):
+            return not self == other
+        return ~self.contains(other)
+
+    # detections have no order, as for BasePrediction
+    def __gt__(self, other):
+        return np.zeros(len(self), dtype=bool)
+
+    def __ge__(self, other):
+        return np.zeros(len(self), dtype=bool)
+
+    def __lt__(self, other):
+        return np.zeros(len(self), dtype=bool)
+
+    def __le__(self, other):
+        return np.zeros(len(self), dtype=bool)
+
+    __hash__ = None
+
+    def _frame_ids(self) -> np.ndarray:
+        # frame position of every detection
+        if self._frame_of_detection is None:
+            self._frame_of_detection = np.repeat(np.arange(len(self)),
+                                                 self.counts)
+        return self._frame_of_detection
+
+    def _prediction(self, i: int) -> Prediction:
+        start, end = self._offsets[i], self._offsets[i + 1]
+        boxes = None
+        if self._boxes is not None:
+            boxes = [BoundingBox(Point(x1, y1), Point(x2, y2))
+                     for x1, y1, x2, y2 in self._boxes[start:end].tolist()]
+        frame = None if self._frames is None else self._frames.frames[i]
+        return Prediction(frame,
+                          self._labels[self._label_ids[start:end]].tolist(),
+                          self._scores[start:end].tolist(),
+                          boxes=boxes)
+
+
+def _concatenate(arrays: List[np.ndarray], dtype) -> np.ndarray:
+    if not arrays:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate([np.asarray(array, dtype=dtype).ravel()
+                           for array in arrays])
+
+
+def _boxes_equal(boxes, other_boxes) -> bool:
+    if boxes is None or other_boxes is None:
+        return boxes is None and other_boxes is None
+    return np.array_equal(boxes, other_boxes)
@@ -12,15 +12,22 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List
+from typing import Dict, List
 
 import numpy as np
 
+from src.models.storage.frame import Frame
+
 
 class FrameBatch:
     """
     Data model used for storing a batch of frames
 
+    The batch is stored column wise: the frame indices are kept in an int
+    array, the pixel data of all the frames in a single contiguous
+    (N, H, W, C) ndarray and every outcome in a column of its own. Frames in
+    a batch are expected to share the same shape and frame info.
+
     Arguments:
         frames (List[Frame]): List of video frames
         info (FrameInfo): Information about the frames in the batch
@@ -37,32 +44,98 @@ class FrameBatch:
         if temp_outcomes is None:
             temp_outcomes = dict()
 
+        frames = list(frames)
         self._info = info
-        self._frames = tuple(frames)
-        self._batch_size = len(frames)
-        self._outcomes = outcomes
-        self._temp_outcomes = temp_outcomes
+        self._indices = np.array([frame.index for frame in frames],
+                                 dtype=np.int64)
+        if frames:
+            self._data = np.stack([frame.data for frame in frames])
+            self._frame_info = frames[0].info
+        else:
+            self._data = np.empty((0,))
+            self._frame_info = None
+        self._frames = None
+        self._outcomes = {name: _to_column(values)
+                          for name, values in outcomes.items()}
+        self._temp_outcomes = {name: _to_column(values)
+                               for name, values in temp_outcomes.items()}
+
+    @staticmethod
+    def from_numpy(indices: np.ndarray, data: np.ndarray, info,
+                   frame_info=None, outcomes=None,
+                   temp_outcomes=None) -> 'FrameBatch':
+        """
+        Factory method for building a batch directly from arrays, without
+        going through Frame objects
+
+        Arguments:
+            indices (np.ndarray): index of every frame in the video
+            data (np.ndarray): (N, H, W, C) array holding the frames
+            info (FrameInfo): Information about the frames in the batch
+            frame_info (FrameInfo): frame info shared by the frames
+            outcomes (Dict[str, np.ndarray]): outcome columns
+            temp_outcomes (Dict[str, np.ndarray]): temporary outcome columns
+
+        Returns:
+            FrameBatch
+        """
+        batch = FrameBatch([], info)
+        batch._indices = np.asarray(indices, dtype=np.int64)
+        batch._data = data
+        batch._frame_info = frame_info
+        if outcomes is not None:
+            batch._outcomes = {name: _to_column(values)
+                               for name, values in outcomes.items()}
+        if temp_outcomes is not None:
+            batch._temp_outcomes = {name: _to_column(values)
+                                    for name, values in temp_outcomes.items()}
+        return batch
 
     @property
     def frames(self):
+        """
+        Frame objects of the batch. They are built on first access and
+        share their data with the batch buffer.
+        """
+        if self._frames is None:
+            self._frames = tuple(
+                Frame(index, data, self._frame_info)
+                for index, data in zip(self._indices.tolist(), self._data))
         return self._frames
 
     @property
     def info(self):
         return self._info
 
+    @property
+    def frame_info(self):
+        return self._frame_info
+
     @property
     def batch_size(self):
-        return self._batch_size
+        return len(self._indices)
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices
 
-    def frames_as_numpy_array(self):
-        return np.array([frame.data for frame in self.frames])
+    @property
+    def outcomes(self) -> Dict[str, np.ndarray]:
+        """
+        Outcome columns of the batch by name, without the temporary ones
+        """
+        return self._outcomes
+
+    def frames_as_numpy_array(self) -> np.ndarray:
+        return self._data
 
     def __eq__(self, other: 'FrameBatch'):
         return self.info == other.info and \
-            self.frames == other.frames and \
-            self._outcomes == other._outcomes and \
-            self._temp_outcomes == other._temp_outcomes
+            self._frame_info == other._frame_info and \
+            np.array_equal(self._indices, other._indices) and \
+            np.array_equal(self._data, other._data) and \
+            _columns_equal(self._outcomes, other._outcomes) and \
+            _columns_equal(self._temp_outcomes, other._temp_outcomes)
 
     def set_outcomes(self, name, predictions: 'BasePrediction',
                      is_temp: bool = False):
@@ -79,9 +152,9 @@ class FrameBatch:
 
         """
         if is_temp:
-            self._temp_outcomes[name] = predictions
+            self._temp_outcomes[name] = _to_column(predictions)
         else:
-            self._outcomes[name] = predictions
+            self._outcomes[name] = _to_column(predictions)
 
     def get_outcomes_for(self, name: str) -> List['BasePrediction']:
         """
@@ -92,10 +165,26 @@ class FrameBatch:
         Returns:
             List[BasePrediction]
         """
+        column = self.get_outcome_column(name)
+        if column is None:
+            return []
+        return column.tolist()
+
+    def get_outcome_column(self, name: str) -> np.ndarray:
+        """
+        Returns the outcome column stored for a name without converting it
+        to a list
+
+        Arguments:
+            name (str): name of the udf on which predicate is being executed
+
+        Returns:
+            np.ndarray: the outcome column, None if not present
+        """
         if name in self._outcomes:
-            return self._outcomes.get(name, [])
+            return self._outcomes[name]
         else:
-            return self._temp_outcomes.get(name, [])
+            return self._temp_outcomes.get(name, None)
 
     def has_outcome(self, name: str):
         """
@@ -110,31 +199,79 @@ class FrameBatch:
 
         return name in self._outcomes or name in self._temp_outcomes
 
+    def scatter_outcomes(self, sub_batch: 'FrameBatch', mask: np.ndarray):
+        """
+        Copies the outcomes of a batch obtained with `self[mask]` back into
+        this batch. Rows which are not part of the sub batch are set to None
+        for outcomes which this batch does not have yet.
+
+        Arguments:
+            sub_batch (FrameBatch): batch holding the rows selected by mask
+            mask (np.ndarray): boolean mask used to build the sub batch
+        """
+        for outcomes, sub_outcomes in (
+                (self._outcomes, sub_batch._outcomes),
+                (self._temp_outcomes, sub_batch._temp_outcomes)):
+            for name, sub_column in sub_outcomes.items():
+                column = outcomes.get(name, None)
+                if column is None or len(column) != self.batch_size:
+                    column = np.empty(self.batch_size, dtype=object)
+                else:
+                    column = column.astype(object)
+                column[mask] = sub_column
+                outcomes[name] = column
+
     def _get_frames_from_indices(self, required_frame_ids):
-        new_frames = [self.frames[i] for i in required_frame_ids]
-        new_batch = FrameBatch(new_frames, self.info)
-        for key in self._outcomes:
-            new_batch._outcomes[key] = [self._outcomes[key][i]
-                                        for i in required_frame_ids]
-        for key in self._temp_outcomes:
-            new_batch._temp_outcomes[key] = [self._temp_outcomes[key][i]
-                                             for i in required_frame_ids]
-        return new_batch
+        """
+        Builds a new batch out of the rows selected by `required_frame_ids`.
+        Both a slice (returns views) and an index array or boolean mask
+        (one take per column) are supported.
+        """
+        return FrameBatch.from_numpy(
+            self._indices[required_frame_ids],
+            self._data[required_frame_ids],
+            self.info,
+            frame_info=self._frame_info,
+            outcomes={key: column[required_frame_ids]
+                      for key, column in self._outcomes.items()},
+            temp_outcomes={key: column[required_frame_ids]
+                           for key, column in self._temp_outcomes.items()})
 
     def __getitem__(self, indices) -> 'FrameBatch':
         """
         Takes as input the slice for the list
         Arguments:
-            item (list or Slice):
+            item (list, Slice, np.ndarray): index list, slice, index array
+            or boolean mask
 
         :return:
         """
         if isinstance(indices, list):
+            return self._get_frames_from_indices(
+                np.array(indices, dtype=np.intp))
+        elif isinstance(indices, (slice, np.ndarray)):
             return self._get_frames_from_indices(indices)
-        elif isinstance(indices, slice):
-            start = indices.start if indices.start else 0
-            end = indices.stop if indices.stop else len(self.frames)
-            if end < 0:
-                end = len(self.frames) + end
-            step = indices.step if indices.step else 1
-            return self._get_frames_from_indices(range(start, end, step))
+
+
+def _to_column(values) -> np.ndarray:
+    """
+    Converts a list of outcomes to a one dimensional column. Outcomes which
+    are not plain scalars (predictions, lists) are kept in an object array.
+    """
+    if isinstance(values, np.ndarray):
+        return values
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def _columns_equal(columns, other_columns) -> bool:
+    if columns.keys() != other_columns.keys():
+        return False
+    for name, column in columns.items():
+        if len(column) != len(other_columns[name]):
+            return False
+        if list(column) != list(other_columns[name]):
+            return False
+    return True
@@ -12,9 +12,13 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from src.configuration.configuration_manager import ConfigurationManager
+from src.expression.expression_utils import extract_column_ranges, \
+    extract_referenced_columns
 from src.optimizer.generators.base import Generator
 from src.optimizer.operators import LogicalGet, Operator, LogicalFilter, \
     LogicalProject
+from src.planner.parallel_scan_plan import ParallelScanPlan
 from src.planner.seq_scan_plan import SeqScanPlan
 from src.planner.storage_plan import StoragePlan
 
@@ -23,10 +27,10 @@ class ScanGenerator(Generator):
     def __init__(self):
         self._target_list = None
         self._predicate = None
-        self._plan = None
+        self._dataset = None
 
     def _visit_logical_get(self, operator: LogicalGet):
-        self._plan = StoragePlan(operator.dataset_metadata)
+        self._dataset = operator.dataset_metadata
 
     def _visit_logical_filter(self, operator: LogicalFilter):
         self._predicate = operator.predicate
@@ -50,6 +54,22 @@ class ScanGenerator(Generator):
     def build(self, operator: Operator):
         self.__init__()
         self._visit(operator)
+        columns = None
+        if self._target_list is not None:
+            columns = extract_referenced_columns(
+                self._target_list + [self._predicate])
+        storage = StoragePlan(self._dataset, columns=columns,
+                              column_ranges=extract_column_ranges(
+                                  self._predicate))
         seq_scan = SeqScanPlan(self._predicate, self._target_list)
-        seq_scan.append_child(self._plan)
-        return seq_scan
+        seq_scan.append_child(storage)
+
+        degree = ConfigurationManager().get_value("executor",
+                                                  "parallel_scan_workers")
+        if not degree or degree <= 1:
+            return seq_scan
+        ordered = ConfigurationManager().get_value("executor",
+                                                   "ordered_parallel_scan")
+        parallel_scan = ParallelScanPlan(degree, bool(ordered))
+        parallel_scan.append_child(seq_scan)
+        return parallel_scan
@@ -34,6 +34,7 @@ class OperatorType(IntEnum):
     LOGICALINSERT = 4,
     LOGICALCREATE = 5,
     LOGICALCREATEUDF = 6,
+    LOGICALLOADDATA = 7,
 
 
 class Operator:
@@ -110,13 +111,13 @@ class LogicalInsert(Operator):
             [catalog id for the video table]
         column_list{List[AbstractExpression]}:
             [After binding annotated column_list]
-        value_list{List[AbstractExpression]}:
-            [value list to insert]
+        value_list{List[List[AbstractExpression]]}:
+            [values of every row to insert]
     """
 
     def __init__(self, video: TableRef, video_catalog_id: int,
                  column_list: List[AbstractExpression],
-                 value_list: List[AbstractExpression],
+                 value_list: List[List[AbstractExpression]],
                  children: List = None):
         super().__init__(OperatorType.LOGICALINSERT, children)
         self._video = video
@@ -232,3 +233,32 @@ class LogicalCreateUDF(Operator):
     @property
     def udf_type(self):
         return self._udf_type
+
+
+class LogicalLoadData(Operator):
+    """Logical node for load data operation
+
+    Arguments:
+        table(TableRef): table to load the data into
+        table_metadata_id(int): catalog id of the table
+        path(Path): file containing the rows to load
+    """
+
+    def __init__(self, table: TableRef, table_metadata_id: int, path: Path,
+                 children: List = None):
+        super().__init__(OperatorType.LOGICALLOADDATA, children)
+        self._table = table
+        self._table_metadata_id = table_metadata_id
+        self._path = path
+
+    @property
+    def table(self):
+        return self._table
+
+    @property
+    def table_metadata_id(self):
+        return self._table_metadata_id
+
+    @property
+    def path(self):
+        return self._path
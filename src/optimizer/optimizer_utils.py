@@ -18,12 +18,16 @@ from src.catalog.catalog_manager import CatalogManager
 from src.catalog.column_type import ColumnType
 from typing import List
 
+from src.configuration.configuration_manager import ConfigurationManager
 from src.expression.abstract_expression import AbstractExpression
+from src.expression.function_expression import FunctionExpression
 from src.expression.tuple_value_expression import ExpressionType, \
     TupleValueExpression
 
 from src.parser.create_statement import ColumnDefinition
 from src.parser.types import ParserColumnDataType
+from src.udfs.inference_pool import PooledUdf
+from src.udfs.udf_result_cache import UdfCacheKey, udf_version
 
 from src.utils.logging_manager import LoggingLevel
 from src.utils.logging_manager import LoggingManager
@@ -66,6 +70,11 @@ def bind_columns_expr(target_columns: List[AbstractExpression],
     if target_columns is None:
         return
 
+    if not column_mapping:
+        # TODO: Remove this and bring uniform interface throughout the system.
+        _old_bind_tuple_value_exprs(_tuple_value_exprs(target_columns))
+        return
+
     for column_exp in target_columns:
         child_count = column_exp.get_children_count()
         for i in range(child_count):
@@ -78,38 +87,101 @@ def bind_columns_expr(target_columns: List[AbstractExpression],
 def bind_tuple_value_expr(expr: TupleValueExpression, column_mapping):
     if not column_mapping:
         # TODO: Remove this and bring uniform interface throughout the system.
-        _old_bind_tuple_value_expr(expr)
+        _old_bind_tuple_value_exprs([expr])
         return
 
     expr.col_object = column_mapping.get(expr.col_name.lower(), None)
 
 
-def _old_bind_tuple_value_expr(expr):
+def _tuple_value_exprs(expressions: List[AbstractExpression]) \
+        -> List[TupleValueExpression]:
+    """Returns the column references in the expression trees"""
+    tuple_exprs = []
+    for expr in expressions:
+        if expr.etype == ExpressionType.TUPLE_VALUE:
+            tuple_exprs.append(expr)
+        tuple_exprs.extend(_tuple_value_exprs(
+            [expr.get_child(i) for i in range(expr.get_children_count())]))
+    return tuple_exprs
+
+
+def _old_bind_tuple_value_exprs(exprs: List[TupleValueExpression]):
     """
-    NOTE: No tests for this  should be combined with latest interface
+    Binds the column references of every table with one catalog lookup
     """
     catalog = CatalogManager()
-    table_id, column_ids = catalog.get_table_bindings(None,
-                                                      expr.table_name,
-                                                      [expr.col_name])
-    expr.table_metadata_id = table_id
-    if not isinstance(column_ids, list) or len(column_ids) == 0:
-        LoggingManager().log(
-            "Optimizer Utils:: bind_tuple_expr: \
-            Cannot bind column name provided", LoggingLevel.ERROR)
-    expr.col_metadata_id = column_ids.pop()
+    exprs_by_table = {}
+    for expr in exprs:
+        exprs_by_table.setdefault(expr.table_name, []).append(expr)
+
+    for table_name, table_exprs in exprs_by_table.items():
+        table_id, column_ids = catalog.get_table_bindings(
+            None, table_name, [expr.col_name for expr in table_exprs])
+        for i, expr in enumerate(table_exprs):
+            expr.table_metadata_id = table_id
+            if i >= len(column_ids) or column_ids[i] is None:
+                LoggingManager().log(
+                    "Optimizer Utils:: bind_tuple_expr: \
+                    Cannot bind column name provided", LoggingLevel.ERROR)
+                continue
+            expr.col_metadata_id = column_ids[i]
 
 
 def bind_predicate_expr(predicate: AbstractExpression, column_mapping):
     # This function will be expanded as we add support for
     # complex predicate expressions and sub select predicates
 
-    child_count = predicate.get_children_count()
-    for i in range(child_count):
-        bind_predicate_expr(predicate.get_child(i), column_mapping)
+    bind_columns_expr([predicate], column_mapping)
+
+
+def bind_udf_cache_keys(expressions: List[AbstractExpression],
+                        dataset: DataFrameMetadata):
+    """Enables the udf result cache for the function expressions which
+    call a udf registered in the catalog. Nothing is done if the cache is
+    disabled in the configuration.
+
+    Arguments:
+        expressions {List[AbstractExpression]} -- expression trees to bind
+        dataset {DataFrameMetadata} -- dataset the expressions are run on
+    """
+    if expressions is None or dataset is None:
+        return
+    if not ConfigurationManager().get_value('cache', 'udf_cache_enabled'):
+        return
+
+    for expr in expressions:
+        child_count = expr.get_children_count()
+        for i in range(child_count):
+            bind_udf_cache_keys([expr.get_child(i)], dataset)
+
+        if isinstance(expr, FunctionExpression) and expr.name is not None:
+            udf = CatalogManager().get_udf_by_name(expr.name)
+            if udf is not None:
+                expr.cache_key = UdfCacheKey(udf.name, udf_version(udf),
+                                             dataset.id)
+
+
+def bind_udf_functions(expressions: List[AbstractExpression]):
+    """Binds the function expressions which call a udf registered in the
+    catalog to the udf implementation, run by the InferencePool. Functions
+    which are already bound are left alone.
+
+    Arguments:
+        expressions {List[AbstractExpression]} -- expression trees to bind
+    """
+    if expressions is None:
+        return
+
+    for expr in expressions:
+        child_count = expr.get_children_count()
+        for i in range(child_count):
+            bind_udf_functions([expr.get_child(i)])
 
-    if predicate.etype == ExpressionType.TUPLE_VALUE:
-        bind_tuple_value_expr(predicate, column_mapping)
+        if isinstance(expr, FunctionExpression) and expr.name is not None \
+                and expr.function is None:
+            udf = CatalogManager().get_udf_by_name(expr.name)
+            if udf is not None:
+                expr.function = PooledUdf(udf.name, udf.impl_file_path)
 
 
 def create_column_metadata(col_list: List[ColumnDefinition]):
@@ -16,16 +16,19 @@ from src.catalog.models.df_metadata import DataFrameMetadata
 from src.expression.abstract_expression import AbstractExpression
 from src.optimizer.operators import (LogicalGet, LogicalFilter, LogicalProject,
                                      LogicalInsert, LogicalCreate,
-                                     LogicalCreateUDF)
+                                     LogicalCreateUDF, LogicalLoadData)
 from src.parser.statement import AbstractStatement
 from src.parser.select_statement import SelectStatement
 from src.parser.insert_statement import InsertTableStatement
 from src.parser.create_statement import CreateTableStatement
 from src.parser.create_udf_statement import CreateUDFStatement
+from src.parser.load_statement import LoadDataStatement
 from src.optimizer.optimizer_utils import (bind_table_ref, bind_columns_expr,
                                            bind_predicate_expr,
                                            create_column_metadata,
                                            bind_dataset,
+                                           bind_udf_cache_keys,
+                                           bind_udf_functions,
                                            column_definition_to_udf_io)
 from src.parser.table_ref import TableRef
 from src.utils.logging_manager import LoggingLevel, LoggingManager
@@ -48,6 +51,7 @@ class StatementToPlanConvertor:
             video {TableRef} -- [Input table ref object created by the parser]
         """
         catalog_vid_metadata = bind_dataset(video.table_info)
+        self._dataset = catalog_vid_metadata
 
         self._populate_column_map(catalog_vid_metadata)
 
@@ -80,6 +84,8 @@ class StatementToPlanConvertor:
     def _visit_projection(self, select_columns):
         # Bind the columns using catalog
         bind_columns_expr(select_columns, self._column_map)
+        bind_udf_functions(select_columns)
+        bind_udf_cache_keys(select_columns, self._dataset)
         projection_opr = LogicalProject(select_columns)
         projection_opr.append_child(self._plan)
         self._plan = projection_opr
@@ -87,6 +93,8 @@ class StatementToPlanConvertor:
     def _visit_select_predicate(self, predicate: AbstractExpression):
         # Binding the expression
         bind_predicate_expr(predicate, self._column_map)
+        bind_udf_functions([predicate])
+        bind_udf_cache_keys([predicate], self._dataset)
         filter_opr = LogicalFilter(predicate)
         filter_opr.append_child(self._plan)
         self._plan = filter_opr
@@ -154,6 +162,18 @@ class StatementToPlanConvertor:
                                           statement.udf_type)
         self._plan = create_udf_opr
 
+    def visit_load_data(self, statement: LoadDataStatement):
+        """Convertor for parsed load data statement
+
+        Arguments:
+            statement {LoadDataStatement} -- Load Data Statement
+        """
+        table = statement.table
+        catalog_table_id = bind_table_ref(table.table_info)
+        load_data_opr = LogicalLoadData(table, catalog_table_id,
+                                        statement.path)
+        self._plan = load_data_opr
+
     def visit(self, statement: AbstractStatement):
         """Based on the instance of the statement the corresponding
            visit is called.
@@ -170,6 +190,8 @@ class StatementToPlanConvertor:
             self.visit_create(statement)
         elif isinstance(statement, CreateUDFStatement):
             self.visit_create_udf(statement)
+        elif isinstance(statement, LoadDataStatement):
+            self.visit_load_data(statement)
         return self._plan
 
     @property
@@ -25,6 +25,7 @@ ASC:                                 'ASC';
 BY:                                  'BY';
 COLUMN:                              'COLUMN';
 CREATE:                              'CREATE';
+DATA:                                'DATA';
 DATABASE:                            'DATABASE';
 DEFAULT:                             'DEFAULT';
 DELETE:                              'DELETE';
@@ -43,6 +44,7 @@ IF:                                  'IF';
 IN:                                  'IN';
 INTO:                                'INTO';
 INDEX:                               'INDEX';
+INFILE:                              'INFILE';
 INSERT:                              'INSERT';
 IS:                                  'IS';
 JOIN:                                'JOIN';
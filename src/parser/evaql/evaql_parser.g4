@@ -31,7 +31,7 @@ ddlStatement
 
 dmlStatement
     : selectStatement | insertStatement | updateStatement
-    | deleteStatement 
+    | deleteStatement | loadStatement
     ;
 
 utilityStatement
@@ -144,6 +144,10 @@ insertStatement
       )
     ;
 
+loadStatement
+    : LOAD DATA INFILE fileName=stringLiteral INTO tableName
+    ;
+
 selectStatement
     : querySpecification                                            #simpleSelect
     ;
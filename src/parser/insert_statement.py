@@ -32,22 +32,23 @@ class InsertTableStatement(AbstractStatement):
     ColumnList:
         list of columns
     ValueList:
-        list of values to fill
+        list of rows to insert, every row is a list of values
     """
 
     def __init__(self,
                  table: TableRef,
                  column_list: List[AbstractExpression] = None,
-                 value_list: List[AbstractExpression] = None):
+                 value_list: List[List[AbstractExpression]] = None):
         super().__init__(StatementType.INSERT)
         self._table = table
         self._column_list = column_list
         self._value_list = value_list
 
     def __str__(self) -> str:
-        print_str = "INSERT INTO {}({}) VALUES ({}) ".format(self._table,
-                                                             self._column_list,
-                                                             self._value_list)
+        rows = ', '.join('({})'.format(row) for row in self._value_list)
+        print_str = "INSERT INTO {}({}) VALUES {} ".format(self._table,
+                                                           self._column_list,
+                                                           rows)
         return print_str
 
     @property
@@ -59,5 +60,5 @@ class InsertTableStatement(AbstractStatement):
         return self._column_list
 
     @property
-    def value_list(self) -> List[AbstractExpression]:
+    def value_list(self) -> List[List[AbstractExpression]]:
         return self._value_list
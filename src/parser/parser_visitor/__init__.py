@@ -10,6 +10,8 @@ from src.expression.function_expression import FunctionExpression
 class ParserVisitor(evaql_parserVisitor):
     from ._insert_statements import visitInsertStatement, visitUidList, visitInsertStatementValue
 
+    from ._load_statement import visitLoadStatement
+
     from ._create_statements import visitColumnCreateTable, visitCreateDefinitions, visitColumnDeclaration, visitColumnDefinition, visitUniqueKeyColumnConstraint, visitSimpleDataType
     from ._create_statements import visitIntegerDataType, visitDimensionDataType, visitLengthOneDimension, visitLengthTwoDimension, visitLengthDimensionList, visitDecimalLiteral
 
@@ -31,9 +31,9 @@ def visitInsertStatement(self, ctx: evaql_parser.InsertStatementContext):
                     column_list = self.visit(ctx.uidList())
 
                 elif rule_idx == evaql_parser.RULE_insertStatementValue:
-                    insrt_value = self.visit(ctx.insertStatementValue())
-                    # Support only (value1, value2, .... value n)
-                    value_list = insrt_value[0]
+                    # one list of values per row:
+                    # VALUES (value1, ... value n), (value1, ... value n)
+                    value_list = self.visit(ctx.insertStatementValue())
             except BaseException:
                 print("Exception")
                 # stop parsing something bad happened
@@ -0,0 +1,12 @@
+from src.parser.evaql.evaql_parser import evaql_parser
+from src.parser.load_statement import LoadDataStatement
+
+
+##################################################################
+# LOAD STATEMENTS
+##################################################################
+
+def visitLoadStatement(self, ctx: evaql_parser.LoadStatementContext):
+    table_ref = self.visit(ctx.tableName())
+    file_path = self.visit(ctx.fileName).value
+    return LoadDataStatement(table_ref, file_path)
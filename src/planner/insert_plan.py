@@ -26,12 +26,13 @@ class InsertPlan(AbstractPlan):
     Arguments:
         video_id{int} -- video metadata id to insert into
         column_list{List[AbstractExpression]} -- list of annotated column
-        value_list{List[AbstractExpression]} -- list of abstract expression
-                                                for the values to insert
+        value_list{List[List[AbstractExpression]]} -- list of abstract
+                                        expressions for the values of every
+                                        row to insert
     """
 
     def __init__(self, video_id: int, column_list: List[AbstractExpression],
-                 value_list: List[AbstractExpression]):
+                 value_list: List[List[AbstractExpression]]):
         super().__init__(PlanNodeType.INSERT)
         self._video_id = video_id
         self._columns_list = column_list
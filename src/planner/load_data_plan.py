@@ -0,0 +1,42 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from pathlib import Path
+
+from src.planner.abstract_plan import AbstractPlan
+from src.planner.types import PlanNodeType
+
+
+class LoadDataPlan(AbstractPlan):
+    """
+    This plan is used for storing information required for loading the
+    rows of a file into an existing table.
+
+    Arguments:
+        table_metadata_id(int): catalog id of the table to load into
+        path(Path): CSV or NumPy file holding the rows
+    """
+
+    def __init__(self, table_metadata_id: int, path: Path):
+        super().__init__(PlanNodeType.LOAD_DATA)
+        self._table_metadata_id = table_metadata_id
+        self._path = path
+
+    @property
+    def table_metadata_id(self):
+        return self._table_metadata_id
+
+    @property
+    def path(self):
+        return self._path
@@ -0,0 +1,41 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from src.planner.abstract_plan import AbstractPlan
+from src.planner.types import PlanNodeType
+
+
+class ParallelScanPlan(AbstractPlan):
+    """
+    This plan runs its child scan subtree in several worker processes,
+    each reading one shard of the dataset, and merges their output batches.
+
+    Arguments:
+        degree (int): number of worker processes, one per shard
+        ordered (bool): merge the output batches by frame index instead of
+                        in the order the workers produce them
+    """
+
+    def __init__(self, degree: int, ordered: bool = False):
+        super().__init__(PlanNodeType.PARALLEL_SCAN)
+        self._degree = degree
+        self._ordered = ordered
+
+    @property
+    def degree(self):
+        return self._degree
+
+    @property
+    def ordered(self):
+        return self._ordered
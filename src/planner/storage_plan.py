@@ -12,7 +12,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from typing import Dict, List
+
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.expression.expression_utils import ColumnRange
 from src.planner.abstract_plan import AbstractPlan
 from src.planner.types import PlanNodeType
 
@@ -30,11 +33,17 @@ class StoragePlan(AbstractPlan):
         limit (int): limit on data records to be retrieved
         total_shards (int): number of shards of data (if sharded)
         curr_shard (int): current curr_shard if data is sharded
+        columns (List[str]): columns to be read, None reads all columns
+        column_ranges (Dict[str, ColumnRange]): value ranges of columns
+            pushed down from the predicate, rows outside them can be
+            skipped by the storage
     """
 
     def __init__(self, video: DataFrameMetadata, batch_size: int = 1,
                  skip_frames: int = 0, offset: int = None, limit: int = None,
-                 total_shards: int = 0, curr_shard: int = 0):
+                 total_shards: int = 0, curr_shard: int = 0,
+                 columns: List[str] = None,
+                 column_ranges: Dict[str, ColumnRange] = None):
         super().__init__(PlanNodeType.STORAGE_PLAN)
         self._video = video
         self._batch_size = batch_size
@@ -43,6 +52,8 @@ class StoragePlan(AbstractPlan):
         self._limit = limit
         self._total_shards = total_shards
         self._curr_shard = curr_shard
+        self._columns = columns
+        self._column_ranges = column_ranges
 
     @property
     def video(self):
@@ -71,3 +82,11 @@ class StoragePlan(AbstractPlan):
     @property
     def curr_shard(self):
         return self._curr_shard
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def column_ranges(self):
+        return self._column_ranges
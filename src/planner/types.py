@@ -23,4 +23,6 @@ class PlanNodeType(IntEnum):
     INSERT = 4
     CREATE = 5
     CREATE_UDF = 6
+    PARALLEL_SCAN = 7
+    LOAD_DATA = 8
     # add other types
\ No newline at end of file
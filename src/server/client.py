@@ -18,22 +18,67 @@ import string
 import socket
 import random
 import os
+import threading
 
+from concurrent.futures import Future
 from contextlib import ExitStack  # For cleanly closing sockets
 
 from src.server.networking_utils import set_socket_io_timeouts
+from src.server.protocol import MessageDecoder, MessageType, ProtocolError, \
+    encode_message
+from src.server.serialization import deserialize_batch, format_response
 
-from src.utils.logging_manager import LoggingManager
+from src.utils.logging_manager import LoggingManager, LoggingLevel
 
 from src.server.interpreter import EvaCommandInterpreter
 
 
+class EvaResponse:
+    """
+        Answer of the server to a query, filled in as its frames arrive.
+
+        The result batches are kept as they are decoded, or handed to
+        `on_batch` as they arrive and not kept at all. `done` is resolved
+        with the response once the result is complete or the query failed.
+    """
+
+    def __init__(self, request_id: int, on_batch=None):
+        self.request_id = request_id
+        self.batches = []
+        self.error = None
+        self.done = Future()
+        self._on_batch = on_batch
+        # chunks of the batch being received
+        self._chunks = []
+
+    def add_chunk(self, chunk: bytes):
+        self._chunks.append(chunk)
+
+    def end_batch(self):
+        batch = deserialize_batch(b''.join(self._chunks))
+        self._chunks = []
+        if self._on_batch is not None:
+            self._on_batch(batch)
+        else:
+            self.batches.append(batch)
+
+    def finish(self, error: str = None):
+        self.error = error
+        self.done.set_result(self)
+
+    def text(self) -> str:
+        if self.error is not None:
+            return 'ERROR: ' + self.error
+        return format_response(self.batches)
+
+
 class EvaClient(asyncio.Protocol):
     """
         Sends data to server and get results back.
 
         - It never creates any asynchronous tasks itself
-        - So it does not know anything about any event loops
+        - Queries are sent as QUERY frames tagged with a request id, several
+          may be in flight and the answers are matched by their id
         - It tracks completion of workload with the `done` future
         - It tracks its progress via the class-level counters
     """
@@ -49,6 +94,12 @@ class EvaClient(asyncio.Protocol):
         self.done = asyncio.Future()
         self.transport = None
         self.id = EvaClient.__connections__
+        self._loop = None
+        self._decoder = MessageDecoder()
+        # answers still expected, by request id
+        self._responses = {}
+        self._responses_lock = threading.Lock()
+        self._next_request_id = 1
 
         EvaClient.__connections__ += 1
 
@@ -58,6 +109,7 @@ class EvaClient(asyncio.Protocol):
 
     def connection_made(self, transport):
         self.transport = transport
+        self._loop = asyncio.get_event_loop()
 
         if not set_socket_io_timeouts(self.transport, 60, 0):
             self.transport.abort()
@@ -76,6 +128,11 @@ class EvaClient(asyncio.Protocol):
                              " Disconnected from server"
                              )
 
+        with self._responses_lock:
+            responses, self._responses = self._responses, {}
+        for response in responses.values():
+            response.finish('connection lost')
+
         try:
             self.transport.abort()  # free sockets early, free sockets often
             self.transport = None
@@ -92,26 +149,92 @@ class EvaClient(asyncio.Protocol):
 
     def data_received(self, data):
 
-        response_chunk = data.decode()
-        LoggingManager().log("[ " + str(self.id) + " ]" +
-                             " Response from server: --|" +
-                             str(response_chunk) + "|--"
-                             )
+        try:
+            messages = self._decoder.feed(data)
+        except ProtocolError as e:
+            LoggingManager().log("[ " + str(self.id) + " ]" +
+                                 " Invalid response: " + str(e),
+                                 LoggingLevel.ERROR)
+            self.transport.abort()
+            return
+
+        for message in messages:
+            with self._responses_lock:
+                if message.type in (MessageType.RESULT_CHUNK,
+                                    MessageType.BATCH_END):
+                    response = self._responses.get(message.request_id)
+                else:
+                    response = self._responses.pop(message.request_id, None)
+            if response is None:
+                LoggingManager().log("[ " + str(self.id) + " ]" +
+                                     " Response to unknown request " +
+                                     str(message.request_id),
+                                     LoggingLevel.WARNING)
+                continue
+
+            if message.type == MessageType.RESULT_CHUNK:
+                response.add_chunk(message.payload)
+                continue
+            if message.type == MessageType.BATCH_END:
+                response.end_batch()
+                continue
+            if message.type == MessageType.ERROR:
+                response.finish(message.payload.decode('utf-8'))
+            else:
+                response.finish()
+
+            LoggingManager().log("[ " + str(self.id) + " ]" +
+                                 " Response from server: --|" +
+                                 response.text() + "|--"
+                                 )
+            self._response_chunk = response.text()
+
+    def send_message(self, message, on_batch=None,
+                     include_frames=True) -> EvaResponse:
+        """
+            Sends a query to the server, it may be called from any thread
 
-        self._response_chunk = response_chunk
+            Arguments:
+                message (str): EVAQL statements
+                on_batch (Callable[[FrameBatch], None]): receives the
+                    batches of the result as they arrive, instead of the
+                    response keeping them
+                include_frames (bool): receive the pixel data, otherwise
+                    only the frame indices and outcomes
 
-    def send_message(self, message):
+            Returns:
+                EvaResponse: completed once the server answered
+        """
 
         LoggingManager().log("[ " + str(self.id) + " ]" +
                              " Request to server: --|" + str(message) + "|--"
                              )
 
-        # Reset response for next reqeuest
-        # self._response_chunk = None
+        with self._responses_lock:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            response = EvaResponse(request_id, on_batch)
+            self._responses[request_id] = response
 
         # Send request
-        request_chunk = message.encode('ascii')
-        self.transport.write(request_chunk)
+        message_type = MessageType.QUERY if include_frames \
+            else MessageType.QUERY_WITHOUT_FRAMES
+        request_chunk = encode_message(message_type, request_id,
+                                       message.encode('utf-8'))
+        if self._loop is None or _in_loop(self._loop):
+            self.transport.write(request_chunk)
+        else:
+            # transports are not thread safe
+            self._loop.call_soon_threadsafe(self.transport.write,
+                                            request_chunk)
+        return response
+
+
+def _in_loop(loop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
 
 
 def process_cmd(prompt):
@@ -119,8 +242,7 @@ def process_cmd(prompt):
     prompt.cmdloop('Foo')
 
 
-@asyncio.coroutine
-def handle_user_input(loop, protocol):
+async def handle_user_input(loop, protocol):
     """
         Reads from stdin in separate thread
 
@@ -134,20 +256,22 @@ def handle_user_input(loop, protocol):
 
     prompt.set_protocol(protocol)
 
-    yield from loop.run_in_executor(None, process_cmd, prompt)
+    await loop.run_in_executor(None, process_cmd, prompt)
 
     protocol.done.set_result(None)
 
 
 async def start_client(loop, factory,
                        host: string, port: int,
-                       max_retry_count: int):
+                       max_retry_count: int,
+                       handler=handle_user_input):
     """
         Wait for the connection to open and the task to be processed.
 
         - There's retry logic to make sure we're connecting even in
           the face of momentary ECONNRESET on the server-side.
         - Socket will be automatically closed by the exit stack.
+        - The task is `handler(loop, protocol)`, the interpreter by default
     """
 
     retries = max_retry_count * [1]  # non-exponential 10s
@@ -170,7 +294,7 @@ async def start_client(loop, factory,
                 break
 
         # Launch task to handle user inputs
-        loop.create_task(handle_user_input(loop, protocol))
+        loop.create_task(handler(loop, protocol))
 
         await protocol.done
 
@@ -179,7 +303,8 @@ async def start_client(loop, factory,
 
 def start_clients(client_count: int, host: string, port: int,
                   loop,
-                  stop_clients_future):
+                  stop_clients_future,
+                  handler=handle_user_input):
     """
         Start a set of eva clients
 
@@ -187,6 +312,8 @@ def start_clients(client_count: int, host: string, port: int,
         hostname: hostname of the server
         port: port where the server is running
         stop_clients_future: future for externally stopping the clients
+        handler: task run on every connection, it has to close the
+                 connection or resolve `protocol.done` once finished
     """
 
     LoggingManager().log('PID(' + str(os.getpid()) + ') attempting '
@@ -201,7 +328,8 @@ def start_clients(client_count: int, host: string, port: int,
     client_coros = [
         start_client(loop, lambda: EvaClient(),
                      host, port,
-                     max_retry_count
+                     max_retry_count,
+                     handler
                      )
         for i in range(client_count)
     ]
@@ -12,28 +12,369 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-
 import asyncio
+import threading
+import time
+from concurrent import futures
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
 
+from src.configuration.configuration_manager import ConfigurationManager
+from src.models.storage.batch import FrameBatch
+from src.server.protocol import MessageType, encode_message, encode_batch
+from src.server.query_scheduler import QueryScheduler, estimate_cost
+from src.server.serialization import FrameEncoding, serialize_batch, \
+    DEFAULT_JPEG_QUALITY
 from src.utils.logging_manager import LoggingManager
+from src.utils.logging_manager import LoggingLevel
+from src.utils.metrics import QUERIES, QUERY_DURATION
+
+_DEFAULT_QUERY_WORKERS = 4
+_DEFAULT_MAX_HEAVY_QUERIES = 2
+_DEFAULT_MAX_FRAME_MEMORY_MB = 2048
+
+# seconds a query thread waits for the transport before checking whether
+# the request was cancelled
+_WRITE_POLL_INTERVAL = 1
+
+_query_executor = None
+_query_executor_lock = threading.Lock()
+_query_scheduler = None
+
+
+def query_executor() -> ThreadPoolExecutor:
+    """
+    Bounded pool of threads the queries are run on, so that the event loop
+    keeps accepting connections and reading requests while queries run.
+    Its size is `server.query_workers`.
+
+    Returns:
+        ThreadPoolExecutor
+    """
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is None:
+            _query_executor = ThreadPoolExecutor(
+                max_workers=_query_workers(), thread_name_prefix='eva-query')
+        return _query_executor
+
+
+def query_scheduler() -> QueryScheduler:
+    """
+    Admission control of the statements run on the query executor. One
+    thread of the executor is left to the fast lane of cheap statements, the
+    other limits are `server.max_heavy_queries` and
+    `server.max_frame_memory_mb`. It must be used from the event loop.
+
+    Returns:
+        QueryScheduler
+    """
+    global _query_scheduler
+    if _query_scheduler is None:
+        config = ConfigurationManager()
+        max_heavy = config.get_value('server', 'max_heavy_queries')
+        if max_heavy is None:
+            max_heavy = _DEFAULT_MAX_HEAVY_QUERIES
+        max_memory_mb = config.get_value('server', 'max_frame_memory_mb')
+        if max_memory_mb is None:
+            max_memory_mb = _DEFAULT_MAX_FRAME_MEMORY_MB
+        _query_scheduler = QueryScheduler(max(_query_workers() - 1, 1),
+                                          max_heavy,
+                                          max_memory_mb * 1024 * 1024)
+    return _query_scheduler
+
+
+def _query_workers() -> int:
+    workers = ConfigurationManager().get_value('server', 'query_workers')
+    if workers is None:
+        workers = _DEFAULT_QUERY_WORKERS
+    return workers
+
+
+def shutdown_query_executor():
+    """
+    Waits for the running queries and stops the query threads. A new pool
+    and scheduler are created on the next request.
+    """
+    global _query_executor, _query_scheduler
+    with _query_executor_lock:
+        executor, _query_executor = _query_executor, None
+        _query_scheduler = None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def execute_query(query: str) -> List[FrameBatch]:
+    """
+    Runs the statements of a query through the parser, the optimizer and
+    the executor
+
+    Thin wrapper around `stream_query` which materializes the complete
+    result in memory.
+
+    Arguments:
+        query (str): one or more EVAQL statements
+
+    Returns:
+        List[FrameBatch]: the output batches of the statements
+    """
+    return list(stream_query(query))
+
+
+def stream_query(query: str) -> Iterator[FrameBatch]:
+    """
+    Runs the statements of a query and yields the output batches as the
+    executor produces them
+
+    Arguments:
+        query (str): one or more EVAQL statements
+
+    Yields:
+        FrameBatch: output batch of a statement
+    """
+    for statement in parse_query(query):
+        yield from execute_plan(plan_statement(statement))
+
+
+def parse_query(query: str) -> List:
+    """
+    Arguments:
+        query (str): one or more EVAQL statements
+
+    Returns:
+        List[AbstractStatement]: the statements of the query
+    """
+    # the query stack is only loaded by the first query
+    from src.parser.parser import Parser
+
+    return Parser().parse(query)
+
+
+def plan_statement(statement):
+    """
+    Arguments:
+        statement (AbstractStatement): a parsed statement
+
+    Returns:
+        AbstractPlan: the physical plan of the statement
+    """
+    from src.optimizer.plan_generator import PlanGenerator
+    from src.optimizer.statement_to_opr_convertor import \
+        StatementToPlanConvertor
 
+    convertor = StatementToPlanConvertor()
+    convertor.visit(statement)
+    return PlanGenerator().build(convertor.plan)
+
+
+def execute_plan(plan) -> Iterator[FrameBatch]:
+    """
+    Arguments:
+        plan (AbstractPlan): physical plan of a statement
 
-@asyncio.coroutine
-def handle_request(transport, request_message):
+    Yields:
+        FrameBatch: output batch of the plan
+    """
+    from src.executor.plan_executor import PlanExecutor
+
+    yield from PlanExecutor(plan).stream_plan()
+
+
+def _plan_with_cost(statement):
+    plan = plan_statement(statement)
+    return plan, estimate_cost(plan)
+
+
+def _statement_type(statement) -> str:
+    statement_type = getattr(statement, 'stmt_type', None)
+    if isinstance(statement_type, Enum):
+        return statement_type.name.lower()
+    return 'unknown'
+
+
+def frame_encoding(include_frames: bool = True) -> FrameEncoding:
+    """
+    Encoding of the pixel data of the results, `server.frame_encoding` is
+    either raw or jpeg
+
+    Arguments:
+        include_frames (bool): the client asked for the pixel data
+
+    Returns:
+        FrameEncoding
+    """
+    if not include_frames:
+        return FrameEncoding.NONE
+    encoding = ConfigurationManager().get_value('server', 'frame_encoding')
+    if encoding is None:
+        return FrameEncoding.RAW
+    return FrameEncoding[encoding.upper()]
+
+
+def jpeg_quality() -> int:
+    quality = ConfigurationManager().get_value('server', 'jpeg_quality')
+    if quality is None:
+        return DEFAULT_JPEG_QUALITY
+    return quality
+
+
+class FlowControl:
+    """
+    Tracks whether a transport accepts more data. The protocol owning the
+    transport forwards its `pause_writing` and `resume_writing` callbacks.
+    """
+
+    def __init__(self):
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def pause(self):
+        self._writable.clear()
+
+    def resume(self):
+        self._writable.set()
+
+    async def wait_writable(self):
+        await self._writable.wait()
+
+
+class _ResultStream:
+    """
+    Writes the batches of a result from the query thread. A batch is only
+    produced once the previous one was handed to the transport and the
+    transport accepts data, so a slow client holds back the query instead of
+    growing the write buffer of the server.
+    """
+
+    def __init__(self, transport, request_id: int, flow_control, loop):
+        self._transport = transport
+        self._request_id = request_id
+        self._flow_control = flow_control
+        self._loop = loop
+        self._cancelled = threading.Event()
+        # the client is gone, the remaining statements are not run
+        self.stopped = False
+
+    def run(self, plan, frame_encoding: FrameEncoding,
+            jpeg_quality: int) -> List[int]:
+        """
+        Executes the plan of a statement and streams its batches, in the
+        query thread
+
+        Returns:
+            List[int]: indices of the frames sent
+        """
+        indices = []
+        batches = execute_plan(plan)
+        try:
+            for batch in batches:
+                payload = serialize_batch(batch, frame_encoding,
+                                          jpeg_quality)
+                frames = list(encode_batch(self._request_id, payload))
+                if not self._send(frames):
+                    self.stopped = True
+                    break
+                indices.extend(batch.indices.tolist())
+        finally:
+            # stops the executor if the client went away
+            batches.close()
+        return indices
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _send(self, frames: List[bytes]) -> bool:
+        write = self.write(frames)
+        try:
+            future = asyncio.run_coroutine_threadsafe(write, self._loop)
+        except RuntimeError:
+            # the event loop is closed, nobody writes the frames anymore
+            write.close()
+            return False
+        while True:
+            try:
+                return future.result(_WRITE_POLL_INTERVAL)
+            except futures.TimeoutError:
+                if self._cancelled.is_set() or self._loop.is_closed() or \
+                        not self._loop.is_running():
+                    future.cancel()
+                    return False
+
+    async def write(self, frames: List[bytes]) -> bool:
+        for frame in frames:
+            if self._flow_control is not None:
+                await self._flow_control.wait_writable()
+            if self._transport.is_closing():
+                return False
+            self._transport.write(frame)
+        return True
+
+
+async def handle_request(transport, request_message, request_id=0,
+                         flow_control=None, include_frames=True,
+                         client=None):
     """
         Reads a request from a client and processes it
 
-        If user inputs 'quit' stops the event loop
-        otherwise just echoes user input
+        The statements of the query are planned and run on the query
+        executor, off the event loop. Each statement waits for its
+        admission by the query scheduler in between. Its
+        output batches are streamed to the client as they are produced, each
+        as RESULT_CHUNK frames followed by BATCH_END, and the result is
+        closed by RESULT_END. A failure is sent as an ERROR frame. Frames are
+        tagged with the id of the request.
+
+        flow_control: FlowControl of the transport, the query waits while
+            the transport is paused
+        include_frames: send the pixel data of the batches, otherwise only
+            the frame indices and outcomes
+        client: key the scheduler shares fairly between clients by
     """
 
-    response_message = "foo"
+    loop = asyncio.get_running_loop()
+    executor = query_executor()
+    scheduler = query_scheduler()
+    stream = _ResultStream(transport, request_id, flow_control, loop)
+    encoding = frame_encoding(include_frames)
+    quality = jpeg_quality()
+    try:
+        indices = []
+        statements = await loop.run_in_executor(executor, parse_query,
+                                                request_message)
+        for statement in statements:
+            statement_type = _statement_type(statement)
+            started = time.perf_counter()
+            try:
+                plan, cost = await loop.run_in_executor(
+                    executor, _plan_with_cost, statement)
+                indices += await scheduler.run(
+                    client, cost,
+                    lambda: loop.run_in_executor(
+                        executor, stream.run, plan, encoding, quality))
+            except Exception:
+                QUERIES.labels(statement_type, 'error').inc()
+                raise
+            QUERIES.labels(statement_type, 'ok').inc()
+            QUERY_DURATION.labels(statement_type).observe(
+                time.perf_counter() - started)
+            if stream.stopped:
+                break
+        response_message = '%d frames: %s' % (len(indices), indices)
+        frames = [encode_message(MessageType.RESULT_END, request_id)]
+    except asyncio.CancelledError:
+        stream.cancel()
+        raise
+    except Exception as e:
+        LoggingManager().log('Query failed: ' + str(e), LoggingLevel.ERROR)
+        response_message = 'ERROR: ' + str(e)
+        frames = [encode_message(MessageType.ERROR, request_id,
+                                 str(e).encode('utf-8'))]
 
     LoggingManager().log('Response to client: --|' +
                          str(response_message) +
                          '|--')
 
-    data = response_message.encode('ascii')
-    transport.write(data)
+    await stream.write(frames)
 
     return response_message
@@ -16,11 +16,16 @@
 import random
 import glob
 
+from concurrent import futures
+
 from PIL import Image
 from cmd import Cmd
 
 from src.parser.parser import Parser
 
+# seconds to wait for the server to answer a query
+RESPONSE_TIMEOUT = 600
+
 
 class EvaCommandInterpreter(Cmd):
 
@@ -38,8 +43,15 @@ class EvaCommandInterpreter(Cmd):
         cmd_result = Cmd.onecmd(self, s)
 
         # Send request to server
-        self.protocol.send_message(s)
-        _server_result = self.protocol._response_chunk
+        response = self.protocol.send_message(s)
+        if cmd_result:
+            # the server closes the connection without answering
+            return cmd_result
+
+        try:
+            _server_result = response.done.result(RESPONSE_TIMEOUT).text()
+        except futures.TimeoutError:
+            _server_result = 'Timed out waiting for the server'
 
         if _server_result is not None:
             print(_server_result)
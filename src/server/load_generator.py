@@ -0,0 +1,278 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import itertools
+import json
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# One query of a workload
+# name: identifies the query in the report, queries with the same name
+#       share their latency histogram
+# text: EVAQL statements sent to the server
+WorkloadQuery = namedtuple('WorkloadQuery', ['name', 'text'])
+
+# seconds to wait for the server to answer a query
+_DEFAULT_QUERY_TIMEOUT = 600
+
+
+def load_workload(path: str) -> list:
+    """
+    Reads a workload file, one JSON object per line
+
+    The statements are in the `query` field. The query is named after its
+    `name` or `request_id` field, or after its line otherwise. Empty lines
+    are skipped.
+
+    Arguments:
+        path (str): workload file
+
+    Returns:
+        List[WorkloadQuery]: the queries in the order of the file
+    """
+    workload = []
+    with open(path) as workload_file:
+        for line_number, line in enumerate(workload_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                text = entry['query']
+            except (ValueError, KeyError, TypeError):
+                raise ValueError('%s:%d: expected a JSON object with a '
+                                 '"query" field' % (path, line_number))
+            name = entry.get('name', entry.get('request_id',
+                                               'line %d' % line_number))
+            workload.append(WorkloadQuery(str(name), text))
+    if not workload:
+        raise ValueError(path + ': the workload has no query')
+    return workload
+
+
+class LatencyHistogram:
+    """
+    Latencies of the answered queries and the number of failed ones
+    """
+
+    def __init__(self):
+        self._latencies = []
+        self.errors = 0
+
+    def record(self, seconds: float):
+        self._latencies.append(seconds)
+
+    def record_error(self):
+        self.errors += 1
+
+    @property
+    def count(self) -> int:
+        return len(self._latencies)
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: the number of answered and failed queries and the mean,
+                p50, p95, p99 and max latency in milliseconds
+        """
+        summary = {'count': self.count, 'errors': self.errors}
+        if self._latencies:
+            latencies = np.array(self._latencies) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            summary.update(mean_ms=float(latencies.mean()),
+                           p50_ms=float(p50), p95_ms=float(p95),
+                           p99_ms=float(p99),
+                           max_ms=float(latencies.max()))
+        return summary
+
+
+class LoadGenerator:
+    """
+    Replays a workload against the server over the connections of
+    `start_clients`, `drive` is the task run on every connection
+
+    The queries of the workload are sent in order, `repeat` times over or
+    for `duration` seconds. Without a `rate` the load is closed: at most
+    `concurrency` queries are in flight, spread over the connections,
+    and each sends the next query once answered. With a `rate` the load is
+    open: queries start `rate` times a second whatever the answers, and
+    their latency counts from the time they were due, so a server falling
+    behind shows in the latency and not only in the throughput.
+
+    Arguments:
+        workload (List[WorkloadQuery]): queries to replay
+        clients (int): connections driven
+        concurrency (int): queries in flight without a rate
+        rate (float): queries started a second
+        repeat (int): times the workload is replayed
+        duration (float): seconds to replay the workload for, the
+            workload is replayed as long as needed
+        include_frames (bool): receive the pixel data of the results
+        timeout (float): seconds to wait for an answer, a query left
+            unanswered counts as failed
+    """
+
+    def __init__(self, workload: list, clients: int = 1,
+                 concurrency: int = 1, rate: float = None,
+                 repeat: int = 1, duration: float = None,
+                 include_frames: bool = False,
+                 timeout: float = _DEFAULT_QUERY_TIMEOUT):
+        if rate is not None and rate <= 0:
+            raise ValueError('rate has to be positive')
+        if concurrency < 1 or clients < 1:
+            raise ValueError('concurrency and clients have to be positive')
+        self._workload = workload
+        self._clients = clients
+        self._concurrency = concurrency
+        self._rate = rate
+        self._duration = duration
+        self._include_frames = include_frames
+        self._timeout = timeout
+        if duration is None:
+            self._limit = repeat * len(workload)
+        else:
+            self._limit = None
+        self._queries = itertools.cycle(workload)
+        self._sent = 0
+        self._connections = 0
+        self._start = None
+        self._end = None
+        self._frames = 0
+        self.latency = LatencyHistogram()
+        self.latency_by_query = {query.name: LatencyHistogram()
+                                 for query in workload}
+
+    async def drive(self, loop, protocol):
+        """
+        Sends the share of the workload of a connection, then closes it
+        """
+        connection = self._connections
+        self._connections += 1
+        if self._start is None:
+            self._start = time.perf_counter()
+        try:
+            if self._rate is None:
+                share = self._concurrency // self._clients + \
+                    (connection < self._concurrency % self._clients)
+                await asyncio.gather(*[self._closed_loop(protocol)
+                                       for _ in range(share)])
+            else:
+                await self._open_loop(protocol)
+        finally:
+            if protocol.transport is not None:
+                protocol.transport.close()
+
+    async def _closed_loop(self, protocol):
+        while True:
+            query = self._next_query(time.perf_counter())
+            if query is None:
+                return
+            await self._send(protocol, query, time.perf_counter())
+
+    async def _open_loop(self, protocol):
+        sending = set()
+        while True:
+            due = self._start + self._sent / self._rate
+            query = self._next_query(due)
+            if query is None:
+                break
+            await asyncio.sleep(due - time.perf_counter())
+            task = asyncio.ensure_future(self._send(protocol, query, due))
+            sending.add(task)
+            task.add_done_callback(sending.discard)
+        if sending:
+            await asyncio.wait(sending)
+
+    def _next_query(self, due: float) -> WorkloadQuery:
+        if self._limit is not None and self._sent >= self._limit:
+            return None
+        if self._duration is not None and \
+                due - self._start >= self._duration:
+            return None
+        self._sent += 1
+        return next(self._queries)
+
+    async def _send(self, protocol, query: WorkloadQuery, due: float):
+        if protocol.transport is None or protocol.transport.is_closing():
+            error = True
+        else:
+            response = protocol.send_message(
+                query.text, on_batch=self._count_frames,
+                include_frames=self._include_frames)
+            done, _ = await asyncio.wait(
+                [asyncio.wrap_future(response.done)], timeout=self._timeout)
+            error = not done or response.error is not None
+        self._end = time.perf_counter()
+        histograms = (self.latency, self.latency_by_query[query.name])
+        for histogram in histograms:
+            if error:
+                histogram.record_error()
+            else:
+                histogram.record(self._end - due)
+
+    def _count_frames(self, batch):
+        self._frames += batch.batch_size
+
+    def report(self, summary=None) -> dict:
+        """
+        Arguments:
+            summary (List[int]): tasks, exceptions and retries of the
+                connections, as returned by `start_clients`
+
+        Returns:
+            dict: the settings of the run, the throughput and the
+                latencies overall and by query
+        """
+        elapsed = 0.0
+        if self._start is not None and self._end is not None:
+            elapsed = self._end - self._start
+        answered = self.latency.count
+        report = {
+            'settings': {
+                'clients': self._clients,
+                'concurrency': self._concurrency,
+                'rate': self._rate,
+                'duration': self._duration,
+                'queries': len(self._workload),
+                'include_frames': self._include_frames,
+            },
+            'elapsed_seconds': elapsed,
+            'queries_sent': self._sent,
+            'throughput_qps': answered / elapsed if elapsed else 0.0,
+            'frames': self._frames,
+            'frames_per_second': self._frames / elapsed if elapsed else 0.0,
+            'latency': self.latency.summary(),
+            'latency_by_query': {
+                name: histogram.summary()
+                for name, histogram in self.latency_by_query.items()},
+        }
+        if summary is not None:
+            tasks, exceptions, retries = summary
+            report['connections'] = {'tasks': tasks,
+                                     'exceptions': exceptions,
+                                     'retries': retries}
+        return report
+
+
+def write_report(report: dict, path: str):
+    """
+    Writes the report of a run as JSON
+    """
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+        report_file.write('\n')
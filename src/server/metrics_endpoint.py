@@ -0,0 +1,107 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from typing import Optional, Tuple
+
+from src.configuration.configuration_manager import ConfigurationManager
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.utils.metrics import METRICS, MetricsRegistry
+
+_DEFAULT_METRICS_HOST = '127.0.0.1'
+
+# seconds a scraper gets to send its request
+_REQUEST_TIMEOUT = 10
+# largest request head accepted
+_MAX_REQUEST_SIZE = 8 * 1024
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_address(worker_id: int = 0) -> Optional[Tuple[str, int]]:
+    """
+    Address the metrics are served on, `server.metrics_host` and
+    `server.metrics_port`. In the pre-fork mode every worker has a registry
+    of its own and serves it on the port following that of the previous
+    worker.
+
+    Arguments:
+        worker_id (int): id of the server worker
+
+    Returns:
+        Tuple[str, int]: host and port, None if no metrics port is set
+    """
+    config = ConfigurationManager()
+    port = config.get_value('server', 'metrics_port')
+    if not port:
+        return None
+    host = config.get_value('server', 'metrics_host')
+    if host is None:
+        host = _DEFAULT_METRICS_HOST
+    return host, port + worker_id
+
+
+async def serve_metrics(host: str, port: int,
+                        registry: MetricsRegistry = METRICS):
+    """
+    Serves the metrics of the registry in the Prometheus text format on
+    GET /metrics, on the running event loop
+
+    Arguments:
+        host (str): interface to listen on
+        port (int): port to listen on, 0 picks a free one
+        registry (MetricsRegistry): metrics to serve
+
+    Returns:
+        asyncio.AbstractServer: the listening server
+    """
+
+    async def handle(reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                          _REQUEST_TIMEOUT)
+            request_line = head.split(b'\r\n', 1)[0].decode('latin-1')
+            writer.write(_response(request_line.split(' '), registry))
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port,
+                                        limit=_MAX_REQUEST_SIZE)
+    for socket in server.sockets:
+        LoggingManager().log('Serving metrics on ' +
+                             str(socket.getsockname()), LoggingLevel.INFO)
+    return server
+
+
+def _response(request: list, registry: MetricsRegistry) -> bytes:
+    if len(request) != 3 or request[0] not in ('GET', 'HEAD'):
+        status, body = '405 Method Not Allowed', 'Method not allowed\n'
+        content_type = 'text/plain; charset=utf-8'
+    elif request[1].split('?', 1)[0] != '/metrics':
+        status, body = '404 Not Found', 'Metrics are served on /metrics\n'
+        content_type = 'text/plain; charset=utf-8'
+    else:
+        status, body = '200 OK', registry.render()
+        content_type = CONTENT_TYPE
+    body = body.encode('utf-8')
+    head = ('HTTP/1.1 %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n'
+            'Connection: close\r\n\r\n' % (status, content_type, len(body)))
+    if request[0] == 'HEAD':
+        body = b''
+    return head.encode('latin-1') + body
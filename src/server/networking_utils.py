@@ -20,11 +20,14 @@ from src.utils.logging_manager import LoggingManager
 from src.utils.logging_manager import LoggingLevel
 
 
-async def realtime_server_status(protocol, server_closed):
+async def realtime_server_status(protocol, server_closed,
+                                 report_status=None):
     """
         Report status changes.
 
         `protocol` must provide `connections` and `errors` attributes.
+        `report_status`, if given, is called with the counters on every
+        change, besides logging them.
 
         Completion or cancellation of the `server_closed` future
         stops monitoring.
@@ -42,6 +45,9 @@ async def realtime_server_status(protocol, server_closed):
             previous_connections = protocol.__connections__
             previous_errors = protocol.__errors__
 
+            if report_status is not None:
+                report_status(previous_connections, previous_errors)
+
             LoggingManager().log("Status: " +
                                  "connections: " + str(previous_connections) +
                                  " " +
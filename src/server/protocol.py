@@ -0,0 +1,143 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import struct
+from collections import namedtuple
+from enum import IntEnum
+from typing import Iterator, List
+
+
+class MessageType(IntEnum):
+    # client -> server: EVAQL statements, utf-8 encoded
+    QUERY = 1
+    # server -> client: part of the result of a query
+    RESULT_CHUNK = 2
+    # server -> client: the result of a query is complete
+    RESULT_END = 3
+    # server -> client: the query failed, utf-8 encoded message
+    ERROR = 4
+    # client -> server: like QUERY, but the result carries the frame
+    # indices and outcomes without the pixel data
+    QUERY_WITHOUT_FRAMES = 5
+    # server -> client: the RESULT_CHUNKs since the previous BATCH_END
+    # form one result batch
+    BATCH_END = 6
+
+
+# A decoded frame
+#   type (MessageType): kind of the message
+#   request_id (int): id the client gave the query, echoed in the answers
+#   payload (bytes): content of the message
+Message = namedtuple('Message', ['type', 'request_id', 'payload'])
+
+# payload length, message type, request id
+HEADER = struct.Struct('!IBI')
+
+# Largest payload of a frame, larger results are split into chunks
+MAX_PAYLOAD_SIZE = 16 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class ProtocolError(Exception):
+    """Raised for a frame which does not follow the protocol"""
+
+
+def encode_message(message_type: MessageType, request_id: int,
+                   payload: bytes = b'') -> bytes:
+    """
+    Frames a message for the wire
+
+    Arguments:
+        message_type (MessageType): kind of the message
+        request_id (int): id of the query the message belongs to
+        payload (bytes): content, at most MAX_PAYLOAD_SIZE bytes
+
+    Returns:
+        bytes: header followed by the payload
+    """
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        raise ProtocolError('Payload of %d bytes exceeds the frame limit'
+                            % len(payload))
+    return HEADER.pack(len(payload), message_type, request_id) + payload
+
+
+def encode_batch(request_id: int, data: bytes,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Frames an encoded result batch as RESULT_CHUNK messages of at most
+    chunk_size bytes followed by BATCH_END. A result is a sequence of
+    batches closed by a RESULT_END message.
+
+    Arguments:
+        request_id (int): id of the query
+        data (bytes): the encoded batch
+        chunk_size (int): largest payload of a chunk
+
+    Returns:
+        Iterator[bytes]: the frames
+    """
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield encode_message(MessageType.RESULT_CHUNK, request_id,
+                             view[start:start + chunk_size])
+    yield encode_message(MessageType.BATCH_END, request_id)
+
+
+class MessageDecoder:
+    """
+    Streaming decoder of frames. Bytes are fed as they come off the socket,
+    in chunks of any size, and every message completed by them is returned.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Message]:
+        """
+        Arguments:
+            data (bytes): bytes received
+
+        Returns:
+            List[Message]: the messages completed by data, in order
+        """
+        self._buffer += data
+        messages = []
+        offset = 0
+        while len(self._buffer) - offset >= HEADER.size:
+            length, message_type, request_id = HEADER.unpack_from(
+                self._buffer, offset)
+            if length > MAX_PAYLOAD_SIZE:
+                raise ProtocolError('Frame of %d bytes exceeds the limit'
+                                    % length)
+            end = offset + HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            try:
+                message_type = MessageType(message_type)
+            except ValueError:
+                raise ProtocolError('Unknown message type %d' % message_type)
+            messages.append(Message(
+                message_type, request_id,
+                bytes(self._buffer[offset + HEADER.size:end])))
+            offset = end
+        del self._buffer[:offset]
+        return messages
+
+    @property
+    def pending(self) -> int:
+        """
+        Returns:
+            int: bytes received which do not form a complete frame yet
+        """
+        return len(self._buffer)
@@ -0,0 +1,283 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from collections import deque, namedtuple
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from src.catalog.column_type import ColumnType
+from src.expression.abstract_expression import ExpressionType
+from src.planner.types import PlanNodeType
+from src.utils.metrics import SCHEDULER_WAIT
+
+# size assumed for a frame column without known dimensions, 1080p RGB
+_DEFAULT_FRAME_SIZE = 1920 * 1080 * 3
+_SCALAR_SIZE = 8
+
+# Estimated cost of a statement
+#   cheap (bool): catalog or metadata statement, reading no frames, it is
+#       run right away in the fast lane
+#   heavy (bool): udfs are run over the frames
+#   frames (int): frames scanned, None if unknown
+#   memory (int): bytes of frames held in flight
+QueryCost = namedtuple('QueryCost', ['cheap', 'heavy', 'frames', 'memory'])
+
+# Snapshot of the scheduler for the status monitor
+#   queued (int): statements waiting for admission
+#   running (int): statements admitted and not finished, fast lane aside
+#   running_heavy (int): running statements which run udfs
+#   memory (int): bytes of frames in flight
+# The admission waits are exported by the eva_scheduler_wait_seconds
+# histogram
+SchedulerStatus = namedtuple('SchedulerStatus', [
+    'queued', 'running', 'running_heavy', 'memory'])
+
+# Statement waiting for admission
+_Waiter = namedtuple('_Waiter', ['cost', 'future', 'enqueued'])
+
+
+def estimate_cost(plan) -> QueryCost:
+    """
+    Estimates the cost of a physical plan from its operators and the size
+    of the scanned tables in the catalog
+
+    Arguments:
+        plan (AbstractPlan): physical plan of a statement
+
+    Returns:
+        QueryCost
+    """
+    cheap, heavy, frames, memory = True, False, 0, 0
+    nodes = [(plan, 1)]
+    while nodes:
+        node, degree = nodes.pop()
+        node_type = node.node_type
+        if node_type == PlanNodeType.STORAGE_PLAN:
+            cheap = False
+            scanned = _scanned_frames(node)
+            frames = None if frames is None or scanned is None \
+                else frames + scanned
+            in_flight = node.batch_size if scanned is None \
+                else min(node.batch_size, scanned)
+            memory += degree * max(in_flight, 1) * \
+                _row_size(node.video, node.columns)
+        elif node_type == PlanNodeType.LOAD_DATA:
+            cheap = False
+            frames = None
+            memory += _DEFAULT_FRAME_SIZE
+        elif node_type in (PlanNodeType.SEQUENTIAL_SCAN,
+                           PlanNodeType.PP_FILTER):
+            expressions = [node.predicate] + list(
+                getattr(node, 'columns', None) or [])
+            heavy = heavy or any(_has_function(expression)
+                                 for expression in expressions)
+        elif node_type == PlanNodeType.PARALLEL_SCAN:
+            degree *= max(node.degree, 1)
+        nodes.extend((child, degree) for child in node.children)
+    return QueryCost(cheap, heavy and not cheap, frames, memory)
+
+
+class QueryScheduler:
+    """
+    Admission control of the statements run by the server.
+
+    Cheap statements run right away. The others wait in a queue per client
+    until running them keeps the number of running statements, of running
+    heavy statements and the frame memory in flight within their limits.
+    The least recently served client goes first and the statements of a
+    client run in order, so a client sending many scans only gets its
+    share. A statement needing
+    more memory than the limit runs once nothing else does.
+
+    The scheduler belongs to the event loop of the server, in the pre-fork
+    mode every worker applies the limits on its own.
+
+    Arguments:
+        max_running (int): statements running at once, fast lane aside
+        max_heavy (int): statements running udfs at once
+        max_memory (int): bytes of frames in flight
+    """
+
+    def __init__(self, max_running: int, max_heavy: int, max_memory: int):
+        self._max_running = max_running
+        self._max_heavy = max_heavy
+        self._max_memory = max_memory
+        self._running = 0
+        self._running_heavy = 0
+        self._memory = 0
+        # waiting statements by client
+        self._queues = {}
+        # when every client was last served, by admission number; clients
+        # never served come first
+        self._last_served = {}
+        self._admissions = 0
+
+    async def run(self, client, cost: QueryCost,
+                  start: Callable[[], Awaitable]):
+        """
+        Waits until the statement may run, starts it and waits for its
+        result. The admission is released once the statement completed. If
+        waiting is cancelled, the statement keeps its admission until it
+        stops, e.g. in the query thread running it.
+
+        Arguments:
+            client: key of the client, its statements share a queue
+            cost (QueryCost): estimated cost of the statement
+            start (Callable[[], Awaitable]): starts the statement
+
+        Returns:
+            the result of the statement
+        """
+        if cost.cheap:
+            return await start()
+        await self.admit(client, cost)
+        try:
+            statement = asyncio.ensure_future(start())
+        except BaseException:
+            self.release(cost)
+            raise
+        statement.add_done_callback(lambda _: self.release(cost))
+        return await asyncio.shield(statement)
+
+    async def admit(self, client, cost: QueryCost):
+        """
+        Waits for the admission of a statement, which must be released
+        once it ran
+        """
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future(),
+                         time.monotonic())
+        self._queues.setdefault(client, deque()).append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # admitted meanwhile
+                self.release(cost)
+            else:
+                self._remove(client, waiter)
+            raise
+
+    def release(self, cost: QueryCost):
+        self._running -= 1
+        if cost.heavy:
+            self._running_heavy -= 1
+        self._memory -= cost.memory
+        self._dispatch()
+
+    def status(self) -> SchedulerStatus:
+        queued = sum(len(queue) for queue in self._queues.values())
+        return SchedulerStatus(queued, self._running, self._running_heavy,
+                               self._memory)
+
+    def _fits(self, cost: QueryCost) -> bool:
+        if self._running >= self._max_running:
+            return False
+        if cost.heavy and self._running_heavy >= self._max_heavy:
+            return False
+        return self._running == 0 or \
+            self._memory + cost.memory <= self._max_memory
+
+    def _dispatch(self):
+        while True:
+            fitting = [client for client, queue in self._queues.items()
+                       if self._fits(queue[0].cost)]
+            if not fitting:
+                return
+            # the least recently served client, then the oldest statement
+            client = min(fitting, key=lambda client: (
+                self._last_served.get(client, 0),
+                self._queues[client][0].enqueued))
+            queue = self._queues[client]
+            waiter = queue.popleft()
+            if not queue:
+                del self._queues[client]
+            self._admissions += 1
+            self._last_served[client] = self._admissions
+            self._forget_idle_clients()
+            self._start(waiter)
+
+    def _forget_idle_clients(self):
+        # a client served before every waiting one gets the same turn when
+        # it comes back as a new client
+        oldest = min((self._last_served.get(client, 0)
+                      for client in self._queues), default=self._admissions)
+        for client in [client for client, served in self._last_served.items()
+                       if client not in self._queues and served < oldest]:
+            del self._last_served[client]
+
+    def _start(self, waiter: '_Waiter'):
+        self._running += 1
+        if waiter.cost.heavy:
+            self._running_heavy += 1
+        self._memory += waiter.cost.memory
+        SCHEDULER_WAIT.observe(time.monotonic() - waiter.enqueued)
+        waiter.future.set_result(None)
+
+    def _remove(self, client, waiter: '_Waiter'):
+        queue = self._queues.get(client)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[client]
+        # the statements behind it may fit now
+        self._dispatch()
+
+
+def _scanned_frames(node) -> int:
+    # the catalog does not keep row counts, the storage engine counts them
+    # from the dataset metadata
+    from src.storage import StorageEngine
+    try:
+        frames = StorageEngine.count(node.video)
+    except Exception:
+        return None
+    if node.offset:
+        frames = max(frames - node.offset, 0)
+    if node.skip_frames:
+        # every skip_frames-th frame is read
+        frames = -(-frames // node.skip_frames)
+    if node.limit is not None:
+        frames = min(frames, node.limit)
+    return frames
+
+
+def _row_size(video, columns=None) -> int:
+    size = 0
+    for column in video.columns:
+        if columns is not None and column.name not in columns:
+            continue
+        if column.type != ColumnType.NDARRAY:
+            size += _SCALAR_SIZE
+            continue
+        dimensions = column.array_dimensions
+        if dimensions and all(dimension > 0 for dimension in dimensions):
+            size += int(np.prod(dimensions))
+        else:
+            size += _DEFAULT_FRAME_SIZE
+    return size
+
+
+def _has_function(expression) -> bool:
+    if expression is None:
+        return False
+    if expression.etype == ExpressionType.FUNCTION_EXPRESSION:
+        return True
+    return any(_has_function(expression.get_child(i))
+               for i in range(expression.get_children_count()))
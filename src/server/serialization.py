@@ -0,0 +1,365 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import struct
+from enum import IntEnum
+from typing import List
+
+import numpy as np
+import pyarrow as pa
+
+from src.models.catalog.frame_info import FrameInfo
+from src.models.catalog.properties import ColorSpace
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.representation import BoundingBox, Point
+from src.models.storage.batch import FrameBatch
+
+
+class FrameEncoding(IntEnum):
+    # the frame indices and outcomes only
+    NONE = 0
+    # contiguous (N, H, W, C) buffer with its shape and dtype
+    RAW = 1
+    # one JPEG image per frame, for clients on slow links
+    JPEG = 2
+
+
+DEFAULT_JPEG_QUALITY = 90
+
+# frame encoding, size of the arrow stream
+_BATCH_HEADER = struct.Struct('!BQ')
+# number of dimensions, length of the dtype string
+_ARRAY_HEADER = struct.Struct('!BB')
+_DIMENSION = struct.Struct('!Q')
+_JPEG_COUNT = struct.Struct('!I')
+# pixel buffers start on a multiple of this offset
+_ALIGNMENT = 64
+
+_INDEX_COLUMN = 'index'
+# metadata key of a column telling how its values are stored
+_KIND = b'eva.kind'
+_SCALAR = b'scalar'
+_OBJECT = b'object'
+_PREDICTION = b'prediction'
+_JSON = b'json'
+
+_PREDICTION_TYPE = pa.struct([
+    ('labels', pa.list_(pa.string())),
+    ('scores', pa.list_(pa.float64())),
+    ('boxes', pa.list_(pa.list_(pa.float64(), 4))),
+])
+
+
+def serialize_batch(batch: FrameBatch,
+                    frame_encoding: FrameEncoding = FrameEncoding.RAW,
+                    jpeg_quality: int = DEFAULT_JPEG_QUALITY) -> bytes:
+    """
+    Encodes a result batch for the wire. The frame indices and the outcome
+    columns travel as an arrow record batch, the pixel data as one raw
+    buffer with its shape and dtype, or as JPEG images. Predictions are
+    stored column wise and without their frame. Outcomes arrow has no type
+    for are sent as JSON text, values JSON has no type for as their repr.
+    A batch without pixel data, e.g. the output of a scan of metadata
+    columns only, is sent without frames whatever the frame encoding.
+
+    Arguments:
+        batch (FrameBatch): output batch of a query
+        frame_encoding (FrameEncoding): how the pixel data is sent
+        jpeg_quality (int): quality of the JPEG images, 0 to 100
+
+    Returns:
+        bytes
+    """
+    table = _encode_table(batch)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_batch(table)
+    arrow_stream = sink.getvalue()
+
+    if not _has_pixels(batch.frames_as_numpy_array()):
+        frame_encoding = FrameEncoding.NONE
+    header = _BATCH_HEADER.pack(frame_encoding, arrow_stream.size)
+    if frame_encoding == FrameEncoding.RAW:
+        pixels = _encode_raw(batch.frames_as_numpy_array(),
+                             len(header) + arrow_stream.size)
+    elif frame_encoding == FrameEncoding.JPEG:
+        pixels = _encode_jpeg(batch.frames_as_numpy_array(), jpeg_quality)
+    else:
+        pixels = []
+
+    # a single copy of the pixel data into the payload
+    return b''.join([header, arrow_stream] +
+                    [memoryview(part).cast('B') for part in pixels])
+
+
+def deserialize_batch(payload) -> FrameBatch:
+    """
+    Decodes a batch encoded by `serialize_batch`. The frame indices, numeric
+    outcome columns and raw pixel data are read-only views of the payload,
+    not copies. A batch sent without its pixel data holds no frames, its
+    predictions have no frame either.
+
+    Arguments:
+        payload (bytes): the encoded batch
+
+    Returns:
+        FrameBatch
+    """
+    view = memoryview(payload)
+    frame_encoding, arrow_size = _BATCH_HEADER.unpack_from(view)
+    offset = _BATCH_HEADER.size
+    reader = pa.ipc.open_stream(pa.py_buffer(view[offset:offset +
+                                                  arrow_size]))
+    table = reader.read_next_batch()
+    offset += arrow_size
+
+    indices = table.column(_INDEX_COLUMN).to_numpy()
+    if frame_encoding == FrameEncoding.RAW:
+        data = _decode_raw(view, offset)
+    elif frame_encoding == FrameEncoding.JPEG:
+        data = _decode_jpeg(view, offset)
+    else:
+        data = np.empty((len(indices), 0))
+
+    metadata = table.schema.metadata or {}
+    batch = FrameBatch.from_numpy(
+        indices, data, _decode_info(metadata.get(b'info')),
+        frame_info=_decode_info(metadata.get(b'frame_info')))
+    frames = batch.frames if frame_encoding != FrameEncoding.NONE \
+        else [None] * len(indices)
+    for field, column in zip(table.schema, table.columns):
+        if field.name != _INDEX_COLUMN:
+            batch.set_outcomes(field.name,
+                               _decode_column(field, column, frames))
+    return batch
+
+
+def format_response(batches: List[FrameBatch]) -> str:
+    """
+    Text describing the output of a query: the number of frames and
+    their indices
+
+    Arguments:
+        batches (List[FrameBatch]): output batches of the query
+
+    Returns:
+        str
+    """
+    indices = [index for batch in batches for index in batch.indices.tolist()]
+    return '%d frames: %s' % (len(indices), indices)
+
+
+def _encode_table(batch: FrameBatch) -> pa.RecordBatch:
+    arrays = [pa.array(batch.indices)]
+    fields = [pa.field(_INDEX_COLUMN, pa.int64())]
+    for name, column in batch.outcomes.items():
+        array, kind = _encode_column(column)
+        arrays.append(array)
+        fields.append(pa.field(name, array.type, metadata={_KIND: kind}))
+    schema = pa.schema(fields, metadata={
+        b'info': _encode_info(batch.info),
+        b'frame_info': _encode_info(batch.frame_info)})
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _encode_column(column: np.ndarray):
+    if column.dtype != object:
+        return pa.array(column), _SCALAR
+    values = column.tolist()
+    if any(isinstance(value, Prediction) for value in values) and \
+            all(value is None or isinstance(value, Prediction)
+                for value in values):
+        return _encode_predictions(values), _PREDICTION
+    try:
+        return pa.array(values), _OBJECT
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # outcomes arrow has no type for, the client must not run any code
+        # to read them
+        return pa.array([None if value is None else
+                         json.dumps(value, default=_json_default)
+                         for value in values], pa.string()), _JSON
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+def _encode_predictions(predictions: List[Prediction]) -> pa.Array:
+    label_offsets, labels = [0], []
+    score_offsets, scores = [0], []
+    box_offsets, boxes = [0], []
+    has_boxes, valid = [], []
+    for prediction in predictions:
+        valid.append(prediction is not None)
+        if prediction is not None:
+            labels.extend(prediction.labels)
+            scores.extend(prediction.scores)
+            if prediction.boxes is not None:
+                boxes.extend((box.top_left.x, box.top_left.y,
+                              box.bottom_right.x, box.bottom_right.y)
+                             for box in prediction.boxes)
+        has_boxes.append(prediction is not None and
+                         prediction.boxes is not None)
+        label_offsets.append(len(labels))
+        score_offsets.append(len(scores))
+        box_offsets.append(len(boxes))
+
+    box_values = pa.FixedSizeListArray.from_arrays(
+        pa.array(np.asarray(boxes, dtype=np.float64).ravel()), 4)
+    box_lists = pa.ListArray.from_arrays(
+        pa.array(box_offsets, pa.int32()), box_values,
+        mask=pa.array(np.logical_not(has_boxes)))
+    return pa.StructArray.from_arrays(
+        [pa.ListArray.from_arrays(pa.array(label_offsets, pa.int32()),
+                                  pa.array(labels, pa.string())),
+         pa.ListArray.from_arrays(pa.array(score_offsets, pa.int32()),
+                                  pa.array(scores, pa.float64())),
+         box_lists],
+        fields=list(_PREDICTION_TYPE),
+        mask=pa.array(np.logical_not(valid)))
+
+
+def _decode_column(field: pa.Field, column: pa.Array, frames) -> List:
+    kind = (field.metadata or {}).get(_KIND)
+    if kind == _SCALAR:
+        return column.to_numpy(zero_copy_only=False)
+    if kind == _PREDICTION:
+        return _decode_predictions(column, frames)
+    if kind == _JSON:
+        return [None if value is None else json.loads(value)
+                for value in column.to_pylist()]
+    return column.to_pylist()
+
+
+def _decode_predictions(column: pa.StructArray, frames) -> List:
+    labels = column.field('labels')
+    label_offsets = labels.offsets.to_numpy()
+    label_values = labels.values.to_pylist()
+    scores = column.field('scores')
+    score_offsets = scores.offsets.to_numpy()
+    score_values = scores.values.to_numpy()
+    boxes = column.field('boxes')
+    box_offsets = boxes.offsets.to_numpy()
+    box_values = boxes.values.flatten().to_numpy().reshape(-1, 4).tolist()
+    valid = column.is_valid().to_numpy(zero_copy_only=False)
+    has_boxes = boxes.is_valid().to_numpy(zero_copy_only=False)
+
+    predictions = []
+    for i, frame in enumerate(frames):
+        if not valid[i]:
+            predictions.append(None)
+            continue
+        prediction_boxes = None
+        if has_boxes[i]:
+            prediction_boxes = [
+                BoundingBox(Point(x1, y1), Point(x2, y2))
+                for x1, y1, x2, y2 in
+                box_values[box_offsets[i]:box_offsets[i + 1]]]
+        predictions.append(Prediction(
+            frame,
+            label_values[label_offsets[i]:label_offsets[i + 1]],
+            score_values[score_offsets[i]:score_offsets[i + 1]].tolist(),
+            boxes=prediction_boxes))
+    return predictions
+
+
+def _has_pixels(data) -> bool:
+    # frames without data leave an object array of None in the batch
+    return isinstance(data, np.ndarray) and data.dtype.kind in 'biuf'
+
+
+def _encode_raw(data: np.ndarray, offset: int) -> List:
+    data = np.ascontiguousarray(data)
+    dtype = data.dtype.str.encode('ascii')
+    header = _ARRAY_HEADER.pack(data.ndim, len(dtype)) + \
+        b''.join(_DIMENSION.pack(size) for size in data.shape) + dtype
+    # offset is where the section starts in the payload, the buffer is
+    # aligned for the client to view it in place
+    padding = _align(offset + len(header)) - offset - len(header)
+    return [header + bytes(padding), data]
+
+
+def _decode_raw(view: memoryview, offset: int) -> np.ndarray:
+    ndim, dtype_size = _ARRAY_HEADER.unpack_from(view, offset)
+    offset += _ARRAY_HEADER.size
+    shape = [_DIMENSION.unpack_from(view, offset + i * _DIMENSION.size)[0]
+             for i in range(ndim)]
+    offset += ndim * _DIMENSION.size
+    dtype = np.dtype(bytes(view[offset:offset + dtype_size]).decode('ascii'))
+    offset = _align(offset + dtype_size)
+    count = int(np.prod(shape))
+    return np.frombuffer(view, dtype=dtype, count=count,
+                         offset=offset).reshape(shape)
+
+
+def _encode_jpeg(data: np.ndarray, quality: int) -> List:
+    import cv2
+
+    images = []
+    for frame in data:
+        ok, image = cv2.imencode('.jpg', frame,
+                                 [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError('Frame cannot be encoded as JPEG')
+        images.append(_JPEG_COUNT.pack(len(image)))
+        images.append(image)
+    return [_JPEG_COUNT.pack(len(data))] + images
+
+
+def _decode_jpeg(view: memoryview, offset: int) -> np.ndarray:
+    import cv2
+
+    count, = _JPEG_COUNT.unpack_from(view, offset)
+    offset += _JPEG_COUNT.size
+    frames = []
+    for _ in range(count):
+        size, = _JPEG_COUNT.unpack_from(view, offset)
+        offset += _JPEG_COUNT.size
+        image = np.frombuffer(view, dtype=np.uint8, count=size, offset=offset)
+        frames.append(cv2.imdecode(image, cv2.IMREAD_UNCHANGED))
+        offset += size
+    if not frames:
+        return np.empty((0,))
+    data = np.stack(frames)
+    if data.ndim == 3:
+        # single channel images come back without their channel axis
+        data = data[..., np.newaxis]
+    return data
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _encode_info(info: FrameInfo) -> bytes:
+    if info is None:
+        return b'null'
+    return json.dumps([info.height, info.width, info.num_channels,
+                       info.color_space.value]).encode('ascii')
+
+
+def _decode_info(value: bytes) -> FrameInfo:
+    if value is None:
+        return None
+    info = json.loads(value)
+    if info is None:
+        return None
+    height, width, channels, color_space = info
+    return FrameInfo(height, width, channels, ColorSpace(color_space))
@@ -24,8 +24,14 @@ from src.server.networking_utils import realtime_server_status,\
     set_socket_io_timeouts
 
 from src.utils.logging_manager import LoggingManager, LoggingLevel
+from src.utils.metrics import CONNECTIONS, CONNECTIONS_TOTAL, \
+    CONNECTION_ERRORS, SCHEDULER_FRAME_MEMORY, SCHEDULER_QUEUED, \
+    SCHEDULER_RUNNING, SCHEDULER_RUNNING_HEAVY
 
-from src.server.command_handler import handle_request
+from src.server.command_handler import FlowControl, handle_request, \
+    query_scheduler, shutdown_query_executor
+from src.server.metrics_endpoint import metrics_address, serve_metrics
+from src.server.protocol import MessageDecoder, MessageType, ProtocolError
 
 
 class EvaServer(asyncio.Protocol):
@@ -33,7 +39,12 @@ class EvaServer(asyncio.Protocol):
     """
     Receives messages and offloads them to another task for processing them.
 
-    - It never creates any asynchronous tasks itself
+    - Requests arrive as QUERY frames of the protocol, a client may send
+      several without waiting for the answers
+    - The requests of a connection are handled one after another, in the
+      order they were received, while other connections proceed
+    - Results are streamed while the transport accepts data, a client
+      reading slowly holds back its queries
     - It doesn't have to know anything about any event loops
     - It tracks its progress via the class-level counters
     """
@@ -46,6 +57,11 @@ class EvaServer(asyncio.Protocol):
     def __init__(self, socket_timeout):
         self.transport = None
         self._socket_timeout = socket_timeout
+        # requests of this connection which are not answered yet
+        self._requests = []
+        self._decoder = MessageDecoder()
+        self._flow_control = FlowControl()
+        self._client = self
 
     def connection_made(self, transport):
         self.transport = transport
@@ -58,46 +74,106 @@ class EvaServer(asyncio.Protocol):
 
         # Each client connection creates a new protocol instance
         peername = transport.get_extra_info('peername')
+        # the connections of a host share its turns in the query scheduler
+        if isinstance(peername, tuple):
+            self._client = peername[0]
         LoggingManager().log('Connection from client: ' + str(peername) +
                              str(self._socket_timeout))
         EvaServer.__connections__ += 1
+        CONNECTIONS.inc()
+        CONNECTIONS_TOTAL.inc()
 
     def connection_lost(self, exc):
+        # nobody is left to read the answers of the pending requests
+        for request in self._requests:
+            request.cancel()
+        # wake up the writers, they see the transport closing
+        self._flow_control.resume()
+
         # free sockets early, free sockets often
         if exc:
             EvaServer.__errors__ += 1
+            CONNECTION_ERRORS.inc()
             self.transport.abort()
         else:
             self.transport.close()
         EvaServer.__connections__ -= 1
+        CONNECTIONS.dec()
 
     def data_received(self, data):
-        request_message = data.decode()
-        LoggingManager().log('Request from client: --|' +
-                             str(request_message) +
-                             '|--')
-
-        if request_message in ["quit", "exit"]:
-            LoggingManager().log('Close client socket')
-            return self.transport.close()
-        else:
+        try:
+            messages = self._decoder.feed(data)
+        except ProtocolError as e:
+            LoggingManager().log('Closing client socket: ' + str(e),
+                                 LoggingLevel.ERROR)
+            return self.transport.abort()
+
+        for message in messages:
+            if message.type not in (MessageType.QUERY,
+                                    MessageType.QUERY_WITHOUT_FRAMES):
+                LoggingManager().log('Ignoring unexpected message type ' +
+                                     str(message.type), LoggingLevel.WARNING)
+                continue
+
+            request_message = message.payload.decode()
+            LoggingManager().log('Request from client: --|' +
+                                 str(request_message) +
+                                 '|--')
+
+            if request_message in ["quit", "exit"]:
+                LoggingManager().log('Close client socket')
+                return self.transport.close()
+
             LoggingManager().log('Handle request')
-            asyncio.create_task(
-                handle_request(self.transport, request_message)
+            previous = self._requests[-1] if self._requests else None
+            request = asyncio.create_task(
+                self._handle_in_order(
+                    previous, request_message, message.request_id,
+                    message.type == MessageType.QUERY)
             )
+            self._requests.append(request)
+            request.add_done_callback(self._requests.remove)
+
+    def pause_writing(self):
+        # the write buffer of the transport is full, the queries of this
+        # connection wait before producing more batches
+        self._flow_control.pause()
+
+    def resume_writing(self):
+        self._flow_control.resume()
+
+    async def _handle_in_order(self, previous, request_message, request_id,
+                               include_frames):
+        # statements of a connection build on each other, e.g. a LOAD DATA
+        # followed by a SELECT, so a request waits for the previous one
+        if previous is not None:
+            await asyncio.wait([previous])
+        await handle_request(self.transport, request_message, request_id,
+                             self._flow_control, include_frames,
+                             self._client)
 
 
 def start_server(host: string,
                  port: int,
                  loop,
                  socket_timeout: int,
-                 stop_server_future):
+                 stop_server_future,
+                 reuse_port: bool = False,
+                 sock=None,
+                 report_status=None,
+                 worker_id: int = 0):
     """
         Start the server.
         Server objects are asynchronous context managers.
 
         hostname: hostname of the server
         stop_server_future: future for externally stopping the server
+        reuse_port: bind with SO_REUSEPORT, for worker processes sharing
+            the port
+        sock: listening socket to serve instead of binding host and port
+        report_status: called with the connection and error counters
+            when they change
+        worker_id: id of the server worker, it picks the metrics port
     """
 
     LoggingManager().log('Start Server', LoggingLevel.CRITICAL)
@@ -115,7 +191,12 @@ def start_server(host: string,
     # loop = asyncio.get_event_loop()
 
     # Start the eva server
-    coro = loop.create_server(lambda: EvaServer(socket_timeout), host, port)
+    if sock is not None:
+        coro = loop.create_server(lambda: EvaServer(socket_timeout),
+                                  sock=sock)
+    else:
+        coro = loop.create_server(lambda: EvaServer(socket_timeout),
+                                  host, port, reuse_port=reuse_port)
     server = loop.run_until_complete(coro)
 
     for socket in server.sockets:
@@ -125,9 +206,13 @@ def start_server(host: string,
 
     server_closed = loop.create_task(server.wait_closed())
 
-    # Start the realtime status monitor
+    metrics_server = start_metrics(loop, worker_id)
+
+    # Start the realtime status monitor, the status of the queries is
+    # exported as metrics
     monitor = loop.create_task(realtime_server_status(EvaServer,
-                                                      server_closed))
+                                                      server_closed,
+                                                      report_status))
 
     try:
         loop.run_until_complete(stop_server_future)
@@ -139,12 +224,57 @@ def start_server(host: string,
     finally:
         # Stop monitor
         monitor.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
 
         # Close server
         server.close()
 
+        # Cancel the pending requests, their queries stop at the next batch
+        pending = [task for task in asyncio.all_tasks(loop)
+                   if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending,
+                                                   return_exceptions=True))
+
+        # Let the running queries finish, the loop keeps serving their
+        # writes meanwhile
+        loop.run_until_complete(
+            loop.run_in_executor(None, shutdown_query_executor))
+
         # Stop event loop
         loop.run_until_complete(server.wait_closed())
         loop.close()
 
         LoggingManager().log("Successfully shutdown server.")
+
+
+def start_metrics(loop, worker_id: int = 0):
+    """
+        Serves the metrics of the process on the metrics port, if one is
+        configured. The scheduler gauges are read from the scheduler when
+        the metrics are scraped.
+
+        Returns the listening server, None if there is none
+    """
+
+    SCHEDULER_QUEUED.set_function(lambda: query_scheduler().status().queued)
+    SCHEDULER_RUNNING.set_function(
+        lambda: query_scheduler().status().running)
+    SCHEDULER_RUNNING_HEAVY.set_function(
+        lambda: query_scheduler().status().running_heavy)
+    SCHEDULER_FRAME_MEMORY.set_function(
+        lambda: query_scheduler().status().memory)
+
+    address = metrics_address(worker_id)
+    if address is None:
+        return None
+    try:
+        return loop.run_until_complete(serve_metrics(*address))
+    except OSError as e:
+        # the server runs on without metrics
+        LoggingManager().log('Could not serve metrics on ' + str(address) +
+                             ': ' + str(e), LoggingLevel.ERROR)
+        return None
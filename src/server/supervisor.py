@@ -0,0 +1,268 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import socket
+import string
+import time
+from signal import signal
+from signal import SIGINT, SIGTERM, SIGHUP, SIGUSR1
+from typing import Callable, List
+
+from src.server.networking_utils import realtime_server_status
+from src.utils.logging_manager import LoggingManager, LoggingLevel
+
+# seconds between two checks of the workers
+POLL_INTERVAL = 1
+# a worker exiting sooner than this after its start is restarted only after
+# RESTART_DELAY, so that a worker failing on startup does not spin
+MIN_WORKER_UPTIME = 5
+RESTART_DELAY = 1
+# seconds a worker gets to finish its running queries on shutdown
+STOP_TIMEOUT = 30
+
+
+class WorkerCounters:
+    """
+    Connection and error counters of the server workers, in shared memory.
+    Every worker publishes its own counters, the sums are exposed like the
+    class counters of EvaServer so that `realtime_server_status` reports on
+    the whole server.
+
+    Arguments:
+        workers (int): number of workers
+        context: multiprocessing context the workers are started with
+    """
+
+    def __init__(self, workers: int, context=multiprocessing):
+        # connections and errors of every worker, side by side
+        self._values = context.RawArray('q', 2 * workers)
+
+    def publish(self, worker_id: int, connections: int, errors: int):
+        self._values[2 * worker_id] = connections
+        self._values[2 * worker_id + 1] = errors
+
+    def reset_connections(self, worker_id: int):
+        """The connections of a crashed worker are gone, its errors stay"""
+        self._values[2 * worker_id] = 0
+
+    @property
+    def __connections__(self) -> int:
+        return sum(self._values[0::2])
+
+    @property
+    def __errors__(self) -> int:
+        return sum(self._values[1::2])
+
+
+class ServerSupervisor:
+    """
+    Runs the server workers in processes of their own and restarts those
+    which exit while the server is running.
+
+    Arguments:
+        workers (int): number of worker processes
+        target (Callable): run in every worker process as
+            target(worker_id, counters, *args)
+        args (tuple): further arguments of target
+        restart_delay (float): delay before restarting a worker which
+            failed on startup
+    """
+
+    def __init__(self, workers: int, target: Callable, args: tuple = (),
+                 restart_delay: float = RESTART_DELAY):
+        self._context = multiprocessing.get_context('spawn')
+        self.counters = WorkerCounters(workers, self._context)
+        self._target = target
+        self._args = args
+        self._restart_delay = restart_delay
+        self._processes = [None] * workers
+        # when every worker was started and may be restarted
+        self._started = [0.0] * workers
+        self._restart_at = [None] * workers
+        self._stopped = False
+        self.restarts = 0
+
+    @property
+    def processes(self) -> List[multiprocessing.Process]:
+        return list(self._processes)
+
+    def start(self):
+        for worker_id in range(len(self._processes)):
+            self._start_worker(worker_id)
+
+    async def supervise(self):
+        """Checks on the workers until the supervisor is stopped"""
+        while not self._stopped:
+            self.check_workers()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def check_workers(self) -> List[int]:
+        """
+        Restarts the workers which exited
+
+        Returns:
+            List[int]: ids of the workers restarted
+        """
+        restarted = []
+        now = time.monotonic()
+        for worker_id, process in enumerate(self._processes):
+            if self._stopped or process.exitcode is None:
+                continue
+            if self._restart_at[worker_id] is None:
+                LoggingManager().log(
+                    'Server worker %d (PID %d) exited with code %d'
+                    % (worker_id, process.pid, process.exitcode),
+                    LoggingLevel.ERROR)
+                self.counters.reset_connections(worker_id)
+                delay = 0
+                if now - self._started[worker_id] < MIN_WORKER_UPTIME:
+                    delay = self._restart_delay
+                self._restart_at[worker_id] = now + delay
+            if now >= self._restart_at[worker_id]:
+                self._start_worker(worker_id)
+                self.restarts += 1
+                restarted.append(worker_id)
+        return restarted
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        """
+        Stops the workers, they get `timeout` seconds to finish their
+        running queries before they are killed
+        """
+        self._stopped = True
+        processes = [process for process in self._processes
+                     if process is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def _start_worker(self, worker_id: int):
+        process = self._context.Process(
+            target=self._target,
+            args=(worker_id, self.counters) + tuple(self._args),
+            name='eva-server-%d' % worker_id)
+        process.start()
+        self._processes[worker_id] = process
+        self._started[worker_id] = time.monotonic()
+        self._restart_at[worker_id] = None
+        LoggingManager().log('Started server worker %d (PID %d)'
+                             % (worker_id, process.pid), LoggingLevel.INFO)
+
+
+def serve_worker(worker_id: int, counters: WorkerCounters, host: string,
+                 port: int, socket_timeout: int, sock=None):
+    """
+    Entry point of a worker process: an EvaServer on an event loop of its
+    own, bound to the shared port with SO_REUSEPORT, or serving the
+    listening socket of the parent where SO_REUSEPORT does not exist
+    """
+    # imported in the worker, the supervisor does not run queries
+    from src.server.server import start_server
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    start_server(host=host, port=port, loop=loop,
+                 socket_timeout=socket_timeout,
+                 stop_server_future=loop.create_future(),
+                 reuse_port=sock is None, sock=sock,
+                 report_status=functools.partial(counters.publish,
+                                                 worker_id),
+                 worker_id=worker_id)
+
+
+def _listening_socket(host: string, port: int) -> socket.socket:
+    # socket.create_server only exists on Python 3.8+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host or '', port))
+        sock.listen(socket.SOMAXCONN)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def start_server_workers(host: string,
+                         port: int,
+                         loop,
+                         socket_timeout: int,
+                         stop_server_future,
+                         workers: int):
+    """
+        Start the server as `workers` processes sharing the port, each with
+        its own event loop, so that query planning and protocol handling
+        use as many cores. Connections are spread over the workers by the
+        kernel. The workers which crash are restarted.
+
+        hostname: hostname of the server
+        stop_server_future: future for externally stopping the server
+        workers: number of worker processes
+    """
+
+    LoggingManager().log('Start Server with %d workers' % workers,
+                         LoggingLevel.CRITICAL)
+
+    # Register signal handler
+    def raiseSystemExit(_, __):
+        raise SystemExit
+
+    for handled_signal in [SIGINT, SIGTERM, SIGHUP, SIGUSR1]:
+        signal(handled_signal, raiseSystemExit)
+
+    sock = None
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        # the workers accept on the socket of the parent instead
+        sock = _listening_socket(host, port)
+
+    supervisor = ServerSupervisor(workers, serve_worker,
+                                  (host, port, socket_timeout, sock))
+    supervisor.start()
+    LoggingManager().log('PID(' + str(os.getpid()) + ') supervising '
+                         + str(workers) + ' server workers',
+                         LoggingLevel.CRITICAL)
+
+    supervision = loop.create_task(supervisor.supervise())
+    monitor = loop.create_task(realtime_server_status(supervisor.counters,
+                                                      supervision))
+
+    try:
+        loop.run_until_complete(stop_server_future)
+
+    except KeyboardInterrupt:
+
+        LoggingManager().log("Server process interrupted")
+
+    finally:
+        supervisor.stop()
+        supervision.cancel()
+        monitor.cancel()
+        loop.run_until_complete(asyncio.gather(supervision, monitor,
+                                               return_exceptions=True))
+        loop.close()
+        if sock is not None:
+            sock.close()
+
+        LoggingManager().log("Successfully shutdown server.")
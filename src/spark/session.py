@@ -23,7 +23,8 @@ from src.utils.logging_manager import LoggingManager
 
 class Session(object):
     """
-    Wrapper around Spark Session
+    Wrapper around Spark Session. The session, and with it the JVM, is
+    started by the first call needing it.
     """
 
     _instance = None
@@ -34,11 +35,6 @@ class Session(object):
             cls._instance = super(Session, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        config = ConfigurationManager()
-        name = config.get_value('core', 'application')
-        self.init_spark_session(name)
-
     def init_spark_session(self, application_name, spark_master=None):
         """Setup a spark session.
 
@@ -71,13 +67,19 @@ class Session(object):
         spark_context.setLogLevel(log4j_level)
 
     def get_session(self):
+        if self._session is None:
+            config = ConfigurationManager()
+            name = config.get_value('core', 'application')
+            self.init_spark_session(name)
         return self._session
 
     def get_context(self):
-        return self._session.sparkContext
+        return self.get_session().sparkContext
 
     def stop(self):
-        self._session.stop()
+        if self._session is not None:
+            self._session.stop()
+            self._session = None
 
     def __del__(self):
-        self._session.stop()
+        self.stop()
@@ -12,3 +12,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from src.configuration.configuration_manager import ConfigurationManager
+from src.utils.generic_utils import LazyObject, str_to_class
+
+# created on the first write, so that importing the executors does not load
+# the pyarrow or spark stacks
+StorageEngine = LazyObject(lambda: str_to_class(
+    ConfigurationManager().get_value("storage", "engine"))())
@@ -0,0 +1,81 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from abc import ABCMeta, abstractmethod
+from typing import Dict, Iterator, List, Sequence
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+
+DEFAULT_SCAN_BATCH_SIZE = 1024
+
+
+class AbstractStorageEngine(metaclass=ABCMeta):
+    """
+    Abstract class for the storage engines which persist tables. All engines
+    store a table as a petastorm dataset at its file_url with the schema
+    built by SchemaUtils, so a table written by one engine can be read by
+    the others and by the loaders.
+    """
+
+    @abstractmethod
+    def create(self, df_metadata: DataFrameMetadata):
+        """
+        Creates an empty table, replacing the one at the same location
+
+        Arguments:
+            df_metadata (DataFrameMetadata): table to create
+        """
+
+    @abstractmethod
+    def append(self, df_metadata: DataFrameMetadata,
+               columns: Dict[str, Sequence]) -> int:
+        """
+        Appends rows given as one sequence of values per column. Columns
+        which are not given are filled with nulls.
+
+        Arguments:
+            df_metadata (DataFrameMetadata): table to append to
+            columns (Dict[str, Sequence]): values of every column
+
+        Returns:
+            int: number of rows appended
+        """
+
+    @abstractmethod
+    def scan(self, df_metadata: DataFrameMetadata,
+             columns: List[str] = None,
+             batch_size: int = DEFAULT_SCAN_BATCH_SIZE) \
+            -> Iterator[Dict[str, List]]:
+        """
+        Reads the rows of a table in the order they were appended
+
+        Arguments:
+            df_metadata (DataFrameMetadata): table to read
+            columns (List[str], optional): columns to read, all by default
+            batch_size (int, optional): maximum number of rows per batch
+
+        Returns:
+            Iterator[Dict[str, List]]: batches of decoded values of every
+                                       column
+        """
+
+    @abstractmethod
+    def count(self, df_metadata: DataFrameMetadata) -> int:
+        """
+        Arguments:
+            df_metadata (DataFrameMetadata): table to count
+
+        Returns:
+            int: number of rows in the table
+        """
@@ -0,0 +1,291 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import fcntl
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Sequence
+from urllib.parse import urlparse
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from petastorm.codecs import ScalarCodec
+from petastorm.etl.dataset_metadata import ROW_GROUPS_PER_FILE_KEY, \
+    UNISCHEMA_KEY
+from petastorm.fs_utils import FilesystemResolver
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.configuration.configuration_manager import ConfigurationManager
+
+# parquet type of the spark types used by ScalarCodec
+_ARROW_TYPES = {
+    'IntegerType': pa.int32(),
+    'LongType': pa.int64(),
+    'FloatType': pa.float32(),
+    'DoubleType': pa.float64(),
+    'StringType': pa.string(),
+    'BooleanType': pa.bool_(),
+}
+
+DEFAULT_ROW_GROUP_SIZE_MB = 32
+
+# schemes of the dataset urls whose files are on a local filesystem
+_LOCAL_SCHEMES = ('', 'file')
+
+
+class BulkWriter:
+    """
+    Buffers rows column-wise and appends them to a petastorm dataset as a
+    single parquet file, without starting a spark job. The file is split
+    into row groups of about storage.row_group_size_mb and becomes visible
+    to readers atomically on commit. Commits of concurrent writers to a
+    local dataset are serialized by a lock file in the dataset directory.
+
+    Arguments:
+        df_metadata (DataFrameMetadata): dataset to append to, its schema
+                                         has to be set
+        row_group_size_mb (int, optional): overrides the configured row
+                                           group size
+    """
+
+    def __init__(self, df_metadata: DataFrameMetadata,
+                 row_group_size_mb: int = None):
+        self._metadata = df_metadata
+        self._schema = df_metadata.schema.petastorm_schema
+        if row_group_size_mb is None:
+            row_group_size_mb = ConfigurationManager().get_value(
+                "storage", "row_group_size_mb")
+        self._row_group_size = (row_group_size_mb or
+                                DEFAULT_ROW_GROUP_SIZE_MB) * 1024 * 1024
+        self._chunks = {name: [] for name in self._schema.fields}
+        self._num_rows = 0
+
+    @property
+    def num_rows(self) -> int:
+        """Number of rows buffered and not yet committed"""
+        return self._num_rows
+
+    def append_rows(self, rows: Sequence[Sequence]):
+        """
+        Buffers rows whose values are in the order of the schema columns
+
+        Arguments:
+            rows (Sequence[Sequence]): rows to append
+        """
+        names = [column.name for column in self._metadata.schema.column_list]
+        columns = {name: [] for name in names}
+        for row in rows:
+            if len(row) != len(names):
+                raise ValueError('Expected %d values per row, got %d'
+                                 % (len(names), len(row)))
+            for name, value in zip(names, row):
+                columns[name].append(value)
+        self.append_columns(columns)
+
+    def append_columns(self, columns: Dict[str, Sequence]):
+        """
+        Buffers rows given as one sequence of values per column. Columns
+        which are not given are filled with nulls if they are nullable.
+
+        Arguments:
+            columns (Dict[str, Sequence]): values of every column
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Columns have different lengths %s' % lengths)
+        unknown = set(columns) - set(self._schema.fields)
+        if unknown:
+            raise ValueError('Unknown columns %s' % sorted(unknown))
+        num_rows = lengths.pop() if lengths else 0
+
+        arrays = {}
+        for name, field in self._schema.fields.items():
+            if name in columns:
+                arrays[name] = _to_arrow(field, columns[name])
+            elif field.nullable:
+                arrays[name] = pa.nulls(num_rows, _arrow_type(field))
+            else:
+                raise ValueError('Missing values for column %s' % name)
+
+        for name, array in arrays.items():
+            self._chunks[name].append(array)
+        self._num_rows += num_rows
+
+    def commit(self) -> int:
+        """
+        Writes the buffered rows and publishes them to readers
+
+        Returns:
+            int: number of rows written
+        """
+        if self._num_rows == 0:
+            return 0
+        table = pa.Table.from_arrays(
+            [pa.chunked_array(chunks, _arrow_type(self._schema.fields[name]))
+             for name, chunks in self._chunks.items()],
+            schema=arrow_schema(self._schema))
+        rows_per_group = max(1, int(self._row_group_size *
+                                    table.num_rows / max(table.nbytes, 1)))
+
+        resolver = FilesystemResolver(self._metadata.file_url)
+        fs = resolver.filesystem()
+        dataset_path = resolver.get_dataset_path()
+        if not fs.exists(dataset_path):
+            fs.mkdir(dataset_path)
+
+        # names sort in commit order, which is the order readers scan in
+        file_name = 'part-%020d-%s.parquet' % (time.time_ns(),
+                                               uuid.uuid4().hex[:8])
+        # files starting with '.' are not part of the dataset until renamed
+        tmp_path = os.path.join(dataset_path, '.' + file_name)
+        with fs.open(tmp_path, 'wb') as f:
+            pq.write_table(table, f, row_group_size=rows_per_group)
+        with fs.open(tmp_path) as f:
+            num_row_groups = pq.read_metadata(f).num_row_groups
+
+        # listing the new file before it exists is harmless for readers
+        local = urlparse(self._metadata.file_url).scheme in _LOCAL_SCHEMES
+        with _dataset_lock(dataset_path, local):
+            self._update_common_metadata(fs, dataset_path, table.schema,
+                                         file_name, num_row_groups)
+        try:
+            fs.mv(tmp_path, os.path.join(dataset_path, file_name))
+        except NotImplementedError:
+            # pyarrow's LocalFileSystem does not implement rename
+            os.rename(tmp_path, os.path.join(dataset_path, file_name))
+
+        num_rows = self._num_rows
+        self._chunks = {name: [] for name in self._schema.fields}
+        self._num_rows = 0
+        return num_rows
+
+    def _update_common_metadata(self, fs, dataset_path: str,
+                                schema: pa.Schema, file_name: str,
+                                num_row_groups: int):
+        """
+        Registers the row groups of a new file in the petastorm metadata,
+        and the unischema if the dataset was not created by spark. The
+        metadata is written to a temporary file which replaces the old one,
+        readers never see a partial file. The caller holds the lock of the
+        dataset.
+        """
+        path = os.path.join(dataset_path, '_common_metadata')
+        if fs.exists(path):
+            with fs.open(path) as f:
+                schema = pq.read_metadata(f).schema.to_arrow_schema()
+        metadata = dict(schema.metadata or {})
+        metadata.setdefault(UNISCHEMA_KEY, pickle.dumps(self._schema))
+        row_groups = json.loads(metadata.get(ROW_GROUPS_PER_FILE_KEY, '{}'))
+        row_groups[file_name] = num_row_groups
+        metadata[ROW_GROUPS_PER_FILE_KEY] = json.dumps(row_groups)
+        tmp_path = os.path.join(dataset_path, '._common_metadata.%s.tmp'
+                                % uuid.uuid4().hex[:8])
+        with fs.open(tmp_path, 'wb') as f:
+            pq.write_metadata(schema.with_metadata(metadata), f)
+        try:
+            fs.mv(tmp_path, path)
+        except NotImplementedError:
+            os.replace(tmp_path, path)
+
+        # the checksum written by spark no longer matches
+        crc_path = os.path.join(dataset_path, '._common_metadata.crc')
+        if fs.exists(crc_path):
+            delete_path(fs, crc_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+
+
+@contextmanager
+def _dataset_lock(dataset_path: str, local: bool):
+    """
+    Holds an exclusive lock on a local dataset, other processes and threads
+    committing to it wait. Datasets on other filesystems are not locked.
+    """
+    if not local:
+        yield
+        return
+    with open(os.path.join(dataset_path, '._lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def delete_path(fs, path: str):
+    """
+    Deletes a file or a directory with everything in it
+
+    Arguments:
+        fs (pyarrow.filesystem.FileSystem): filesystem of the path
+        path (str): path to delete
+    """
+    try:
+        fs.delete(path, recursive=True)
+    except NotImplementedError:
+        # pyarrow's LocalFileSystem does not implement delete
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def arrow_schema(unischema) -> pa.Schema:
+    """
+    Arguments:
+        unischema (Unischema): petastorm schema of a table
+
+    Returns:
+        pa.Schema: schema of the parquet files storing the table
+    """
+    return pa.schema([pa.field(name, _arrow_type(field), field.nullable)
+                      for name, field in unischema.fields.items()])
+
+
+def _arrow_type(field) -> pa.DataType:
+    if isinstance(field.codec, ScalarCodec):
+        return _ARROW_TYPES[type(field.codec.spark_dtype()).__name__]
+    return pa.binary()
+
+
+def _to_arrow(field, values: Sequence) -> pa.Array:
+    """Encodes the values of one column the way petastorm stores them"""
+    arrow_type = _arrow_type(field)
+    if isinstance(field.codec, ScalarCodec):
+        if arrow_type == pa.string():
+            return pa.array([None if value is None else str(value)
+                             for value in values], arrow_type)
+        if any(value is None for value in values):
+            return pa.array(values, arrow_type)
+        return pa.array(np.asarray(values).astype(
+            arrow_type.to_pandas_dtype()), arrow_type)
+    encoded = []
+    for value in values:
+        if value is not None:
+            value = field.codec.encode(
+                field, np.asarray(value, dtype=field.numpy_dtype))
+        encoded.append(value)
+    return pa.array(encoded, arrow_type)
+
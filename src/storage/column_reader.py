@@ -0,0 +1,51 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import csv
+import os
+from typing import Dict, List
+
+import numpy as np
+
+
+def read_columns(path: str) -> Dict[str, List]:
+    """
+    Reads a file to be loaded into a table column-wise. Supported are CSV
+    files with a header row naming the columns, .npz archives with one
+    array per column and .npy files with a structured array.
+
+    Arguments:
+        path (str): path of the file
+
+    Returns:
+        Dict[str, Sequence]: values of every column in the file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            names = [name.strip() for name in next(reader)]
+            values = list(zip(*reader))
+        if not values:
+            return {name: [] for name in names}
+        return {name: list(column) for name, column in zip(names, values)}
+    if extension == '.npz':
+        with np.load(path) as archive:
+            return {name: archive[name] for name in archive.files}
+    if extension == '.npy':
+        array = np.load(path)
+        if array.dtype.names is None:
+            raise ValueError('%s does not contain a structured array' % path)
+        return {name: array[name] for name in array.dtype.names}
+    raise ValueError('Unsupported file format %s' % extension)
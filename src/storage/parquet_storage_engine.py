@@ -0,0 +1,114 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import pickle
+from typing import Dict, Iterator, List, Sequence
+
+import pyarrow.parquet as pq
+from petastorm.codecs import ScalarCodec
+from petastorm.etl.dataset_metadata import ROW_GROUPS_PER_FILE_KEY, \
+    UNISCHEMA_KEY
+from petastorm.fs_utils import FilesystemResolver
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.storage.abstract_storage_engine import AbstractStorageEngine, \
+    DEFAULT_SCAN_BATCH_SIZE
+from src.storage.bulk_writer import BulkWriter, arrow_schema, \
+    delete_path
+
+
+class ParquetStorageEngine(AbstractStorageEngine):
+    """
+    Storage engine writing and reading the parquet files of a table directly
+    with pyarrow, for single node deployments which cannot afford a JVM.
+    Counting only reads the parquet footers.
+    """
+
+    def create(self, df_metadata: DataFrameMetadata):
+        fs, dataset_path = _resolve(df_metadata)
+        if fs.exists(dataset_path):
+            delete_path(fs, dataset_path)
+        fs.mkdir(dataset_path)
+
+        unischema = df_metadata.schema.petastorm_schema
+        schema = arrow_schema(unischema).with_metadata({
+            UNISCHEMA_KEY: pickle.dumps(unischema),
+            ROW_GROUPS_PER_FILE_KEY: '{}'
+        })
+        with fs.open(os.path.join(dataset_path, '_common_metadata'),
+                     'wb') as f:
+            pq.write_metadata(schema, f)
+
+    def append(self, df_metadata: DataFrameMetadata,
+               columns: Dict[str, Sequence]) -> int:
+        writer = BulkWriter(df_metadata)
+        writer.append_columns(columns)
+        return writer.commit()
+
+    def scan(self, df_metadata: DataFrameMetadata,
+             columns: List[str] = None,
+             batch_size: int = DEFAULT_SCAN_BATCH_SIZE) \
+            -> Iterator[Dict[str, List]]:
+        unischema = df_metadata.schema.petastorm_schema
+        if columns is None:
+            columns = list(unischema.fields)
+        fs, dataset_path = _resolve(df_metadata)
+        for path in _data_files(fs, dataset_path):
+            with fs.open(path) as f:
+                parquet_file = pq.ParquetFile(f)
+                for row_group in range(parquet_file.num_row_groups):
+                    table = parquet_file.read_row_group(row_group,
+                                                        columns=columns)
+                    for start in range(0, table.num_rows, batch_size):
+                        batch = table.slice(start, batch_size)
+                        yield {name: _decode(unischema.fields[name],
+                                             batch.column(name))
+                               for name in columns}
+
+    def count(self, df_metadata: DataFrameMetadata) -> int:
+        fs, dataset_path = _resolve(df_metadata)
+        num_rows = 0
+        for path in _data_files(fs, dataset_path):
+            with fs.open(path) as f:
+                num_rows += pq.read_metadata(f).num_rows
+        return num_rows
+
+
+def _resolve(df_metadata: DataFrameMetadata):
+    resolver = FilesystemResolver(df_metadata.file_url)
+    return resolver.filesystem(), resolver.get_dataset_path()
+
+
+def _data_files(fs, dataset_path: str) -> List[str]:
+    """
+    Paths of the parquet files of a dataset in the order they were written.
+    Files starting with '.' or '_' are metadata or not yet committed.
+    """
+    if not fs.exists(dataset_path):
+        return []
+    paths = []
+    for path in fs.ls(dataset_path):
+        name = os.path.basename(path)
+        if name.endswith('.parquet') and not name.startswith(('.', '_')):
+            paths.append(path)
+    return sorted(paths)
+
+
+def _decode(field, column) -> List:
+    """Decodes the values of one column the way petastorm reads them"""
+    if isinstance(field.codec, ScalarCodec) and column.null_count == 0:
+        return list(column.to_numpy().astype(field.numpy_dtype))
+    return [None if value is None else field.codec.decode(field, value)
+            for value in column.to_pylist()]
@@ -0,0 +1,78 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Dict, Iterator, List, Sequence
+
+from petastorm.unischema import dict_to_spark_row
+from petastorm.utils import decode_row
+
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.storage.abstract_storage_engine import AbstractStorageEngine, \
+    DEFAULT_SCAN_BATCH_SIZE
+from src.storage.dataframe import append_rows, create_dataframe, \
+    load_dataframe
+
+
+class SparkStorageEngine(AbstractStorageEngine):
+    """
+    Storage engine running every operation as a spark job, for deployments
+    with a spark cluster and a distributed filesystem.
+    """
+
+    def create(self, df_metadata: DataFrameMetadata):
+        create_dataframe(df_metadata)
+
+    def append(self, df_metadata: DataFrameMetadata,
+               columns: Dict[str, Sequence]) -> int:
+        names = [column.name for column in df_metadata.schema.column_list]
+        unknown = set(columns) - set(names)
+        if unknown:
+            raise ValueError('Unknown columns %s' % sorted(unknown))
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Columns have different lengths %s' % lengths)
+        num_rows = lengths.pop() if lengths else 0
+        if num_rows == 0:
+            return 0
+
+        unischema = df_metadata.schema.petastorm_schema
+        rows = []
+        for index in range(num_rows):
+            row = {name: columns[name][index] if name in columns else None
+                   for name in names}
+            rows.append(dict_to_spark_row(unischema, row))
+        append_rows(df_metadata, rows)
+        return num_rows
+
+    def scan(self, df_metadata: DataFrameMetadata,
+             columns: List[str] = None,
+             batch_size: int = DEFAULT_SCAN_BATCH_SIZE) \
+            -> Iterator[Dict[str, List]]:
+        unischema = df_metadata.schema.petastorm_schema
+        if columns is None:
+            columns = list(unischema.fields)
+        dataframe = load_dataframe(df_metadata.file_url).select(*columns)
+        batch = {name: [] for name in columns}
+        for row in dataframe.toLocalIterator():
+            row = decode_row(row.asDict(), unischema)
+            for name in columns:
+                batch[name].append(row[name])
+            if len(batch[columns[0]]) == batch_size:
+                yield batch
+                batch = {name: [] for name in columns}
+        if batch[columns[0]]:
+            yield batch
+
+    def count(self, df_metadata: DataFrameMetadata) -> int:
+        return load_dataframe(df_metadata.file_url).count()
@@ -65,4 +65,4 @@ class AbstractClassifierUDF(metaclass=ABCMeta):
         """
 
     def __call__(self, *args, **kwargs):
-        self.classify(*args, **kwargs)
+        return self.classify(*args, **kwargs)
@@ -16,13 +16,11 @@
 from typing import List, Tuple
 
 import numpy as np
-import torchvision
-from torchvision import transforms
 
+from src.configuration.configuration_manager import ConfigurationManager
 from src.models.catalog.frame_info import FrameInfo
 from src.models.catalog.properties import ColorSpace
-from src.models.inference.classifier_prediction import Prediction
-from src.models.inference.representation import BoundingBox, Point
+from src.models.inference.detection_batch import DetectionBatch
 from src.models.storage.batch import FrameBatch
 from src.udfs.abstract_udfs import AbstractClassifierUDF
 
@@ -32,6 +30,10 @@ class FastRCNNObjectDetector(AbstractClassifierUDF):
     Arguments:
         threshold (float): Threshold for classifier confidence score
 
+    The frames of a batch are converted to a float tensor at once and run
+    through the model without autograd. The number of threads torch uses
+    within an operator is set from `inference.torch_threads`, 0 keeps the
+    default of torch.
     """
 
     @property
@@ -41,6 +43,13 @@ class FastRCNNObjectDetector(AbstractClassifierUDF):
     def __init__(self, threshold=0.5):
         super().__init__()
         self.threshold = threshold
+        # torch is only loaded once the udf is used
+        import torch
+        import torchvision
+        threads = ConfigurationManager().get_value('inference',
+                                                   'torch_threads')
+        if threads:
+            torch.set_num_threads(threads)
         self.model = torchvision.models.detection.fasterrcnn_resnet50_fpn(
             pretrained=True)
         self.model.eval()
@@ -78,10 +87,8 @@ class FastRCNNObjectDetector(AbstractClassifierUDF):
             'toothbrush'
         ]
 
-    def _get_predictions(self, frames: np.ndarray) -> Tuple[List[List[str]],
-                                                            List[List[float]],
-                                                            List[List[
-                                                                BoundingBox]]]:
+    def _get_predictions(self, frames: np.ndarray) -> \
+            Tuple[List[np.ndarray], List[np.ndarray], List[np.ndarray]]:
         """
         Performs predictions on input frames
         Arguments:
@@ -89,40 +96,53 @@ class FastRCNNObjectDetector(AbstractClassifierUDF):
             to be performed
 
         Returns:
-            tuple containing predicted_classes (List[List[str]]),
-            predicted_boxes (List[List[BoundingBox]]),
-            predicted_scores (List[List[float]])
+            tuple containing the label ids (List[np.ndarray]), scores
+            (List[np.ndarray]) and (N, 4) boxes (List[np.ndarray]) of every
+            frame
 
         """
 
-        transform = transforms.Compose([transforms.ToTensor()])
-        images = [transform(frame) for frame in frames]
-        predictions = self.model(images)
-        prediction_boxes = []
+        import torch
+        # inference mode skips the autograd bookkeeping no_grad still does
+        no_grad = getattr(torch, 'inference_mode', torch.no_grad)
+        images = torch.from_numpy(np.ascontiguousarray(frames))
+        images = images.permute(0, 3, 1, 2).float().div_(255)
+        with no_grad():
+            predictions = self.model(list(images.unbind(0)))
+
         prediction_classes = []
         prediction_scores = []
+        prediction_boxes = []
         for prediction in predictions:
-            pred_class = [str(self.labels[i]) for i in
-                          list(prediction['labels'].numpy())]
-            pred_boxes = [BoundingBox(Point(i[0], i[1]), Point(i[2], i[3]))
-                          for i in
-                          list(prediction['boxes'].detach().numpy())]
-            pred_score = list(prediction['scores'].detach().numpy())
-            pred_t = \
-                [pred_score.index(x) for x in pred_score if
-                 x > self.threshold][-1]
-            pred_boxes = list(pred_boxes[:pred_t + 1])
-            pred_class = list(pred_class[:pred_t + 1])
-            pred_score = list(pred_score[:pred_t + 1])
-            prediction_boxes.append(pred_boxes)
+            pred_class, pred_score, pred_boxes = self._threshold(
+                prediction['labels'].numpy(),
+                prediction['scores'].numpy(),
+                prediction['boxes'].numpy())
             prediction_classes.append(pred_class)
             prediction_scores.append(pred_score)
+            prediction_boxes.append(pred_boxes)
         return prediction_classes, prediction_scores, prediction_boxes
 
-    def classify(self, batch: FrameBatch) -> List[Prediction]:
+    def _threshold(self, labels: np.ndarray, scores: np.ndarray,
+                   boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray,
+                                               np.ndarray]:
+        """
+        Keeps the detections up to the last one scoring above the threshold
+
+        Arguments:
+            labels (np.ndarray): label ids of the detections
+            scores (np.ndarray): scores of the detections
+            boxes (np.ndarray): (N, 4) corners of the detections
+
+        Returns:
+            tuple containing the label ids, scores and boxes kept
+        """
+        above = np.flatnonzero(scores > self.threshold)
+        keep = above[-1] + 1 if len(above) else 0
+        return labels[:keep], scores[:keep], boxes[:keep]
+
+    def classify(self, batch: FrameBatch) -> DetectionBatch:
         frames = batch.frames_as_numpy_array()
         (pred_classes, pred_scores, pred_boxes) = self._get_predictions(frames)
-        return Prediction.predictions_from_batch_and_lists(batch,
-                                                           pred_classes,
-                                                           pred_scores,
-                                                           boxes=pred_boxes)
+        return DetectionBatch.from_frames(batch, pred_classes, pred_scores,
+                                          self.labels, boxes=pred_boxes)
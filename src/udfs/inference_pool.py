@@ -0,0 +1,595 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import atexit
+import gc
+import multiprocessing
+import os
+import pickle
+import threading
+import traceback
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from multiprocessing import connection
+from queue import Empty
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.configuration.configuration_manager import ConfigurationManager
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.detection_batch import DetectionBatch
+from src.models.storage.batch import FrameBatch
+from src.udfs.udf_loader import load_udf
+from src.utils.logging_manager import LoggingLevel
+from src.utils.logging_manager import LoggingManager
+
+# Key identifying a udf model in the pool
+#   name (str): name of the udf in the catalog
+#   impl_file_path (str): implementation file of the udf
+UdfKey = namedtuple('UdfKey', ['name', 'impl_file_path'])
+
+_DEFAULT_WORKERS = 1
+_DEFAULT_MODEL_MEMORY_MB = 4096
+
+# Seconds between checks whether the workers are still alive
+POLL_INTERVAL = 1
+
+
+class PooledUdf(object):
+    """
+    Callable bound to the function expressions which call a udf registered
+    in the catalog. The calls are run by the InferencePool, which keeps the
+    model of the udf loaded across queries.
+
+    Arguments:
+        name (str): name of the udf in the catalog
+        impl_file_path (str): implementation file of the udf
+    """
+
+    def __init__(self, name: str, impl_file_path: str):
+        self.key = UdfKey(name, impl_file_path)
+
+    def __call__(self, batch: FrameBatch) -> List:
+        return InferencePool().classify(self.key, batch)
+
+    def __eq__(self, other):
+        return isinstance(other, PooledUdf) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+class InferencePool(object):
+    """
+    Keeps the models of the udfs loaded across queries.
+
+    Every udf is instantiated, and thereby loads its model, once. With
+    `inference.workers` set to 0 the udfs run in the calling process, threads
+    calling the same udf share the instance. Otherwise the udfs are hosted by
+    long lived worker processes: every udf is placed on one worker, the
+    frames of a batch are handed over in shared memory, or through the
+    request queue where shared memory does not exist (Python < 3.8), and
+    only the predictions, without their frames, are sent back. A DetectionBatch
+    stays columnar on the way back.
+
+    The memory taken by the loaded models is bounded by
+    `inference.model_memory_mb`, the least recently used models are unloaded
+    first. The memory of a model is the size of its torch parameters and
+    buffers if the udf exposes a `model`, the growth of the resident memory
+    of the process while loading it otherwise.
+
+    Workers are spawned rather than forked, the server process runs threads
+    which must not be duplicated into the workers. Processes which can not
+    have children of their own, e.g. parallel scan workers, run the udfs
+    in process.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        # a forked process can not reach the workers of its parent
+        if cls._instance is None or cls._instance._pid != os.getpid():
+            cls._instance = super(InferencePool, cls).__new__(cls)
+
+            config = ConfigurationManager()
+            workers = config.get_value('inference', 'workers')
+            if workers is None:
+                workers = _DEFAULT_WORKERS
+            memory_mb = config.get_value('inference', 'model_memory_mb')
+            if memory_mb is None:
+                memory_mb = _DEFAULT_MODEL_MEMORY_MB
+            cls._instance.open(workers, memory_mb * 1024 * 1024)
+
+        return cls._instance
+
+    def open(self, workers: int, model_memory: int):
+        """
+        Configures the pool, the workers are started on first use
+
+        Arguments:
+            workers (int): number of worker processes, 0 runs the udfs in
+                process
+            model_memory (int): bound on the memory of the loaded models in
+                bytes
+        """
+        if workers > 0 and multiprocessing.current_process().daemon:
+            workers = 0
+        self._pid = os.getpid()
+        self._num_workers = workers
+        self._lock = threading.Lock()
+        self._models = _ResidentModels(model_memory)
+        # in process
+        self._udfs = {}
+        self._load_locks = {}
+        # worker processes
+        self._workers = []
+        self._placement = {}
+        self._pending = {}
+        self._next_request_id = 0
+        self._dispatcher = None
+
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    @property
+    def model_memory(self) -> int:
+        """
+        Returns:
+            int: memory taken by the loaded models in bytes
+        """
+        return self._models.total
+
+    def resident(self) -> List[UdfKey]:
+        """
+        Returns:
+            List[UdfKey]: the loaded udfs, least recently used first
+        """
+        with self._lock:
+            return self._models.keys()
+
+    def classify(self, key: UdfKey, batch: FrameBatch) -> List:
+        """
+        Runs a udf on a batch, loading its model if it is not resident
+
+        Arguments:
+            key (UdfKey): udf to run
+            batch (FrameBatch): input of the udf
+
+        Returns:
+            List: the outcome of the udf for the frames of the batch
+        """
+        if batch.batch_size == 0:
+            return []
+        if self._num_workers == 0:
+            return self._classify_in_process(key, batch)
+        return self._classify_in_worker(key, batch)
+
+    def shutdown(self):
+        """
+        Stops the workers and unloads every model. The pool is started again
+        on its next use.
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+            dispatcher, self._dispatcher = self._dispatcher, None
+            pending, self._pending = self._pending, {}
+            self._placement.clear()
+            self._udfs.clear()
+            self._models.clear()
+
+        for worker in workers:
+            worker.requests.put(None)
+        for worker in workers:
+            worker.process.join(POLL_INTERVAL * 5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        if dispatcher is not None:
+            dispatcher.join()
+        for worker in workers:
+            worker.responses.close()
+        for future, _ in pending.values():
+            future.set_exception(RuntimeError('Inference pool was shut down'))
+
+    def _classify_in_process(self, key: UdfKey, batch: FrameBatch) -> List:
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # concurrent first calls wait for a single load of the model
+        with load_lock:
+            with self._lock:
+                udf = self._udfs.get(key)
+                if udf is not None:
+                    self._models.touch(key)
+            if udf is None:
+                udf, size = _load_udf(key)
+                with self._lock:
+                    self._udfs[key] = udf
+                    for evicted in self._models.add(key, size):
+                        del self._udfs[evicted]
+                gc.collect()
+
+        return udf.classify(batch)
+
+    def _classify_in_worker(self, key: UdfKey, batch: FrameBatch) -> List:
+        data = np.ascontiguousarray(batch.frames_as_numpy_array())
+        shared_memory = _shared_memory()
+        segment = None
+        if shared_memory is not None:
+            segment = shared_memory.SharedMemory(create=True,
+                                                 size=max(data.nbytes, 1))
+        try:
+            if segment is not None:
+                view = np.ndarray(data.shape, data.dtype, buffer=segment.buf)
+                view[...] = data
+                del view
+                frames = _SharedFrames(segment.name, data.shape,
+                                       data.dtype.str)
+            else:
+                frames = data
+
+            with self._lock:
+                self._start()
+                worker = self._place(key)
+                self._models.touch(key)
+                request_id = self._next_request_id
+                self._next_request_id += 1
+                future = Future()
+                self._pending[request_id] = (future, worker)
+                worker.requests.put(_ClassifyRequest(
+                    request_id, key, frames, batch.indices, batch.info,
+                    batch.frame_info))
+
+            payload, size = future.result()
+        finally:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+        if size is not None:
+            self._loaded_in_worker(key, size, worker)
+        return _attach_frames(pickle.loads(payload), batch)
+
+    def _loaded_in_worker(self, key: UdfKey, size: int, worker: '_Worker'):
+        with self._lock:
+            if self._placement.get(key, worker) is not worker:
+                # the udf was evicted and placed elsewhere meanwhile
+                worker.requests.put(_UnloadRequest(key))
+                return
+            self._placement[key] = worker
+            for evicted in self._models.add(key, size):
+                self._placement.pop(evicted).requests.put(
+                    _UnloadRequest(evicted))
+
+    def _start(self):
+        if self._workers:
+            return
+        context = multiprocessing.get_context('spawn')
+        self._workers = [_Worker(context) for _ in range(self._num_workers)]
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, daemon=True,
+            name='inference-pool-dispatcher')
+        self._dispatcher.start()
+        atexit.unregister(self.shutdown)
+        atexit.register(self.shutdown)
+
+    def _place(self, key: UdfKey) -> '_Worker':
+        worker = self._placement.get(key)
+        if worker is None:
+            placed = {worker: 0 for worker in self._workers}
+            for placed_worker in self._placement.values():
+                placed[placed_worker] += 1
+            worker = min(self._workers, key=placed.get)
+            self._placement[key] = worker
+        return worker
+
+    def _dispatch(self):
+        """
+        Resolves the futures of the requests with the responses of the
+        workers and restarts workers which exited unexpectedly
+        """
+        while True:
+            with self._lock:
+                if self._dispatcher is not threading.current_thread():
+                    return
+                workers = list(self._workers)
+
+            ready = connection.wait([worker.responses for worker in workers],
+                                    timeout=POLL_INTERVAL)
+            for worker in workers:
+                if worker.responses not in ready:
+                    continue
+                try:
+                    request_id, payload, size, error = worker.responses.recv()
+                except (EOFError, OSError):
+                    self._restart(worker)
+                    continue
+
+                with self._lock:
+                    future, _ = self._pending.pop(request_id, (None, None))
+                if future is None:
+                    continue
+                if error is not None:
+                    msg = 'Inference worker failed:\n' + error
+                    LoggingManager().log(msg, LoggingLevel.ERROR)
+                    future.set_exception(RuntimeError(msg))
+                else:
+                    future.set_result((payload, size))
+
+    def _restart(self, worker: '_Worker'):
+        with self._lock:
+            if worker not in self._workers:
+                return
+            LoggingManager().log('Inference worker exited unexpectedly, '
+                                 'restarting it', LoggingLevel.ERROR)
+            for key in [key for key, placed in self._placement.items()
+                        if placed is worker]:
+                del self._placement[key]
+                self._models.remove(key)
+            for request_id in [request_id for request_id, (_, placed)
+                               in self._pending.items() if placed is worker]:
+                future, _ = self._pending.pop(request_id)
+                future.set_exception(
+                    RuntimeError('Inference worker exited unexpectedly'))
+            worker.responses.close()
+            worker.process.join()
+            self._workers[self._workers.index(worker)] = \
+                _Worker(worker.context)
+
+
+class _ResidentModels(object):
+    """
+    Sizes of the loaded models in least recently used order, bounded by a
+    memory budget
+    """
+
+    def __init__(self, budget: int):
+        self._budget = budget
+        self._sizes = OrderedDict()
+        self.total = 0
+
+    def keys(self) -> List[UdfKey]:
+        return list(self._sizes)
+
+    def touch(self, key: UdfKey):
+        if key in self._sizes:
+            self._sizes.move_to_end(key)
+
+    def add(self, key: UdfKey, size: int) -> List[UdfKey]:
+        """
+        Records a loaded model and evicts the least recently used models
+        while the budget is exceeded. The model just loaded is kept even if
+        it does not fit on its own.
+
+        Returns:
+            List[UdfKey]: the models to unload
+        """
+        self.remove(key)
+        self._sizes[key] = size
+        self.total += size
+
+        evicted = []
+        while self.total > self._budget and len(self._sizes) > 1:
+            evicted_key, evicted_size = self._sizes.popitem(last=False)
+            self.total -= evicted_size
+            evicted.append(evicted_key)
+            LoggingManager().log('Unloading udf ' + evicted_key.name,
+                                 LoggingLevel.INFO)
+        if self.total > self._budget:
+            LoggingManager().log('Udf %s takes %d bytes, more than the model '
+                                 'memory budget' % (key.name, size),
+                                 LoggingLevel.WARNING)
+        return evicted
+
+    def remove(self, key: UdfKey):
+        self.total -= self._sizes.pop(key, 0)
+
+    def clear(self):
+        self._sizes.clear()
+        self.total = 0
+
+
+class _Worker(object):
+    """
+    A worker process with its request queue and response pipe. Every worker
+    answers on a pipe of its own, a worker dying halfway through a response
+    can not block the others and shows as the end of its pipe.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.requests = context.Queue()
+        self.responses, sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_serve,
+                                       args=(self.requests, sender,
+                                             os.getpid()),
+                                       daemon=True)
+        self.process.start()
+        sender.close()
+
+
+# Frames of a batch held by a shared memory segment
+#   name (str): name of the segment
+#   shape (Tuple[int]): shape of the frames array
+#   dtype (str): dtype of the frames array
+_SharedFrames = namedtuple('_SharedFrames', ['name', 'shape', 'dtype'])
+
+
+class _ClassifyRequest(object):
+    """
+    Runs a udf on the frames of a batch, held by a shared memory segment
+    or sent along as an array
+    """
+
+    def __init__(self, request_id, key, frames, indices, info, frame_info):
+        self.request_id = request_id
+        self.key = key
+        self.frames = frames
+        self.indices = indices
+        self.info = info
+        self.frame_info = frame_info
+
+    def batch(self) -> Tuple[FrameBatch, object]:
+        """
+        Returns:
+            the batch and the segment its frames are a view of, None if they
+            were sent along. The segment has to stay open until the
+            response is sent, the parent unlinks it once it has the answer.
+        """
+        if not isinstance(self.frames, _SharedFrames):
+            return FrameBatch.from_numpy(self.indices, self.frames,
+                                         self.info, self.frame_info), None
+        segment = _shared_memory().SharedMemory(name=self.frames.name)
+        data = np.ndarray(self.frames.shape, np.dtype(self.frames.dtype),
+                          buffer=segment.buf)
+        return FrameBatch.from_numpy(self.indices, data, self.info,
+                                     self.frame_info), segment
+
+
+class _UnloadRequest(object):
+    """Drops a udf from a worker"""
+
+    def __init__(self, key):
+        self.key = key
+
+
+class _DetachedPrediction(object):
+    """A Prediction sent without its frame, see `_attach_frames`"""
+
+    def __init__(self, prediction: Prediction):
+        self.index = prediction.frame.index \
+            if prediction.frame is not None else None
+        self.labels = prediction.labels
+        self.scores = prediction.scores
+        self.boxes = prediction.boxes
+
+
+def _serve(requests, responses, parent_pid: int):
+    udfs = {}
+    # segments still referenced by the outcomes of a udf
+    segments = []
+    while True:
+        if segments:
+            gc.collect()
+            segments = [segment for segment in segments
+                        if not _close_segment(segment)]
+        try:
+            request = requests.get(timeout=POLL_INTERVAL)
+        except Empty:
+            # exit with the parent, even if it could not stop the workers
+            if os.getppid() != parent_pid:
+                return
+            continue
+        if request is None:
+            return
+        if isinstance(request, _UnloadRequest):
+            udfs.pop(request.key, None)
+            gc.collect()
+            continue
+
+        segment = None
+        try:
+            size = None
+            udf = udfs.get(request.key)
+            if udf is None:
+                udf, size = _load_udf(request.key)
+                udfs[request.key] = udf
+            batch, segment = request.batch()
+            outcomes = udf.classify(batch)
+            payload = pickle.dumps(_detach_frames(outcomes),
+                                   protocol=pickle.HIGHEST_PROTOCOL)
+            responses.send((request.request_id, payload, size, None))
+        except Exception:
+            responses.send((request.request_id, None, None,
+                            traceback.format_exc()))
+        finally:
+            # the frames are views of the segment
+            request = batch = outcomes = None
+            if segment is not None and not _close_segment(segment):
+                segments.append(segment)
+
+
+def _shared_memory():
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        # Python < 3.8
+        return None
+    return shared_memory
+
+
+def _close_segment(segment) -> bool:
+    """
+    Returns:
+        bool: whether the segment could be closed, it can not while arrays
+            still view it
+    """
+    try:
+        segment.close()
+    except BufferError:
+        return False
+    return True
+
+
+def _detach_frames(outcomes: List) -> List:
+    if isinstance(outcomes, DetectionBatch):
+        return outcomes.with_frames(None)
+    return [_DetachedPrediction(outcome)
+            if isinstance(outcome, Prediction) else outcome
+            for outcome in outcomes]
+
+
+def _attach_frames(outcomes: List, batch: FrameBatch) -> List:
+    if isinstance(outcomes, DetectionBatch):
+        return outcomes.with_frames(batch)
+    frames = None
+    for i, outcome in enumerate(outcomes):
+        if isinstance(outcome, _DetachedPrediction):
+            if frames is None:
+                frames = {frame.index: frame for frame in batch.frames}
+            outcomes[i] = Prediction(frames.get(outcome.index),
+                                     outcome.labels, outcome.scores,
+                                     boxes=outcome.boxes)
+    return outcomes
+
+
+def _load_udf(key: UdfKey):
+    LoggingManager().log('Loading udf ' + key.name, LoggingLevel.INFO)
+    before = _resident_memory()
+    udf = load_udf(key.impl_file_path)
+    size = _model_memory(udf)
+    if size is None:
+        size = max(_resident_memory() - before, 0)
+    return udf, size
+
+
+def _model_memory(udf) -> int:
+    model = getattr(udf, 'model', None)
+    if not callable(getattr(model, 'parameters', None)):
+        return None
+    tensors = list(model.parameters())
+    if callable(getattr(model, 'buffers', None)):
+        tensors += list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def _resident_memory() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
@@ -0,0 +1,103 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import os
+import sys
+
+from src.configuration.dictionary import EVA_DIR
+from src.udfs.abstract_udfs import AbstractClassifierUDF
+
+UDF_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_EVA_ROOT = os.path.realpath(EVA_DIR)
+
+
+def resolve_udf_path(impl_file_path: str) -> str:
+    """
+    Resolves the implementation path of a udf registered in the catalog.
+    Relative paths are looked up in the working directory first and in the
+    udf directory otherwise.
+
+    Arguments:
+        impl_file_path (str): path the udf was registered with
+
+    Returns:
+        str: absolute path of the implementation file
+    """
+    if os.path.isabs(impl_file_path) or os.path.exists(impl_file_path):
+        return os.path.abspath(impl_file_path)
+    return os.path.join(UDF_DIR, impl_file_path)
+
+
+def load_udf_class(impl_file_path: str) -> type:
+    """
+    Imports the implementation file of a udf and returns the udf class
+    defined in it
+
+    Arguments:
+        impl_file_path (str): path the udf was registered with
+
+    Returns:
+        type: the concrete AbstractClassifierUDF subclass of the file
+    """
+    path = resolve_udf_path(impl_file_path)
+    module = _import_file(path)
+    module_name = module.__name__
+
+    for _, obj in inspect.getmembers(module, inspect.isclass):
+        if issubclass(obj, AbstractClassifierUDF) \
+                and not inspect.isabstract(obj) \
+                and obj.__module__ == module_name:
+            return obj
+    raise ImportError('No udf implementation found in ' + path)
+
+
+def _import_file(path: str):
+    # files of the eva tree are imported as part of the package, so that
+    # their classes are the same objects the rest of the code refers to
+    relative = os.path.relpath(os.path.realpath(path), _EVA_ROOT)
+    if not relative.startswith(os.path.pardir) and relative.endswith('.py'):
+        return importlib.import_module(
+            relative[:-len('.py')].replace(os.path.sep, '.'))
+
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+    module_name = '_eva_udf_%s_%s' % (
+        os.path.splitext(os.path.basename(path))[0], digest)
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        if spec is None:
+            raise ImportError('Cannot load udf implementation ' + path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return module
+
+
+def load_udf(impl_file_path: str) -> AbstractClassifierUDF:
+    """
+    Instantiates the udf defined in an implementation file, which loads its
+    model
+
+    Arguments:
+        impl_file_path (str): path the udf was registered with
+
+    Returns:
+        AbstractClassifierUDF
+    """
+    return load_udf_class(impl_file_path)()
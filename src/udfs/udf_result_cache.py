@@ -0,0 +1,410 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from src.configuration.configuration_manager import ConfigurationManager
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.representation import BoundingBox, Point
+from src.models.storage.batch import FrameBatch
+from src.udfs.udf_loader import resolve_udf_path
+from src.utils.logging_manager import LoggingLevel
+from src.utils.logging_manager import LoggingManager
+
+# Key identifying the cached outcomes of a udf over a dataset
+#   udf_name (str): name of the udf in the catalog
+#   udf_version (str): version of the udf catalog entry, see `udf_version`
+#   dataset_id (int): catalog id of the dataset the frames belong to
+UdfCacheKey = namedtuple('UdfCacheKey',
+                         ['udf_name', 'udf_version', 'dataset_id'])
+
+_DEFAULT_DIRECTORY = os.path.join('~', '.eva')
+_DEFAULT_FILE_NAME = 'udf_cache.db'
+_DEFAULT_MAX_SIZE_MB = 1024
+# dtypes of the arrays which are stored as raw buffers
+_ARRAY_KINDS = 'biufcSU'
+# keep the number of parameters of a query below the sqlite limit
+_QUERY_CHUNK_SIZE = 500
+
+
+def udf_version(udf_metadata) -> str:
+    """
+    Version of a udf catalog entry. It changes whenever the udf is
+    registered again, its implementation or type are updated or the content
+    of its implementation file changes.
+
+    Arguments:
+        udf_metadata (UdfMetadata): catalog entry of the udf
+
+    Returns:
+        str: version of the udf
+    """
+    entry = '{}:{}:{}:{}:{}'.format(udf_metadata.id, udf_metadata.name,
+                                    udf_metadata.impl_file_path,
+                                    udf_metadata.type,
+                                    _file_digest(udf_metadata.impl_file_path))
+    return hashlib.sha1(entry.encode('utf-8')).hexdigest()[:16]
+
+
+# digests of the udf implementation files by (path, mtime, size)
+_file_digests = {}
+
+
+def _file_digest(impl_file_path: str) -> str:
+    path = resolve_udf_path(impl_file_path)
+    try:
+        stat = os.stat(path)
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+        digest = _file_digests.get(stamp, None)
+        if digest is None:
+            with open(path, 'rb') as impl_file:
+                digest = hashlib.sha1(impl_file.read()).hexdigest()
+            _file_digests[stamp] = digest
+        return digest
+    except OSError:
+        return ''
+
+
+class UdfResultCache(object):
+    """
+    Persistent cache for the outcomes of udfs, stored per
+    (udf name and version, dataset id, frame index).
+
+    Outcomes are encoded as JSON, with arrays as raw buffers, and
+    compressed into a sqlite database. Nothing executable is stored, outcomes
+    of other types are not cached. Predictions are stored without their
+    frame, which is restored from the batch on lookup. The total size of the
+    stored outcomes is bounded, least recently used entries are evicted
+    first. Entries of a udf are dropped as soon as a different version of
+    the udf is seen.
+    """
+
+    _instance = None
+    # caches opened by the parent of a forked process, they must neither be
+    # used nor closed by the child
+    _inherited = []
+
+    def __new__(cls):
+        if cls._instance is not None and cls._instance._pid != os.getpid():
+            cls._inherited.append(cls._instance)
+            cls._instance = None
+        if cls._instance is None:
+            cls._instance = super(UdfResultCache, cls).__new__(cls)
+
+            config = ConfigurationManager()
+            location = config.get_value('cache', 'udf_cache_location')
+            if location is None:
+                directory = os.path.expanduser(_DEFAULT_DIRECTORY)
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+                os.chmod(directory, 0o700)
+                location = os.path.join(directory, _DEFAULT_FILE_NAME)
+            else:
+                location = os.path.expanduser(location)
+                directory = os.path.dirname(location)
+                if directory:
+                    os.makedirs(directory, mode=0o700, exist_ok=True)
+            max_size_mb = config.get_value('cache', 'udf_cache_size_mb')
+            if max_size_mb is None:
+                max_size_mb = _DEFAULT_MAX_SIZE_MB
+            cls._instance.open(location, max_size_mb * 1024 * 1024)
+
+        return cls._instance
+
+    def open(self, location: str, max_size: int):
+        """
+        Opens (and creates if required) the cache database
+
+        Arguments:
+            location (str): path of the sqlite database file
+            max_size (int): bound on the size of the stored outcomes in bytes
+        """
+        LoggingManager().log("Opening udf result cache " + location,
+                             LoggingLevel.INFO)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._versions = {}
+        self._connection = sqlite3.connect(location,
+                                           check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS udf_result ('
+                'udf_name TEXT NOT NULL, '
+                'dataset_id INTEGER NOT NULL, '
+                'frame_id INTEGER NOT NULL, '
+                'value BLOB NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'last_used REAL NOT NULL, '
+                'PRIMARY KEY (udf_name, dataset_id, frame_id))')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS udf_result_last_used '
+                'ON udf_result (last_used)')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS udf_version ('
+                'udf_name TEXT PRIMARY KEY, '
+                'version TEXT NOT NULL)')
+        self._size = self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM udf_result').fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: UdfCacheKey, batch: FrameBatch) -> \
+            Tuple[np.ndarray, np.ndarray]:
+        """
+        Looks up the outcomes of the frames of a batch
+
+        Arguments:
+            key (UdfCacheKey): udf and dataset of the outcomes
+            batch (FrameBatch): frames for which outcomes are required
+
+        Returns:
+            tuple containing a boolean mask of the frames found in the
+            cache and an object array with their outcomes (None for frames
+            which are not cached)
+        """
+        frame_ids = batch.indices.tolist()
+        values = np.empty(len(frame_ids), dtype=object)
+        hits = np.zeros(len(frame_ids), dtype=bool)
+        position = {frame_id: i for i, frame_id in enumerate(frame_ids)}
+
+        with self._lock:
+            self._check_version(key)
+            rows = []
+            for chunk in _chunks(frame_ids):
+                rows.extend(self._connection.execute(
+                    'SELECT frame_id, value FROM udf_result '
+                    'WHERE udf_name = ? AND dataset_id = ? '
+                    'AND frame_id IN (%s)' % ','.join('?' * len(chunk)),
+                    [key.udf_name, key.dataset_id] + chunk).fetchall())
+            if rows:
+                self._touch(key, [row[0] for row in rows])
+
+        frames = batch.frames if rows else None
+        for frame_id, value in rows:
+            i = position[frame_id]
+            try:
+                values[i] = _decode(value, frames[i])
+            except (ValueError, TypeError, KeyError, zlib.error):
+                # rows which were not written by the cache are misses
+                continue
+            hits[i] = True
+        return hits, values
+
+    def put(self, key: UdfCacheKey, batch: FrameBatch, outcomes: List):
+        """
+        Stores the outcomes of the frames of a batch
+
+        Arguments:
+            key (UdfCacheKey): udf and dataset of the outcomes
+            batch (FrameBatch): frames to which the outcomes belong
+            outcomes (List): one outcome per frame of the batch
+        """
+        frame_ids = batch.indices.tolist()
+        if len(frame_ids) != len(outcomes):
+            LoggingManager().log(
+                "UdfResultCache::put() expected one outcome per frame",
+                LoggingLevel.WARNING)
+            return
+
+        now = time.time()
+        rows = []
+        for frame_id, outcome in zip(frame_ids, outcomes):
+            try:
+                value = _encode(outcome)
+            except TypeError:
+                continue
+            rows.append((key.udf_name, key.dataset_id, frame_id, value,
+                         len(value), now))
+        if len(rows) < len(frame_ids):
+            LoggingManager().log(
+                "UdfResultCache::put() skipped outcomes of udf %s which "
+                "cannot be encoded" % key.udf_name, LoggingLevel.DEBUG)
+            frame_ids = [row[2] for row in rows]
+            if not rows:
+                return
+
+        with self._lock:
+            self._check_version(key)
+            with self._connection:
+                for chunk in _chunks(frame_ids):
+                    self._size -= self._connection.execute(
+                        'SELECT COALESCE(SUM(size), 0) FROM udf_result '
+                        'WHERE udf_name = ? AND dataset_id = ? '
+                        'AND frame_id IN (%s)' % ','.join('?' * len(chunk)),
+                        [key.udf_name, key.dataset_id] + chunk).fetchone()[0]
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO udf_result '
+                    'VALUES (?, ?, ?, ?, ?, ?)', rows)
+                self._size += sum(row[4] for row in rows)
+                self._evict()
+
+    def invalidate(self, udf_name: str):
+        """
+        Drops all the cached outcomes of a udf
+
+        Arguments:
+            udf_name (str): name of the udf
+        """
+        with self._lock:
+            with self._connection:
+                self._delete_udf(udf_name)
+                self._connection.execute(
+                    'DELETE FROM udf_version WHERE udf_name = ?', [udf_name])
+            self._versions.pop(udf_name, None)
+
+    def _check_version(self, key: UdfCacheKey):
+        version = self._versions.get(key.udf_name, None)
+        if version is None:
+            row = self._connection.execute(
+                'SELECT version FROM udf_version WHERE udf_name = ?',
+                [key.udf_name]).fetchone()
+            version = row[0] if row is not None else None
+
+        if version != key.udf_version:
+            with self._connection:
+                if version is not None:
+                    LoggingManager().log(
+                        "Invalidating cached outcomes of udf " +
+                        key.udf_name, LoggingLevel.INFO)
+                    self._delete_udf(key.udf_name)
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO udf_version VALUES (?, ?)',
+                    [key.udf_name, key.udf_version])
+        self._versions[key.udf_name] = key.udf_version
+
+    def _delete_udf(self, udf_name: str):
+        self._size -= self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM udf_result '
+            'WHERE udf_name = ?', [udf_name]).fetchone()[0]
+        self._connection.execute(
+            'DELETE FROM udf_result WHERE udf_name = ?', [udf_name])
+
+    def _touch(self, key: UdfCacheKey, frame_ids: List[int]):
+        now = time.time()
+        with self._connection:
+            for chunk in _chunks(frame_ids):
+                self._connection.execute(
+                    'UPDATE udf_result SET last_used = ? '
+                    'WHERE udf_name = ? AND dataset_id = ? '
+                    'AND frame_id IN (%s)' % ','.join('?' * len(chunk)),
+                    [now, key.udf_name, key.dataset_id] + chunk)
+
+    def _evict(self):
+        while self._size > self._max_size:
+            rows = self._connection.execute(
+                'SELECT rowid, size FROM udf_result '
+                'ORDER BY last_used LIMIT ?', [_QUERY_CHUNK_SIZE]).fetchall()
+            if not rows:
+                self._size = 0
+                return
+
+            evicted = []
+            for rowid, size in rows:
+                evicted.append(rowid)
+                self._size -= size
+                if self._size <= self._max_size:
+                    break
+            self._connection.execute(
+                'DELETE FROM udf_result WHERE rowid IN (%s)' %
+                ','.join('?' * len(evicted)), evicted)
+
+
+def _chunks(values: List) -> Iterator[List]:
+    for start in range(0, len(values), _QUERY_CHUNK_SIZE):
+        yield values[start:start + _QUERY_CHUNK_SIZE]
+
+
+def _encode(outcome) -> bytes:
+    return zlib.compress(json.dumps(_to_json(outcome)).encode('utf-8'))
+
+
+def _decode(value: bytes, frame):
+    return _from_json(json.loads(zlib.decompress(value).decode('utf-8')),
+                      frame)
+
+
+def _to_json(value):
+    # json objects are kept for tagged values, plain dicts are tagged too
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return _to_json(value.item())
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, tuple):
+        return {'tuple': [_to_json(item) for item in value]}
+    if isinstance(value, dict) and all(isinstance(item, str)
+                                       for item in value):
+        return {'dict': {name: _to_json(item)
+                         for name, item in value.items()}}
+    if isinstance(value, bytes):
+        return {'bytes': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, np.ndarray) and value.dtype.kind in _ARRAY_KINDS:
+        return {'ndarray': [value.dtype.str, list(value.shape),
+                            base64.b64encode(
+                                np.ascontiguousarray(value).tobytes())
+                            .decode('ascii')]}
+    if isinstance(value, Prediction):
+        boxes = None
+        if value.boxes is not None:
+            boxes = [[box.top_left.x, box.top_left.y,
+                      box.bottom_right.x, box.bottom_right.y]
+                     for box in value.boxes]
+        return {'prediction': [_to_json(value.labels),
+                               _to_json(value.scores),
+                               _to_json(boxes)]}
+    raise TypeError('Cannot cache outcome of type %s' % type(value).__name__)
+
+
+def _from_json(value, frame):
+    if isinstance(value, list):
+        return [_from_json(item, frame) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    (kind, content), = value.items()
+    if kind == 'tuple':
+        return tuple(_from_json(item, frame) for item in content)
+    if kind == 'dict':
+        return {name: _from_json(item, frame)
+                for name, item in content.items()}
+    if kind == 'bytes':
+        return base64.b64decode(content)
+    if kind == 'ndarray':
+        dtype, shape, data = content
+        dtype = np.dtype(dtype)
+        if dtype.kind not in _ARRAY_KINDS:
+            raise ValueError('Unexpected dtype of cached array %s' % dtype)
+        return np.frombuffer(base64.b64decode(data),
+                             dtype=dtype).reshape(shape).copy()
+    if kind == 'prediction':
+        labels, scores, boxes = [_from_json(item, frame) for item in content]
+        if boxes is not None:
+            boxes = [BoundingBox(Point(x1, y1), Point(x2, y2))
+                     for x1, y1, x2, y2 in boxes]
+        return Prediction(frame, labels, scores, boxes=boxes)
+    raise ValueError('Unknown cached outcome kind ' + kind)
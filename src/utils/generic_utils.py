@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import importlib
+import threading
+from typing import Any, Callable
 
 
 def validate_kwargs(kwargs, allowed_kwargs,
@@ -36,3 +38,39 @@ def str_to_class(class_path: str):
     module_path, class_name = class_path.rsplit(".", 1)
     module = importlib.import_module(module_path)
     return getattr(module, class_name)
+
+
+class LazyObject(object):
+    """
+    Stands in for an object which is expensive to import or create, such
+    as a class from an optional dependency stack, and creates it on first
+    use. Calls and attribute lookups are forwarded to the created object.
+
+    Arguments:
+        factory (Callable[[], Any]): creates the object
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._object = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """
+        Returns:
+            Any: the object, created by the first call
+        """
+        if self._object is None:
+            with self._lock:
+                if self._object is None:
+                    self._object = self._factory()
+        return self._object
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in ('_factory', '_object', '_lock'):
+            # not set yet, e.g. while copying
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
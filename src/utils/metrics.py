@@ -0,0 +1,358 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Tuple
+
+# upper bounds in seconds of the latency buckets, the Prometheus defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+# queries and admission waits take longer than calls
+QUERY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                 60.0, 120.0, 300.0, 600.0)
+
+
+class _ThreadCells:
+    """
+    Values of a metric, kept separately by every thread recording them.
+    A thread only ever writes its own cell, so recording takes no lock; the
+    lock is taken once per thread to add its cell, and when the cells are
+    summed up for an export.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._cells = {}
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        cell = self._cells.get(threading.get_ident())
+        if cell is None:
+            with self._lock:
+                cell = self._cells.setdefault(threading.get_ident(),
+                                              [0] * self._size)
+        return cell
+
+    def total(self) -> List[float]:
+        with self._lock:
+            cells = list(self._cells.values())
+        totals = [0] * self._size
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class _Counter:
+    """A value which only goes up, e.g. the number of queries run"""
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+
+    def inc(self, amount: float = 1):
+        self._cells.cell()[0] += amount
+
+    def value(self) -> float:
+        return self._cells.total()[0]
+
+
+class _Gauge:
+    """
+    A value going up and down, e.g. the number of open connections. It is
+    set by a single thread, typically the event loop, or read from a
+    function when exported.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._function = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        self._value += amount
+
+    def dec(self, amount: float = 1):
+        self._value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """The gauge takes the value returned by `function` when exported"""
+        self._function = function
+
+    def value(self) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+
+class _Histogram:
+    """Distribution of observed values, e.g. the latency of queries"""
+
+    def __init__(self, buckets: Tuple[float]):
+        self._bounds = buckets
+        # a count per bucket, the +Inf bucket and the sum of the values
+        self._cells = _ThreadCells(len(buckets) + 2)
+
+    def observe(self, value: float):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self._bounds, value)] += 1
+        cell[-1] += value
+
+    def value(self) -> Tuple[List[Tuple[float, int]], float, int]:
+        """
+        Returns:
+            the cumulative count of every bucket by upper bound, the sum
+            and the count of the values
+        """
+        totals = self._cells.total()
+        buckets = []
+        count = 0
+        for bound, bucket_count in zip(self._bounds + (math.inf,),
+                                       totals[:-1]):
+            count += bucket_count
+            buckets.append((bound, count))
+        return buckets, totals[-1], count
+
+
+class Metric:
+    """
+    A metric, made of one time series for every combination of label values
+
+    The series of a metric without labels is recorded through the metric
+    itself, e.g. `metric.inc()`, the series of a metric with labels through
+    `metric.labels(...)`, e.g. `metric.labels('select', 'ok').inc()`.
+
+    Arguments:
+        kind (str): counter, gauge or histogram
+        name (str): name of the metric
+        documentation (str): help text of the metric
+        labelnames (Tuple[str]): names of the labels
+        buckets (Tuple[float]): upper bounds of the buckets of a histogram
+    """
+
+    def __init__(self, kind: str, name: str, documentation: str,
+                 labelnames: Tuple[str] = (),
+                 buckets: Tuple[float] = DEFAULT_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        """
+        Returns:
+            the series of the label values, created on first use
+        """
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError('%s expects the labels %s' % (
+                    self.name, ', '.join(self.labelnames)))
+            with self._lock:
+                series = self._series.get(values)
+                if series is None:
+                    series = self._new_series()
+                    self._series[values] = series
+        return series
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def value(self):
+        return self._default.value()
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """
+        Returns:
+            the name, labels and value of every sample of the metric
+        """
+        with self._lock:
+            series = list(self._series.items())
+        samples = []
+        for values, serie in series:
+            labels = dict(zip(self.labelnames,
+                              (str(value) for value in values)))
+            if self.kind != 'histogram':
+                samples.append((self.name, labels, serie.value()))
+                continue
+            buckets, total, count = serie.value()
+            for bound, bucket_count in buckets:
+                samples.append((self.name + '_bucket',
+                                dict(labels, le=_format_value(bound)),
+                                bucket_count))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, count))
+        return samples
+
+    def _new_series(self):
+        if self.kind == 'counter':
+            return _Counter()
+        if self.kind == 'gauge':
+            return _Gauge()
+        return _Histogram(self._buckets)
+
+
+class MetricsRegistry:
+    """
+    The metrics of the process, exported in the Prometheus text format.
+    A metric is created on its first registration, registering it again
+    returns the same metric.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Tuple[str] = ()) -> Metric:
+        return self._register('counter', name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: Tuple[str] = ()) -> Metric:
+        return self._register('gauge', name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Tuple[str] = (),
+                  buckets: Tuple[float] = DEFAULT_BUCKETS) -> Metric:
+        return self._register('histogram', name, documentation, labelnames,
+                              buckets)
+
+    def get(self, name: str) -> Metric:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: the metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(),
+                             key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append('# HELP %s %s' % (
+                metric.name, metric.documentation.replace('\\', '\\\\')
+                .replace('\n', '\\n')))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            for name, labels, value in metric.samples():
+                if labels:
+                    name += '{%s}' % ','.join(
+                        '%s="%s"' % (label, _escape(value))
+                        for label, value in labels.items())
+                lines.append('%s %s' % (name, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, kind, name, documentation, labelnames,
+                  buckets=DEFAULT_BUCKETS) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = Metric(kind, name, documentation, labelnames,
+                                buckets)
+                self._metrics[name] = metric
+            elif metric.kind != kind or \
+                    metric.labelnames != tuple(labelnames):
+                raise ValueError('Metric %s is already registered as a %s '
+                                 'with the labels %s' % (
+                                     name, metric.kind,
+                                     ', '.join(metric.labelnames)))
+            return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# Metrics of the server, recorded by the modules along the query path
+METRICS = MetricsRegistry()
+
+CONNECTIONS = METRICS.gauge(
+    'eva_connections', 'Open client connections')
+CONNECTIONS_TOTAL = METRICS.counter(
+    'eva_connections_total', 'Client connections accepted')
+CONNECTION_ERRORS = METRICS.counter(
+    'eva_connection_errors_total', 'Client connections lost on an error')
+QUERIES = METRICS.counter(
+    'eva_queries_total', 'Statements run, by statement type and outcome',
+    ('type', 'status'))
+QUERY_DURATION = METRICS.histogram(
+    'eva_query_duration_seconds',
+    'Time from planning a statement to sending its last batch',
+    ('type',), QUERY_BUCKETS)
+SCHEDULER_WAIT = METRICS.histogram(
+    'eva_scheduler_wait_seconds',
+    'Time statements waited for their admission', (), QUERY_BUCKETS)
+SCHEDULER_QUEUED = METRICS.gauge(
+    'eva_scheduler_queued', 'Statements waiting for their admission')
+SCHEDULER_RUNNING = METRICS.gauge(
+    'eva_scheduler_running', 'Statements admitted and running')
+SCHEDULER_RUNNING_HEAVY = METRICS.gauge(
+    'eva_scheduler_running_heavy', 'Running statements which run udfs')
+SCHEDULER_FRAME_MEMORY = METRICS.gauge(
+    'eva_scheduler_frame_memory_bytes',
+    'Estimated frame memory in flight of the running statements')
+FRAMES_SCANNED = METRICS.counter(
+    'eva_frames_scanned_total', 'Frames loaded from the storage',
+    ('loader',))
+LOADER_DECODE = METRICS.histogram(
+    'eva_loader_decode_seconds',
+    'Time a loader spent reading and decoding a batch of frames',
+    ('loader',))
+UDF_INVOCATIONS = METRICS.counter(
+    'eva_udf_invocations_total', 'Calls of a udf on a batch', ('udf',))
+UDF_FRAMES = METRICS.counter(
+    'eva_udf_frames_total', 'Frames a udf was called on', ('udf',))
+UDF_DURATION = METRICS.histogram(
+    'eva_udf_duration_seconds', 'Time of a call of a udf on a batch',
+    ('udf',))
+CACHE_LOOKUPS = METRICS.counter(
+    'eva_cache_lookups_total',
+    'Lookups in the caches of the server by outcome, hit or miss; the udf '
+    'result cache counts frames',
+    ('cache', 'result'))
+CATALOG_QUERY_DURATION = METRICS.histogram(
+    'eva_catalog_query_duration_seconds',
+    'Time of the statements run on the catalog database',
+    ('operation',))
@@ -0,0 +1,52 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.catalog.models.catalog_version import CatalogVersion
+from src.catalog.services.catalog_version_service import \
+    CatalogVersionService
+from src.catalog.sql_config import create_catalog_engine
+
+
+class CatalogVersionServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_catalog_engine(
+            'sqlite:///' + os.path.join(self.tmp_dir, 'eva.db'))
+        CatalogVersion.__table__.create(self.engine)
+        patcher = patch(
+            'src.catalog.services.catalog_version_service.SQLConfig')
+        patcher.start().return_value.engine = self.engine
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_bump_should_increment_version(self):
+        service = CatalogVersionService()
+        self.assertEqual(0, service.version())
+
+        service.bump()
+        service.bump()
+
+        self.assertEqual(2, service.version())
+        # other processes see the version of the database
+        self.assertEqual(2, CatalogVersionService().version())
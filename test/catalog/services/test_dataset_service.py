@@ -14,7 +14,7 @@
 # limitations under the License.
 from unittest import TestCase
 
-from mock import patch
+from mock import call, patch
 
 from src.catalog.services.df_service import DatasetService
 
@@ -66,3 +66,36 @@ class DatasetServiceTest(TestCase):
         expected = mocked.query.filter.return_value.one.return_value
 
         self.assertEqual(actual, expected)
+
+    @patch("src.catalog.services.base_service.db_session")
+    @patch("src.catalog.services.df_service.joinedload")
+    @patch("src.catalog.services.df_service.DataFrameMetadata")
+    def test_dataset_with_columns_loads_and_detaches_columns(
+            self, mocked, mock_joinedload, mock_session):
+        service = DatasetService()
+        query = mocked.query.options.return_value.filter.return_value
+        dataset = query.one_or_none.return_value
+        dataset.columns = ['column1', 'column2']
+
+        actual = service.dataset_with_columns(name=DATASET_NAME)
+
+        mock_joinedload.assert_called_with(mocked._columns)
+        mocked.query.options.return_value.filter.assert_called_with(
+            mocked._name == DATASET_NAME)
+        self.assertEqual(actual, dataset)
+        mock_session.expunge.assert_has_calls(
+            [call('column1'), call('column2'), call(dataset)])
+
+    @patch("src.catalog.services.base_service.db_session")
+    @patch("src.catalog.services.df_service.joinedload")
+    @patch("src.catalog.services.df_service.DataFrameMetadata")
+    def test_dataset_with_columns_returns_none_for_unknown_id(
+            self, mocked, mock_joinedload, mock_session):
+        service = DatasetService()
+        mocked.query.options.return_value.filter.return_value \
+            .one_or_none.return_value = None
+
+        self.assertIsNone(service.dataset_with_columns(dataset_id=DATASET_ID))
+        mocked.query.options.return_value.filter.assert_called_with(
+            mocked._id == DATASET_ID)
+        mock_session.expunge.assert_not_called()
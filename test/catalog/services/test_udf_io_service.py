@@ -54,6 +54,19 @@ class UdfServiceTest(TestCase):
             return_value.all.return_value
         self.assertEqual(actual, expected)
 
+    @patch('src.catalog.services.base_service.db_session')
+    @patch('src.catalog.services.udf_io_service.UdfIO')
+    def test_udf_io_by_udf_id_should_return_detached_io(self, mocked,
+                                                        mock_session):
+        service = UdfIOService()
+        mocked.query.filter.return_value.all.return_value = ['in', 'out']
+
+        actual = service.udf_io_by_udf_id(UDF_ID)
+
+        mocked.query.filter.assert_called_with(mocked._udf_id == UDF_ID)
+        self.assertEqual(['in', 'out'], actual)
+        self.assertEqual(2, mock_session.expunge.call_count)
+
     def test_add_udf_io_should_save_io(self):
         service = UdfIOService()
         io_list = [MagicMock(), MagicMock()]
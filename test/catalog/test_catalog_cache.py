@@ -0,0 +1,96 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+from unittest.mock import MagicMock
+
+from src.catalog.catalog_cache import CatalogCache
+from src.utils.metrics import CACHE_LOOKUPS
+
+
+class CatalogCacheTest(unittest.TestCase):
+
+    def test_should_load_entry_once(self):
+        cache = CatalogCache()
+        load = MagicMock(return_value='entry')
+
+        self.assertEqual('entry', cache.get('dataset', 'name', load))
+        self.assertEqual('entry', cache.get('dataset', 'name', load))
+        load.assert_called_once_with()
+
+    def test_should_count_hits_and_misses(self):
+        cache = CatalogCache()
+        hits = CACHE_LOOKUPS.labels('catalog', 'hit').value()
+        misses = CACHE_LOOKUPS.labels('catalog', 'miss').value()
+
+        cache.get('dataset', 'name', lambda: 'entry')
+        cache.get('dataset', 'name', lambda: 'entry')
+
+        self.assertEqual(hits + 1,
+                         CACHE_LOOKUPS.labels('catalog', 'hit').value())
+        self.assertEqual(misses + 1,
+                         CACHE_LOOKUPS.labels('catalog', 'miss').value())
+
+    def test_should_not_cache_misses(self):
+        cache = CatalogCache()
+        load = MagicMock(side_effect=[None, 'entry'])
+
+        self.assertIsNone(cache.get('dataset', 'name', load))
+        self.assertEqual('entry', cache.get('dataset', 'name', load))
+
+    def test_invalidate_should_drop_entry_only(self):
+        cache = CatalogCache()
+        cache.get('dataset', 'a', lambda: 'a1')
+        cache.get('dataset', 'b', lambda: 'b1')
+
+        cache.invalidate('dataset', 'a')
+
+        self.assertEqual(1, cache.version)
+        self.assertEqual('a2', cache.get('dataset', 'a', lambda: 'a2'))
+        self.assertEqual('b1', cache.get('dataset', 'b', lambda: 'b2'))
+
+    def test_should_not_store_entry_loaded_during_invalidation(self):
+        cache = CatalogCache()
+
+        def stale_load():
+            # another thread writes the entry while it is being loaded
+            cache.invalidate('dataset', 'name')
+            return 'stale'
+
+        self.assertEqual('stale', cache.get('dataset', 'name', stale_load))
+        self.assertEqual('fresh', cache.get('dataset', 'name',
+                                            lambda: 'fresh'))
+
+    def test_should_drop_entries_when_shared_version_changes(self):
+        cache = CatalogCache()
+        cache.check_shared_version(3)
+        cache.get('dataset', 'name', lambda: 'old')
+
+        cache.check_shared_version(3)
+        self.assertEqual('old', cache.get('dataset', 'name',
+                                          lambda: 'new'))
+
+        cache.check_shared_version(4)
+        self.assertEqual('new', cache.get('dataset', 'name',
+                                          lambda: 'new'))
+
+    def test_clear_should_drop_all_entries(self):
+        cache = CatalogCache()
+        cache.get('dataset', 'name', lambda: 'old')
+        cache.get('udf', 'name', lambda: 'old')
+
+        cache.clear()
+
+        self.assertEqual('new', cache.get('dataset', 'name', lambda: 'new'))
+        self.assertEqual('new', cache.get('udf', 'name', lambda: 'new'))
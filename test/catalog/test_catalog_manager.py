@@ -19,6 +19,7 @@ from mock import MagicMock
 from src.catalog.catalog_manager import CatalogManager
 from src.catalog.column_type import ColumnType
 from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
 
 
 class CatalogManagerTests(unittest.TestCase):
@@ -26,6 +27,25 @@ class CatalogManagerTests(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    def setUp(self):
+        CatalogManager._cache.clear()
+        patcher = mock.patch(
+            'src.catalog.catalog_manager.CatalogVersionService')
+        self.version_mock = patcher.start()
+        self.version_mock.return_value.version.return_value = 0
+        self.addCleanup(patcher.stop)
+
+    def create_dataset(self, ds_mock):
+        dataset = DataFrameMetadata('name', 'file1')
+        dataset._id = 1
+        columns = [DataFrameColumn('column1', ColumnType.INTEGER),
+                   DataFrameColumn('column2', ColumnType.TEXT)]
+        for col_id, column in enumerate(columns):
+            column._id = col_id + 10
+        dataset._columns = columns
+        ds_mock.return_value.dataset_with_columns.return_value = dataset
+        return dataset
+
     @mock.patch('src.catalog.catalog_manager.init_db')
     def test_catalog_manager_singleton_pattern(self, mocked_db):
         x = CatalogManager()
@@ -60,71 +80,90 @@ class CatalogManagerTests(unittest.TestCase):
 
     @mock.patch('src.catalog.catalog_manager.init_db')
     @mock.patch('src.catalog.catalog_manager.DatasetService')
-    @mock.patch('src.catalog.catalog_manager.DatasetColumnService')
-    def test_table_binding_returns_metadata_and_column_ids(self,
-                                                           dcs_mock,
-                                                           ds_mock,
+    def test_table_binding_returns_metadata_and_column_ids(self, ds_mock,
                                                            initdb_mock):
+        self.create_dataset(ds_mock)
         catalog = CatalogManager()
-        dataset_name = "name"
 
-        columns = ["column1", "column2"]
-        database_name = "database"
-        actual = catalog.get_table_bindings(database_name, dataset_name,
-                                            columns)
-        ds_dataset_name_mock = ds_mock.return_value.dataset_by_name
-        ds_dataset_name_mock.assert_called_with(dataset_name)
+        actual = catalog.get_table_bindings("database", "name",
+                                            ["column2", "COLUMN1", "other"])
 
-        column_values_mock = \
-            dcs_mock.return_value.columns_by_dataset_id_and_names
-        column_values_mock.assert_called_with(
-            ds_dataset_name_mock.return_value,
-            columns
-        )
-
-        self.assertEqual(actual, (ds_dataset_name_mock.return_value,
-                                  column_values_mock.return_value))
+        ds_mock.return_value.dataset_with_columns.assert_called_once_with(
+            name="name")
+        self.assertEqual(actual, (1, [11, 10, None]))
 
     @mock.patch('src.catalog.catalog_manager.init_db')
     @mock.patch('src.catalog.catalog_manager.DatasetService')
-    @mock.patch('src.catalog.catalog_manager.DatasetColumnService')
     def test_table_binding_without_columns_returns_no_column_ids(self,
-                                                                 dcs_mock,
                                                                  ds_mock,
                                                                  initdb_mock):
+        self.create_dataset(ds_mock)
         catalog = CatalogManager()
-        dataset_name = "name"
 
-        database_name = "database"
-        actual = catalog.get_table_bindings(database_name, dataset_name)
-        ds_dataset_name_mock = ds_mock.return_value.dataset_by_name
-        ds_dataset_name_mock.assert_called_with(dataset_name)
+        actual = catalog.get_table_bindings("database", "name")
 
-        column_values_mock = \
-            dcs_mock.return_value.columns_by_dataset_id_and_names
-        column_values_mock.assert_not_called()
+        self.assertEqual(actual, (1, []))
 
-        self.assertEqual(actual, (ds_dataset_name_mock.return_value, []))
+    @mock.patch('src.catalog.catalog_manager.init_db')
+    @mock.patch('src.catalog.catalog_manager.DatasetService')
+    def test_table_binding_of_unknown_table(self, ds_mock, initdb_mock):
+        ds_mock.return_value.dataset_with_columns.return_value = None
+        catalog = CatalogManager()
+
+        self.assertEqual((None, []),
+                         catalog.get_table_bindings(None, "name", ["c"]))
 
     @mock.patch('src.catalog.catalog_manager.init_db')
     @mock.patch('src.catalog.catalog_manager.DatasetService')
-    @mock.patch('src.catalog.catalog_manager.DatasetColumnService')
-    def test_table_binding_without_columns_returns_no_column_ids(self,
-                                                                 dcs_mock,
-                                                                 ds_mock,
-                                                                 initdb_mock):
+    def test_get_dataset_metadata_returns_dataset_with_schema(self,
+                                                              ds_mock,
+                                                              initdb_mock):
+        dataset = self.create_dataset(ds_mock)
         catalog = CatalogManager()
-        dataset_name = "name"
 
-        database_name = "database"
+        actual = catalog.get_dataset_metadata("database", "name")
 
-        actual = catalog.get_dataset_metadata(database_name, dataset_name)
-        ds_mock.return_value.dataset_object_by_name.assert_called_with(
-            database_name, dataset_name)
+        self.assertEqual(actual, dataset)
+        self.assertEqual(dataset.columns, actual.schema.column_list)
 
-        self.assertEqual(actual,
-                         ds_mock.return_value.dataset_object_by_name
-                         .return_value)
+    @mock.patch('src.catalog.catalog_manager.init_db')
+    @mock.patch('src.catalog.catalog_manager.DatasetService')
+    @mock.patch('src.catalog.catalog_manager.DatasetColumnService')
+    def test_should_load_dataset_once_until_it_is_created_again(
+            self, dcs_mock, ds_mock, initdb_mock):
+        self.create_dataset(ds_mock)
+        catalog = CatalogManager()
+        catalog.get_dataset_metadata(None, "name")
+        catalog.get_table_bindings(None, "name", ["column1"])
+        catalog.get_table_bindings(None, "name", ["column2"])
+        self.assertEqual(
+            1, ds_mock.return_value.dataset_with_columns.call_count)
+
+        ds_mock.return_value.create_dataset.return_value.id = 1
+        catalog.create_metadata("name", "file1", [])
+        catalog.get_dataset_metadata(None, "name")
+        self.assertEqual(
+            2, ds_mock.return_value.dataset_with_columns.call_count)
+
+    @mock.patch('src.catalog.catalog_manager.init_db')
+    @mock.patch('src.catalog.catalog_manager.DatasetService')
+    def test_get_metadata_returns_requested_columns(self, ds_mock,
+                                                    initdb_mock):
+        dataset = self.create_dataset(ds_mock)
+        catalog = CatalogManager()
+
+        subset = catalog.get_metadata(1, [11])
+        self.assertEqual((1, 'name', 'file1'),
+                         (subset.id, subset.name, subset.file_url))
+        self.assertEqual(['column2'],
+                         [col.name for col in subset.schema.column_list])
+        self.assertEqual(dataset, catalog.get_metadata(1))
+        self.assertEqual(2, len(dataset.schema.column_list))
+        self.assertEqual([ColumnType.TEXT],
+                         catalog.get_column_types(1, [11]))
+        self.assertEqual([10, 11], catalog.get_column_ids(1))
+        ds_mock.return_value.dataset_with_columns.assert_called_once_with(
+            dataset_id=1)
 
     @mock.patch('src.catalog.catalog_manager.UdfIO')
     def test_create_udf_io_object(self, udfio_mock):
@@ -149,6 +188,63 @@ class CatalogManagerTests(unittest.TestCase):
             'udf', 'sample.py', 'classification')
         self.assertEqual(actual, udf_mock.return_value.create_udf.return_value)
 
+    @mock.patch('src.catalog.catalog_manager.UdfService')
+    def test_get_udf_by_name(self, udf_mock):
+        udf_mock.return_value.detach.side_effect = lambda udf: udf
+        catalog = CatalogManager()
+        actual = catalog.get_udf_by_name('udf')
+        udf_mock.return_value.udf_by_name.assert_called_with('udf')
+        self.assertEqual(actual,
+                         udf_mock.return_value.udf_by_name.return_value)
+
+    @mock.patch('src.catalog.catalog_manager.UdfService')
+    @mock.patch('src.catalog.catalog_manager.UdfIOService')
+    def test_should_load_udf_once_until_it_is_created_again(self,
+                                                            udfio_mock,
+                                                            udf_mock):
+        udf_mock.return_value.detach.side_effect = lambda udf: udf
+        udf_mock.return_value.create_udf.return_value.id = 1
+        udfio_mock.return_value.udf_io_by_udf_id.return_value = ['io']
+        catalog = CatalogManager()
+        for _ in range(2):
+            catalog.get_udf_by_name('udf')
+            self.assertEqual(['io'], catalog.get_udf_io(1))
+        self.assertEqual(1, udf_mock.return_value.udf_by_name.call_count)
+        self.assertEqual(
+            1, udfio_mock.return_value.udf_io_by_udf_id.call_count)
+
+        catalog.create_udf('udf', 'sample.py', 'classification', [])
+        catalog.get_udf_by_name('udf')
+        catalog.get_udf_io(1)
+        self.assertEqual(2, udf_mock.return_value.udf_by_name.call_count)
+        self.assertEqual(
+            2, udfio_mock.return_value.udf_io_by_udf_id.call_count)
+
+    @mock.patch('src.catalog.catalog_manager.init_db')
+    @mock.patch('src.catalog.catalog_manager.DatasetService')
+    def test_should_reload_dataset_written_by_another_process(self, ds_mock,
+                                                              initdb_mock):
+        self.create_dataset(ds_mock)
+        catalog = CatalogManager()
+        catalog.get_dataset_metadata(None, 'name')
+        catalog.get_dataset_metadata(None, 'name')
+        self.assertEqual(
+            1, ds_mock.return_value.dataset_with_columns.call_count)
+
+        self.version_mock.return_value.version.return_value = 1
+        catalog.get_dataset_metadata(None, 'name')
+        catalog.get_dataset_metadata(None, 'name')
+        self.assertEqual(
+            2, ds_mock.return_value.dataset_with_columns.call_count)
+
+    @mock.patch('src.catalog.catalog_manager.UdfService')
+    @mock.patch('src.catalog.catalog_manager.UdfIOService')
+    def test_create_udf_should_bump_catalog_version(self, udfio_mock,
+                                                    udf_mock):
+        CatalogManager().create_udf('udf', 'sample.py', 'classification',
+                                    [])
+        self.version_mock.return_value.bump.assert_called_once_with()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,72 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+from unittest.mock import patch
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.executor.insert_executor import InsertExecutor
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.tuple_value_expression import TupleValueExpression
+from src.planner.insert_plan import InsertPlan
+
+
+class InsertExecutorTest(unittest.TestCase):
+
+    def create_metadata(self):
+        metadata = DataFrameMetadata('dataset', 'dummy')
+        columns = [DataFrameColumn('id', ColumnType.INTEGER),
+                   DataFrameColumn('label', ColumnType.TEXT)]
+        for col_id, column in enumerate(columns):
+            column._id = col_id
+        metadata.schema = columns
+        return metadata
+
+    def create_column(self, col_id):
+        column = TupleValueExpression()
+        column.col_metadata_id = col_id
+        return column
+
+    @patch('src.executor.insert_executor.StorageEngine')
+    @patch('src.executor.insert_executor.CatalogManager')
+    def test_should_append_all_rows_in_one_write(self, mock_catalog,
+                                                 mock_engine):
+        metadata = self.create_metadata()
+        mock_catalog.return_value.get_metadata.return_value = metadata
+        columns = [self.create_column(1), self.create_column(0)]
+        rows = [[ConstantValueExpression('car'), ConstantValueExpression(1)],
+                [ConstantValueExpression('bus'), ConstantValueExpression(2)]]
+
+        InsertExecutor(InsertPlan(3, columns, rows)).exec()
+
+        mock_catalog.return_value.get_metadata.assert_called_once_with(3)
+        mock_engine.append.assert_called_once_with(
+            metadata, {'id': [1, 2], 'label': ['car', 'bus']})
+
+    @patch('src.executor.insert_executor.StorageEngine')
+    @patch('src.executor.insert_executor.CatalogManager')
+    def test_should_not_write_rows_with_invalid_values(self, mock_catalog,
+                                                       mock_engine):
+        mock_catalog.return_value.get_metadata.return_value = \
+            self.create_metadata()
+        columns = [self.create_column(0), self.create_column(1)]
+        rows = [[ConstantValueExpression(1), ConstantValueExpression('car')],
+                [ConstantValueExpression('x'), ConstantValueExpression('bus')]]
+
+        InsertExecutor(InsertPlan(3, columns, rows)).exec()
+
+        mock_engine.append.assert_not_called()
@@ -0,0 +1,71 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from petastorm import make_reader
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.executor.load_data_executor import LoadDataExecutor
+from src.planner.load_data_plan import LoadDataPlan
+
+
+class LoadDataExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dataset_url = 'file://' + os.path.join(self.tmp_dir, 'dataset')
+        self.metadata = DataFrameMetadata('dataset', self.dataset_url)
+        self.metadata.schema = [DataFrameColumn('id', ColumnType.INTEGER),
+                                DataFrameColumn('score', ColumnType.FLOAT)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('src.executor.load_data_executor.CatalogManager')
+    def test_should_load_csv_rows_into_table(self, mock_catalog):
+        mock_catalog.return_value.get_metadata.return_value = self.metadata
+        csv_path = os.path.join(self.tmp_dir, 'rows.csv')
+        with open(csv_path, 'w') as f:
+            f.write('score,id\n')
+            for i in range(100):
+                f.write('%f,%d\n' % (i / 2, i))
+
+        LoadDataExecutor(LoadDataPlan(1, Path(csv_path))).exec()
+
+        mock_catalog.return_value.get_metadata.assert_called_once_with(1)
+        with make_reader(self.dataset_url,
+                         reader_pool_type='dummy') as reader:
+            rows = sorted((row.id, row.score) for row in reader)
+        self.assertEqual([(i, i / 2) for i in range(100)], rows)
+
+    @patch('src.executor.load_data_executor.CatalogManager')
+    def test_should_not_create_files_if_columns_do_not_match(self,
+                                                             mock_catalog):
+        mock_catalog.return_value.get_metadata.return_value = self.metadata
+        csv_path = os.path.join(self.tmp_dir, 'rows.csv')
+        with open(csv_path, 'w') as f:
+            f.write('label\ncar\n')
+
+        LoadDataExecutor(LoadDataPlan(1, Path(csv_path))).exec()
+
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir,
+                                                     'dataset')))
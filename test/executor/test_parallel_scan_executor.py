@@ -0,0 +1,154 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Iterator
+from unittest.mock import patch
+
+import numpy as np
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.executor.disk_based_storage_executor import DiskStorageExecutor
+from src.executor.parallel_scan_executor import ParallelScanExecutor
+from src.executor.seq_scan_executor import SequentialScanExecutor
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
+from src.loaders.abstract_loader import AbstractVideoLoader
+from src.loaders.petastorm_loader import PetastormLoader
+from src.models.catalog.frame_info import FrameInfo
+from src.models.catalog.properties import ColorSpace
+from src.models.storage.frame import Frame
+from src.planner.parallel_scan_plan import ParallelScanPlan
+from src.planner.seq_scan_plan import SeqScanPlan
+from src.storage.bulk_writer import BulkWriter
+from src.planner.storage_plan import StoragePlan
+
+NUM_FRAMES = 20
+
+
+class ShardedDummyLoader(AbstractVideoLoader):
+    """Serves frame i from shard i % total_shards"""
+
+    def _load_frames(self) -> Iterator[Frame]:
+        info = FrameInfo(1, 1, 1, ColorSpace.GRAY)
+        for i in range(NUM_FRAMES):
+            if self.total_shards and i % self.total_shards != \
+                    self.curr_shard:
+                continue
+            if i == 13 and self.video_metadata.file_url == 'corrupt.avi':
+                raise IOError('corrupt frame')
+            yield Frame(i, np.full((1, 1, 1), i), info)
+
+
+@patch('src.executor.disk_based_storage_executor.Loader',
+       ShardedDummyLoader)
+class ParallelScanExecutorTest(unittest.TestCase):
+
+    def build_executor(self, degree, ordered, predicate=None,
+                       file_url='dummy.avi', batch_size=2):
+        video = DataFrameMetadata('dataset', file_url)
+        storage = DiskStorageExecutor(StoragePlan(video,
+                                                  batch_size=batch_size))
+        seq_scan = SequentialScanExecutor(SeqScanPlan(predicate, None))
+        seq_scan.append_child(storage)
+        parallel_scan = ParallelScanExecutor(ParallelScanPlan(degree,
+                                                              ordered))
+        parallel_scan.append_child(seq_scan)
+        return parallel_scan
+
+    def test_should_return_all_frames_from_all_shards(self):
+        executor = self.build_executor(degree=3, ordered=False)
+        indices = [index for batch in executor.exec()
+                   for index in batch.indices]
+        self.assertEqual(list(range(NUM_FRAMES)), sorted(indices))
+
+    def test_ordered_merge_should_return_frames_in_index_order(self):
+        executor = self.build_executor(degree=3, ordered=True, batch_size=1)
+        indices = [index for batch in executor.exec()
+                   for index in batch.indices]
+        self.assertEqual(list(range(NUM_FRAMES)), indices)
+
+    def test_ordered_merge_should_interleave_frames_of_batches(self):
+        # every batch of a shard holds frames which are degree apart
+        executor = self.build_executor(degree=3, ordered=True, batch_size=4)
+        batches = list(executor.exec())
+        indices = [index for batch in batches for index in batch.indices]
+        self.assertEqual(list(range(NUM_FRAMES)), indices)
+        self.assertEqual([[index] for index in range(NUM_FRAMES)],
+                         [batch.indices.tolist() for batch in batches])
+        self.assertEqual([[index] for index in range(NUM_FRAMES)],
+                         [batch.frames_as_numpy_array().ravel().tolist()
+                          for batch in batches])
+
+    def test_should_evaluate_predicate_inside_the_workers(self):
+        predicate = ComparisonExpression(
+            ExpressionType.COMPARE_GREATER,
+            FunctionExpression(lambda batch: batch.indices),
+            ConstantValueExpression(14))
+        executor = self.build_executor(degree=4, ordered=True,
+                                       predicate=predicate)
+        indices = [index for batch in executor.exec()
+                   for index in batch.indices]
+        self.assertEqual(list(range(15, NUM_FRAMES)), indices)
+
+    def test_should_raise_worker_errors(self):
+        executor = self.build_executor(degree=2, ordered=False,
+                                       file_url='corrupt.avi')
+        with self.assertRaises(RuntimeError) as context:
+            list(executor.exec())
+        self.assertIn('corrupt frame', str(context.exception))
+
+
+@patch('src.executor.disk_based_storage_executor.Loader', PetastormLoader)
+class ParallelPetastormScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(self.tmp_dir, 'dataset')
+        self.video = DataFrameMetadata('dataset', 'file://' + path)
+        self.video.schema = [
+            DataFrameColumn('frame_id', ColumnType.INTEGER),
+            DataFrameColumn('frame_data', ColumnType.NDARRAY,
+                            array_dimensions=[1, 1, 1])]
+        # every commit writes a file of one row group
+        for start in range(0, NUM_FRAMES, 2):
+            with BulkWriter(self.video) as writer:
+                writer.append_columns({
+                    'frame_id': np.arange(start, start + 2),
+                    'frame_data': np.arange(start, start + 2,
+                                            dtype=np.uint8).reshape(
+                                                2, 1, 1, 1)})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_ordered_scan_should_return_row_groups_in_index_order(self):
+        storage = DiskStorageExecutor(StoragePlan(self.video, batch_size=3))
+        parallel_scan = ParallelScanExecutor(ParallelScanPlan(2, True))
+        parallel_scan.append_child(storage)
+        batches = list(parallel_scan.exec())
+        self.assertEqual(list(range(NUM_FRAMES)),
+                         [index for batch in batches
+                          for index in batch.indices])
+        self.assertEqual(list(range(NUM_FRAMES)),
+                         [frame for batch in batches
+                          for frame in batch.frames_as_numpy_array().ravel()])
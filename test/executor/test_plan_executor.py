@@ -15,13 +15,21 @@
 import unittest
 from unittest.mock import patch
 
+import numpy as np
+
 from src.catalog.models.df_metadata import DataFrameMetadata
 from src.executor.plan_executor import PlanExecutor
 from src.models.storage.batch import FrameBatch
 from src.planner.seq_scan_plan import SeqScanPlan
+from src.models.storage.frame import Frame
 from src.planner.storage_plan import StoragePlan
 
 
+def create_batch(indices):
+    return FrameBatch([Frame(i, i * np.ones((1, 1)), None) for i in indices],
+                      None)
+
+
 class PlanExecutorTest(unittest.TestCase):
 
     def test_tree_structure_for_build_execution_tree(self):
@@ -77,8 +85,8 @@ class PlanExecutorTest(unittest.TestCase):
         # Build plan tree
         video = DataFrameMetadata("dataset", "dummy.avi")
         class_instatnce.load.return_value = map(lambda x: x, [
-            FrameBatch([1, 2, 3], None),
-            FrameBatch([4, 5, 6], None)])
+            create_batch([1, 2, 3]),
+            create_batch([4, 5, 6])])
 
         storage_plan = StoragePlan(video)
         seq_scan = SeqScanPlan(predicate=dummy_expr, column_ids=[])
@@ -88,11 +96,37 @@ class PlanExecutorTest(unittest.TestCase):
         executor = PlanExecutor(seq_scan)
         actual = executor.execute_plan()
         expected = [
-            FrameBatch([1, 3], None),
-            FrameBatch([4, 6], None)]
+            create_batch([1, 3]),
+            create_batch([4, 6])]
 
         mock_class.assert_called_once()
 
         self.assertEqual(
             expected, actual
         )
+
+    @patch('src.executor.disk_based_storage_executor.Loader')
+    def test_stream_plan_should_yield_batches_lazily(self, mock_class):
+        class_instance = mock_class.return_value
+        loaded = []
+
+        def load():
+            for batch in [create_batch([1, 2]), create_batch([3])]:
+                loaded.append(batch)
+                yield batch
+
+        class_instance.load.side_effect = load
+
+        video = DataFrameMetadata("dataset", "dummy.avi")
+        storage_plan = StoragePlan(video)
+        seq_scan = SeqScanPlan(predicate=None, column_ids=[])
+        seq_scan.append_child(storage_plan)
+
+        stream = PlanExecutor(seq_scan).stream_plan()
+        self.assertEqual([], loaded)
+
+        self.assertEqual(create_batch([1, 2]), next(stream))
+        self.assertEqual(1, len(loaded))
+
+        self.assertEqual([create_batch([3])], list(stream))
+        self.assertEqual(2, len(loaded))
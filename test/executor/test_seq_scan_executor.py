@@ -83,3 +83,16 @@ class SeqScanExecutorTest(unittest.TestCase):
                                                  outcome_3]})
         filtered = list(predicate_executor.exec())[0]
         self.assertEqual(expected, filtered)
+
+    def test_should_apply_row_independent_predicate_to_all_frames(self):
+        frames = [Frame(i, i * np.ones((1, 1)), None) for i in range(3)]
+        batch = FrameBatch(frames=frames, info=None)
+        expression = type("AbstractExpression", (),
+                          {"evaluate": lambda x: np.array([True])})
+
+        plan = type("ScanPlan", (), {"predicate": expression})
+        predicate_executor = SequentialScanExecutor(plan)
+        predicate_executor.append_child(DummyExecutor([batch]))
+
+        filtered = list(predicate_executor.exec())[0]
+        self.assertEqual(batch, filtered)
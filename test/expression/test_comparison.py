@@ -14,9 +14,12 @@
 # limitations under the License.
 import unittest
 
+import numpy as np
+
 from src.expression.abstract_expression import ExpressionType
 from src.expression.comparison_expression import ComparisonExpression
 from src.expression.constant_value_expression import ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
 
 
 class ComparisonExpressionsTest(unittest.TestCase):
@@ -111,3 +114,30 @@ class ComparisonExpressionsTest(unittest.TestCase):
         )
 
         self.assertEqual([True], cmpr_exp.evaluate(None))
+
+    def test_comparison_should_return_boolean_mask_for_columns(self):
+        column = FunctionExpression(lambda x: np.arange(5))
+        const_exp = ConstantValueExpression(2)
+
+        cmpr_exp = ComparisonExpression(
+            ExpressionType.COMPARE_GREATER,
+            column,
+            const_exp
+        )
+        outcome = cmpr_exp.evaluate(None)
+
+        self.assertEqual(np.bool_, outcome.dtype)
+        self.assertEqual([False, False, False, True, True], outcome.tolist())
+
+    def test_comparison_should_work_on_udf_scalar_outputs(self):
+        left = FunctionExpression(lambda x: [1.0, 2.5, 3.0])
+        right = FunctionExpression(lambda x: [1.0, 2.0, 4.0])
+
+        cmpr_exp = ComparisonExpression(
+            ExpressionType.COMPARE_LEQ,
+            left,
+            right
+        )
+
+        self.assertEqual([True, False, True],
+                         cmpr_exp.evaluate(None).tolist())
@@ -42,4 +42,5 @@ class ExpressionEvaluationTest(unittest.TestCase):
             frame_1, frame_2
         ], info=None)
 
-        self.assertEqual([True, False], expression_tree.evaluate(batch))
+        self.assertEqual([True, False],
+                         expression_tree.evaluate(batch).tolist())
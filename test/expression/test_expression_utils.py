@@ -0,0 +1,97 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.expression_utils import ColumnRange, \
+    extract_column_ranges, extract_referenced_columns
+from src.expression.function_expression import FunctionExpression
+from src.expression.logical_expression import LogicalExpression
+from src.expression.tuple_value_expression import TupleValueExpression
+
+
+def compare(etype, left, right):
+    return ComparisonExpression(etype, left, right)
+
+
+class ExpressionUtilsTest(unittest.TestCase):
+
+    def test_should_collect_columns_of_target_list_and_predicate(self):
+        predicate = compare(ExpressionType.COMPARE_GREATER,
+                            TupleValueExpression('id'),
+                            ConstantValueExpression(10))
+        columns = extract_referenced_columns(
+            [TupleValueExpression('label'), TupleValueExpression('id'),
+             predicate])
+        self.assertEqual(['id', 'label'], columns)
+
+    def test_should_need_all_columns_if_function_is_referenced(self):
+        predicate = compare(ExpressionType.COMPARE_EQUAL,
+                            FunctionExpression(lambda batch: batch),
+                            ConstantValueExpression('car'))
+        self.assertIsNone(extract_referenced_columns(
+            [TupleValueExpression('id'), predicate]))
+
+    def test_should_intersect_ranges_of_conjuncts(self):
+        predicate = LogicalExpression(
+            ExpressionType.LOGICAL_AND,
+            compare(ExpressionType.COMPARE_GREATER,
+                    TupleValueExpression('id'),
+                    ConstantValueExpression(10)),
+            LogicalExpression(
+                ExpressionType.LOGICAL_AND,
+                compare(ExpressionType.COMPARE_GEQ,
+                        ConstantValueExpression(20),
+                        TupleValueExpression('id')),
+                compare(ExpressionType.COMPARE_NEQ,
+                        TupleValueExpression('label'),
+                        ConstantValueExpression('car'))))
+        ranges = extract_column_ranges(predicate)
+        self.assertEqual({'id': ColumnRange(10, 20, False, True)}, ranges)
+
+    def test_should_not_push_down_disjunctions(self):
+        predicate = LogicalExpression(
+            ExpressionType.LOGICAL_OR,
+            compare(ExpressionType.COMPARE_GREATER,
+                    TupleValueExpression('id'),
+                    ConstantValueExpression(10)),
+            compare(ExpressionType.COMPARE_LESSER,
+                    TupleValueExpression('id'),
+                    ConstantValueExpression(5)))
+        self.assertEqual({}, extract_column_ranges(predicate))
+        self.assertEqual({}, extract_column_ranges(None))
+
+    def test_column_range_contains_respects_inclusiveness(self):
+        column_range = ColumnRange(10, 20, False, True)
+        self.assertEqual([False, True, True, False],
+                         [column_range.contains(value)
+                          for value in [10, 11, 20, 21]])
+        self.assertTrue(ColumnRange(None, None, False, False).contains(-1))
+        self.assertEqual(ColumnRange(10, 15, False, False),
+                         column_range.intersect(
+                             ColumnRange(5, 15, True, False)).intersect(
+                             ColumnRange(10, None, True, False)))
+
+    def test_column_range_overlaps_respects_inclusiveness(self):
+        column_range = ColumnRange(10, 20, False, True)
+        self.assertEqual([False, True, True, True, False],
+                         [column_range.overlaps(minimum, maximum)
+                          for minimum, maximum in [(0, 10), (0, 11), (12, 13),
+                                                   (20, 30), (21, 30)]])
+        self.assertTrue(ColumnRange(None, None, False, False).overlaps(-2,
+                                                                       -1))
@@ -14,9 +14,12 @@
 # limitations under the License.
 import unittest
 
+import numpy as np
+
 from src.expression.function_expression import FunctionExpression, \
     ExecutionMode
 from src.models.storage.batch import FrameBatch
+from src.utils.metrics import UDF_DURATION, UDF_FRAMES, UDF_INVOCATIONS
 
 
 class FunctionExpressionTest(unittest.TestCase):
@@ -36,6 +39,20 @@ class FunctionExpressionTest(unittest.TestCase):
         expression.evaluate(input_batch)
         self.assertEqual(expected_batch, input_batch)
 
+    def test_should_record_udf_invocations(self):
+        expression = FunctionExpression(lambda x: [1, 2],
+                                        mode=ExecutionMode.EXEC,
+                                        name="metrics_test")
+        batch = FrameBatch.from_numpy(np.arange(2),
+                                      np.zeros((2, 1, 1, 3)), None)
+
+        expression.evaluate(batch)
+        expression.evaluate(batch)
+
+        self.assertEqual(2, UDF_INVOCATIONS.labels('metrics_test').value())
+        self.assertEqual(4, UDF_FRAMES.labels('metrics_test').value())
+        self.assertEqual(2, UDF_DURATION.labels('metrics_test').value()[2])
+
     def test_should_throw_assert_error_when_name_not_provided_exec_mode(self):
         self.assertRaises(AssertionError,
                           lambda _=None:
@@ -14,10 +14,16 @@
 # limitations under the License.
 import unittest
 
+import numpy as np
+
 from src.expression.abstract_expression import ExpressionType
 from src.expression.comparison_expression import ComparisonExpression
 from src.expression.logical_expression import LogicalExpression
 from src.expression.constant_value_expression import ConstantValueExpression
+from src.expression.function_expression import FunctionExpression, \
+    ExecutionMode
+from src.models.storage.batch import FrameBatch
+from src.models.storage.frame import Frame
 
 
 class LogicalExpressionsTest(unittest.TestCase):
@@ -86,3 +92,118 @@ class LogicalExpressionsTest(unittest.TestCase):
             comparison_expression_right
         )
         self.assertEqual([True], logical_expr.evaluate(None))
+
+    def test_logical_operators_should_combine_boolean_masks(self):
+        left = FunctionExpression(lambda x: np.array([True, True, False]))
+        right = FunctionExpression(lambda x: [True, False, False])
+
+        and_expr = LogicalExpression(ExpressionType.LOGICAL_AND, left, right)
+        or_expr = LogicalExpression(ExpressionType.LOGICAL_OR, left, right)
+        not_expr = LogicalExpression(ExpressionType.LOGICAL_NOT, None, right)
+
+        self.assertEqual([True, False, False],
+                         and_expr.evaluate(None).tolist())
+        self.assertEqual([True, True, False],
+                         or_expr.evaluate(None).tolist())
+        self.assertEqual([False, True, True],
+                         not_expr.evaluate(None).tolist())
+
+    def _create_batch(self, num_frames):
+        frames = [Frame(i, i * np.ones((1, 1)), None)
+                  for i in range(num_frames)]
+        return FrameBatch(frames=frames, info=None)
+
+    def test_logical_and_should_skip_rows_rejected_by_cheaper_side(self):
+        batch_sizes = []
+
+        def expensive_udf(batch):
+            batch_sizes.append(batch.batch_size)
+            return batch.indices % 2 == 0
+
+        # nested functions make the left side more expensive
+        expensive = FunctionExpression(lambda x: x)
+        expensive.append_child(FunctionExpression(expensive_udf))
+        cheap = FunctionExpression(lambda batch: batch.indices > 1)
+
+        logical_expr = LogicalExpression(ExpressionType.LOGICAL_AND,
+                                         expensive, cheap)
+        outcome = logical_expr.evaluate(self._create_batch(6))
+
+        self.assertEqual([False, False, True, False, True, False],
+                         outcome.tolist())
+        self.assertEqual([4], batch_sizes)
+
+    def test_logical_or_should_skip_rows_accepted_by_cheaper_side(self):
+        batch_sizes = []
+
+        def expensive_udf(batch):
+            batch_sizes.append(batch.batch_size)
+            return batch.indices == 0
+
+        expensive = FunctionExpression(lambda x: x)
+        expensive.append_child(FunctionExpression(expensive_udf))
+        cheap = FunctionExpression(lambda batch: batch.indices > 3)
+
+        logical_expr = LogicalExpression(ExpressionType.LOGICAL_OR,
+                                         expensive, cheap)
+        outcome = logical_expr.evaluate(self._create_batch(6))
+
+        self.assertEqual([True, False, False, False, True, True],
+                         outcome.tolist())
+        self.assertEqual([4], batch_sizes)
+
+    def test_logical_and_should_not_evaluate_other_side_if_all_decided(self):
+        expensive = FunctionExpression(lambda x: self.fail("called"))
+        expensive.append_child(FunctionExpression(lambda x: x))
+        cheap = FunctionExpression(lambda batch: batch.indices > 10)
+
+        logical_expr = LogicalExpression(ExpressionType.LOGICAL_AND,
+                                         expensive, cheap)
+
+        self.assertEqual([False] * 3,
+                         logical_expr.evaluate(self._create_batch(3)).tolist())
+
+    def test_short_circuit_should_evaluate_exec_mode_side_on_every_row(self):
+        for etype in (ExpressionType.LOGICAL_AND, ExpressionType.LOGICAL_OR):
+            batch_sizes = []
+
+            def cheap_udf(batch):
+                batch_sizes.append(batch.batch_size)
+                return batch.indices > 0
+
+            expensive = FunctionExpression(lambda batch: batch.indices == 2,
+                                           mode=ExecutionMode.EXEC,
+                                           name="test")
+            expensive.append_child(FunctionExpression(lambda x: x))
+            cheap = FunctionExpression(cheap_udf)
+            batch = self._create_batch(3)
+
+            logical_expr = LogicalExpression(etype, expensive, cheap)
+            outcome = logical_expr.evaluate(batch)
+
+            self.assertEqual([False, False, True],
+                             batch.get_outcomes_for("test"))
+            if etype == ExpressionType.LOGICAL_AND:
+                self.assertEqual([False, False, True], outcome.tolist())
+                # only the row accepted by the exec mode side
+                self.assertEqual([1], batch_sizes)
+            else:
+                self.assertEqual([False, True, True], outcome.tolist())
+                self.assertEqual([2], batch_sizes)
+
+    def test_short_circuit_should_not_skip_either_exec_mode_side(self):
+        left = FunctionExpression(lambda batch: batch.indices == 0,
+                                  mode=ExecutionMode.EXEC, name="left")
+        right = FunctionExpression(lambda batch: batch.indices == 2,
+                                   mode=ExecutionMode.EXEC, name="right")
+        batch = self._create_batch(3)
+
+        logical_expr = LogicalExpression(ExpressionType.LOGICAL_OR,
+                                         left, right)
+        outcome = logical_expr.evaluate(batch)
+
+        self.assertEqual([True, False, True], outcome.tolist())
+        self.assertEqual([True, False, False],
+                         batch.get_outcomes_for("left"))
+        self.assertEqual([False, False, True],
+                         batch.get_outcomes_for("right"))
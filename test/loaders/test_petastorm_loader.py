@@ -12,16 +12,24 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch
 
 import numpy as np
+import pyarrow.parquet as pq
 
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
 from src.catalog.models.df_metadata import DataFrameMetadata
+from src.expression.expression_utils import ColumnRange
 from src.loaders.petastorm_loader import PetastormLoader
 from src.models.catalog.frame_info import FrameInfo
 from src.models.catalog.properties import ColorSpace
 from src.models.storage.frame import Frame
+from src.storage.bulk_writer import BulkWriter
 
 NUM_FRAMES = 10
 
@@ -52,7 +60,9 @@ class PetastormLoaderTest(unittest.TestCase):
         video_loader = PetastormLoader(video_info, curr_shard=3,
                                        total_shards=3)
         list(video_loader._load_frames())
-        mock.assert_called_once_with('dummy.avi', shard_count=3, cur_shard=3)
+        mock.assert_called_once_with('dummy.avi', schema_fields=None,
+                                     predicate=None, shard_count=3,
+                                     cur_shard=3)
 
     @patch("src.loaders.petastorm_loader.make_reader")
     def test_load_frame_load_frames_using_petastorm(self, mock):
@@ -69,3 +79,106 @@ class PetastormLoaderTest(unittest.TestCase):
                     for i in range(3)]
 
         self.assertEqual(expected, actual)
+
+    @patch("src.loaders.petastorm_loader.make_reader")
+    def test_should_read_first_shard_of_sharded_dataset(self, mock):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = PetastormLoader(video_info, curr_shard=0,
+                                       total_shards=2)
+        list(video_loader._load_frames())
+        mock.assert_called_once_with('dummy.avi', schema_fields=None,
+                                     predicate=None, shard_count=2,
+                                     cur_shard=0)
+
+    @patch("src.loaders.petastorm_loader.make_reader")
+    def test_should_not_shard_without_shard_count(self, mock):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = PetastormLoader(video_info)
+        list(video_loader._load_frames())
+        mock.assert_called_once_with('dummy.avi', schema_fields=None,
+                                     predicate=None, shard_count=None,
+                                     cur_shard=None)
+
+    @patch("src.loaders.petastorm_loader.make_reader")
+    def test_should_read_ordered_shard_in_row_group_order(self, mock):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = PetastormLoader(video_info, curr_shard=1,
+                                       total_shards=2, ordered=True)
+        list(video_loader._load_frames())
+        mock.assert_called_once_with('dummy.avi', schema_fields=None,
+                                     predicate=None, shard_count=2,
+                                     cur_shard=1, shuffle_row_groups=False,
+                                     workers_count=1)
+
+    @patch("src.loaders.petastorm_loader.make_reader")
+    def test_should_only_read_referenced_columns(self, mock):
+        mock.return_value = self.DummyReader(
+            map(lambda i: self.DummyRow(i, None), range(3)))
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = PetastormLoader(video_info, columns=['id'])
+        actual = list(video_loader._load_frames())
+        self.assertEqual(['frame_id', 'id'],
+                         mock.call_args[1]['schema_fields'])
+        self.assertEqual([Frame(i, None, None) for i in range(3)], actual)
+
+    @patch("src.loaders.petastorm_loader.get_schema_from_dataset_url")
+    @patch("src.loaders.petastorm_loader._make_pruning_reader")
+    def test_should_push_column_ranges_into_predicate(self, mock,
+                                                      mock_schema):
+        mock_schema.return_value.fields = {'frame_id': None,
+                                           'frame_data': None}
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = PetastormLoader(
+            video_info, column_ranges={
+                'frame_id': ColumnRange(10, 20, False, True),
+                'label': ColumnRange('car', 'car', True, True)})
+        list(video_loader._load_frames())
+        predicate = mock.call_args[1]['predicate']
+        self.assertEqual({'frame_id'}, predicate.get_fields())
+        self.assertFalse(predicate.do_include({'frame_id': 10}))
+        self.assertTrue(predicate.do_include({'frame_id': 11}))
+        self.assertTrue(predicate.do_include({'frame_id': 20}))
+        self.assertFalse(predicate.do_include({'frame_id': 21}))
+
+
+class PetastormLoaderDatasetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(self.tmp_dir, 'dataset')
+        self.video = DataFrameMetadata('dataset', 'file://' + path)
+        self.video.schema = [
+            DataFrameColumn('frame_id', ColumnType.INTEGER),
+            DataFrameColumn('frame_data', ColumnType.NDARRAY,
+                            array_dimensions=[2, 2, 3])]
+        # every commit writes a file of one row group
+        for start in range(0, 4 * NUM_FRAMES, NUM_FRAMES):
+            with BulkWriter(self.video) as writer:
+                writer.append_columns({
+                    'frame_id': np.arange(start, start + NUM_FRAMES),
+                    'frame_data': np.zeros((NUM_FRAMES, 2, 2, 3),
+                                           dtype=np.uint8)})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_should_not_read_row_groups_outside_column_ranges(self):
+        read_row_group = pq.ParquetFile.read_row_group
+        first_frames = set()
+
+        def read_and_record(parquet_file, *args, **kwargs):
+            table = read_row_group(parquet_file, *args, **kwargs)
+            if 'frame_id' in table.column_names:
+                first_frames.add(min(table.column('frame_id').to_pylist()))
+            return table
+
+        video_loader = PetastormLoader(
+            self.video, column_ranges={
+                'frame_id': ColumnRange(NUM_FRAMES + 2, NUM_FRAMES + 5,
+                                        True, False)})
+        with patch.object(pq.ParquetFile, 'read_row_group',
+                          read_and_record):
+            actual = [frame.index for frame in video_loader._load_frames()]
+        self.assertEqual(list(range(NUM_FRAMES + 2, NUM_FRAMES + 5)),
+                         sorted(actual))
+        self.assertEqual({NUM_FRAMES}, first_frames)
@@ -13,7 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import os
+import threading
 import unittest
+from unittest.mock import patch
 
 import cv2
 import numpy as np
@@ -23,8 +25,10 @@ from src.loaders.video_loader import VideoLoader
 from src.models.catalog.frame_info import FrameInfo
 from src.models.catalog.properties import ColorSpace
 from src.models.storage.frame import Frame
+from src.utils.metrics import FRAMES_SCANNED, LOADER_DECODE
 
 NUM_FRAMES = 10
+VideoCapture = cv2.VideoCapture
 
 
 class VideoLoaderTest(unittest.TestCase):
@@ -66,6 +70,19 @@ class VideoLoaderTest(unittest.TestCase):
         self.assertEqual(len(batches), NUM_FRAMES)
         self.assertEqual(dummy_frames, [batch.frames[0] for batch in batches])
 
+    def test_should_record_frames_scanned_and_decode_time(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, batch_size=4)
+        frames = FRAMES_SCANNED.labels('VideoLoader').value()
+        _, _, decoded = LOADER_DECODE.labels('VideoLoader').value()
+
+        batches = list(video_loader.load())
+
+        self.assertEqual(frames + NUM_FRAMES,
+                         FRAMES_SCANNED.labels('VideoLoader').value())
+        self.assertEqual(decoded + len(batches),
+                         LOADER_DECODE.labels('VideoLoader').value()[2])
+
     def test_should_return_half_then_number_of_batches_with_skip_of_two(self):
         video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
         video_loader = VideoLoader(video_info, skip_frames=2)
@@ -105,3 +122,93 @@ class VideoLoaderTest(unittest.TestCase):
         batches = list(video_loader.load())
         self.assertEqual(1, len(batches))
         self.assertEqual(dummy_frames, list(batches[0].frames))
+
+    def test_prefetch_should_return_same_batches_as_sequential_load(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        expected = list(VideoLoader(video_info, batch_size=3,
+                                    prefetch_depth=0).load())
+        actual = list(VideoLoader(video_info, batch_size=3,
+                                  prefetch_depth=2).load())
+        self.assertEqual(expected, actual)
+
+    def test_prefetch_should_stop_worker_when_consumer_stops(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, prefetch_depth=1)
+        threads_before = threading.active_count()
+        batches = video_loader.load()
+        first = next(batches)
+        batches.close()
+        self.assertEqual(list(self.create_dummy_frames())[0],
+                         first.frames[0])
+        self.assertEqual(threads_before, threading.active_count())
+
+    def test_prefetch_should_raise_decode_errors_to_consumer(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, prefetch_depth=2)
+        with patch.object(VideoLoader, '_load_frames',
+                          side_effect=IOError('corrupt video')):
+            with self.assertRaises(IOError):
+                list(video_loader.load())
+
+    def test_should_return_last_partial_batch(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, batch_size=4)
+        batches = list(video_loader.load())
+        self.assertEqual([4, 4, 2], [batch.batch_size for batch in batches])
+        self.assertEqual(list(self.create_dummy_frames()),
+                         [frame for batch in batches
+                          for frame in batch.frames])
+
+    def test_should_grab_skipped_frames_without_reading_them(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, skip_frames=3)
+        with patch('src.loaders.video_loader.cv2.VideoCapture',
+                   side_effect=CountingCapture):
+            batches = list(video_loader.load())
+        self.assertEqual(list(self.create_dummy_frames(filters=[0, 3, 6, 9])),
+                         [batch.frames[0] for batch in batches])
+        self.assertEqual(4, CountingCapture.reads)
+
+    def test_should_seek_over_large_gaps_between_frames(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, skip_frames=4, offset=1)
+        with patch.object(VideoLoader, 'SEEK_THRESHOLD', 2):
+            batches = list(video_loader.load())
+        self.assertEqual(list(self.create_dummy_frames(filters=[4, 8])),
+                         [batch.frames[0] for batch in batches])
+
+    def test_should_stop_decoding_when_limit_is_reached(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        video_loader = VideoLoader(video_info, limit=3, batch_size=2)
+        with patch('src.loaders.video_loader.cv2.VideoCapture',
+                   side_effect=CountingCapture):
+            batches = list(video_loader.load())
+        self.assertEqual([2, 1], [batch.batch_size for batch in batches])
+        self.assertEqual(3, CountingCapture.reads)
+
+    def test_shards_should_partition_the_frames(self):
+        video_info = DataFrameMetadata("dataset_1", 'dummy.avi')
+        frames = []
+        for shard in range(3):
+            video_loader = VideoLoader(video_info, curr_shard=shard,
+                                       total_shards=3, offset=1, limit=9)
+            frames += [frame for batch in video_loader.load()
+                       for frame in batch.frames]
+        self.assertEqual(list(self.create_dummy_frames(filters=range(1, 9))),
+                         frames)
+
+
+class CountingCapture:
+    """Wraps cv2.VideoCapture and counts the decoded frames"""
+    reads = 0
+
+    def __init__(self, file_url):
+        CountingCapture.reads = 0
+        self._video = VideoCapture(file_url)
+
+    def read(self):
+        CountingCapture.reads += 1
+        return self._video.read()
+
+    def __getattr__(self, name):
+        return getattr(self._video, name)
@@ -0,0 +1,152 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import tracemalloc
+import unittest
+
+import numpy as np
+
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.detection_batch import DetectionBatch
+from src.models.inference.representation import BoundingBox, Point
+from src.models.storage.batch import FrameBatch
+
+LABELS = ['__background__', 'person', 'car', 'bus']
+
+
+def create_batch(num_frames):
+    return FrameBatch.from_numpy(np.arange(num_frames),
+                                 np.zeros((num_frames, 2, 2, 3)), None)
+
+
+def create_detections(frames=None):
+    # frame 0: car, person; frame 1: nothing; frame 2: bus
+    return DetectionBatch.from_frames(
+        frames,
+        [np.array([2, 1]), np.array([], dtype=int), np.array([3])],
+        [np.array([0.9, 0.8]), np.array([]), np.array([0.7])],
+        LABELS,
+        boxes=[np.array([[0, 0, 1, 1], [1, 1, 2, 2]]), np.zeros((0, 4)),
+               np.array([[2, 2, 3, 3]])])
+
+
+class DetectionBatchTest(unittest.TestCase):
+
+    def test_should_lay_out_detections_of_frames_one_after_another(self):
+        detections = create_detections()
+
+        self.assertEqual(3, len(detections))
+        self.assertEqual([0, 2, 2, 3], detections.offsets.tolist())
+        self.assertEqual([2, 0, 1], detections.counts.tolist())
+        self.assertEqual((3, 4), detections.boxes.shape)
+
+    def test_should_convert_lazily_to_predictions(self):
+        batch = create_batch(3)
+        detections = create_detections(batch)
+
+        prediction = detections[0]
+
+        self.assertIsInstance(prediction, Prediction)
+        self.assertEqual(batch.frames[0], prediction.frame)
+        self.assertEqual(['car', 'person'], prediction.labels)
+        self.assertEqual([np.float32(0.9), np.float32(0.8)],
+                         prediction.scores)
+        self.assertEqual(BoundingBox(Point(1, 1), Point(2, 2)),
+                         prediction.boxes[1])
+        self.assertEqual([], detections[1].labels)
+        self.assertEqual(['bus'], detections[-1].labels)
+        self.assertEqual(detections[2], detections.tolist()[2])
+        with self.assertRaises(IndexError):
+            detections[3]
+
+    def test_comparison_with_label_should_give_frames_containing_it(self):
+        detections = create_detections()
+
+        self.assertEqual([True, False, False],
+                         (detections == 'car').tolist())
+        self.assertEqual([False, True, True],
+                         (detections != 'car').tolist())
+        self.assertEqual([False, False, False],
+                         (detections == 'truck').tolist())
+        self.assertEqual([True, False, True],
+                         (detections == np.array(['person', 'car',
+                                                  'bus'])).tolist())
+        self.assertTrue('bus' in detections)
+        self.assertFalse('truck' in detections)
+
+    def test_comparison_should_match_comparing_predictions(self):
+        detections = create_detections(create_batch(3))
+        predictions = detections.tolist()
+
+        for label in LABELS:
+            self.assertEqual([prediction == label
+                              for prediction in predictions],
+                             (detections == label).tolist())
+
+    def test_should_select_frames_with_mask_or_slice(self):
+        batch = create_batch(3)
+        detections = create_detections(batch)
+
+        selected = detections[np.array([True, False, True])]
+
+        self.assertEqual([0, 2, 3], selected.offsets.tolist())
+        self.assertEqual(['car', 'person'], selected[0].labels)
+        self.assertEqual(['bus'], selected[1].labels)
+        self.assertEqual(batch.frames[2], selected[1].frame)
+        self.assertEqual(selected, detections[[0, 2]])
+        self.assertEqual(['bus'], detections[1:][1].labels)
+
+    def test_should_take_a_tenth_of_the_memory_of_predictions(self):
+        random = np.random.RandomState(0)
+        frames, per_frame = 20, 50
+        detections = DetectionBatch.from_frames(
+            None,
+            [random.randint(0, len(LABELS), per_frame)
+             for _ in range(frames)],
+            [random.rand(per_frame) for _ in range(frames)],
+            LABELS,
+            boxes=[random.rand(per_frame, 4) * 100 for _ in range(frames)])
+
+        tracemalloc.start()
+        predictions = detections.tolist()
+        prediction_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        self.assertEqual(frames, len(predictions))
+        self.assertLess(detections.nbytes * 10, prediction_size)
+
+    def test_comparison_expression_should_filter_frames(self):
+        batch = create_batch(3)
+        detections = create_detections(batch)
+        function = FunctionExpression(lambda frames: detections)
+
+        for left, right in ((function, ConstantValueExpression('bus')),
+                            (ConstantValueExpression('bus'), function)):
+            expression = ComparisonExpression(ExpressionType.COMPARE_EQUAL,
+                                              left, right)
+            self.assertEqual([False, False, True],
+                             expression.evaluate(batch).tolist())
+
+    def test_should_store_predictions_as_outcomes(self):
+        batch = create_batch(3)
+        detections = create_detections(batch)
+
+        batch.set_outcomes('detector', detections)
+
+        self.assertEqual(detections.tolist(),
+                         batch.get_outcomes_for('detector'))
@@ -135,3 +135,46 @@ class FrameBatchTest(unittest.TestCase):
 
         self.assertTrue(batch.has_outcome('test'))
         self.assertTrue(batch.has_outcome('test_temp'))
+
+    def test_frames_should_be_stored_in_a_single_contiguous_array(self):
+        batch = FrameBatch(
+            frames=[Frame(i, i * np.ones((2, 2, 3)), None) for i in range(3)],
+            info=None)
+        data = batch.frames_as_numpy_array()
+        self.assertEqual((3, 2, 2, 3), data.shape)
+        self.assertIs(data, batch.frames_as_numpy_array())
+        self.assertEqual([0, 1, 2], batch.indices.tolist())
+        self.assertEqual(Frame(1, np.ones((2, 2, 3)), None), batch.frames[1])
+
+    def test_should_filter_frames_and_outcomes_with_boolean_mask(self):
+        batch = FrameBatch(
+            frames=[Frame(i, i * np.ones((1, 1)), None) for i in range(3)],
+            info=None,
+            outcomes={'test': [[1], [2], [3]]},
+            temp_outcomes={'test2': [4, 5, 6]})
+        expected = FrameBatch(
+            frames=[Frame(i, i * np.ones((1, 1)), None) for i in [0, 2]],
+            info=None,
+            outcomes={'test': [[1], [3]]},
+            temp_outcomes={'test2': [4, 6]})
+        self.assertEqual(expected, batch[np.array([True, False, True])])
+        self.assertEqual(expected, batch[np.array([0, 2])])
+
+    def test_slicing_should_return_views_of_the_batch_data(self):
+        batch = FrameBatch(
+            frames=[Frame(i, i * np.ones((1, 1)), None) for i in range(4)],
+            info=None)
+        sliced = batch[1:3]
+        self.assertTrue(np.shares_memory(batch.frames_as_numpy_array(),
+                                         sliced.frames_as_numpy_array()))
+        self.assertEqual([1, 2], sliced.indices.tolist())
+
+    def test_from_numpy_should_build_equivalent_batch(self):
+        frames = [Frame(i, i * np.ones((1, 1)), None) for i in range(2)]
+        expected = FrameBatch(frames=frames, info=None,
+                              outcomes={'test': [1, 2]})
+        actual = FrameBatch.from_numpy(np.arange(2),
+                                       np.arange(2).reshape(2, 1, 1),
+                                       None, outcomes={'test': [1, 2]})
+        self.assertEqual(expected, actual)
+        self.assertEqual(frames, list(actual.frames))
@@ -13,9 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import unittest
+from unittest.mock import patch
 
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.expression_utils import ColumnRange
+from src.expression.tuple_value_expression import TupleValueExpression
 from src.optimizer.operators import LogicalProject, LogicalFilter, LogicalGet
 from src.optimizer.generators.seq_scan_generator import ScanGenerator
+from src.planner.parallel_scan_plan import ParallelScanPlan
 from src.planner.seq_scan_plan import SeqScanPlan
 from src.planner.types import PlanNodeType
 
@@ -40,3 +48,28 @@ class SequentialScanGeneratorTest(unittest.TestCase):
         self.assertEqual(None, plan.columns)
         self.assertEqual(PlanNodeType.STORAGE_PLAN, plan.children[0].node_type)
         self.assertEqual(1, plan.children[0].video)
+
+    @patch('src.optimizer.generators.seq_scan_generator.ConfigurationManager')
+    def test_should_wrap_scan_in_parallel_scan_if_configured(self, mock):
+        config = {'parallel_scan_workers': 4, 'ordered_parallel_scan': True}
+        mock.return_value.get_value.side_effect = \
+            lambda category, key: config[key]
+        plan = ScanGenerator().build(LogicalGet("video", 1))
+        self.assertTrue(isinstance(plan, ParallelScanPlan))
+        self.assertEqual(4, plan.degree)
+        self.assertTrue(plan.ordered)
+        self.assertEqual(PlanNodeType.SEQUENTIAL_SCAN,
+                         plan.children[0].node_type)
+
+    def test_should_push_columns_and_ranges_into_storage_plan(self):
+        predicate = ComparisonExpression(ExpressionType.COMPARE_GREATER,
+                                         TupleValueExpression('id'),
+                                         ConstantValueExpression(10))
+        logical_plan = LogicalProject(
+            [TupleValueExpression('id')],
+            [LogicalFilter(predicate, [LogicalGet("video", 1)])])
+        plan = ScanGenerator().build(logical_plan)
+        storage_plan = plan.children[0]
+        self.assertEqual(['id'], storage_plan.columns)
+        self.assertEqual({'id': ColumnRange(10, None, False, False)},
+                         storage_plan.column_ranges)
@@ -16,12 +16,21 @@ import unittest
 
 from mock import patch, MagicMock
 
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
 from src.expression.tuple_value_expression import TupleValueExpression
 from src.optimizer.optimizer_utils import (bind_dataset, bind_tuple_value_expr,
+                                           bind_udf_cache_keys,
+                                           bind_udf_functions,
+                                           bind_columns_expr,
                                            column_definition_to_udf_io)
 from src.optimizer.optimizer_utils import \
     xform_parser_column_type_to_catalog_type
 from src.parser.create_statement import ColumnDefinition
+from src.udfs.inference_pool import PooledUdf
+from src.udfs.udf_result_cache import UdfCacheKey, udf_version
 
 
 class OptimizerUtilsTest(unittest.TestCase):
@@ -41,6 +50,28 @@ class OptimizerUtilsTest(unittest.TestCase):
         bind_tuple_value_expr(tuple_expr, column_map)
         self.assertEqual(tuple_expr.col_object, column_map['col1'])
 
+    @patch('src.optimizer.optimizer_utils.CatalogManager')
+    def test_should_bind_columns_of_a_table_in_one_lookup(self, mock):
+        catalog = mock.return_value
+        catalog.get_table_bindings.return_value = (1, [10, None, 12])
+        columns = [TupleValueExpression(col_name='id', table_name='video'),
+                   TupleValueExpression(col_name='x', table_name='video')]
+        label = TupleValueExpression(col_name='label', table_name='video')
+        columns.append(ComparisonExpression(ExpressionType.COMPARE_EQUAL,
+                                            label,
+                                            ConstantValueExpression(1)))
+
+        bind_columns_expr(columns, {})
+
+        catalog.get_table_bindings.assert_called_once_with(
+            None, 'video', ['id', 'x', 'label'])
+        self.assertEqual([1, 1, 1], [columns[0].table_metadata_id,
+                                     columns[1].table_metadata_id,
+                                     label.table_metadata_id])
+        self.assertEqual(10, columns[0].col_metadata_id)
+        self.assertIsNone(columns[1].col_metadata_id)
+        self.assertEqual(12, label.col_metadata_id)
+
     @patch('src.optimizer.optimizer_utils.CatalogManager')
     @patch('src.optimizer.optimizer_utils.\
 xform_parser_column_type_to_catalog_type')
@@ -65,3 +96,43 @@ xform_parser_column_type_to_catalog_type')
         mock.return_value.udf_io.assert_called_with(
             'name', 'type', 'dimension', True)
         self.assertEqual(actual2, ['udf_io'])
+
+    @patch('src.optimizer.optimizer_utils.CatalogManager')
+    def test_bind_udf_cache_keys_should_set_key_of_catalog_udfs(self, mock):
+        udf = MagicMock()
+        udf.name = 'fastrcnn'
+        mock.return_value.get_udf_by_name.side_effect = \
+            lambda name: udf if name == 'fastrcnn' else None
+        dataset = MagicMock()
+        known = FunctionExpression(None, name='fastrcnn')
+        unknown = FunctionExpression(None, name='unknown')
+        predicate = ComparisonExpression(ExpressionType.COMPARE_EQUAL,
+                                         known, unknown)
+
+        bind_udf_cache_keys([predicate, ConstantValueExpression(1)],
+                            dataset)
+
+        self.assertEqual(UdfCacheKey('fastrcnn', udf_version(udf),
+                                     dataset.id), known.cache_key)
+        self.assertIsNone(unknown.cache_key)
+
+    @patch('src.optimizer.optimizer_utils.CatalogManager')
+    def test_bind_udf_functions_should_bind_catalog_udfs(self, mock):
+        udf = MagicMock()
+        udf.name = 'fastrcnn'
+        udf.impl_file_path = 'fastrcnn_object_detector.py'
+        mock.return_value.get_udf_by_name.side_effect = \
+            lambda name: udf if name == 'fastrcnn' else None
+        bound = MagicMock()
+        known = FunctionExpression(None, name='fastrcnn')
+        unknown = FunctionExpression(None, name='unknown')
+        builtin = FunctionExpression(bound, name='fastrcnn')
+        predicate = ComparisonExpression(ExpressionType.COMPARE_EQUAL,
+                                         known, unknown)
+
+        bind_udf_functions([predicate, builtin])
+
+        self.assertEqual(PooledUdf('fastrcnn', 'fastrcnn_object_detector.py'),
+                         known.function)
+        self.assertIsNone(unknown.function)
+        self.assertIs(bound, builtin.function)
@@ -22,6 +22,7 @@ from src.parser.table_ref import TableRef, TableInfo
 from src.parser.create_udf_statement import CreateUDFStatement
 from src.parser.insert_statement import InsertTableStatement
 from src.parser.create_statement import CreateTableStatement
+from src.parser.load_statement import LoadDataStatement
 
 
 class StatementToOprTest(unittest.TestCase):
@@ -47,23 +48,28 @@ class StatementToOprTest(unittest.TestCase):
 
         converter._populate_column_map.assert_called_with(mock.return_value)
 
+    @patch('src.optimizer.statement_to_opr_convertor.bind_udf_functions')
     @patch('src.optimizer.statement_to_opr_convertor.LogicalFilter')
     @patch('src.optimizer.statement_to_opr_convertor.bind_predicate_expr')
     def test_visit_select_predicate_should_add_logical_filter(self, mock,
-                                                              mock_lfilter):
+                                                              mock_lfilter,
+                                                              mock_udfs):
         converter = StatementToPlanConvertor()
         select_predicate = MagicMock()
         converter._visit_select_predicate(select_predicate)
 
         mock_lfilter.assert_called_with(select_predicate)
         mock.assert_called_with(select_predicate, converter._column_map)
+        mock_udfs.assert_called_with([select_predicate])
         mock_lfilter.return_value.append_child.assert_called()
         self.assertEqual(mock_lfilter.return_value, converter._plan)
 
+    @patch('src.optimizer.statement_to_opr_convertor.bind_udf_functions')
     @patch('src.optimizer.statement_to_opr_convertor.LogicalProject')
     @patch('src.optimizer.statement_to_opr_convertor.bind_columns_expr')
     def test_visit_projection_should_add_logical_predicate(self, mock,
-                                                           mock_lproject):
+                                                           mock_lproject,
+                                                           mock_udfs):
         converter = StatementToPlanConvertor()
         projects = MagicMock()
 
@@ -71,6 +77,7 @@ class StatementToOprTest(unittest.TestCase):
 
         mock_lproject.assert_called_with(projects)
         mock.assert_called_with(projects, converter._column_map)
+        mock_udfs.assert_called_with(projects)
         mock_lproject.return_value.append_child.assert_called()
         self.assertEqual(mock_lproject.return_value, converter._plan)
 
@@ -170,3 +177,15 @@ statement_to_opr_convertor.column_definition_to_udf_io')
         actual = convertor.visit(stmt)
         mock.assert_called_once()
         mock.assert_called_with(stmt)
+
+    @patch('src.optimizer.statement_to_opr_convertor.LogicalLoadData')
+    @patch('src.optimizer.statement_to_opr_convertor.bind_table_ref')
+    def test_visit_load_data(self, mock_bind, l_load_data_mock):
+        mock_bind.return_value = 7
+        table_ref = TableRef(TableInfo('MyVideo'))
+        stmt = LoadDataStatement(table_ref, 'rows.csv')
+        convertor = StatementToPlanConvertor()
+        convertor.visit(stmt)
+        mock_bind.assert_called_once_with(table_ref.table_info)
+        l_load_data_mock.assert_called_once_with(table_ref, 7, stmt.path)
+        self.assertEqual(l_load_data_mock.return_value, convertor.plan)
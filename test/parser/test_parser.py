@@ -198,8 +198,32 @@ class ParserTests(unittest.TestCase):
         # Values
         self.assertIsNotNone(insert_stmt.value_list)
         self.assertIsInstance(insert_stmt.value_list, list)
+        self.assertEqual(len(insert_stmt.value_list), 1)
+        self.assertEqual(len(insert_stmt.value_list[0]), 2)
+        self.assertEqual(insert_stmt.value_list[0][0].value, 1)
+
+    def test_multi_row_insert_statement(self):
+        parser = Parser()
+        insert_query = """INSERT INTO MyVideo (Frame_ID, Frame_Path)
+                                    VALUES    (1, '/mnt/frames/1.png'),
+                                              (2, '/mnt/frames/2.png');
+                        """
+        insert_stmt = parser.parse(insert_query)[0]
         self.assertEqual(len(insert_stmt.value_list), 2)
-        self.assertEqual(insert_stmt.value_list[0].value, 1)
+        self.assertEqual(insert_stmt.value_list[1][0].value, 2)
+        self.assertEqual(insert_stmt.value_list[1][1].value,
+                         '/mnt/frames/2.png')
+
+    def test_load_data_statement(self):
+        parser = Parser()
+        load_query = """LOAD DATA INFILE 'data/annotations.csv'
+                        INTO MyVideo;"""
+        eva_statement_list = parser.parse(load_query)
+        self.assertEqual(len(eva_statement_list), 1)
+        load_stmt = eva_statement_list[0]
+        self.assertEqual(load_stmt.stmt_type, StatementType.LOAD_DATA)
+        self.assertEqual(load_stmt.table.table_info.table_name, 'MyVideo')
+        self.assertEqual(load_stmt.path, Path('data/annotations.csv'))
 
     def test_create_udf_statement(self):
         parser = Parser()
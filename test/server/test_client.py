@@ -19,7 +19,37 @@ import time
 import asyncio
 import threading
 
+import numpy as np
+
+from src.models.storage.batch import FrameBatch
 from src.server.client import start_clients
+from src.server.load_generator import LoadGenerator, WorkloadQuery
+from src.server.protocol import MessageDecoder, MessageType, \
+    encode_batch, encode_message
+from src.server.serialization import FrameEncoding, serialize_batch
+
+
+class QueryServer(asyncio.Protocol):
+    """Answers every query with a batch of two frames"""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.decoder = MessageDecoder()
+
+    def data_received(self, data):
+        batch = FrameBatch.from_numpy(np.arange(2),
+                                      np.zeros((2, 4, 4, 3), np.uint8), None)
+        for message in self.decoder.feed(data):
+            if message.payload == b'fail':
+                self.transport.write(encode_message(
+                    MessageType.ERROR, message.request_id, b'failed'))
+                continue
+            for frame in encode_batch(
+                    message.request_id,
+                    serialize_batch(batch, FrameEncoding.NONE)):
+                self.transport.write(frame)
+            self.transport.write(encode_message(MessageType.RESULT_END,
+                                                message.request_id))
 
 
 class ClientTests(unittest.TestCase):
@@ -59,6 +89,34 @@ class ClientTests(unittest.TestCase):
         exception_count = client_count
         self.assertEqual(summary[1], exception_count)
 
+    def test_clients_should_run_load_generator(self):
+        server_loop = asyncio.new_event_loop()
+        server = server_loop.run_until_complete(server_loop.create_server(
+            QueryServer, '127.0.0.1', 0))
+        port = server.sockets[0].getsockname()[1]
+        thread = threading.Thread(target=server_loop.run_forever,
+                                  daemon=True)
+        thread.start()
+        workload = [WorkloadQuery('scan', 'scan'),
+                    WorkloadQuery('fail', 'fail')]
+        generator = LoadGenerator(workload, clients=2, concurrency=2,
+                                  repeat=3)
+        try:
+            summary = start_clients(2, '127.0.0.1', port,
+                                    asyncio.new_event_loop(), None,
+                                    handler=generator.drive)
+        finally:
+            server_loop.call_soon_threadsafe(server_loop.stop)
+            thread.join()
+            server.close()
+            server_loop.close()
+
+        self.assertEqual(summary, [2, 0, 0])
+        report = generator.report(summary)
+        self.assertEqual(report['latency_by_query']['scan']['count'], 3)
+        self.assertEqual(report['latency_by_query']['fail']['errors'], 3)
+        self.assertEqual(report['frames'], 6)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -16,10 +16,31 @@
 import unittest
 import mock
 import asyncio
+import threading
 
-from unittest.mock import MagicMock
+import numpy as np
 
-from src.server.command_handler import handle_request
+from unittest.mock import MagicMock, patch
+
+from src.models.storage.batch import FrameBatch
+from src.models.storage.frame import Frame
+from src.parser.types import StatementType
+from src.server.protocol import MessageType, encode_message, encode_batch
+from src.server.serialization import FrameEncoding, serialize_batch
+from src.server.command_handler import (FlowControl, handle_request,
+                                        execute_query, parse_query,
+                                        shutdown_query_executor)
+from src.server.query_scheduler import QueryCost, QueryScheduler
+from src.utils.metrics import QUERIES, QUERY_DURATION
+
+CATALOG = QueryCost(cheap=True, heavy=False, frames=0, memory=0)
+SCAN = QueryCost(cheap=False, heavy=False, frames=10, memory=100)
+HEAVY = QueryCost(cheap=False, heavy=True, frames=10, memory=100)
+
+
+def create_batch(indices):
+    return FrameBatch([Frame(i, np.zeros((2, 2, 3), dtype=np.uint8), None)
+                       for i in indices], None)
 
 
 class CommandHandlerTests(unittest.TestCase):
@@ -28,6 +49,15 @@ class CommandHandlerTests(unittest.TestCase):
         self.loop = asyncio.new_event_loop()
         self.stop_server_future = self.loop.create_future()
         asyncio.set_event_loop(None)
+        self.parse_query = self._patch('parse_query',
+                                       return_value=['statement'])
+        self.plan_with_cost = self._patch('_plan_with_cost',
+                                          return_value=('plan', SCAN))
+
+    def _patch(self, name, **kwargs):
+        patcher = patch('src.server.command_handler.' + name, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -39,6 +69,267 @@ class CommandHandlerTests(unittest.TestCase):
 
         asyncio.run(handle_request(transport, request_message))
 
+    def tearDown(self):
+        shutdown_query_executor()
+
+    def _transport(self):
+        transport = mock.Mock()
+        transport.is_closing = MagicMock(return_value=False)
+        return transport
+
+    def _writes(self, transport):
+        return [call[0][0] for call in transport.write.call_args_list]
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_stream_batches_off_event_loop(self, mock):
+        batches = [create_batch([3, 4]), create_batch([5])]
+        threads = []
+
+        def stream(plan):
+            threads.append(threading.current_thread())
+            yield from batches
+        mock.side_effect = stream
+        transport = self._transport()
+
+        response = asyncio.run(handle_request(transport, 'SELECT id FROM v;',
+                                              7))
+
+        self.parse_query.assert_called_with('SELECT id FROM v;')
+        mock.assert_called_with('plan')
+        self.assertIsNot(threading.main_thread(), threads[0])
+        self.assertEqual('3 frames: [3, 4, 5]', response)
+        self.assertEqual(
+            list(encode_batch(7, serialize_batch(batches[0]))) +
+            list(encode_batch(7, serialize_batch(batches[1]))) +
+            [encode_message(MessageType.RESULT_END, 7)],
+            self._writes(transport))
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_stream_batches_without_pixels(self, mock):
+        batch = create_batch([3, 4])
+        mock.return_value = (batch for batch in [batch])
+        transport = self._transport()
+
+        asyncio.run(handle_request(transport, 'SELECT id FROM v;', 7,
+                                   include_frames=False))
+
+        self.assertEqual(
+            list(encode_batch(7, serialize_batch(batch,
+                                                 FrameEncoding.NONE))) +
+            [encode_message(MessageType.RESULT_END, 7)],
+            self._writes(transport))
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_write_error_of_failed_query(self, mock):
+        mock.side_effect = ValueError('no such table')
+        transport = self._transport()
+
+        response = asyncio.run(handle_request(transport, 'SELECT id FROM v;',
+                                              7))
+
+        self.assertEqual('ERROR: no such table', response)
+        transport.write.assert_called_once_with(
+            encode_message(MessageType.ERROR, 7, b'no such table'))
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_not_write_to_closed_transport(self, mock):
+        mock.return_value = (batch for batch in [])
+        transport = self._transport()
+        transport.is_closing.return_value = True
+
+        asyncio.run(handle_request(transport, 'SELECT id FROM v;'))
+
+        transport.write.assert_not_called()
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_hold_back_query_while_transport_is_paused(self, mock):
+        produced = []
+
+        def stream(plan):
+            for index in range(3):
+                produced.append(index)
+                yield create_batch([index])
+        mock.side_effect = stream
+        transport = self._transport()
+
+        async def run():
+            flow_control = FlowControl()
+            flow_control.pause()
+            request = asyncio.create_task(
+                handle_request(transport, 'query', 1, flow_control))
+            await asyncio.sleep(0.2)
+            # the first batch waits for the transport, the next one is not
+            # produced meanwhile
+            self.assertEqual([0], produced)
+            transport.write.assert_not_called()
+            flow_control.resume()
+            return await request
+
+        self.assertEqual('3 frames: [0, 1, 2]', asyncio.run(run()))
+        self.assertEqual([0, 1, 2], produced)
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_stop_query_when_client_goes_away(self, mock):
+        closed = []
+
+        def stream(plan):
+            try:
+                for index in range(3):
+                    yield create_batch([index])
+            finally:
+                closed.append(True)
+        mock.side_effect = stream
+        transport = self._transport()
+        transport.write.side_effect = \
+            lambda frame: transport.is_closing.configure_mock(
+                return_value=True)
+
+        response = asyncio.run(handle_request(transport, 'query'))
+
+        self.assertEqual('0 frames: []', response)
+        self.assertEqual([True], closed)
+        transport.write.assert_called_once()
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_stop_query_when_request_is_cancelled(self, mock):
+        closed = threading.Event()
+
+        def stream(plan):
+            try:
+                yield create_batch([0])
+            finally:
+                closed.set()
+        mock.side_effect = stream
+        transport = self._transport()
+
+        async def run():
+            flow_control = FlowControl()
+            flow_control.pause()
+            request = asyncio.create_task(
+                handle_request(transport, 'query', 1, flow_control))
+            await asyncio.sleep(0.1)
+            request.cancel()
+            await asyncio.wait([request])
+
+        with patch('src.server.command_handler._WRITE_POLL_INTERVAL', 0.05):
+            asyncio.run(run())
+            self.assertTrue(closed.wait(5))
+        transport.write.assert_not_called()
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_stop_query_when_event_loop_stops(self, mock):
+        closed = threading.Event()
+
+        def stream(plan):
+            try:
+                yield create_batch([0])
+            finally:
+                closed.set()
+        mock.side_effect = stream
+        transport = self._transport()
+        flow_control = FlowControl()
+        flow_control.pause()
+
+        with patch('src.server.command_handler._WRITE_POLL_INTERVAL', 0.05):
+            request = self.loop.create_task(
+                handle_request(transport, 'query', 1, flow_control))
+            self.loop.call_later(0.1, self.loop.stop)
+            self.loop.run_forever()
+            self.assertTrue(closed.wait(5))
+
+        request.cancel()
+        self.loop.run_until_complete(asyncio.wait([request]))
+        self.loop.close()
+        transport.write.assert_not_called()
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_run_statements_in_turn_with_their_plans(self, mock):
+        self.parse_query.return_value = ['first', 'second']
+        self.plan_with_cost.side_effect = lambda statement: (
+            statement + ' plan', CATALOG)
+        mock.side_effect = lambda plan: (
+            batch for batch in [create_batch([0 if plan == 'first plan'
+                                              else 1])])
+
+        response = asyncio.run(handle_request(self._transport(), 'query'))
+
+        self.assertEqual('2 frames: [0, 1]', response)
+        self.assertEqual([(('first plan',),), (('second plan',),)],
+                         mock.call_args_list)
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_record_statements_by_type(self, mock):
+        load, select = MagicMock(), MagicMock()
+        load.stmt_type = StatementType.LOAD_DATA
+        select.stmt_type = StatementType.SELECT
+        self.parse_query.return_value = [load, select]
+        mock.side_effect = [(batch for batch in []), ValueError('failed')]
+        loads = QUERIES.labels('load_data', 'ok').value()
+        failed_selects = QUERIES.labels('select', 'error').value()
+        _, _, timed_loads = QUERY_DURATION.labels('load_data').value()
+
+        asyncio.run(handle_request(self._transport(), 'query'))
+
+        self.assertEqual(loads + 1, QUERIES.labels('load_data', 'ok').value())
+        self.assertEqual(failed_selects + 1,
+                         QUERIES.labels('select', 'error').value())
+        self.assertEqual(timed_loads + 1,
+                         QUERY_DURATION.labels('load_data').value()[2])
+
+    @patch('src.server.command_handler.execute_plan')
+    def test_should_wait_for_admission_by_scheduler(self, mock):
+        scheduler = QueryScheduler(max_running=2, max_heavy=1,
+                                   max_memory=1000)
+        self._patch('query_scheduler', return_value=scheduler)
+        self.plan_with_cost.return_value = ('plan', HEAVY)
+        running = threading.Semaphore(0)
+        finish = threading.Event()
+
+        def stream(plan):
+            running.release()
+            finish.wait(5)
+            yield create_batch([0])
+        mock.side_effect = stream
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            requests = [asyncio.create_task(handle_request(
+                self._transport(), 'query', i, client=i)) for i in range(2)]
+            await loop.run_in_executor(None, running.acquire)
+            await asyncio.sleep(0.1)
+            # the second heavy statement waits for the first one
+            status = scheduler.status()
+            finish.set()
+            await asyncio.gather(*requests)
+            return status
+
+        status = asyncio.run(run())
+
+        self.assertEqual((1, 1, 1), status[:3])
+        self.assertEqual(2, mock.call_count)
+        self.assertEqual((0, 0, 0, 0), scheduler.status()[:4])
+
+    @patch('src.optimizer.plan_generator.PlanGenerator')
+    @patch('src.optimizer.statement_to_opr_convertor.'
+           'StatementToPlanConvertor')
+    @patch('src.executor.plan_executor.PlanExecutor')
+    def test_execute_query_should_run_every_statement(self, executor,
+                                                      convertor, generator):
+        parser = MagicMock()
+        parser.return_value.parse.return_value = ['first', 'second']
+        executor.return_value.stream_plan.side_effect = [iter(['a']),
+                                                         iter(['b'])]
+
+        with patch.dict('sys.modules',
+                        {'src.parser.parser': MagicMock(Parser=parser)}):
+            self.parse_query.side_effect = parse_query
+            self.assertEqual(['a', 'b'], execute_query('query'))
+
+        convertor.return_value.visit.assert_called_with('second')
+        generator.return_value.build.assert_called_with(
+            convertor.return_value.plan)
+        executor.assert_called_with(generator.return_value.build.return_value)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,209 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+from src.server.load_generator import LatencyHistogram, LoadGenerator, \
+    WorkloadQuery, load_workload, write_report
+
+
+class FakeResponse:
+
+    def __init__(self):
+        self.error = None
+        self.done = Future()
+
+    def finish(self, error=None):
+        self.error = error
+        self.done.set_result(self)
+
+
+class FakeProtocol:
+    """Answers every query after `delay` seconds, failing those in `fail`"""
+
+    def __init__(self, delay=0.01, fail=()):
+        self.transport = MagicMock()
+        self.transport.is_closing.return_value = False
+        self.delay = delay
+        self.fail = fail
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sent = []
+
+    def send_message(self, message, on_batch=None, include_frames=True):
+        self.sent.append((message, time.perf_counter()))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        response = FakeResponse()
+
+        def finish():
+            self.in_flight -= 1
+            response.finish('failed' if message in self.fail else None)
+        asyncio.get_event_loop().call_later(self.delay, finish)
+        return response
+
+
+def drive(generators):
+    async def run():
+        await asyncio.gather(*generators)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+class LoadGeneratorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workload = [WorkloadQuery('scan', 'scan'),
+                         WorkloadQuery('detect', 'detect')]
+
+    def test_load_workload_should_name_queries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'workload.jsonl')
+            with open(path, 'w') as workload_file:
+                workload_file.write(
+                    json.dumps({'name': 'scan', 'query': 'SELECT 1;'}) +
+                    '\n\n' +
+                    json.dumps({'request_id': 'user-001',
+                                'query': 'SELECT 2;'}) + '\n' +
+                    json.dumps({'query': 'SELECT 3;'}) + '\n')
+
+            self.assertEqual(load_workload(path), [
+                WorkloadQuery('scan', 'SELECT 1;'),
+                WorkloadQuery('user-001', 'SELECT 2;'),
+                WorkloadQuery('line 4', 'SELECT 3;')])
+
+    def test_load_workload_should_reject_lines_without_query(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'workload.jsonl')
+            with open(path, 'w') as workload_file:
+                workload_file.write('{"name": "scan"}\n')
+
+            with self.assertRaises(ValueError):
+                load_workload(path)
+
+    def test_histogram_should_summarize_percentiles(self):
+        histogram = LatencyHistogram()
+        for millisecond in range(1, 101):
+            histogram.record(millisecond / 1000)
+        histogram.record_error()
+
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['errors'], 1)
+        self.assertAlmostEqual(summary['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['p99_ms'], 99.01)
+        self.assertAlmostEqual(summary['max_ms'], 100)
+        self.assertEqual(LatencyHistogram().summary(),
+                         {'count': 0, 'errors': 0})
+
+    def test_closed_load_should_cap_queries_in_flight(self):
+        generator = LoadGenerator(self.workload, clients=2, concurrency=3,
+                                  repeat=5)
+        protocols = [FakeProtocol(), FakeProtocol()]
+
+        drive([generator.drive(None, protocol) for protocol in protocols])
+
+        self.assertEqual([protocol.max_in_flight for protocol in protocols],
+                         [2, 1])
+        sent = [message for protocol in protocols
+                for message, _ in protocol.sent]
+        self.assertEqual(len(sent), 10)
+        self.assertEqual(sent.count('scan'), 5)
+        for protocol in protocols:
+            protocol.transport.close.assert_called_once_with()
+
+        report = generator.report([2, 0, 0])
+        self.assertEqual(report['queries_sent'], 10)
+        self.assertEqual(report['latency']['count'], 10)
+        self.assertEqual(report['latency_by_query']['detect']['count'], 5)
+        self.assertGreater(report['throughput_qps'], 0)
+        self.assertGreaterEqual(report['latency']['p50_ms'], 10)
+        self.assertEqual(report['connections'],
+                         {'tasks': 2, 'exceptions': 0, 'retries': 0})
+
+    def test_open_load_should_send_at_rate(self):
+        generator = LoadGenerator(self.workload, clients=2, rate=100,
+                                  repeat=10)
+        # answers are slower than the arrivals
+        protocols = [FakeProtocol(delay=0.1), FakeProtocol(delay=0.1)]
+
+        drive([generator.drive(None, protocol) for protocol in protocols])
+
+        times = sorted(sent for protocol in protocols
+                       for _, sent in protocol.sent)
+        self.assertEqual(len(times), 20)
+        self.assertGreaterEqual(times[-1] - times[0], 0.18)
+        self.assertLess(times[-1] - times[0], 0.5)
+        self.assertGreater(max(protocol.max_in_flight
+                               for protocol in protocols), 1)
+        self.assertEqual(generator.report()['latency']['count'], 20)
+
+    def test_duration_should_bound_the_run(self):
+        generator = LoadGenerator(self.workload, concurrency=1,
+                                  duration=0.1)
+        protocol = FakeProtocol(delay=0.02)
+
+        drive([generator.drive(None, protocol)])
+
+        self.assertGreater(len(protocol.sent), 1)
+        self.assertLess(len(protocol.sent), 10)
+        self.assertEqual(generator.report()['queries_sent'],
+                         len(protocol.sent))
+
+    def test_unanswered_queries_should_count_as_errors(self):
+        generator = LoadGenerator(self.workload[:1], timeout=0.05)
+
+        drive([generator.drive(None, FakeProtocol(delay=1))])
+
+        self.assertEqual(generator.report()['latency'],
+                         {'count': 0, 'errors': 1})
+
+    def test_failed_queries_should_count_as_errors(self):
+        generator = LoadGenerator(self.workload)
+        protocol = FakeProtocol(fail=('scan',))
+
+        drive([generator.drive(None, protocol)])
+
+        report = generator.report()
+        self.assertEqual(report['latency_by_query']['scan']['errors'], 1)
+        self.assertEqual(report['latency_by_query']['detect']['count'], 1)
+        self.assertEqual(report['latency']['errors'], 1)
+
+    def test_write_report_should_write_json(self):
+        generator = LoadGenerator(self.workload)
+        drive([generator.drive(None, FakeProtocol())])
+        report = generator.report()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            write_report(report, path)
+            with open(path) as report_file:
+                self.assertEqual(json.load(report_file), report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+
+from unittest.mock import patch
+
+from src.server.metrics_endpoint import CONTENT_TYPE, metrics_address, \
+    serve_metrics
+from src.utils.metrics import MetricsRegistry
+
+
+async def request(port: int, request_line: str) -> bytes:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request_line.encode('latin-1') +
+                 b'\r\nHost: localhost\r\n\r\n')
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+class MetricsEndpointTests(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter('eva_test_total', 'Test counter').inc(3)
+
+    def scrape(self, *request_lines):
+        async def run():
+            server = await serve_metrics('127.0.0.1', 0, self.registry)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return [await request(port, line) for line in request_lines]
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_should_serve_metrics(self):
+        response, = self.scrape('GET /metrics HTTP/1.1')
+
+        head, body = response.split(b'\r\n\r\n', 1)
+        self.assertTrue(head.startswith(b'HTTP/1.1 200 OK'))
+        self.assertIn(('Content-Type: ' + CONTENT_TYPE).encode(), head)
+        self.assertIn(('Content-Length: %d' % len(body)).encode(), head)
+        self.assertEqual(body.decode(), self.registry.render())
+        self.assertIn(b'eva_test_total 3', body)
+
+    def test_should_reject_other_paths_and_methods(self):
+        not_found, not_allowed = self.scrape('GET / HTTP/1.1',
+                                             'POST /metrics HTTP/1.1')
+
+        self.assertTrue(not_found.startswith(b'HTTP/1.1 404'))
+        self.assertTrue(not_allowed.startswith(b'HTTP/1.1 405'))
+
+    @patch('src.server.metrics_endpoint.ConfigurationManager')
+    def test_workers_should_serve_on_following_ports(self, mock_config):
+        values = {'metrics_host': None, 'metrics_port': 9432}
+        mock_config.return_value.get_value.side_effect = \
+            lambda section, key: values[key]
+
+        self.assertEqual(metrics_address(), ('127.0.0.1', 9432))
+        self.assertEqual(metrics_address(2), ('127.0.0.1', 9434))
+
+        values['metrics_port'] = None
+        self.assertIsNone(metrics_address())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from src.server.protocol import (MessageDecoder, MessageType, Message,
+                                 ProtocolError, HEADER, MAX_PAYLOAD_SIZE,
+                                 encode_message, encode_batch)
+
+
+class ProtocolTests(unittest.TestCase):
+
+    def test_should_decode_encoded_message(self):
+        data = encode_message(MessageType.QUERY, 3, b'SELECT id FROM v;')
+
+        messages = MessageDecoder().feed(data)
+
+        self.assertEqual([Message(MessageType.QUERY, 3,
+                                  b'SELECT id FROM v;')], messages)
+
+    def test_should_decode_messages_split_across_reads(self):
+        data = (encode_message(MessageType.QUERY, 1, b'first') +
+                encode_message(MessageType.QUERY, 2, b'') +
+                encode_message(MessageType.QUERY, 3, b'third'))
+        decoder = MessageDecoder()
+
+        messages = []
+        for i in range(len(data)):
+            messages.extend(decoder.feed(data[i:i + 1]))
+
+        self.assertEqual([b'first', b'', b'third'],
+                         [message.payload for message in messages])
+        self.assertEqual([1, 2, 3],
+                         [message.request_id for message in messages])
+        self.assertEqual(0, decoder.pending)
+
+    def test_should_keep_incomplete_frame_pending(self):
+        data = encode_message(MessageType.ERROR, 1, b'failed')
+        decoder = MessageDecoder()
+
+        self.assertEqual([], decoder.feed(data[:-1]))
+        self.assertEqual(len(data) - 1, decoder.pending)
+        self.assertEqual([Message(MessageType.ERROR, 1, b'failed')],
+                         decoder.feed(data[-1:]))
+
+    def test_should_split_batch_in_chunks(self):
+        data = bytes(range(10))
+
+        messages = MessageDecoder().feed(
+            b''.join(encode_batch(5, data, chunk_size=4)))
+
+        self.assertEqual([MessageType.RESULT_CHUNK] * 3 +
+                         [MessageType.BATCH_END],
+                         [message.type for message in messages])
+        self.assertEqual(data, b''.join(message.payload
+                                        for message in messages))
+        self.assertTrue(all(message.request_id == 5
+                            for message in messages))
+
+    def test_should_end_empty_batch(self):
+        self.assertEqual([encode_message(MessageType.BATCH_END, 5)],
+                         list(encode_batch(5, b'')))
+
+    def test_should_reject_oversized_frames(self):
+        with self.assertRaises(ProtocolError):
+            encode_message(MessageType.QUERY, 1,
+                           bytes(MAX_PAYLOAD_SIZE + 1))
+        with self.assertRaises(ProtocolError):
+            MessageDecoder().feed(HEADER.pack(MAX_PAYLOAD_SIZE + 1,
+                                              MessageType.QUERY, 1))
+
+    def test_should_reject_unknown_message_type(self):
+        with self.assertRaises(ProtocolError):
+            MessageDecoder().feed(HEADER.pack(0, 42, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
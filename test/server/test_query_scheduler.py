@@ -0,0 +1,225 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.expression.abstract_expression import ExpressionType
+from src.expression.comparison_expression import ComparisonExpression
+from src.expression.constant_value_expression import \
+    ConstantValueExpression
+from src.expression.function_expression import FunctionExpression
+from src.expression.tuple_value_expression import TupleValueExpression
+from src.planner.create_plan import CreatePlan
+from src.planner.load_data_plan import LoadDataPlan
+from src.planner.seq_scan_plan import SeqScanPlan
+from src.planner.storage_plan import StoragePlan
+from src.server.query_scheduler import (QueryCost, QueryScheduler,
+                                        estimate_cost)
+from src.utils.metrics import SCHEDULER_WAIT
+
+FRAME = 10 * 20 * 3
+
+
+def create_video():
+    video = MagicMock()
+    video.columns = [DataFrameColumn('id', ColumnType.INTEGER),
+                     DataFrameColumn('data', ColumnType.NDARRAY,
+                                     array_dimensions=[10, 20, 3])]
+    return video
+
+
+def create_scan(predicate, batch_size=4, **kwargs):
+    scan = SeqScanPlan(predicate, [TupleValueExpression('id')])
+    scan.append_child(StoragePlan(create_video(), batch_size=batch_size,
+                                  **kwargs))
+    return scan
+
+
+def cost(heavy=False, memory=100):
+    return QueryCost(cheap=False, heavy=heavy, frames=None, memory=memory)
+
+
+class EstimateCostTests(unittest.TestCase):
+
+    @patch('src.storage.StorageEngine')
+    def test_should_estimate_scan_from_catalog(self, engine):
+        engine.count.return_value = 100
+
+        self.assertEqual(QueryCost(False, False, 100, 4 * (FRAME + 8)),
+                         estimate_cost(create_scan(None)))
+        self.assertEqual(QueryCost(False, False, 5, 4 * (FRAME + 8)),
+                         estimate_cost(create_scan(None, skip_frames=10,
+                                                   limit=5)))
+
+    @patch('src.storage.StorageEngine')
+    def test_should_bound_memory_by_frames_scanned(self, engine):
+        engine.count.return_value = 2
+
+        self.assertEqual(2 * (FRAME + 8),
+                         estimate_cost(create_scan(None)).memory)
+
+    @patch('src.storage.StorageEngine')
+    def test_should_estimate_udf_scan_as_heavy(self, engine):
+        engine.count.side_effect = RuntimeError('no dataset')
+        predicate = ComparisonExpression(
+            ExpressionType.COMPARE_EQUAL,
+            FunctionExpression(lambda batch: [], name='detector'),
+            ConstantValueExpression('car'))
+
+        self.assertEqual(QueryCost(False, True, None, 4 * (FRAME + 8)),
+                         estimate_cost(create_scan(predicate)))
+
+    def test_should_estimate_catalog_statements_as_cheap(self):
+        self.assertTrue(estimate_cost(CreatePlan(MagicMock(), [])).cheap)
+        self.assertFalse(estimate_cost(LoadDataPlan(1, Path('v.mp4'))).cheap)
+
+
+class QuerySchedulerTests(unittest.TestCase):
+
+    def run_admissions(self, scheduler, requests, finish_after=()):
+        """
+        Admits (client, cost) requests in order and returns the indices of
+        the admitted ones before and after releasing those in finish_after
+        """
+        async def run():
+            tasks = [asyncio.create_task(scheduler.admit(client, cost))
+                     for client, cost in requests]
+            await asyncio.sleep(0)
+            admitted = [i for i, task in enumerate(tasks) if task.done()]
+            for i in finish_after:
+                scheduler.release(requests[i][1])
+            await asyncio.sleep(0)
+            later = [i for i, task in enumerate(tasks) if task.done()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return admitted, later
+        return asyncio.run(run())
+
+    def test_should_cap_running_and_heavy_statements(self):
+        scheduler = QueryScheduler(max_running=3, max_heavy=1,
+                                   max_memory=1000)
+
+        admitted, later = self.run_admissions(
+            scheduler, [('a', cost(heavy=True)), ('b', cost(heavy=True)),
+                        ('c', cost()), ('d', cost()), ('e', cost())],
+            finish_after=[0])
+
+        self.assertEqual([0, 2, 3], admitted)
+        self.assertEqual([0, 1, 2, 3], later)
+
+    def test_should_cap_frame_memory_in_flight(self):
+        scheduler = QueryScheduler(max_running=10, max_heavy=10,
+                                   max_memory=250)
+
+        admitted, _ = self.run_admissions(
+            scheduler, [('a', cost()), ('b', cost()), ('c', cost()),
+                        ('d', cost(memory=50))])
+
+        self.assertEqual([0, 1, 3], admitted)
+
+    def test_should_run_statement_larger_than_budget_alone(self):
+        scheduler = QueryScheduler(max_running=10, max_heavy=10,
+                                   max_memory=100)
+
+        admitted, later = self.run_admissions(
+            scheduler, [('a', cost(memory=500)), ('b', cost())],
+            finish_after=[0])
+
+        self.assertEqual([0], admitted)
+        self.assertEqual([0, 1], later)
+
+    def test_should_serve_clients_round_robin(self):
+        scheduler = QueryScheduler(max_running=1, max_heavy=1,
+                                   max_memory=1000)
+        requests = [('a', cost()), ('a', cost()), ('a', cost()),
+                    ('b', cost()), ('c', cost())]
+
+        async def run():
+            order = []
+
+            async def admit(i, client, cost):
+                await scheduler.admit(client, cost)
+                order.append(i)
+                await asyncio.sleep(0)
+                scheduler.release(cost)
+            await asyncio.gather(*[admit(i, client, cost) for i, (
+                client, cost) in enumerate(requests)])
+            return order
+
+        _, _, waits = SCHEDULER_WAIT.value()
+        # b and c get their turn before the rest of the statements of a
+        self.assertEqual([0, 3, 4, 1, 2], asyncio.run(run()))
+        self.assertEqual((0, 0, 0, 0), scheduler.status())
+        self.assertEqual(waits + len(requests), SCHEDULER_WAIT.value()[2])
+
+    def test_should_run_cheap_statements_in_fast_lane(self):
+        scheduler = QueryScheduler(max_running=1, max_heavy=1,
+                                   max_memory=1000)
+        cheap = QueryCost(cheap=True, heavy=False, frames=0, memory=0)
+
+        async def status():
+            return scheduler.status()
+
+        async def run():
+            await scheduler.admit('a', cost())
+            return await scheduler.run('b', cheap, status)
+
+        self.assertEqual(1, asyncio.run(run()).running)
+
+    def test_cancelled_statement_should_keep_admission_until_it_stops(self):
+        scheduler = QueryScheduler(max_running=1, max_heavy=1,
+                                   max_memory=1000)
+
+        async def run():
+            statement = asyncio.get_running_loop().create_future()
+            waiting = asyncio.create_task(
+                scheduler.run('a', cost(), lambda: statement))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            running = scheduler.status().running
+            statement.set_result(None)
+            await asyncio.sleep(0)
+            return waiting.cancelled(), running, scheduler.status().running
+
+        self.assertEqual((True, 1, 0), asyncio.run(run()))
+
+    def test_should_drop_cancelled_statements_from_queue(self):
+        scheduler = QueryScheduler(max_running=1, max_heavy=1,
+                                   max_memory=1000)
+
+        async def run():
+            first = asyncio.create_task(scheduler.admit('a', cost()))
+            second = asyncio.create_task(scheduler.admit('b', cost()))
+            third = asyncio.create_task(scheduler.admit('c', cost()))
+            await asyncio.sleep(0)
+            second.cancel()
+            await asyncio.sleep(0)
+            queued = scheduler.status().queued
+            scheduler.release(cost())
+            await asyncio.sleep(0)
+            return queued, first.done(), second.cancelled(), third.done()
+
+        self.assertEqual((1, True, True, True), asyncio.run(run()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from src.models.catalog.frame_info import FrameInfo
+from src.models.catalog.properties import ColorSpace
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.representation import BoundingBox, Point
+from src.models.storage.batch import FrameBatch
+from src.models.storage.frame import Frame
+from src.server.serialization import (FrameEncoding, serialize_batch,
+                                      deserialize_batch, format_response)
+
+
+def create_batch(size=3):
+    info = FrameInfo(4, 4, 3, ColorSpace.BGR)
+    batch = FrameBatch([Frame(i, i * np.ones((4, 4, 3), dtype=np.uint8),
+                              info)
+                        for i in range(3, 3 + size)], info)
+    box = BoundingBox(Point(1, 2), Point(3.5, 4))
+    predictions = [Prediction(frame, ['car', 'bus'], [0.9, 0.25],
+                              boxes=[box, box])
+                   for frame in batch.frames]
+    predictions[-1] = Prediction(batch.frames[-1], [], [])
+    batch.set_outcomes('detector', predictions)
+    batch.set_outcomes('score', np.arange(size, dtype=np.float32))
+    batch.set_outcomes('label', ['a', None, 'c'][:size])
+    return batch
+
+
+class SerializationTests(unittest.TestCase):
+
+    def test_should_round_trip_batch(self):
+        batch = create_batch()
+
+        decoded = deserialize_batch(serialize_batch(batch))
+
+        self.assertEqual(batch, decoded)
+        self.assertEqual(batch.info, decoded.info)
+        self.assertEqual(np.float32,
+                         decoded.get_outcome_column('score').dtype)
+        prediction = decoded.get_outcomes_for('detector')[1]
+        self.assertEqual(['car', 'bus'], prediction.labels)
+        self.assertEqual([0.9, 0.25], prediction.scores)
+        self.assertEqual(BoundingBox(Point(1, 2), Point(3.5, 4)),
+                         prediction.boxes[1])
+        self.assertIs(decoded.frames[1], prediction.frame)
+        self.assertIsNone(decoded.get_outcomes_for('detector')[2].boxes)
+
+    def test_should_view_pixels_in_place(self):
+        payload = serialize_batch(create_batch())
+
+        data = deserialize_batch(payload).frames_as_numpy_array()
+
+        self.assertFalse(data.flags.owndata)
+        self.assertTrue(data.flags.aligned)
+        self.assertTrue(np.shares_memory(
+            data, np.frombuffer(payload, dtype=np.uint8)))
+
+    def test_should_send_frame_pixels_once(self):
+        batch = create_batch(size=2)
+        pixels = batch.frames_as_numpy_array().nbytes
+
+        size = len(serialize_batch(batch))
+        without_pixels = len(serialize_batch(batch, FrameEncoding.NONE))
+
+        self.assertLess(size - without_pixels, pixels + 200)
+
+    def test_should_leave_out_pixels(self):
+        decoded = deserialize_batch(serialize_batch(create_batch(),
+                                                    FrameEncoding.NONE))
+
+        self.assertEqual([3, 4, 5], decoded.indices.tolist())
+        self.assertEqual(0, decoded.frames_as_numpy_array().size)
+        prediction = decoded.get_outcomes_for('detector')[0]
+        self.assertEqual([0.9, 0.25], prediction.scores)
+        self.assertIsNone(prediction.frame)
+
+    def test_should_round_trip_pixels_as_jpeg(self):
+        batch = create_batch()
+
+        decoded = deserialize_batch(serialize_batch(batch,
+                                                    FrameEncoding.JPEG))
+
+        self.assertEqual(batch.frames_as_numpy_array().shape,
+                         decoded.frames_as_numpy_array().shape)
+        self.assertTrue(np.allclose(batch.frames_as_numpy_array(),
+                                    decoded.frames_as_numpy_array(),
+                                    atol=2))
+
+    def test_should_round_trip_missing_predictions_and_other_outcomes(self):
+        batch = create_batch()
+        batch.set_outcomes('detector', [None] + batch.get_outcomes_for(
+            'detector')[1:])
+        batch.set_outcomes('mixed', [{'a': 1}, (2, 'b'), None])
+
+        decoded = deserialize_batch(serialize_batch(batch))
+
+        self.assertIsNone(decoded.get_outcomes_for('detector')[0])
+        self.assertEqual(['car', 'bus'],
+                         decoded.get_outcomes_for('detector')[1].labels)
+        # sent as JSON, tuples come back as lists
+        self.assertEqual([{'a': 1}, [2, 'b'], None],
+                         decoded.get_outcomes_for('mixed'))
+
+    def test_should_send_outcomes_without_json_type_as_text(self):
+        batch = create_batch()
+        box = BoundingBox(Point(1, 2), Point(3, 4))
+        batch.set_outcomes('mixed', [{'box': box}, np.arange(2), None])
+
+        payload = serialize_batch(batch)
+        decoded = deserialize_batch(payload)
+
+        self.assertEqual([{'box': repr(box)}, [0, 1], None],
+                         decoded.get_outcomes_for('mixed'))
+        self.assertNotIn(b'pickle', payload)
+
+    def test_should_round_trip_batch_without_pixel_data(self):
+        batch = FrameBatch([Frame(i, None, None) for i in range(3)], None)
+        batch.set_outcomes('label', ['a', 'b', 'c'])
+
+        for encoding in FrameEncoding:
+            decoded = deserialize_batch(serialize_batch(batch, encoding, 90))
+
+            self.assertEqual([0, 1, 2], decoded.indices.tolist())
+            self.assertEqual(['a', 'b', 'c'],
+                             list(decoded.get_outcomes_for('label')))
+            self.assertEqual(0, decoded.frames_as_numpy_array().size)
+
+    def test_should_round_trip_empty_batch(self):
+        batch = FrameBatch([], None)
+
+        decoded = deserialize_batch(serialize_batch(batch))
+
+        self.assertEqual(0, decoded.batch_size)
+        self.assertIsNone(decoded.info)
+
+    def test_format_response_should_list_frames(self):
+        self.assertEqual('0 frames: []', format_response([]))
+        self.assertEqual('3 frames: [3, 4, 5]',
+                         format_response([create_batch()]))
+
+
+if __name__ == '__main__':
+    unittest.main()
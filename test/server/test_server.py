@@ -19,10 +19,13 @@ import threading
 import mock
 import asyncio
 
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from src.server.server import start_server
-from src.server.server import EvaServer
+from src.server.server import EvaServer, start_metrics
+from src.utils.metrics import CONNECTIONS, CONNECTION_ERRORS, \
+    SCHEDULER_QUEUED
+from src.server.protocol import MessageType, encode_message
 
 
 from concurrent.futures import CancelledError
@@ -59,6 +62,29 @@ class ServerTests(unittest.TestCase):
                          socket_timeout=socket_timeout,
                          stop_server_future=self.stop_server_future)
 
+    @patch('src.server.server.shutdown_query_executor')
+    @patch('src.server.server.metrics_address', return_value=None)
+    def test_server_should_cancel_pending_requests_on_stop(
+            self, mock_address, mock_shutdown):
+        drained = []
+
+        async def request():
+            try:
+                await asyncio.sleep(60)
+            finally:
+                drained.append(mock_shutdown.called)
+        pending = self.loop.create_task(request())
+        self.loop.call_later(0.1, self.stop_server_future.set_result, None)
+
+        start_server(host='127.0.0.1', port=0, loop=self.loop,
+                     socket_timeout=60,
+                     stop_server_future=self.stop_server_future)
+
+        self.assertTrue(pending.cancelled())
+        self.assertEqual([False], drained)
+        mock_shutdown.assert_called_once_with()
+        self.assertTrue(self.loop.is_closed())
+
     def test_server_protocol_connection_lost(self):
 
         socket_timeout = 65
@@ -68,10 +94,14 @@ class ServerTests(unittest.TestCase):
         eva_server.transport.close = MagicMock(return_value="closed")
         eva_server.transport.abort = MagicMock(return_value="aborted")
 
+        open_connections = CONNECTIONS.value()
+        errors = CONNECTION_ERRORS.value()
+
         # connection made
         eva_server.connection_made(eva_server.transport)
         self.assertEqual(EvaServer.__connections__, 1,
                          "connection not made")
+        self.assertEqual(open_connections + 1, CONNECTIONS.value())
 
         # connection lost
         eva_server.connection_lost(None)
@@ -91,6 +121,25 @@ class ServerTests(unittest.TestCase):
                          "connection not lost")
         self.assertEqual(EvaServer.__errors__, 1,
                          "connection not errored out")
+        self.assertEqual(open_connections, CONNECTIONS.value())
+        self.assertEqual(errors + 1, CONNECTION_ERRORS.value())
+
+    @patch('src.server.server.metrics_address')
+    def test_start_metrics_should_serve_configured_port(self, mock_address):
+        mock_address.return_value = ('127.0.0.1', 0)
+
+        metrics_server = start_metrics(self.loop, 3)
+        try:
+            mock_address.assert_called_once_with(3)
+            self.assertEqual(1, len(metrics_server.sockets))
+            self.assertEqual(0, SCHEDULER_QUEUED.value())
+        finally:
+            metrics_server.close()
+            self.loop.run_until_complete(metrics_server.wait_closed())
+            self.loop.close()
+
+        mock_address.return_value = None
+        self.assertIsNone(start_metrics(None))
 
     def test_server_protocol_data_received(self):
 
@@ -102,18 +151,130 @@ class ServerTests(unittest.TestCase):
         eva_server.transport.abort = MagicMock(return_value="aborted")
 
         # data received
-        data = mock.Mock()
-        data.decode = MagicMock(return_value="quit")
+        data = encode_message(MessageType.QUERY, 1, b'quit')
         self.assertEqual(eva_server.data_received(data), "closed",
                          "transport not closed")
 
         asyncio.set_event_loop(None)
 
         with self.assertRaises(RuntimeError):
-            data.decode = MagicMock(return_value="query")
+            data = encode_message(MessageType.QUERY, 2, b'query')
             # error due to lack of asyncio loop
             eva_server.data_received(data)
 
+    def test_server_protocol_should_wait_for_complete_frames(self):
+        eva_server = EvaServer(60)
+        eva_server.transport = mock.Mock()
+        eva_server.transport.close = MagicMock(return_value="closed")
+        data = encode_message(MessageType.QUERY, 1, b'quit')
+
+        self.assertIsNone(eva_server.data_received(data[:7]))
+        eva_server.transport.close.assert_not_called()
+        self.assertEqual("closed", eva_server.data_received(data[7:]))
+
+    def test_server_protocol_should_abort_on_invalid_frame(self):
+        eva_server = EvaServer(60)
+        eva_server.transport = mock.Mock()
+        eva_server.transport.abort = MagicMock(return_value="aborted")
+
+        data = encode_message(MessageType.QUERY, 1, b'quit')
+        data = data[:4] + bytes([42]) + data[5:]
+
+        self.assertEqual("aborted", eva_server.data_received(data))
+
+    @patch('src.server.server.handle_request')
+    def test_server_protocol_should_answer_requests_in_order(self,
+                                                             mock_handle):
+        handled = []
+
+        async def handle(transport, request_message, *args):
+            # the first request takes longest
+            await asyncio.sleep(0.1 if request_message == 'first' else 0)
+            handled.append(request_message)
+        mock_handle.side_effect = handle
+
+        async def receive():
+            eva_server = EvaServer(60)
+            eva_server.transport = mock.Mock()
+            for request_id, message in enumerate(('first', 'second',
+                                                  'third')):
+                eva_server.data_received(encode_message(
+                    MessageType.QUERY, request_id, message.encode()))
+            await asyncio.gather(*eva_server._requests)
+            return eva_server
+
+        eva_server = asyncio.run(receive())
+
+        self.assertEqual(['first', 'second', 'third'], handled)
+        self.assertEqual([], eva_server._requests)
+
+    @patch('src.server.server.handle_request')
+    def test_server_protocol_should_pass_request_options(
+            self, mock_handle):
+        calls = []
+
+        async def handle(*args):
+            calls.append(args)
+        mock_handle.side_effect = handle
+
+        async def receive():
+            eva_server = EvaServer(60)
+            eva_server.transport = mock.Mock()
+            eva_server.data_received(
+                encode_message(MessageType.QUERY, 1, b'first') +
+                encode_message(MessageType.QUERY_WITHOUT_FRAMES, 2,
+                               b'second'))
+            await asyncio.gather(*eva_server._requests)
+            return eva_server
+
+        eva_server = asyncio.run(receive())
+
+        self.assertEqual([(eva_server.transport, 'first', 1,
+                           eva_server._flow_control, True, eva_server),
+                          (eva_server.transport, 'second', 2,
+                           eva_server._flow_control, False, eva_server)],
+                         calls)
+
+    def test_server_protocol_should_forward_write_flow_control(self):
+        async def run():
+            eva_server = EvaServer(60)
+            flow_control = eva_server._flow_control
+            eva_server.pause_writing()
+            waiter = asyncio.create_task(flow_control.wait_writable())
+            await asyncio.sleep(0)
+            paused = not waiter.done()
+            eva_server.resume_writing()
+            await asyncio.wait_for(waiter, 1)
+            return paused
+
+        self.assertTrue(asyncio.run(run()))
+
+    @patch('src.server.server.handle_request')
+    def test_server_protocol_should_cancel_requests_on_disconnect(
+            self, mock_handle):
+        handled = []
+
+        async def handle(transport, request_message, *args):
+            await asyncio.sleep(0.1)
+            handled.append(request_message)
+        mock_handle.side_effect = handle
+
+        async def receive():
+            eva_server = EvaServer(60)
+            eva_server.transport = mock.Mock()
+            eva_server.data_received(
+                encode_message(MessageType.QUERY, 1, b'first') +
+                encode_message(MessageType.QUERY, 2, b'second'))
+            requests = list(eva_server._requests)
+            eva_server.connection_lost(None)
+            await asyncio.wait(requests)
+            return requests
+
+        requests = asyncio.run(receive())
+
+        self.assertTrue(all(request.cancelled() for request in requests))
+        self.assertEqual([], handled)
+
 
 if __name__ == '__main__':
     unittest.main()
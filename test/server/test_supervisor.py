@@ -0,0 +1,123 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+
+from src.server.protocol import MessageType, encode_message
+from src.server.supervisor import (ServerSupervisor, WorkerCounters,
+                                   serve_worker)
+
+
+def crash_once(worker_id, counters, directory):
+    # the first run of every worker fails, the restarted one keeps running
+    marker = os.path.join(directory, str(worker_id))
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        sys.exit(1)
+    counters.publish(worker_id, 1, worker_id)
+    time.sleep(60)
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+class WorkerCountersTests(unittest.TestCase):
+
+    def test_should_sum_counters_of_workers(self):
+        counters = WorkerCounters(3)
+        counters.publish(0, 2, 1)
+        counters.publish(2, 3, 0)
+
+        self.assertEqual(5, counters.__connections__)
+        self.assertEqual(1, counters.__errors__)
+
+        counters.reset_connections(0)
+        self.assertEqual(3, counters.__connections__)
+        self.assertEqual(1, counters.__errors__)
+
+
+class ServerSupervisorTests(unittest.TestCase):
+
+    def test_should_restart_crashed_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            supervisor = ServerSupervisor(2, crash_once, (directory,),
+                                          restart_delay=0)
+            supervisor.start()
+            try:
+                first = supervisor.processes
+                self.assertTrue(wait_for(
+                    lambda: supervisor.check_workers() or
+                    supervisor.restarts == 2))
+                self.assertTrue(wait_for(
+                    lambda: supervisor.counters.__connections__ == 2))
+                self.assertEqual(1, supervisor.counters.__errors__)
+                self.assertEqual([1, 1], [process.exitcode
+                                          for process in first])
+                self.assertTrue(all(process.is_alive()
+                                    for process in supervisor.processes))
+            finally:
+                supervisor.stop(timeout=5)
+
+        self.assertFalse(any(process.is_alive()
+                             for process in supervisor.processes))
+        # stopped workers are not restarted
+        self.assertEqual([], supervisor.check_workers())
+
+    def test_should_share_port_between_workers(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        supervisor = ServerSupervisor(2, serve_worker,
+                                      ('127.0.0.1', port, 60))
+        supervisor.start()
+        connections = []
+        try:
+            def connect():
+                try:
+                    connections.append(socket.create_connection(
+                        ('127.0.0.1', port), timeout=5))
+                except OSError:
+                    return False
+                return len(connections) == 4
+            self.assertTrue(wait_for(connect, 60))
+            self.assertTrue(wait_for(
+                lambda: supervisor.counters.__connections__ == 4))
+
+            # a worker answers on its connection
+            connections[0].sendall(encode_message(MessageType.QUERY, 1,
+                                                  b'quit'))
+            self.assertEqual(b'', connections[0].recv(1))
+        finally:
+            for connection in connections:
+                connection.close()
+            supervisor.stop(timeout=10)
+
+        self.assertEqual([0, 0], [process.exitcode
+                                  for process in supervisor.processes])
+
+
+if __name__ == '__main__':
+    unittest.main()
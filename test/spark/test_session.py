@@ -39,6 +39,13 @@ class SparkSessionTest(unittest.TestCase):
         self.assertEqual(self.session, session2)
         self.assertIsInstance(spark_session, SparkSession)
 
+    def test_deleting_session_which_never_started_should_not_fail(self):
+        self.session.stop()
+
+        self.session.__del__()
+
+        self.assertIsNone(self.session._session)
+
 
 if __name__ == '__main__':
 
@@ -0,0 +1,148 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pyarrow.parquet as pq
+from petastorm import make_reader
+from petastorm.etl.dataset_metadata import ROW_GROUPS_PER_FILE_KEY
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.storage.bulk_writer import BulkWriter
+
+
+def create_metadata(path):
+    metadata = DataFrameMetadata('dataset', 'file://' + path)
+    metadata.schema = [
+        DataFrameColumn('id', ColumnType.INTEGER),
+        DataFrameColumn('label', ColumnType.TEXT, is_nullable=True),
+        DataFrameColumn('frame', ColumnType.NDARRAY,
+                        array_dimensions=[2, 2])]
+    return metadata
+
+
+def read_rows(path, **kwargs):
+    # petastorm's thread pool now and then drops all rows on python 3.11
+    with make_reader('file://' + path, reader_pool_type='dummy',
+                     **kwargs) as reader:
+        return sorted(reader, key=lambda row: row.id)
+
+
+class BulkWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'dataset')
+        self.metadata = create_metadata(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_should_append_rows_readable_by_petastorm(self):
+        with BulkWriter(self.metadata) as writer:
+            writer.append_rows([(i, 'car', np.full((2, 2), i))
+                                for i in range(3)])
+        with BulkWriter(self.metadata) as writer:
+            writer.append_columns({'id': np.arange(3, 5),
+                                   'frame': np.zeros((2, 2, 2))})
+
+        rows = read_rows(self.path)
+        self.assertEqual(list(range(5)), [row.id for row in rows])
+        self.assertEqual([b'car'] * 3 + [None] * 2,
+                         [row.label for row in rows])
+        np.testing.assert_array_equal(np.full((2, 2), 2), rows[2].frame)
+
+    def test_should_split_file_into_row_groups_of_configured_size(self):
+        writer = BulkWriter(self.metadata, row_group_size_mb=1)
+        frames = np.zeros((1000, 2, 2))
+        for _ in range(5):
+            writer.append_columns({'id': np.arange(1000), 'frame': frames,
+                                   'label': ['x' * 1000] * 1000})
+        self.assertEqual(5000, writer.commit())
+        self.assertEqual(0, writer.num_rows)
+
+        parquet_files = [name for name in os.listdir(self.path)
+                         if name.endswith('.parquet')]
+        self.assertEqual(1, len(parquet_files))
+        self.assertEqual(5000, len(read_rows(self.path,
+                                             schema_fields=['id'])))
+        # ~5MB of rows in row groups of ~1MB
+        metadata = pq.read_metadata(os.path.join(self.path,
+                                                 parquet_files[0]))
+        self.assertGreaterEqual(metadata.num_row_groups, 4)
+        self.assertLessEqual(metadata.num_row_groups, 8)
+
+    def test_should_not_publish_anything_before_commit(self):
+        writer = BulkWriter(self.metadata)
+        writer.append_rows([(1, 'car', np.zeros((2, 2)))])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(0, BulkWriter(self.metadata).commit())
+
+    def test_should_remove_stale_metadata_checksum(self):
+        with BulkWriter(self.metadata) as writer:
+            writer.append_rows([(1, 'car', np.zeros((2, 2)))])
+        crc_path = os.path.join(self.path, '._common_metadata.crc')
+        open(crc_path, 'w').close()
+
+        with BulkWriter(self.metadata) as writer:
+            writer.append_rows([(2, 'bus', np.zeros((2, 2)))])
+
+        self.assertFalse(os.path.exists(crc_path))
+        self.assertEqual([1, 2], [row.id for row in read_rows(self.path)])
+
+    def test_concurrent_commits_should_all_be_registered(self):
+        # the first commit creates the dataset
+        with BulkWriter(self.metadata) as writer:
+            writer.append_rows([(0, 'car', np.zeros((2, 2)))])
+
+        def commit(index):
+            with BulkWriter(self.metadata) as writer:
+                writer.append_rows([(index, 'car', np.zeros((2, 2)))])
+        threads = [threading.Thread(target=commit, args=(index,))
+                   for index in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metadata = pq.read_metadata(
+            os.path.join(self.path, '_common_metadata')).metadata
+        row_groups = json.loads(metadata[ROW_GROUPS_PER_FILE_KEY])
+        self.assertEqual(sorted(name for name in os.listdir(self.path)
+                                if name.endswith('.parquet')),
+                         sorted(row_groups))
+        self.assertEqual(list(range(9)),
+                         [row.id for row in read_rows(self.path)])
+        self.assertEqual([], [name for name in os.listdir(self.path)
+                              if name.endswith('.tmp')])
+
+    def test_should_reject_missing_non_nullable_columns(self):
+        writer = BulkWriter(self.metadata)
+        with self.assertRaises(ValueError):
+            writer.append_columns({'id': [1, 2]})
+        with self.assertRaises(ValueError):
+            writer.append_columns({'id': [1], 'frame': [np.zeros((2, 2))],
+                                   'unknown': [1]})
+        with self.assertRaises(ValueError):
+            writer.append_rows([(1, 'car')])
+        self.assertEqual(0, writer.num_rows)
+
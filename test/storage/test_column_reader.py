@@ -0,0 +1,60 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.storage.column_reader import read_columns
+
+
+class ReadColumnsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_should_read_csv_columns_by_header(self):
+        path = os.path.join(self.tmp_dir, 'rows.csv')
+        with open(path, 'w') as f:
+            f.write('id, label\n1,car\n2,bus\n')
+        self.assertEqual({'id': ['1', '2'], 'label': ['car', 'bus']},
+                         read_columns(path))
+
+    def test_should_read_numpy_columns(self):
+        npz_path = os.path.join(self.tmp_dir, 'rows.npz')
+        np.savez(npz_path, id=np.arange(3), score=np.ones(3))
+        columns = read_columns(npz_path)
+        self.assertEqual(['id', 'score'], sorted(columns))
+        np.testing.assert_array_equal(np.arange(3), columns['id'])
+
+        npy_path = os.path.join(self.tmp_dir, 'rows.npy')
+        rows = np.array([(1, 0.5), (2, 1.5)],
+                        dtype=[('id', np.int32), ('score', np.float64)])
+        np.save(npy_path, rows)
+        columns = read_columns(npy_path)
+        np.testing.assert_array_equal([0.5, 1.5], columns['score'])
+
+    def test_should_reject_unsupported_files(self):
+        path = os.path.join(self.tmp_dir, 'rows.npy')
+        np.save(path, np.arange(3))
+        with self.assertRaises(ValueError):
+            read_columns(path)
+        with self.assertRaises(ValueError):
+            read_columns(os.path.join(self.tmp_dir, 'rows.json'))
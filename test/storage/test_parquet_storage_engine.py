@@ -0,0 +1,101 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from petastorm import make_reader
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.storage.parquet_storage_engine import ParquetStorageEngine
+
+
+class ParquetStorageEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'dataset')
+        self.metadata = DataFrameMetadata('dataset', 'file://' + self.path)
+        self.metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('label', ColumnType.TEXT, is_nullable=True),
+            DataFrameColumn('frame', ColumnType.NDARRAY,
+                            array_dimensions=[2, 2])]
+        self.engine = ParquetStorageEngine()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def append(self, ids):
+        return self.engine.append(self.metadata, {
+            'id': list(ids),
+            'label': ['car'] * len(ids),
+            'frame': [np.full((2, 2), i, dtype=np.uint8) for i in ids]})
+
+    def test_should_create_empty_table(self):
+        self.engine.create(self.metadata)
+
+        self.assertEqual(0, self.engine.count(self.metadata))
+        self.assertEqual([], list(self.engine.scan(self.metadata)))
+
+    def test_create_should_replace_existing_table(self):
+        self.engine.create(self.metadata)
+        self.append(range(3))
+
+        self.engine.create(self.metadata)
+
+        self.assertEqual(0, self.engine.count(self.metadata))
+
+    def test_should_scan_rows_in_append_order(self):
+        self.engine.create(self.metadata)
+        self.assertEqual(3, self.append(range(5, 8)))
+        self.assertEqual(5, self.append(range(5)))
+
+        batches = list(self.engine.scan(self.metadata, batch_size=2))
+
+        self.assertEqual([2, 1, 2, 2, 1],
+                         [len(batch['id']) for batch in batches])
+        ids = [i for batch in batches for i in batch['id']]
+        self.assertEqual([5, 6, 7, 0, 1, 2, 3, 4], ids)
+        frames = [f for batch in batches for f in batch['frame']]
+        for i, frame in zip(ids, frames):
+            np.testing.assert_array_equal(np.full((2, 2), i), frame)
+        self.assertEqual(b'car', batches[0]['label'][0])
+        self.assertEqual(8, self.engine.count(self.metadata))
+
+    def test_should_scan_only_requested_columns(self):
+        self.engine.create(self.metadata)
+        self.engine.append(self.metadata, {
+            'id': [1, 2], 'frame': [np.zeros((2, 2), dtype=np.uint8)] * 2})
+
+        batches = list(self.engine.scan(self.metadata,
+                                        columns=['id', 'label']))
+
+        self.assertEqual([{'id': [1, 2], 'label': [None, None]}], batches)
+
+    def test_should_write_tables_readable_by_petastorm(self):
+        self.engine.create(self.metadata)
+        self.append(range(3))
+
+        with make_reader('file://' + self.path,
+                         reader_pool_type='dummy') as reader:
+            rows = sorted(reader, key=lambda row: row.id)
+
+        self.assertEqual([0, 1, 2], [row.id for row in rows])
+        np.testing.assert_array_equal(np.full((2, 2), 2), rows[2].frame)
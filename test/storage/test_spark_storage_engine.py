@@ -0,0 +1,74 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from pyspark.sql import Row
+
+from src.catalog.column_type import ColumnType
+from src.catalog.models.df_column import DataFrameColumn
+from src.catalog.models.df_metadata import DataFrameMetadata
+from src.storage.spark_storage_engine import SparkStorageEngine
+
+
+class SparkStorageEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metadata = DataFrameMetadata('dataset', 'file:///tmp/dataset')
+        self.metadata.schema = [
+            DataFrameColumn('id', ColumnType.INTEGER),
+            DataFrameColumn('label', ColumnType.TEXT, is_nullable=True)]
+        self.engine = SparkStorageEngine()
+
+    @patch('src.storage.spark_storage_engine.create_dataframe')
+    def test_should_create_dataframe(self, mock_create):
+        self.engine.create(self.metadata)
+        mock_create.assert_called_once_with(self.metadata)
+
+    @patch('src.storage.spark_storage_engine.append_rows')
+    def test_should_append_columns_as_spark_rows(self, mock_append):
+        self.assertEqual(2, self.engine.append(
+            self.metadata, {'id': np.array([1, 2])}))
+
+        metadata, rows = mock_append.call_args[0]
+        self.assertEqual(self.metadata, metadata)
+        self.assertEqual([(1, None), (2, None)],
+                         [(row.id, row.label) for row in rows])
+
+    @patch('src.storage.spark_storage_engine.append_rows')
+    def test_should_reject_unknown_columns(self, mock_append):
+        with self.assertRaises(ValueError):
+            self.engine.append(self.metadata, {'score': [1.0]})
+        mock_append.assert_not_called()
+
+    @patch('src.storage.spark_storage_engine.load_dataframe')
+    def test_should_scan_decoded_rows_in_batches(self, mock_load):
+        dataframe = MagicMock()
+        mock_load.return_value.select.return_value = dataframe
+        dataframe.toLocalIterator.return_value = iter(
+            [Row(id=i, label='car') for i in range(3)])
+
+        batches = list(self.engine.scan(self.metadata, batch_size=2))
+
+        mock_load.assert_called_once_with('file:///tmp/dataset')
+        mock_load.return_value.select.assert_called_once_with('id', 'label')
+        self.assertEqual([[0, 1], [2]], [batch['id'] for batch in batches])
+        self.assertEqual([b'car', b'car'], batches[0]['label'])
+
+    @patch('src.storage.spark_storage_engine.load_dataframe')
+    def test_should_count_dataframe_rows(self, mock_load):
+        mock_load.return_value.count.return_value = 7
+        self.assertEqual(7, self.engine.count(self.metadata))
@@ -0,0 +1,54 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+from typing import List
+
+from src.models.catalog.frame_info import FrameInfo
+from src.models.catalog.properties import ColorSpace
+from src.models.inference.classifier_prediction import Prediction
+from src.models.storage.batch import FrameBatch
+from src.udfs.abstract_udfs import AbstractClassifierUDF
+
+
+class DummyObjectDetector(AbstractClassifierUDF):
+    """
+    Labels every frame with the process and instance running the udf, fails
+    on frames with a negative index
+    """
+
+    @property
+    def name(self) -> str:
+        return "dummy"
+
+    def __init__(self):
+        super().__init__()
+        self.instance = '%d-%d' % (os.getpid(), id(self))
+
+    @property
+    def input_format(self) -> FrameInfo:
+        return FrameInfo(-1, -1, 3, ColorSpace.RGB)
+
+    @property
+    def labels(self) -> List[str]:
+        return [self.instance]
+
+    def classify(self, batch: FrameBatch) -> List[Prediction]:
+        predictions = []
+        for frame in batch.frames:
+            if frame.index < 0:
+                raise ValueError('negative frame index')
+            predictions.append(Prediction(frame, [self.instance],
+                                          [float(frame.data.mean())]))
+        return predictions
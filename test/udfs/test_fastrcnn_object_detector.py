@@ -16,8 +16,10 @@ import os
 import unittest
 
 import cv2
+import numpy as np
 
 from src.models.storage.batch import FrameBatch
+from src.models.inference.representation import BoundingBox, Point
 from src.models.storage.frame import Frame
 from src.udfs.fastrcnn_object_detector import FastRCNNObjectDetector
 
@@ -46,3 +48,48 @@ class FastRCNNObjectDetectorTest(unittest.TestCase):
 
         self.assertEqual(["dog"], result[0].labels)
         self.assertEqual(["cat", "dog"], result[1].labels)
+
+    def _create_detector(self, threshold):
+        # skips __init__, which downloads the model
+        detector = object.__new__(FastRCNNObjectDetector)
+        detector.threshold = threshold
+        return detector
+
+    def test_threshold_should_keep_detections_up_to_last_above(self):
+        detector = self._create_detector(0.5)
+        labels = np.array([18, 17, 1])
+        scores = np.array([0.9, 0.6, 0.2], dtype=np.float32)
+        boxes = np.array([[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11]],
+                         dtype=np.float32)
+
+        kept_labels, kept_scores, kept_boxes = detector._threshold(
+            labels, scores, boxes)
+
+        self.assertEqual([18, 17], kept_labels.tolist())
+        self.assertEqual(scores[:2].tolist(), kept_scores.tolist())
+        self.assertEqual(boxes[:2].tolist(), kept_boxes.tolist())
+
+    def test_threshold_should_keep_nothing_below_threshold(self):
+        detector = self._create_detector(0.5)
+
+        labels, scores, boxes = detector._threshold(
+            np.array([1]), np.array([0.1]), np.zeros((1, 4)))
+
+        self.assertEqual((0, 0, 0), (len(labels), len(scores), len(boxes)))
+
+    def test_classify_should_return_detections_of_every_frame(self):
+        detector = self._create_detector(0.5)
+        detector._get_predictions = lambda frames: (
+            [np.array([18]), np.array([17, 18])],
+            [np.array([0.9]), np.array([0.8, 0.7])],
+            [np.zeros((1, 4)), np.ones((2, 4))])
+        batch = FrameBatch.from_numpy(np.array([0, 1]),
+                                      np.zeros((2, 2, 2, 3)), None)
+
+        result = detector.classify(batch)
+
+        self.assertEqual(["dog"], result[0].labels)
+        self.assertEqual(["cat", "dog"], result[1].labels)
+        self.assertEqual(BoundingBox(Point(1, 1), Point(1, 1)),
+                         result[1].boxes[0])
+        self.assertEqual([False, True], (result == 'cat').tolist())
@@ -0,0 +1,198 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.models.inference.detection_batch import DetectionBatch
+from src.models.storage.batch import FrameBatch
+from src.models.storage.frame import Frame
+from src.udfs.inference_pool import (InferencePool, PooledUdf, UdfKey,
+                                     _attach_frames, _detach_frames,
+                                     _ResidentModels)
+
+DUMMY = UdfKey('dummy', os.path.join(os.path.dirname(__file__), 'data',
+                                     'dummy_udf.py'))
+
+
+def create_batch(indices):
+    return FrameBatch([Frame(i, i * np.ones((4, 4, 3), dtype=np.uint8),
+                             None)
+                       for i in indices], None)
+
+
+def create_pool(workers, model_memory=1024 * 1024 * 1024):
+    pool = object.__new__(InferencePool)
+    pool.open(workers, model_memory)
+    return pool
+
+
+class ResidentModelsTest(unittest.TestCase):
+
+    def test_should_evict_least_recently_used_models_beyond_budget(self):
+        models = _ResidentModels(10)
+        a, b, c = UdfKey('a', 'a'), UdfKey('b', 'b'), UdfKey('c', 'c')
+        self.assertEqual([], models.add(a, 4))
+        self.assertEqual([], models.add(b, 4))
+        models.touch(a)
+
+        self.assertEqual([b], models.add(c, 4))
+        self.assertEqual([a, c], models.keys())
+        self.assertEqual(8, models.total)
+
+    def test_should_keep_model_larger_than_budget(self):
+        models = _ResidentModels(10)
+        a, b = UdfKey('a', 'a'), UdfKey('b', 'b')
+        models.add(a, 4)
+
+        self.assertEqual([a], models.add(b, 20))
+        self.assertEqual([b], models.keys())
+
+
+class InferencePoolInProcessTest(unittest.TestCase):
+
+    def test_should_keep_udf_loaded_across_calls(self):
+        pool = create_pool(0)
+        batch = create_batch([1, 2])
+
+        first = pool.classify(DUMMY, batch)
+        second = pool.classify(DUMMY, create_batch([3]))
+
+        self.assertEqual(first[0].labels, second[0].labels)
+        self.assertEqual(batch.frames[1], first[1].frame)
+        self.assertEqual([DUMMY], pool.resident())
+
+    @patch('src.udfs.inference_pool._load_udf')
+    def test_should_unload_least_recently_used_udfs(self, mock):
+        mock.side_effect = lambda key: (MagicMock(), 6)
+        pool = create_pool(0, model_memory=10)
+        a, b = UdfKey('a', 'a'), UdfKey('b', 'b')
+        batch = create_batch([1])
+
+        pool.classify(a, batch)
+        pool.classify(b, batch)
+        pool.classify(a, batch)
+
+        self.assertEqual(3, mock.call_count)
+        self.assertEqual([a], pool.resident())
+        self.assertEqual(6, pool.model_memory)
+
+    @patch('src.udfs.inference_pool._load_udf')
+    def test_concurrent_calls_should_share_single_load(self, mock):
+        def load(key):
+            time.sleep(0.1)
+            return MagicMock(), 1
+        mock.side_effect = load
+        pool = create_pool(0)
+        threads = [threading.Thread(target=pool.classify,
+                                    args=(DUMMY, create_batch([1])))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock.assert_called_once_with(DUMMY)
+
+    def test_should_skip_empty_batches(self):
+        pool = create_pool(0)
+        self.assertEqual([], pool.classify(DUMMY, create_batch([])))
+        self.assertEqual([], pool.resident())
+
+    @patch('src.udfs.inference_pool.InferencePool')
+    def test_pooled_udf_should_run_on_pool(self, mock):
+        batch = create_batch([1])
+        udf = PooledUdf('dummy', 'dummy_udf.py')
+
+        outcome = udf(batch)
+
+        mock.return_value.classify.assert_called_with(
+            UdfKey('dummy', 'dummy_udf.py'), batch)
+        self.assertEqual(mock.return_value.classify.return_value, outcome)
+        self.assertEqual(PooledUdf('dummy', 'dummy_udf.py'), udf)
+
+    def test_detection_batch_should_be_sent_without_frames(self):
+        batch = create_batch([1, 2])
+        detections = DetectionBatch.from_frames(
+            batch, [np.array([1]), np.array([0, 1])],
+            [np.array([0.5]), np.array([0.4, 0.3])], ['car', 'bus'])
+
+        detached = _detach_frames(detections)
+        attached = _attach_frames(detached, batch)
+
+        self.assertIsNone(detached.frames)
+        self.assertEqual(detections, attached)
+        self.assertEqual(batch.frames[1], attached[1].frame)
+
+
+class InferencePoolWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = create_pool(1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_should_run_udf_in_worker_process(self):
+        batch = create_batch([1, 2])
+
+        first = self.pool.classify(DUMMY, batch)
+        second = self.pool.classify(DUMMY, create_batch([3]))
+
+        pid = int(first[0].labels[0].split('-')[0])
+        self.assertNotEqual(os.getpid(), pid)
+        self.assertEqual(first[0].labels, second[0].labels)
+        self.assertEqual(list(batch.frames),
+                         [prediction.frame for prediction in first])
+        self.assertEqual([1.0, 2.0], [prediction.scores[0]
+                                      for prediction in first])
+        self.assertEqual([DUMMY], self.pool.resident())
+
+    @patch('src.udfs.inference_pool._shared_memory', return_value=None)
+    def test_should_send_frames_without_shared_memory(self, mock):
+        batch = create_batch([1, 2])
+
+        predictions = self.pool.classify(DUMMY, batch)
+
+        self.assertEqual([1.0, 2.0], [prediction.scores[0]
+                                      for prediction in predictions])
+        self.assertEqual(list(batch.frames),
+                         [prediction.frame for prediction in predictions])
+
+    def test_should_raise_failure_of_udf(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.classify(DUMMY, create_batch([-1]))
+
+        self.assertEqual(1, len(self.pool.classify(DUMMY,
+                                                   create_batch([1]))))
+
+    def test_should_restart_worker_which_exited(self):
+        self.pool.classify(DUMMY, create_batch([1]))
+        worker = self.pool._workers[0]
+        worker.process.kill()
+        worker.process.join()
+
+        deadline = time.monotonic() + 10
+        while self.pool._workers[0] is worker \
+                and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        self.assertEqual([], self.pool.resident())
+        self.assertEqual(1, len(self.pool.classify(DUMMY,
+                                                   create_batch([1]))))
@@ -0,0 +1,56 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import tempfile
+import unittest
+
+from src.udfs.fastrcnn_object_detector import FastRCNNObjectDetector
+from src.udfs.udf_loader import load_udf, load_udf_class, resolve_udf_path
+
+DUMMY_UDF = os.path.join(os.path.dirname(__file__), 'data', 'dummy_udf.py')
+
+
+class UdfLoaderTest(unittest.TestCase):
+
+    def test_should_resolve_relative_paths_in_udf_directory(self):
+        path = resolve_udf_path('fastrcnn_object_detector.py')
+        self.assertTrue(os.path.isfile(path))
+
+    def test_should_import_udfs_of_eva_tree_as_package_modules(self):
+        self.assertIs(FastRCNNObjectDetector,
+                      load_udf_class('fastrcnn_object_detector.py'))
+
+    def test_should_instantiate_udf_of_file(self):
+        udf = load_udf(DUMMY_UDF)
+        self.assertEqual('dummy', udf.name)
+
+    def test_should_load_udfs_outside_eva_tree(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'external_udf.py')
+            with open(path, 'w') as udf_file:
+                udf_file.write('from test.udfs.data.dummy_udf import '
+                               'DummyObjectDetector\n\n\n'
+                               'class ExternalUdf(DummyObjectDetector):\n'
+                               '    pass\n')
+
+            self.assertEqual('ExternalUdf', load_udf_class(path).__name__)
+
+    def test_should_fail_without_udf_class(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'empty.py')
+            open(path, 'w').close()
+
+            with self.assertRaises(ImportError):
+                load_udf_class(path)
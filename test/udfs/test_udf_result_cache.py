@@ -0,0 +1,239 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import pickle
+import stat
+import tempfile
+import unittest
+import zlib
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.expression.function_expression import FunctionExpression
+from src.models.inference.classifier_prediction import Prediction
+from src.models.inference.representation import BoundingBox, Point
+from src.models.storage.batch import FrameBatch
+from src.models.storage.frame import Frame
+from src.udfs.udf_result_cache import UdfCacheKey, UdfResultCache, \
+    udf_version
+
+KEY = UdfCacheKey('udf', 'v1', 1)
+
+
+def create_batch(indices):
+    return FrameBatch([Frame(i, i * np.ones((2, 2, 3)), None)
+                       for i in indices], None)
+
+
+class RemoveOnLoad(object):
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return os.remove, (self.path,)
+
+
+class UdfResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = object.__new__(UdfResultCache)
+        self.cache.open(os.path.join(self.directory.name, 'cache.db'),
+                        1024 * 1024)
+
+    def tearDown(self):
+        self.cache._connection.close()
+        self.directory.cleanup()
+
+    def test_should_return_cached_outcomes_of_frames(self):
+        self.cache.put(KEY, create_batch([1, 2]), [[1], [2]])
+
+        hits, values = self.cache.get(KEY, create_batch([0, 1, 2]))
+
+        self.assertEqual([False, True, True], hits.tolist())
+        self.assertEqual([None, [1], [2]], values.tolist())
+
+    def test_should_restore_predictions_with_frames_of_batch(self):
+        batch = create_batch([3])
+        box = BoundingBox(Point(1.0, 2.0), Point(3.0, 4.0))
+        prediction = Prediction(batch.frames[0], ['car'], [0.9], [box])
+        self.cache.put(KEY, batch, [prediction])
+
+        _, values = self.cache.get(KEY, create_batch([3]))
+
+        self.assertEqual(prediction, values[0])
+
+    def test_should_restore_arrays_and_containers(self):
+        outcome = {'labels': np.array(['car', 'bus']),
+                   'scores': np.arange(4, dtype=np.float32).reshape(2, 2),
+                   'pair': (1, np.int64(2)), 'raw': b'x', 'none': None}
+        self.cache.put(KEY, create_batch([1]), [outcome])
+
+        _, values = self.cache.get(KEY, create_batch([1]))
+
+        value = values[0]
+        self.assertEqual(['car', 'bus'], value['labels'].tolist())
+        self.assertEqual(np.float32, value['scores'].dtype)
+        self.assertEqual([[0, 1], [2, 3]], value['scores'].tolist())
+        self.assertEqual((1, 2), value['pair'])
+        self.assertEqual(b'x', value['raw'])
+        self.assertIsNone(value['none'])
+
+    def test_should_not_cache_outcomes_which_cannot_be_encoded(self):
+        self.cache.put(KEY, create_batch([1, 2]), [object(), [2]])
+
+        hits, values = self.cache.get(KEY, create_batch([1, 2]))
+
+        self.assertEqual([False, True], hits.tolist())
+        self.assertEqual([2], values[1])
+
+    def test_should_not_unpickle_stored_rows(self):
+        marker = os.path.join(self.directory.name, 'marker')
+        open(marker, 'w').close()
+        self.cache.put(KEY, create_batch([1]), [1])
+        with self.cache._connection:
+            self.cache._connection.execute(
+                'UPDATE udf_result SET value = ?',
+                [zlib.compress(pickle.dumps(RemoveOnLoad(marker)))])
+
+        hits, _ = self.cache.get(KEY, create_batch([1]))
+
+        self.assertFalse(hits.any())
+        self.assertTrue(os.path.exists(marker))
+
+    @patch('src.udfs.udf_result_cache.os.path.expanduser')
+    @patch('src.udfs.udf_result_cache.ConfigurationManager')
+    def test_default_location_should_be_private_to_user(self, mock_config,
+                                                        mock_expanduser):
+        mock_config.return_value.get_value.return_value = None
+        directory = os.path.join(self.directory.name, 'home', '.eva')
+        mock_expanduser.return_value = directory
+        try:
+            cache = UdfResultCache()
+            self.assertTrue(
+                os.path.exists(os.path.join(directory, 'udf_cache.db')))
+            self.assertEqual(0o700, stat.S_IMODE(os.stat(directory).st_mode))
+        finally:
+            UdfResultCache._instance = None
+            cache._connection.close()
+
+    def test_udf_version_should_change_with_implementation_file(self):
+        path = os.path.join(self.directory.name, 'udf.py')
+        with open(path, 'w') as impl_file:
+            impl_file.write('first = 1\n')
+        udf = MagicMock(id=1, impl_file_path=path, type='Classification')
+        udf.name = 'udf'
+        version = udf_version(udf)
+        self.assertEqual(version, udf_version(udf))
+
+        with open(path, 'w') as impl_file:
+            impl_file.write('second = 2\n')
+        os.utime(path, ns=(0, 0))
+
+        self.assertNotEqual(version, udf_version(udf))
+
+    @patch('src.udfs.udf_result_cache.ConfigurationManager')
+    def test_forked_process_should_open_cache_of_its_own(self, mock_config):
+        mock_config.return_value.get_value.side_effect = \
+            lambda section, key: {
+                'udf_cache_location': os.path.join(self.directory.name,
+                                                   'shared.db')}.get(key)
+        parent = UdfResultCache()
+        try:
+            with patch('src.udfs.udf_result_cache.os.getpid',
+                       return_value=os.getpid() + 1):
+                child = UdfResultCache()
+                self.assertIsNot(parent, child)
+                self.assertIs(child, UdfResultCache())
+            self.assertIn(parent, UdfResultCache._inherited)
+        finally:
+            UdfResultCache._instance = None
+            UdfResultCache._inherited.clear()
+            parent._connection.close()
+            child._connection.close()
+
+    def test_should_not_mix_outcomes_of_different_datasets(self):
+        self.cache.put(KEY, create_batch([1]), [1])
+
+        hits, _ = self.cache.get(UdfCacheKey('udf', 'v1', 2),
+                                 create_batch([1]))
+
+        self.assertFalse(hits.any())
+
+    def test_new_udf_version_should_invalidate_outcomes(self):
+        self.cache.put(KEY, create_batch([1]), [1])
+
+        hits, _ = self.cache.get(UdfCacheKey('udf', 'v2', 1),
+                                 create_batch([1]))
+        self.assertFalse(hits.any())
+
+        hits, _ = self.cache.get(KEY, create_batch([1]))
+        self.assertFalse(hits.any())
+        self.assertEqual(0, self.cache.size)
+
+    def test_should_evict_least_recently_used_outcomes(self):
+        outcome = np.random.bytes(400 * 1024)
+        self.cache.put(KEY, create_batch([1]), [outcome])
+        self.cache.put(KEY, create_batch([2]), [outcome])
+        # frame 1 becomes the most recently used one
+        self.cache.get(KEY, create_batch([1]))
+        self.cache.put(KEY, create_batch([3]), [outcome])
+
+        hits, _ = self.cache.get(KEY, create_batch([1, 2, 3]))
+
+        self.assertEqual([True, False, True], hits.tolist())
+        self.assertLessEqual(self.cache.size, 1024 * 1024)
+
+    def test_invalidate_should_drop_outcomes_of_udf(self):
+        self.cache.put(KEY, create_batch([1]), [1])
+
+        self.cache.invalidate('udf')
+
+        hits, _ = self.cache.get(KEY, create_batch([1]))
+        self.assertFalse(hits.any())
+
+    @patch('src.expression.function_expression.UdfResultCache')
+    def test_function_expression_should_only_compute_missing_frames(
+            self, mock):
+        mock.return_value = self.cache
+        self.cache.put(KEY, create_batch([1]), ['cached'])
+        computed = []
+
+        def udf(batch):
+            computed.extend(batch.indices.tolist())
+            return ['computed'] * batch.batch_size
+
+        expression = FunctionExpression(udf, cache_key=KEY)
+
+        self.assertEqual(['computed', 'cached', 'computed'],
+                         expression.evaluate(create_batch([0, 1, 2])))
+        self.assertEqual([0, 2], computed)
+
+        self.assertEqual(['computed', 'cached', 'computed'],
+                         expression.evaluate(create_batch([0, 1, 2])))
+        self.assertEqual([0, 2], computed)
+
+    @patch('src.expression.function_expression.UdfResultCache')
+    def test_function_expression_should_return_uncached_outcome_as_is(
+            self, mock):
+        mock.return_value = self.cache
+        outcome = ('computed', 'computed')
+        expression = FunctionExpression(lambda batch: outcome, cache_key=KEY)
+
+        self.assertIs(outcome, expression.evaluate(create_batch([0, 1])))
+        self.assertEqual(['computed', 'computed'],
+                         expression.evaluate(create_batch([0, 1])))
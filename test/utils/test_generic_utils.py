@@ -14,8 +14,9 @@
 # limitations under the License.
 
 import unittest
+from unittest.mock import MagicMock
 
-from src.utils.generic_utils import str_to_class
+from src.utils.generic_utils import LazyObject, str_to_class
 from src.loaders.video_loader import VideoLoader
 
 
@@ -24,3 +25,21 @@ class ModulePathTest(unittest.TestCase):
     def test_should_return_correct_class_for_string(self):
         vl = str_to_class("src.loaders.video_loader.VideoLoader")
         self.assertEqual(vl, VideoLoader)
+
+
+class LazyObjectTest(unittest.TestCase):
+
+    def test_should_create_object_on_first_use_only(self):
+        factory = MagicMock(return_value=VideoLoader)
+        lazy = LazyObject(factory)
+        factory.assert_not_called()
+
+        self.assertEqual(64, lazy.SEEK_THRESHOLD)
+        self.assertIs(VideoLoader, lazy.resolve())
+        factory.assert_called_once_with()
+
+    def test_should_forward_calls(self):
+        factory = MagicMock()
+        lazy = LazyObject(factory)
+        self.assertEqual(factory.return_value.return_value, lazy(1, key=2))
+        factory.return_value.assert_called_once_with(1, key=2)
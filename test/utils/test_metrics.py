@@ -0,0 +1,112 @@
+# coding=utf-8
+# Copyright 2018-2020 EVA
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import threading
+import unittest
+
+from src.utils.metrics import MetricsRegistry
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_should_sum_the_threads(self):
+        counter = self.registry.counter('eva_test_total', 'Test counter')
+
+        def record():
+            for _ in range(10000):
+                counter.inc()
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(2.5)
+
+        self.assertEqual(counter.value(), 40002.5)
+
+    def test_labels_should_keep_a_series_per_value(self):
+        counter = self.registry.counter('eva_test_total', 'Test counter',
+                                        ('type', 'status'))
+        counter.labels('select', 'ok').inc()
+        counter.labels('select', 'ok').inc()
+        counter.labels('load_data', 'error').inc()
+
+        self.assertEqual(counter.labels('select', 'ok').value(), 2)
+        self.assertEqual(counter.labels('load_data', 'error').value(), 1)
+        with self.assertRaises(ValueError):
+            counter.labels('select')
+
+    def test_registering_again_should_return_the_metric(self):
+        counter = self.registry.counter('eva_test_total', 'Test counter')
+
+        self.assertIs(self.registry.counter('eva_test_total', 'Again'),
+                      counter)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('eva_test_total', 'Test gauge')
+
+    def test_gauge_should_read_its_function(self):
+        gauge = self.registry.gauge('eva_test', 'Test gauge')
+        gauge.inc(3)
+        gauge.dec()
+        self.assertEqual(gauge.value(), 2)
+
+        gauge.set_function(lambda: 7)
+        self.assertEqual(gauge.value(), 7)
+
+    def test_histogram_should_count_values_by_bucket(self):
+        histogram = self.registry.histogram('eva_test_seconds',
+                                            'Test histogram',
+                                            buckets=(0.1, 1.0))
+        for value in [0.05, 0.1, 0.5, 2.0]:
+            histogram.observe(value)
+
+        buckets, total, count = histogram.value()
+        self.assertEqual(buckets, [(0.1, 2), (1.0, 3), (math.inf, 4)])
+        self.assertAlmostEqual(total, 2.65)
+        self.assertEqual(count, 4)
+
+    def test_render_should_follow_the_text_format(self):
+        counter = self.registry.counter('eva_queries_total', 'Queries run',
+                                        ('type',))
+        counter.labels('se"lect').inc(3)
+        histogram = self.registry.histogram('eva_query_seconds',
+                                            'Query latency',
+                                            buckets=(0.5,))
+        histogram.observe(0.25)
+        self.registry.gauge('eva_connections', 'Open connections').set(2)
+
+        self.assertEqual(self.registry.render(), '\n'.join([
+            '# HELP eva_connections Open connections',
+            '# TYPE eva_connections gauge',
+            'eva_connections 2',
+            '# HELP eva_queries_total Queries run',
+            '# TYPE eva_queries_total counter',
+            'eva_queries_total{type="se\\"lect"} 3',
+            '# HELP eva_query_seconds Query latency',
+            '# TYPE eva_query_seconds histogram',
+            'eva_query_seconds_bucket{le="0.5"} 1',
+            'eva_query_seconds_bucket{le="+Inf"} 1',
+            'eva_query_seconds_sum 0.25',
+            'eva_query_seconds_count 1',
+        ]) + '\n')
+
+
+if __name__ == '__main__':
+    unittest.main()